@@ -196,7 +196,7 @@ function(P4_BUILD_PD_TARGET t arch target p4program)
 
   # generate pd.c, pdcli.c, p4_pd_rpc.thrift
   add_custom_command(OUTPUT ${PDDOTC} ${PDCLIDOTC} ${PDRPCDOTTHRIFT}
-    COMMAND ${PYTHON_COMMAND} ${PDGEN} --path ${t}/${target} --manifest ${t}/${target}/manifest.json ${COMPUTED_PDFLAGS} ${PDFLAGS_INTERNAL} -o ${t}/${target}
+    COMMAND ${PYTHON_COMMAND} ${PDGEN} --path ${t}/${target} --manifest ${t}/${target}/manifest.json ${COMPUTED_PDFLAGS} ${PDFLAGS_INTERNAL} --cache-dir ${CMAKE_BINARY_DIR}/pd_template_cache -o ${t}/${target}
     COMMAND ${PYTHON_COMMAND} ${PDGENCLI} ${t}/${target}/cli/pd.json -po ${t}/${target}/src -xo ${t}/${target}/cli/xml -xd ${CMAKE_INSTALL_PREFIX}/share/cli/xml -ll ${CMAKE_INSTALL_PREFIX}/lib/${target}pd/${t}
     DEPENDS ${t}/${target}/manifest.json
   )
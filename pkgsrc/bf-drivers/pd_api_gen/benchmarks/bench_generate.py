@@ -0,0 +1,173 @@
+################################################################################
+ #  Copyright (C) 2024 Intel Corporation
+ #
+ #  Licensed under the Apache License, Version 2.0 (the "License");
+ #  you may not use this file except in compliance with the License.
+ #  You may obtain a copy of the License at
+ #
+ #  http://www.apache.org/licenses/LICENSE-2.0
+ #
+ #  Unless required by applicable law or agreed to in writing,
+ #  software distributed under the License is distributed on an "AS IS" BASIS,
+ #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ #  See the License for the specific language governing permissions
+ #  and limitations under the License.
+ #
+ #
+ #  SPDX-License-Identifier: Apache-2.0
+################################################################################
+"""PD generation time and memory without, with a cold and with a warm cache
+
+Usage:
+    python benchmarks/bench_generate.py [--context-json FILE] [--copies N]
+                                        [--write-json FILE] [-j JOBS]
+
+Every run is a new generate_tofino_pd process, like in a build:
+  no cache      no --cache-dir
+  cold cache    an empty --cache-dir
+  warm cache    the cache dir of the previous run
+  unchanged     the same again, into the output dir of the previous run
+The outputs of all runs are checked to be byte-identical.
+
+--copies N stands in for a large program: the tables of the context.json are
+replicated N times under new names and handles (100 copies of tna_exact_match
+make a 72MB context.json).
+"""
+from __future__ import print_function
+import argparse
+import copy
+import filecmp
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+PD_API_GEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_CONTEXT_JSON = os.path.join(
+    PD_API_GEN_DIR, "..", "src", "tdi_tofino", "tests",
+    "tofino_context_json_files", "tna_exact_match", "pipe", "context.json")
+
+# Runs generate_tofino_pd.main() with the remaining arguments. Under Python 3
+# the bundled tenjin.py looks six up in modules it creates without importing
+# it, and reads templates as bytes.
+GENERATE = """
+import builtins, six, sys, time
+builtins.six = six
+sys.path.insert(0, sys.argv[1])
+import tenjin
+tenjin._read_template_file = lambda filename, encoding=None: \\
+    open(filename, encoding="utf-8").read()
+import resource
+import generate_tofino_pd
+sys.argv[1:2] = []
+start = time.time()
+generate_tofino_pd.main()
+print("elapsed %f %d" % (time.time() - start,
+                         resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+"""
+
+
+def generate(context_json, out_dir, cache_dir, jobs):
+    cmd = [sys.executable, "-c", GENERATE, PD_API_GEN_DIR,
+           "--context_json", context_json, "--p4-name", "bench",
+           "--p4-prefix", "bench", "-o", out_dir]
+    if cache_dir:
+        cmd += ["--cache-dir", cache_dir]
+    if jobs:
+        cmd += ["-j", str(jobs)]
+    start = time.time()
+    out = subprocess.check_output(cmd, universal_newlines=True)
+    total = time.time() - start
+    lines = out.splitlines()
+    _, elapsed, max_rss_kb = lines[-1].split()
+    return float(elapsed), total, int(max_rss_kb) // 1024, lines[-2]
+
+
+def replicate_tables(context, copies):
+    """
+    context with its tables repeated copies times. Every copy gets its own
+    names and handles, also in the references between its tables.
+    """
+    handles = set(table["handle"] for table in context["tables"])
+
+    def rename(obj, suffix, offset):
+        if isinstance(obj, dict):
+            if obj.get("handle") in handles and "name" in obj:
+                obj["name"] += suffix
+                obj["handle"] += offset
+            for value in obj.values():
+                rename(value, suffix, offset)
+        elif isinstance(obj, list):
+            for value in obj:
+                rename(value, suffix, offset)
+
+    tables = list(context["tables"])
+    for i in range(1, copies):
+        tables_copy = copy.deepcopy(context["tables"])
+        rename(tables_copy, "_c%d" % i, i << 12)
+        tables += tables_copy
+    context = dict(context)
+    context["tables"] = tables
+    return context
+
+
+def same_trees(first, second):
+    comparison = filecmp.dircmp(first, second)
+    if comparison.left_only or comparison.right_only:
+        return False
+    _, mismatch, errors = filecmp.cmpfiles(first, second, comparison.common_files,
+                                           shallow=False)
+    if mismatch or errors:
+        return False
+    return all(same_trees(os.path.join(first, d), os.path.join(second, d))
+               for d in comparison.common_dirs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--context-json", default=DEFAULT_CONTEXT_JSON)
+    parser.add_argument("--copies", type=int, default=1,
+                        help="replicate the tables this many times")
+    parser.add_argument("--write-json", help="save the replicated context.json")
+    parser.add_argument("-j", "--jobs", type=int,
+                        help="passed on to generate_tofino_pd")
+    args = parser.parse_args()
+    if args.copies < 1:
+        parser.error("--copies must be at least 1")
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_generate")
+    try:
+        context_json = args.context_json
+        if args.copies > 1 or args.write_json:
+            with open(context_json) as f:
+                context = replicate_tables(json.load(f), args.copies)
+            context_json = args.write_json or os.path.join(tmp_dir, "context.json")
+            with open(context_json, "w") as f:
+                json.dump(context, f)
+            del context
+            print("%s: %.1f MB" % (context_json, os.path.getsize(context_json) / 1e6))
+        cache_dir = os.path.join(tmp_dir, "cache")
+        runs = [("no cache", "out0", None),
+                ("cold cache", "out1", cache_dir),
+                ("warm cache", "out2", cache_dir),
+                ("unchanged", "out2", cache_dir)]
+        for label, out_dir, cache in runs:
+            out_dir = os.path.join(tmp_dir, out_dir)
+            elapsed, total, max_rss, summary = generate(context_json, out_dir,
+                                                        cache, args.jobs)
+            print("%-12s %6.2f s in main(), %6.2f s with startup, peak RSS "
+                  "%4d MB  (%s)" % (label, elapsed, total, max_rss, summary))
+        for out_dir in ["out1", "out2"]:
+            if not same_trees(os.path.join(tmp_dir, "out0"),
+                              os.path.join(tmp_dir, out_dir)):
+                sys.exit("outputs differ between runs")
+        print("outputs identical")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
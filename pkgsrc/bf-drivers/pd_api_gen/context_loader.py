@@ -0,0 +1,126 @@
+################################################################################
+ #  Copyright (C) 2024 Intel Corporation
+ #
+ #  Licensed under the Apache License, Version 2.0 (the "License");
+ #  you may not use this file except in compliance with the License.
+ #  You may obtain a copy of the License at
+ #
+ #  http://www.apache.org/licenses/LICENSE-2.0
+ #
+ #  Unless required by applicable law or agreed to in writing,
+ #  software distributed under the License is distributed on an "AS IS" BASIS,
+ #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ #  See the License for the specific language governing permissions
+ #  and limitations under the License.
+ #
+ #
+ #  SPDX-License-Identifier: Apache-2.0
+################################################################################
+
+#
+# Loading of the compiler context.json for PD generation
+#
+
+import glob
+import hashlib
+import json
+import os
+import pickle
+
+# Subtrees of context.json which PD generation never reads.  They hold the
+# hash, memory and register cache configuration of the driver and are by far
+# the largest part of the file, so they are dropped while parsing instead of
+# being kept alive until generation ends.
+UNUSED_KEYS = frozenset([
+    "hash_functions",
+    "ways",
+    "memory_resource_allocation",
+    "stash_allocation",
+    "ghost_bit_info",
+    "configuration_cache",
+    "mau_stage_characteristics",
+])
+
+# Change when UNUSED_KEYS or the layout of the loaded context changes, it is
+# part of the cache key
+LOADER_VERSION = 1
+
+# Number of loaded contexts kept in the cache directory
+MAX_CACHED_CONTEXTS = 16
+
+
+def _make_object(pairs):
+    return {key: value for key, value in pairs if key not in UNUSED_KEYS}
+
+
+def parse_context_json(data):
+    """
+    Parse the text of a context.json, without the UNUSED_KEYS subtrees.
+    JSON objects are loaded as plain dicts, which keep the file order.
+    """
+    return json.loads(data, object_pairs_hook=_make_object)
+
+
+def load_context_json(path, cache_dir=None):
+    """
+    Load the context.json at path.
+    cache_dir: optional directory where loaded contexts are kept, keyed by a
+    hash of the file content, so that generating the PD of an unchanged
+    program again does not parse its context.json.
+    """
+    if not cache_dir:
+        return _parse_file(path)
+
+    key = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            key.update(chunk)
+    key.update(str(LOADER_VERSION).encode())
+    cache_path = os.path.join(cache_dir, "context-%s.pickle" % key.hexdigest())
+    try:
+        with open(cache_path, "rb") as f:
+            context_dict = pickle.load(f)
+        # Keep recently used entries when trimming the cache
+        os.utime(cache_path, None)
+        return context_dict
+    except (IOError, OSError, EOFError, pickle.UnpicklingError, ValueError):
+        pass
+
+    context_dict = _parse_file(path)
+    _store(cache_dir, cache_path, context_dict)
+    return context_dict
+
+
+def _parse_file(path):
+    with open(path, "r") as f:
+        return parse_context_json(f.read())
+
+
+def _store(cache_dir, cache_path, context_dict):
+    # Written to a temporary file first, concurrent builds never read a
+    # partial entry.  Failing to write the cache is not an error.
+    tmp_path = "%s.%d.tmp" % (cache_path, os.getpid())
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(context_dict, f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_path, cache_path)
+        _trim(cache_dir)
+    except (IOError, OSError):
+        try:
+            os.unlink(tmp_path)
+        except (IOError, OSError):
+            pass
+
+
+def _trim(cache_dir):
+    entries = glob.glob(os.path.join(cache_dir, "context-*.pickle"))
+    if len(entries) <= MAX_CACHED_CONTEXTS:
+        return
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[MAX_CACHED_CONTEXTS:]:
+        try:
+            os.unlink(path)
+        except (IOError, OSError):
+            pass
@@ -23,12 +23,15 @@ import inspect
 import json
 import os, os.path
 import re
+import resource
 import sys
+import time
 import traceback
 
 from collections import OrderedDict
 
-from tenjin_util import render_template
+from context_loader import load_context_json
+from tenjin_util import render_templates
 
 tenjin_prefix = "//::"
 
@@ -219,7 +222,7 @@ def pd_dict_populate_tables(pd_dict, context_dict):
 
     tbl_name = table['name']
     table_dir_res[tbl_name] = []
-    table_indir_res[tbl_name] = set()
+    table_indir_res[tbl_name] = []
 
     # General table info
     t_info = {}
@@ -369,12 +372,12 @@ def pd_dict_populate_tables(pd_dict, context_dict):
       # and replace them with handles later
       # Assumes that names are unique between resource tables
       for _,_,_, res_name in a_info['indirect_resources']:
-        table_indir_res[tbl_name].add(res_name)
+        if res_name not in table_indir_res[tbl_name]:
+          table_indir_res[tbl_name].append(res_name)
 
       pd_dict['action_handles'][(tbl_name, action['name'])] = action['handle']
 
     t_info['actions'] = actions
-    table_indir_res[tbl_name] = list(table_indir_res[tbl_name])
 
     # Table handle info (assumes each match table has at most one action data table and one selector table)
     adt_hdl = None
@@ -664,12 +667,16 @@ def pd_dict_populate_parser_value_set_names (pd_dict, context_dict):
         pd_dict['parser_value_set']['egress'].append(pvs)
 
 def generate_pd_dict_from_context_json(args, context_json):
-  with open(context_json, 'r') as f:
-    context_dict = json.load(f, object_pairs_hook=OrderedDict)
-    error_msg = check_context_version(context_dict)
-    if len(error_msg) > 0:
-      six.print_(error_msg)
-      sys.exit(1)
+  start = time.time()
+  context_dict = load_context_json(context_json, cache_dir=args.cache_dir)
+  # ru_maxrss is in kilobytes on Linux
+  six.print_("Loaded context.json in %.2fs, peak RSS %d MB" %
+             (time.time() - start,
+              resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024))
+  error_msg = check_context_version(context_dict)
+  if len(error_msg) > 0:
+    six.print_(error_msg)
+    sys.exit(1)
 
   pd_dict = {}
 
@@ -926,6 +933,7 @@ def generate_pd(args, context_json, templates_dir, with_thrift=True):
   if not os.path.exists(output_dir):
     os.mkdir(output_dir)
   files = gen_file_lists(templates_dir, output_dir)
+  jobs = []
   for template, target in files:
       # not very robust
       if (not with_thrift) and ("thrift" in target):
@@ -933,9 +941,12 @@ def generate_pd(args, context_json, templates_dir, with_thrift=True):
       path = os.path.dirname(target)
       if not os.path.exists(path):
           os.mkdir(path)
-      with open(target, "w") as f:
-          render_template(f, template, pd_dict, templates_dir,
-                          prefix=tenjin_prefix)
+      jobs.append((template, target))
+  written = render_templates(jobs, pd_dict, templates_dir,
+                             prefix=tenjin_prefix, cache_dir=args.cache_dir,
+                             processes=args.jobs)
+  six.print_("Generated %d files, %d unchanged" %
+             (len(written), len(jobs) - len(written)))
 
 def construct_parser():
   parser = argparse.ArgumentParser(description='pd api generation')
@@ -959,6 +970,13 @@ def construct_parser():
                       help='flag to turn on MD pd generation')
   parser.add_argument('--gen-hitless-ha-test-pd', action='store_true',
                       help='flag to turn on hitless HA test pd generation')
+  parser.add_argument('-j', '--jobs', metavar='jobs', type=int, default=1,
+                      help='number of templates rendered in parallel '
+                           '(default: 1)')
+  parser.add_argument('--cache-dir', metavar='cache_dir', type=str,
+                      help='directory of the compiled templates and loaded '
+                           'context.json files cache, e.g. in the build tree '
+                           '(default: no cache)')
   return parser
 
 def main(templates_dir=_TEMPLATES_DIR):
@@ -25,30 +25,176 @@
 import types
 import sys
 import os
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 import tenjin
 
+# disable HTML escaping
+_TEMPLATE_GLOBALS = {"to_str": str, "escape": str}
+
 # From loxi_utils.py
-def render_template(out, name, context, templates_dir, prefix=None):
+def render_template(out, name, context, templates_dir, prefix=None,
+                    cache_dir=None):
     """
     Render a template using tenjin.
     out: a file-like object
     name: name of the template
     context: dictionary of variables to pass to the template
     prefix: optional prefix for embedding (for other languages than python)
+    cache_dir: optional directory of the compiled template cache
+    """
+    engine = _make_engine(templates_dir, prefix, cache_dir)
+    out.write(engine.render(name, context, _TEMPLATE_GLOBALS))
+
+
+def render_templates(jobs, context, templates_dir, prefix=None, cache_dir=None,
+                     processes=1):
+    """
+    Render several templates with the same context and write each output only
+    if its content changed, so that make does not rebuild unchanged files.
+    jobs: list of (template name, output file path)
+    processes: number of templates rendered concurrently, 1 (the default)
+    renders them in this process
+    Returns the list of output files which were written.
+    """
+    processes = min(processes, len(jobs))
+    names = [name for name, _ in jobs]
+    _render_state.update(context=context, templates_dir=templates_dir,
+                         prefix=prefix, cache_dir=cache_dir)
+    try:
+        if processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+            # Forked workers inherit _render_state, the (large) context is
+            # not pickled for every template
+            with ProcessPoolExecutor(
+                    processes,
+                    mp_context=multiprocessing.get_context("fork")) as pool:
+                outputs = list(pool.map(_render_job, names))
+        else:
+            outputs = [_render_job(name) for name in names]
+    finally:
+        _render_state.clear()
+
+    written = []
+    for (_, target), output in zip(jobs, outputs):
+        if write_if_changed(target, output):
+            written.append(target)
+    return written
+
+
+def write_if_changed(path, content):
     """
+    Write content to path unless the file already holds it.
+    Returns True if the file was written.
+    """
+    try:
+        with open(path, "r") as f:
+            if f.read() == content:
+                return False
+    except (IOError, OSError, UnicodeDecodeError):
+        pass
+    with open(path, "w") as f:
+        f.write(content)
+    return True
+
+
+_render_state = {}
+
+def _render_job(name):
+    state = _render_state
+    engine = _make_engine(state["templates_dir"], state["prefix"],
+                          state["cache_dir"])
+    # Each template gets its own copy of the context, as when rendered in
+    # another process
+    return engine.render(name, dict(state["context"]), _TEMPLATE_GLOBALS)
+
 
+def _make_engine(templates_dir, prefix, cache_dir):
     # support "::" syntax
     pp = [tenjin.PrefixedLinePreprocessor(prefix=prefix)
           if prefix else tenjin.PrefixedLinePreprocessor()]
-    # disable HTML escaping
-    template_globals = {"to_str": str, "escape": str}
-    engine = TemplateEngine(path=[templates_dir], pp=pp, cache=False)
-    out.write(engine.render(name, context, template_globals))
+    if cache_dir:
+        cache = _get_cache_storage(cache_dir)
+    else:
+        cache = False
+    return TemplateEngine(path=[templates_dir], pp=pp, cache=cache,
+                          cache_dir=cache_dir, prefix_key=prefix)
 
 
+_cache_storages = {}
+
+def _get_cache_storage(cache_dir):
+    storage = _cache_storages.get(cache_dir)
+    if storage is None:
+        storage = ContentCacheStorage()
+        _cache_storages[cache_dir] = storage
+    return storage
+
+
+class ContentCacheStorage(tenjin.MarshalCacheStorage):
+    """
+    Compiled templates cached in a directory which several builds may share.
+    Cache files are named after the hash of the template they come from (see
+    TemplateEngine.cachename), they are written atomically so that concurrent
+    builds never read a partial file, and unreadable or unwritable cache files
+    are ignored.
+    """
+    def _load(self, cachepath):
+        try:
+            return tenjin.MarshalCacheStorage._load(self, cachepath)
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def _store(self, cachepath, dct):
+        tmp_path = "%s.%d.tmp" % (cachepath, os.getpid())
+        try:
+            cache_dir = os.path.dirname(cachepath)
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            tenjin.MarshalCacheStorage._store(self, tmp_path, dct)
+            os.rename(tmp_path, cachepath)
+        except (IOError, OSError):
+            try:
+                os.unlink(tmp_path)
+            except (IOError, OSError):
+                pass
+
+    def _delete(self, cachepath):
+        # Entries are never stale, another build may still use them
+        pass
+
 
 class TemplateEngine(tenjin.Engine):
+    def __init__(self, cache_dir=None, prefix_key=None, **kwargs):
+        self.cache_dir = cache_dir
+        self.prefix_key = prefix_key
+        tenjin.Engine.__init__(self, **kwargs)
+
+    def cachename(self, filepath):
+        """
+        With a cache directory, compiled templates are keyed by the content of
+        the template, the preprocessor prefix and the versions of Python (the
+        cache holds its bytecode) and tenjin, not by the template path and
+        modification time.
+        """
+        if not self.cache_dir:
+            return tenjin.Engine.cachename(self, filepath)
+        key = hashlib.sha1()
+        with open(filepath, "rb") as f:
+            key.update(f.read())
+        key.update(repr((self.prefix_key, sys.version,
+                         tenjin.__version__)).encode())
+        return os.path.join(self.cache_dir, key.hexdigest() + ".cache")
+
+    def _get_template_from_cache(self, cachepath, filepath):
+        if not self.cache_dir:
+            return tenjin.Engine._get_template_from_cache(self, cachepath,
+                                                          filepath)
+        # The cache path changes with the template content, no need to check
+        # timestamps
+        return self.cache.get(cachepath, self.templateclass)
+
     def include(self, template_name, **kwargs):
         """
         Tenjin has an issue with nested includes that use the same local
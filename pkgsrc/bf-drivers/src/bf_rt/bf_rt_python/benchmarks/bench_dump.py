@@ -0,0 +1,172 @@
+################################################################################
+ #  Copyright (C) 2024 Intel Corporation
+ #
+ #  Licensed under the Apache License, Version 2.0 (the "License");
+ #  you may not use this file except in compliance with the License.
+ #  You may obtain a copy of the License at
+ #
+ #  http://www.apache.org/licenses/LICENSE-2.0
+ #
+ #  Unless required by applicable law or agreed to in writing,
+ #  software distributed under the License is distributed on an "AS IS" BASIS,
+ #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ #  See the License for the specific language governing permissions
+ #  and limitations under the License.
+ #
+ #
+ #  SPDX-License-Identifier: Apache-2.0
+################################################################################
+"""BfRtTable.dump() against a mock ctypes backend
+
+Usage:
+    python benchmarks/bench_dump.py [-n ENTRIES] [--batch-size N] [--max-batch-size N]
+
+The mock backend stands in for libdriver: key/data handles are ctypes
+objects it allocates, and get_first/get_next_n fill the key handles with the
+index of the entry. The benchmark checks that every entry reaches the
+handler once and in order. It then reports the get_next_n calls, handle
+allocations, handles still allocated after the dump and the run time.
+"""
+from __future__ import print_function
+import argparse
+import os
+import sys
+import time
+from ctypes import POINTER, Structure, addressof, c_int
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bfrtTable import BfRtTable  # noqa: E402
+
+BF_OBJECT_NOT_FOUND = 6
+
+
+class _Handle(Structure):
+    _fields_ = [("unused", c_int)]
+
+
+class MockDriver:
+    """
+    The bf_rt_table_key/data_* functions of libdriver. Every allocated
+    handle maps to the index of the entry it holds, None until it is filled.
+    """
+    def __init__(self):
+        self.handles = {}
+        self.allocations = 0
+        self.resets = 0
+
+    def _allocate(self, table_hdl, hdl_ref):
+        hdl = _Handle()
+        self.handles[addressof(hdl)] = [hdl, None]
+        hdl_ref._obj.contents = hdl
+        self.allocations += 1
+        return 0
+
+    def _deallocate(self, hdl):
+        del self.handles[addressof(hdl.contents)]
+        return 0
+
+    def _reset(self, table_hdl, hdl_ref):
+        self.handles[addressof(hdl_ref._obj.contents)][1] = None
+        self.resets += 1
+        return 0
+
+    bf_rt_table_key_allocate = _allocate
+    bf_rt_table_data_allocate = _allocate
+    bf_rt_table_key_deallocate = _deallocate
+    bf_rt_table_data_deallocate = _deallocate
+    bf_rt_table_key_reset = _reset
+    bf_rt_table_data_reset = _reset
+
+    def entry_index(self, hdl):
+        return self.handles[addressof(hdl.contents)][1]
+
+
+class MockCIntf:
+    """
+    The part of CIntfBfRt used by BfRtTable.dump(), serving a table of
+    num_entries entries
+    """
+    handle_type = POINTER(_Handle)
+
+    def __init__(self, num_entries):
+        self.num_entries = num_entries
+        self.driver = MockDriver()
+        self.get_next_n_calls = 0
+
+    def get_driver(self):
+        return self.driver
+
+    def get_session(self):
+        return None
+
+    def get_dev_tgt(self):
+        return None
+
+    def err_str(self, sts):
+        return str(sts)
+
+    def bf_rt_table_entry_get_first(self, table_hdl, session, dev_tgt,
+                                    key_hdl, data_hdl, flag):
+        if self.num_entries == 0:
+            return BF_OBJECT_NOT_FOUND
+        self.driver.handles[addressof(key_hdl.contents)][1] = 0
+        return 0
+
+    def bf_rt_table_entry_get_next_n(self, table_hdl, session, dev_tgt,
+                                     prev_key_hdl, key_hdls, data_hdls, n,
+                                     num_returned, flag):
+        self.get_next_n_calls += 1
+        prev = self.driver.entry_index(prev_key_hdl)
+        count = min(n, self.num_entries - prev - 1)
+        for i in range(count):
+            self.driver.handles[addressof(key_hdls[i].contents)][1] = prev + 1 + i
+        num_returned._obj.value = count
+        return 0 if count == n else BF_OBJECT_NOT_FOUND
+
+
+def mock_table(num_entries):
+    table = object.__new__(BfRtTable)
+    table._cintf = MockCIntf(num_entries)
+    table._handle = None
+    table.name = "pipe.Ingress.mock"
+    table.actions = {}
+    table.supported_commands = ["get_first", "get_next_n"]
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--entries", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-batch-size", type=int, default=None)
+    args = parser.parse_args()
+    if args.entries < 1:
+        # dump() raises on an empty table when not printing
+        parser.error("--entries must be at least 1")
+
+    table = mock_table(args.entries)
+    driver = table._cintf.driver
+    seen = []
+
+    def handler(key_hdls, data_hdls, action_names, print_zero):
+        seen.extend(driver.entry_index(hdl) for hdl in key_hdls)
+
+    kwargs = {}
+    if args.batch_size is not None:
+        kwargs["batch_size"] = args.batch_size
+    if args.max_batch_size is not None:
+        kwargs["max_batch_size"] = args.max_batch_size
+    start = time.time()
+    table.dump(handler, print_ents=False, **kwargs)
+    elapsed = time.time() - start
+    if seen != list(range(args.entries)):
+        sys.exit("dump handed %d entries, not entries 0..%d in order"
+                 % (len(seen), args.entries - 1))
+    print("%d entries: %d get_next_n calls, %d handle allocations, "
+          "%d handles leaked, %.2f s"
+          % (args.entries, table._cintf.get_next_n_calls, driver.allocations,
+             len(driver.handles), elapsed))
+
+
+if __name__ == "__main__":
+    main()
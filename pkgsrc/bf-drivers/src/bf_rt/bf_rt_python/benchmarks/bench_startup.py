@@ -0,0 +1,101 @@
+################################################################################
+ #  Copyright (C) 2024 Intel Corporation
+ #
+ #  Licensed under the Apache License, Version 2.0 (the "License");
+ #  you may not use this file except in compliance with the License.
+ #  You may obtain a copy of the License at
+ #
+ #  http://www.apache.org/licenses/LICENSE-2.0
+ #
+ #  Unless required by applicable law or agreed to in writing,
+ #  software distributed under the License is distributed on an "AS IS" BASIS,
+ #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ #  See the License for the specific language governing permissions
+ #  and limitations under the License.
+ #
+ #
+ #  SPDX-License-Identifier: Apache-2.0
+################################################################################
+"""bfrt_python startup time and memory for a large program
+
+Usage:
+    python benchmarks/bench_startup.py [-n TABLES] [--layouts N] [--bfrt-json FILE]
+                                       [--write-json FILE] [--trace-memory]
+
+The tables of a synthetic bfrt.json (or of --bfrt-json, MatchAction tables
+only) are loaded through the stub C interface of tests/stub_cintf.py. The
+benchmark then times three phases: BfRtInfo, the bfrt object tree and
+generating the methods of every leaf (dir() on each of them). After each
+phase it prints the peak RSS, or the traced Python memory with
+--trace-memory (much slower).
+"""
+from __future__ import print_function
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests"))
+import stub_cintf  # noqa: E402
+from bfrtcli import BFLeaf, BFNode  # noqa: E402
+
+P4_NAME = b"bench"
+
+
+def leaves(node):
+    for child in node._children:
+        if isinstance(child, BFLeaf):
+            yield child
+        elif isinstance(child, BFNode):
+            for leaf in leaves(child):
+                yield leaf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--tables", type=int, default=2000)
+    parser.add_argument("--layouts", type=int, default=10,
+                        help="distinct key/action layouts of the synthetic tables")
+    parser.add_argument("--bfrt-json", help="use this bfrt.json instead")
+    parser.add_argument("--write-json", help="save the synthetic bfrt.json")
+    parser.add_argument("--trace-memory", action="store_true")
+    args = parser.parse_args()
+
+    if args.bfrt_json:
+        with open(args.bfrt_json) as f:
+            bfrt_json = json.load(f)
+    else:
+        bfrt_json = stub_cintf.make_bfrt_json(args.tables, args.layouts)
+    if args.write_json:
+        with open(args.write_json, "w") as f:
+            json.dump(bfrt_json, f)
+    if args.trace_memory:
+        tracemalloc.start()
+
+    def report(phase, elapsed):
+        if args.trace_memory:
+            memory = "traced %.0f MB" % (tracemalloc.get_traced_memory()[0] / 1e6)
+        else:
+            memory = "peak RSS %d MB" % (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024)
+        print("%-12s %8.2f s  %s" % (phase, elapsed, memory))
+
+    start = time.time()
+    info = stub_cintf.load_info(P4_NAME, bfrt_json)
+    report("BfRtInfo", time.time() - start)
+    start = time.time()
+    bfrt = stub_cintf.make_tree(info)
+    report("tree", time.time() - start)
+    start = time.time()
+    num_leaves = 0
+    for leaf in leaves(bfrt):
+        dir(leaf)
+        num_leaves += 1
+    report("all leaves", time.time() - start)
+    print("%d tables, %d leaves" % (len(info.tables), num_leaves))
+
+
+if __name__ == "__main__":
+    main()
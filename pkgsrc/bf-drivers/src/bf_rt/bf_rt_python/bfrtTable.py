@@ -34,6 +34,84 @@ class BfRtTableError(Exception):
         Exception.__init__(self, str_rep, *args,**kwargs)
 
 
+class _DumpHandlePool:
+    """
+    Key and data handles reused across the get_next_n calls of
+    BfRtTable.dump. The handle arrays only ever grow, handles filled by a call
+    are reset before the next one instead of being deallocated and allocated
+    again.
+    """
+    def __init__(self, table):
+        self.table = table
+        self.key_hdls = None
+        self.data_hdls = None
+        self.size = 0
+        self.num_used = 0
+
+    def _grow(self, n):
+        table = self.table
+        arrtype = table._cintf.handle_type * n
+        key_hdls = arrtype()
+        data_hdls = arrtype()
+        for i in range(0, self.size):
+            key_hdls[i] = self.key_hdls[i]
+            data_hdls[i] = self.data_hdls[i]
+        self.key_hdls = key_hdls
+        self.data_hdls = data_hdls
+        while self.size < n:
+            new_key, new_data = table._allocate_keydata_handles()
+            key_hdls[self.size] = new_key
+            data_hdls[self.size] = new_data
+            self.size += 1
+
+    def _reset(self):
+        table = self.table
+        driver = table._cintf.get_driver()
+        for i in range(0, self.num_used):
+            sts = driver.bf_rt_table_key_reset(table._handle, byref(self.key_hdls[i]))
+            if sts == 0:
+                sts = driver.bf_rt_table_data_reset(table._handle, byref(self.data_hdls[i]))
+            if not sts == 0:
+                raise BfRtTableError("CLI Error: table key/data reset failed. [{}].".format(table._cintf.err_str(sts)), table, sts)
+        self.num_used = 0
+
+    def get_next(self, prev_key, n, from_hw=False):
+        """
+        Read up to n entries following prev_key into the first n handles of
+        the pool and return the number of entries read
+        """
+        table = self.table
+        self._reset()
+        if self.size < n:
+            self._grow(n)
+        flag = c_int(0)
+        if from_hw:
+            flag = c_int(1)
+        num_returned = c_uint(0)
+        sts = table._cintf.bf_rt_table_entry_get_next_n(table._handle,
+                                                        table._cintf.get_session(),
+                                                        table._cintf.get_dev_tgt(),
+                                                        prev_key,
+                                                        self.key_hdls,
+                                                        self.data_hdls,
+                                                        n,
+                                                        byref(num_returned),
+                                                        flag)
+        # Handles may have been partially written even on errors
+        self.num_used = n
+        if not sts == 0 and not sts == 6:
+            raise BfRtTableError("Error: entry_get_next {} failed on table {}. [{}]".format(n, table.name, table._cintf.err_str(sts)), table, sts)
+        self.num_used = num_returned.value
+        return num_returned.value
+
+    def deallocate(self):
+        if self.size:
+            self.table._deallocate_hdls(self.key_hdls[:self.size], self.data_hdls[:self.size])
+        self.key_hdls = None
+        self.data_hdls = None
+        self.size = 0
+        self.num_used = 0
+
 class BfRtTable:
 
     """
@@ -45,6 +123,10 @@ class BfRtTable:
     Note that keys in this object are the c-string representation
     (byte-streams in python) of data, not python strings.
     """
+    # Initial and maximum number of entries read per get_next_n call by dump()
+    DUMP_BATCH_SIZE = 20
+    DUMP_MAX_BATCH_SIZE = 1024
+
     def __init__(self, cintf, handle, info):
         self._cintf = cintf
         self._bfrt_info = info
@@ -1567,6 +1649,110 @@ class BfRtTable:
         if not sts == 0:
             raise BfRtTableError("Error: table_entry_add failed on table {}. [{}]".format(self.name, self._cintf.err_str(sts)), self, sts)
 
+    def add_entries(self, entries, batch_size=1000, transaction=False):
+        """
+        Add many entries with a single key object and one data object per
+        action, reset and refilled for every entry instead of allocated and
+        freed each time.
+
+        entries is an iterable of (index, key_content, data_content, action)
+        and is consumed lazily. An entry whose key_content is None is counted
+        as failed with data_content as its error, for entries the caller
+        could not parse. Entries are sent batch_size at a time between
+        begin_batch and end_batch or, if transaction is set, in one atomic
+        transaction which is aborted if any entry fails.
+
+        Returns the number of entries added and the list of (index, error
+        string) of the entries which failed.
+        """
+        driver = self._cintf.get_driver()
+        key_handle = self._cintf.handle_type()
+        sts = driver.bf_rt_table_key_allocate(self._handle, byref(key_handle))
+        if not sts == 0:
+            raise BfRtTableError("CLI Error: table key allocate failed. [{}].".format(self._cintf.err_str(sts)), self, sts)
+        data_handles = {}
+        num_added = 0
+        failures = []
+        in_batch = False
+        if transaction:
+            self._cintf._begin_transaction(atomic=True)
+        try:
+            for num, (idx, key_content, data_content, action) in enumerate(entries):
+                if key_content is None:
+                    failures.append((idx, data_content))
+                    continue
+                if not transaction and num % batch_size == 0:
+                    if in_batch:
+                        self._cintf._end_batch()
+                        in_batch = False
+                    self._cintf._begin_batch()
+                    in_batch = True
+                data_handle = data_handles.get(action)
+                if data_handle is None:
+                    data_handle = self._cintf.handle_type()
+                    if action != None:
+                        sts = driver.bf_rt_table_action_data_allocate(self._handle, self.actions[action]["id"], byref(data_handle))
+                    else:
+                        sts = driver.bf_rt_table_data_allocate(self._handle, byref(data_handle))
+                    if not sts == 0:
+                        raise BfRtTableError("CLI Error: table data allocate failed. [{}].".format(self._cintf.err_str(sts)), self, sts)
+                    data_handles[action] = data_handle
+                    reset_data = False
+                else:
+                    reset_data = True
+                try:
+                    error = self._fill_add_entry(key_handle, key_content, data_handle, data_content, action, reset_data)
+                except Exception as e:
+                    error = str(e)
+                if error is not None:
+                    failures.append((idx, error))
+                    continue
+                num_added += 1
+        except:
+            if transaction:
+                self._cintf._abort_transaction()
+                transaction = False
+            raise
+        finally:
+            if in_batch:
+                self._cintf._end_batch()
+            driver.bf_rt_table_key_deallocate(key_handle)
+            for data_handle in data_handles.values():
+                driver.bf_rt_table_data_deallocate(data_handle)
+        if transaction:
+            if failures:
+                self._cintf._abort_transaction()
+                num_added = 0
+            else:
+                self._cintf._commit_transaction()
+        return num_added, failures
+
+    def _fill_add_entry(self, key_handle, key_content, data_handle, data_content, action, reset_data):
+        """
+        Reset and fill the reused objects of add_entries and add the entry.
+        Returns None or a string describing the error.
+        """
+        driver = self._cintf.get_driver()
+        sts = driver.bf_rt_table_key_reset(self._handle, byref(key_handle))
+        if sts == 0:
+            sts = self._set_key_fields(key_content, key_handle)
+        if not sts == 0:
+            return "table key field set failed. [{}]".format(self._cintf.err_str(sts))
+        if not reset_data:
+            sts = 0
+        elif action != None:
+            sts = driver.bf_rt_table_action_data_reset(self._handle, self.actions[action]["id"], byref(data_handle))
+        else:
+            sts = driver.bf_rt_table_data_reset(self._handle, byref(data_handle))
+        if sts == 0:
+            sts = self._set_data_fields(data_content, data_handle, action)
+        if not sts == 0:
+            return "table data field set failed. [{}]".format(self._cintf.err_str(sts))
+        sts = self._cintf.bf_rt_table_entry_add(self._handle, self._cintf.get_session(), self._cintf.get_dev_tgt(), 0, key_handle, data_handle)
+        if not sts == 0:
+            return "table_entry_add failed on table {}. [{}]".format(self.name, self._cintf.err_str(sts))
+        return None
+
     def mod_entry(self, key_content, data_content, action=None, ttl_reset=True):
         flags = 0
         if ttl_reset == False:
@@ -2517,40 +2703,70 @@ class BfRtTable:
         if not sts == 0:
             raise BfRtTableError("Error: Table clear failed on table {}. [{}]".format(self.name, sts), self, sts)
 
-    def dump(self, entry_handler, from_hw=False, print_ents=True, print_zero=True):
+    def dump(self, entry_handler, from_hw=False, print_ents=True, print_zero=True,
+             batch_size=None, max_batch_size=None):
+        """
+        Walk all the entries of the table and hand them to entry_handler in
+        batches. The get_next_n batch starts at batch_size entries and doubles
+        each time a full batch comes back, up to max_batch_size, so small
+        tables are read with a handful of calls and large ones do not hold more
+        than max_batch_size key/data objects at once.
+
+        The handles passed to entry_handler are reset and reused by the next
+        batch, the handler must not keep them.
+        """
         if "get_first" not in self.supported_commands:
             return 0
+        if batch_size is None:
+            batch_size = self.DUMP_BATCH_SIZE
+        if max_batch_size is None:
+            max_batch_size = self.DUMP_MAX_BATCH_SIZE
+        max_batch_size = max(batch_size, max_batch_size)
         key_hdl, data_hdl = self.get_first(from_hw, print_ents)
         if key_hdl == -1:
             return -1
 
+        # get_next_n reads the previous key while filling its output handles,
+        # two sets of handles are used in turn so that the previous key (the
+        # last one of the other set) is never overwritten
+        pools = [_DumpHandlePool(self), _DumpHandlePool(self)]
         key_hdls = [key_hdl]
         data_hdls = [data_hdl]
         prev_key_hdl = key_hdl
-        while True:
-            next_key_hdls, next_data_hdls = self.get_next(prev_key_hdl, 20 - len(key_hdls), from_hw)
-            if next_key_hdls == -1:
-                return -1
-            key_hdls += next_key_hdls
-            data_hdls += next_data_hdls
-            if len(key_hdls) == 0:
-                self._cintf.get_driver().bf_rt_table_key_deallocate(prev_key_hdl)
-                return 0;
-
-            action_ids = []
-            if len(self.actions) > 0:
-                for d_hdl in data_hdls:
-                    action_ids.append(self._action_from_data(d_hdl))
-
-            entry_handler(key_hdls, data_hdls, action_ids, print_zero)
-            self._deallocate_hdls(key_hdls[:-1], data_hdls)
-            prev_key_hdl = key_hdls[-1]
-
-            if len(key_hdls) < 20:
-                self._cintf.get_driver().bf_rt_table_key_deallocate(prev_key_hdl)
-                return 0;
-            key_hdls = []
-            data_hdls = []
+        n = max(batch_size - 1, 1)
+        try:
+            while True:
+                num_returned = 0
+                if "get_next_n" in self.supported_commands:
+                    pool = pools[0]
+                    num_returned = pool.get_next(prev_key_hdl, n, from_hw)
+                    key_hdls += pool.key_hdls[:num_returned]
+                    data_hdls += pool.data_hdls[:num_returned]
+                    pools.reverse()
+                if len(key_hdls) == 0:
+                    return 0
+
+                action_ids = []
+                if len(self.actions) > 0:
+                    for d_hdl in data_hdls:
+                        action_ids.append(self._action_from_data(d_hdl))
+
+                entry_handler(key_hdls, data_hdls, action_ids, print_zero)
+                if key_hdl is not None:
+                    # Entries from get_first are only part of the first batch
+                    self._deallocate_hdls([key_hdl], [data_hdl])
+                    key_hdl = data_hdl = None
+                if num_returned < n:
+                    return 0
+                prev_key_hdl = key_hdls[-1]
+                n = min(max(n * 2, batch_size), max_batch_size)
+                key_hdls = []
+                data_hdls = []
+        finally:
+            if key_hdl is not None:
+                self._deallocate_hdls([key_hdl], [data_hdl])
+            for pool in pools:
+                pool.deallocate()
 
     def raw_entry(self, key_content, data_content, action):
         raw_key = {}
@@ -34,6 +34,7 @@ import pdb
 import re
 import atexit
 import json
+import time
 import operator
 import copy
 from bfrtTable import BfRtTable
@@ -817,6 +818,79 @@ def _learn_fields_print(dev_id, pipe_id, direction, parser_id, session, data):
     print("Learn data:\n{}".format(data))
     return 0
 
+def _iter_json_array(blob):
+    """
+    Yield the elements of the JSON array in the string blob one at a time
+    instead of decoding the whole array first
+    """
+    decoder = json.JSONDecoder()
+    ws = re.compile(r'\s*')
+    idx = ws.match(blob, 0).end()
+    if blob[idx:idx + 1] != '[':
+        raise ValueError("Expecting a JSON array")
+    idx = ws.match(blob, idx + 1).end()
+    if blob[idx:idx + 1] == ']':
+        return
+    while True:
+        obj, idx = decoder.raw_decode(blob, idx)
+        yield obj
+        idx = ws.match(blob, idx).end()
+        sep = blob[idx:idx + 1]
+        if sep == ']':
+            return
+        if sep != ',':
+            raise ValueError("Expecting ',' or ']' at position {}".format(idx))
+        idx = ws.match(blob, idx + 1).end()
+
+"""
+Functions generated for the BFLeaf methods, keyed by their source with the
+docstring left out. The docstring is the only part naming the table, leaves of
+tables with the same key, action and data fields share the code of their
+methods instead of each compiling its own.
+"""
+_dynamic_functions = {}
+
+def _make_dynamic_function(method_def, method_name):
+    body = method_def
+    doc = None
+    start = method_def.find('"""')
+    if start != -1:
+        end = method_def.find('"""', start + 3)
+        doc = method_def[start + 3:end]
+        if "\\" in doc:
+            # Keep escape sequences handled by the compiler
+            body, doc = method_def, None
+        else:
+            body = method_def[:start] + method_def[end + 3:]
+    cached = _dynamic_functions.get(body)
+    if cached is None:
+        d = {}
+        exec(body, globals(), d)
+        cached = d[method_name]
+        _dynamic_functions[body] = cached
+        if doc is None:
+            return cached
+    func = types.FunctionType(cached.__code__, cached.__globals__, cached.__name__,
+                              cached.__defaults__, cached.__closure__)
+    func.__kwdefaults__ = cached.__kwdefaults__
+    func.__dict__.update(cached.__dict__)
+    func.__doc__ = doc
+    return func
+
+class _LeafDoc:
+    """
+    BFLeaf docstrings list the generated commands, the leaf is materialized
+    when its docstring is read
+    """
+    def __init__(self, class_doc):
+        self.class_doc = class_doc
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self.class_doc
+        obj._materialize()
+        return obj.__dict__.get("__doc__", self.class_doc)
+
 class BFLeaf(BFContext):
     """
     This class creates easy to type, autocompleted python entrypoints to the
@@ -846,6 +920,31 @@ class BFLeaf(BFContext):
             for c in children:
                 self._add_child(c)
         #
+        # Methods and Attributes for Leaf Command Node are only generated
+        # when the leaf is first used, see _materialize
+        #
+        self._materialized = False
+
+    __doc__ = _LeafDoc(__doc__)
+
+    def __getattr__(self, name):
+        # Only called for attributes which are not set yet, the generated
+        # methods, docstring and tables of methods appear once the leaf is
+        # materialized
+        if self.__dict__.get("_materialized", True):
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+        self._materialize()
+        return getattr(self, name)
+
+    def __dir__(self):
+        self._materialize()
+        return super().__dir__()
+
+    def _materialize(self):
+        if self._materialized:
+            return
+        self._materialized = True
+        #
         # Setup Methods and Attributes for Leaf Command Node
         #
         self._adds = {}
@@ -1011,35 +1110,54 @@ class BFLeaf(BFContext):
                 else:
                     return None
 
-    def add_from_json(self, entry_blob):
-        if isinstance(entry_blob, str):
-            jents = json.loads(entry_blob)
-            try:
-                for ent in jents:
-                    if not ent['table_name'] == self._c_tbl.name:
-                        print("Error: table mismatch for entry {}.".format(ent))
-                    skey = ent['key']
-                    sdata = ent['data']
-                    saction = ent['action']
-                    key = {}
-                    data = {}
-                    action = None
-                    if saction is not None:
-                        action = saction.encode('ascii')
-                    for k, v in skey.items():
-                        key[k.encode('ascii')] = v
-                    for k, v in sdata.items():
-                        data[k.encode('ascii')] = v
-                    parsed_keys, parsed_data = self._c_tbl.parse_str_input("add_from_json", key, data, action)
-                    if parsed_keys == -1:
-                        return
-                    if parsed_data == -1:
-                        return
-                    self._c_tbl.add_entry(parsed_keys, parsed_data, action)
-            except Exception as e:
-                print("Error: {}".format(str(e)))
-        else:
+    def add_from_json(self, entry_blob, batch_size=1000, transaction=False):
+        """Add the entries of a string produced by dump(json=True) on this table.
+
+        Entries are parsed one at a time and added batch_size at a time within
+        a batch, or all within one atomic transaction if transaction is True.
+        Entries which cannot be added are reported and skipped (the whole
+        transaction is aborted in transaction mode).
+        """
+        if not isinstance(entry_blob, str):
             print("Input must be string produced by dump command for this table.")
+            return
+        num_entries = 0
+        def parsed_entries():
+            nonlocal num_entries
+            for idx, ent in enumerate(_iter_json_array(entry_blob)):
+                num_entries += 1
+                if not ent['table_name'] == self._c_tbl.name:
+                    print("Error: table mismatch for entry {}.".format(ent))
+                skey = ent['key']
+                sdata = ent['data']
+                saction = ent['action']
+                key = {}
+                data = {}
+                action = None
+                if saction is not None:
+                    action = saction.encode('ascii')
+                for k, v in skey.items():
+                    key[k.encode('ascii')] = v
+                for k, v in sdata.items():
+                    data[k.encode('ascii')] = v
+                parsed_keys, parsed_data = self._c_tbl.parse_str_input("add_from_json", key, data, action)
+                if parsed_keys == -1 or parsed_data == -1:
+                    # Handed on so that a transaction is aborted
+                    yield idx, None, "could not parse entry", action
+                    continue
+                yield idx, parsed_keys, parsed_data, action
+
+        start = time.time()
+        try:
+            num_added, failures = self._c_tbl.add_entries(parsed_entries(), batch_size, transaction)
+        except Exception as e:
+            print("Error: {}".format(str(e)))
+            return
+        elapsed = time.time() - start
+        for idx, error in failures:
+            print("Error: entry {}: {}".format(idx, error))
+        print("Added {} of {} entries to {} in {:.2f}s ({:.0f} entries/s)".format(
+            num_added, num_entries, self._name, elapsed, num_entries / elapsed if elapsed else 0))
 
     def port_status_notif_cb_set(self, callback=None):
         if callback is None:
@@ -1166,6 +1284,7 @@ def {}(self, {} ):
             self._children[method_name] = getattr(self, method_name)
 
     def _get_children(self):
+        self._materialize()
         return self._children
 
     def _get_full_leaf_info(self):
@@ -1326,14 +1445,13 @@ Available Commands:
         self._create_attributes(key_fields)
 
     def _set_dynamic_method(self, method_def, method_name):
-        d = {}
         try:
-            exec(method_def.strip(), globals(), d)
+            func = _make_dynamic_function(method_def.strip(), method_name)
         except Exception as e:
             print(e)
             raise e
             pdb.set_trace()
-        setattr(self, method_name, types.MethodType(d[method_name], self))
+        setattr(self, method_name, types.MethodType(func, self))
         self._children[method_name] = getattr(self, method_name)
         return getattr(self, method_name)
 
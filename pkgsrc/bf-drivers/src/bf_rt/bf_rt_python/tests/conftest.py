@@ -0,0 +1,3 @@
+# The bfpy_*_test.py scripts run inside bfrt_python against a switch, only
+# the test_*.py unit tests are for pytest
+collect_ignore_glob = ["bfpy_*_test.py"]
@@ -0,0 +1,423 @@
+################################################################################
+ #  Copyright (C) 2024 Intel Corporation
+ #
+ #  Licensed under the Apache License, Version 2.0 (the "License");
+ #  you may not use this file except in compliance with the License.
+ #  You may obtain a copy of the License at
+ #
+ #  http://www.apache.org/licenses/LICENSE-2.0
+ #
+ #  Unless required by applicable law or agreed to in writing,
+ #  software distributed under the License is distributed on an "AS IS" BASIS,
+ #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ #  See the License for the specific language governing permissions
+ #  and limitations under the License.
+ #
+ #
+ #  SPDX-License-Identifier: Apache-2.0
+################################################################################
+"""
+Stand-in for CIntfBFRT and libdriver.so answering the bf_rt_info/table
+metadata calls of BfRtInfo and BfRtTable from a bfrt.json, so that the
+bfrt_python object tree can be built without a switch. Entries can be added,
+within batches and transactions, and are kept per table.
+
+Only MatchAction tables with key fields and actions are described, which is
+what P4 programs are mostly made of.
+"""
+from ctypes import POINTER, addressof, pointer
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bfrtcli import CIntfBFRT, BFNode, make_deep_tree, set_node_docstrs  # noqa: E402
+from bfrtInfo import BfRtInfo  # noqa: E402
+from bfrtLearn import BfRtLearn  # noqa: E402
+from bfrtTable import BfRtTable  # noqa: E402
+
+# Enums of bf_rt_table.h, as mapped by BfRtTable.*_type_map
+TABLE_TYPES = {"MatchAction_Direct": 0, "MatchAction_Indirect": 1,
+               "MatchAction_Indirect_Selector": 2}
+MATCH_TYPES = {"Exact": 1, "Ternary": 2, "Range": 3, "LPM": 4, "Optional": 5}
+BYTE_STREAM = 3
+# add, mod, delete, clear, set/reset/get_default, get, get_first, get_next_n,
+# usage_get
+MATCH_TABLE_APIS = [0, 1, 3, 4, 5, 6, 7, 8, 9, 10, 11]
+
+
+def make_bfrt_json(num_tables, num_layouts, num_keys=4, num_actions=8,
+                   num_action_data=3):
+    """
+    A bfrt.json of num_tables MatchAction_Direct tables. Table i has the
+    key, actions and data of layout i % num_layouts, like a program which
+    instantiates a few table shapes many times.
+    """
+    match_types = ["Exact", "Ternary", "LPM"]
+    tables = []
+    for i in range(num_tables):
+        layout = i % num_layouts
+        keys = [{"id": k + 1, "name": "hdr.f%d_%d" % (k, layout),
+                 "match_type": match_types[k % len(match_types)],
+                 "type": {"type": "bytes", "width": 8 * (k + 1)}}
+                for k in range(num_keys)]
+        actions = [{"id": a + 1, "name": "Ingress.act%d_%d" % (a, layout),
+                    "annotations": [],
+                    "data": [{"id": d + 1, "name": "p%d" % d, "repeated": False,
+                              "mandatory": True, "read_only": False,
+                              "type": {"type": "bytes", "width": 16}}
+                             for d in range(num_action_data)]}
+                   for a in range(num_actions)]
+        tables.append({"name": "pipe.Ingress.tbl%d" % i, "id": 0x1000000 + i,
+                       "table_type": "MatchAction_Direct", "size": 1024,
+                       "key": keys, "action_specs": actions, "data": [],
+                       "attributes": [], "supported_operations": []})
+    return {"schema_version": "1.0.0", "tables": tables, "learn_filters": []}
+
+
+class StubDriver:
+    """
+    The bf_rt_* metadata functions of libdriver.so. Handles are
+    CIntfBFRT.BfRtHandle structures, told apart by their address.
+    """
+    def __init__(self, p4_name, bfrt_json, num_pipes=4):
+        self.p4_name = p4_name
+        self.num_pipes = num_pipes
+        self._keep = []
+        self.info_hdl = self._new_handle()
+        self.tables = []
+        self._tables = {}
+        self._objects = {}
+        self.session_state = None
+        self.pending = []
+        for table in bfrt_json["tables"]:
+            hdl = self._new_handle()
+            self.tables.append(hdl)
+            self._tables[addressof(hdl)] = _StubTable(table)
+
+    def _new_handle(self):
+        hdl = CIntfBFRT.BfRtHandle()
+        self._keep.append(hdl)
+        return hdl
+
+    def _table(self, tbl_hdl):
+        return self._tables[addressof(tbl_hdl.contents)]
+
+    @staticmethod
+    def _out(ref, value):
+        ref._obj.value = value
+        return 0
+
+    @staticmethod
+    def _fill(arr, values):
+        # Arrays come either as is or through byref()
+        arr = getattr(arr, "_obj", arr)
+        for i, value in enumerate(values):
+            arr[i] = value
+        return 0
+
+    # bf_rt_info
+    def bf_rt_info_get(self, dev_id, p4_name, info_ref):
+        if p4_name != self.p4_name:
+            return 6
+        info_ref._obj.contents = self.info_hdl
+        return 0
+
+    def bf_rt_num_tables_get(self, info_hdl, num_ref):
+        return self._out(num_ref, len(self.tables))
+
+    def bf_rt_tables_get(self, info_hdl, tables):
+        return self._fill(tables, [pointer(hdl) for hdl in self.tables])
+
+    def bf_rt_num_tables_this_table_depends_on_get(self, info_hdl, tbl_id, num_ref):
+        return self._out(num_ref, 0)
+
+    def bf_rt_num_learns_get(self, info_hdl, num_ref):
+        return self._out(num_ref, 0)
+
+    def bf_rt_learns_get(self, info_hdl, learns):
+        return 0
+
+    def bf_rt_info_num_pipeline_info_get(self, info_hdl, num_ref):
+        return self._out(num_ref, self.num_pipes)
+
+    # bf_rt_table
+    def bf_rt_table_id_from_handle_get(self, tbl_hdl, id_ref):
+        return self._out(id_ref, self._table(tbl_hdl).json["id"])
+
+    def bf_rt_table_has_const_default_action(self, tbl_hdl, value_ref):
+        return self._out(value_ref, False)
+
+    def bf_rt_table_type_get(self, tbl_hdl, type_ref):
+        return self._out(type_ref, TABLE_TYPES[self._table(tbl_hdl).json["table_type"]])
+
+    def bf_rt_table_name_get(self, tbl_hdl, name_ref):
+        return self._out(name_ref, self._table(tbl_hdl).name)
+
+    def bf_rt_table_num_attributes_supported(self, tbl_hdl, num_ref):
+        return self._out(num_ref, 0)
+
+    def bf_rt_table_attributes_supported(self, tbl_hdl, arr_ref, num_ref):
+        return 0
+
+    def bf_rt_table_num_operations_supported(self, tbl_hdl, num_ref):
+        return self._out(num_ref, 0)
+
+    def bf_rt_table_operations_supported(self, tbl_hdl, arr_ref, num_ref):
+        return 0
+
+    def bf_rt_table_num_api_supported(self, tbl_hdl, num_ref):
+        return self._out(num_ref, len(MATCH_TABLE_APIS))
+
+    def bf_rt_table_api_supported(self, tbl_hdl, arr_ref, num_ref):
+        return self._fill(arr_ref, MATCH_TABLE_APIS)
+
+    # Key fields
+    def bf_rt_key_field_id_list_size_get(self, tbl_hdl, num_ref):
+        return self._out(num_ref, len(self._table(tbl_hdl).keys))
+
+    def bf_rt_key_field_id_list_get(self, tbl_hdl, ids):
+        return self._fill(ids, sorted(self._table(tbl_hdl).keys))
+
+    def bf_rt_key_field_name_get(self, tbl_hdl, field_id, name_ref):
+        return self._out(name_ref, self._table(tbl_hdl).keys[field_id]["name"].encode())
+
+    def bf_rt_key_field_type_get(self, tbl_hdl, field_id, type_ref):
+        return self._out(type_ref, MATCH_TYPES[self._table(tbl_hdl).keys[field_id]["match_type"]])
+
+    def bf_rt_key_field_data_type_get(self, tbl_hdl, field_id, type_ref):
+        return self._out(type_ref, BYTE_STREAM)
+
+    def bf_rt_key_field_size_get(self, tbl_hdl, field_id, size_ref):
+        return self._out(size_ref, self._table(tbl_hdl).keys[field_id]["type"]["width"])
+
+    def bf_rt_key_field_is_ptr_get(self, tbl_hdl, field_id, is_ptr_ref):
+        return self._out(is_ptr_ref, self._table(tbl_hdl).keys[field_id]["type"]["width"] > 64)
+
+    def bf_rt_key_field_mask_get(self, tbl_hdl, field_id, size, mask):
+        return self._fill(mask, [0xff] * size)
+
+    # Actions
+    def bf_rt_action_id_applicable(self, tbl_hdl, value_ref):
+        return self._out(value_ref, bool(self._table(tbl_hdl).actions))
+
+    def bf_rt_action_id_list_size_get(self, tbl_hdl, num_ref):
+        return self._out(num_ref, len(self._table(tbl_hdl).actions))
+
+    def bf_rt_action_id_list_get(self, tbl_hdl, ids):
+        return self._fill(ids, sorted(self._table(tbl_hdl).actions))
+
+    def bf_rt_action_name_get(self, tbl_hdl, action_id, name_ref):
+        return self._out(name_ref, self._table(tbl_hdl).actions[action_id]["name"].encode())
+
+    def bf_rt_action_num_annotations_get(self, tbl_hdl, action_id, num_ref):
+        return self._out(num_ref, 0)
+
+    def bf_rt_action_annotations_get(self, tbl_hdl, action_id, arr_ref):
+        return 0
+
+    # Action data fields
+    def bf_rt_data_field_id_list_size_with_action_get(self, tbl_hdl, action_id, num_ref):
+        return self._out(num_ref, len(self._table(tbl_hdl).data[action_id]))
+
+    def bf_rt_data_field_list_with_action_get(self, tbl_hdl, action_id, ids):
+        return self._fill(ids, sorted(self._table(tbl_hdl).data[action_id]))
+
+    def _data_field(self, tbl_hdl, field_id, action_id):
+        return self._table(tbl_hdl).data[getattr(action_id, "value", action_id)][field_id]
+
+    def bf_rt_data_field_type_with_action_get(self, tbl_hdl, field_id, action_id, type_ref):
+        return self._out(type_ref, BYTE_STREAM)
+
+    def bf_rt_data_field_name_with_action_get(self, tbl_hdl, field_id, action_id, name_ref):
+        return self._out(name_ref, self._data_field(tbl_hdl, field_id, action_id)["name"].encode())
+
+    def bf_rt_data_field_size_with_action_get(self, tbl_hdl, field_id, action_id, size_ref):
+        return self._out(size_ref, self._data_field(tbl_hdl, field_id, action_id)["type"]["width"])
+
+    def bf_rt_data_field_is_ptr_with_action_get(self, tbl_hdl, field_id, action_id, is_ptr_ref):
+        return self._out(is_ptr_ref, self._data_field(tbl_hdl, field_id, action_id)["type"]["width"] > 64)
+
+    def bf_rt_data_field_is_read_only_with_action_get(self, tbl_hdl, field_id, action_id, value_ref):
+        return self._out(value_ref, self._data_field(tbl_hdl, field_id, action_id)["read_only"])
+
+    def bf_rt_data_field_is_mandatory_with_action_get(self, tbl_hdl, field_id, action_id, value_ref):
+        return self._out(value_ref, self._data_field(tbl_hdl, field_id, action_id)["mandatory"])
+
+    def bf_rt_data_field_num_annotations_with_action_get(self, tbl_hdl, field_id, action_id, num_ref):
+        return self._out(num_ref, 0)
+
+    def bf_rt_data_field_annotations_with_action_get(self, tbl_hdl, field_id, action_id, arr_ref):
+        return 0
+
+    # Key and data objects, as {field id: value} dictionaries
+    def _allocate(self, hdl_ref, action_id=None):
+        hdl = self._new_handle()
+        self._objects[addressof(hdl)] = [action_id, {}]
+        hdl_ref._obj.contents = hdl
+        return 0
+
+    def _object(self, hdl):
+        hdl = getattr(hdl, "_obj", hdl)
+        return self._objects[addressof(hdl.contents)]
+
+    def _reset(self, hdl_ref, action_id=None):
+        self._object(hdl_ref)[:] = [action_id, {}]
+        return 0
+
+    def _deallocate(self, hdl):
+        del self._objects[addressof(hdl.contents)]
+        return 0
+
+    def _set(self, hdl, field_id, *value):
+        self._object(hdl)[1][field_id] = value
+        return 0
+
+    def bf_rt_table_key_allocate(self, tbl_hdl, hdl_ref):
+        return self._allocate(hdl_ref)
+
+    def bf_rt_table_data_allocate(self, tbl_hdl, hdl_ref):
+        return self._allocate(hdl_ref)
+
+    def bf_rt_table_action_data_allocate(self, tbl_hdl, action_id, hdl_ref):
+        return self._allocate(hdl_ref, action_id)
+
+    def bf_rt_table_key_reset(self, tbl_hdl, hdl_ref):
+        return self._reset(hdl_ref)
+
+    def bf_rt_table_data_reset(self, tbl_hdl, hdl_ref):
+        return self._reset(hdl_ref)
+
+    def bf_rt_table_action_data_reset(self, tbl_hdl, action_id, hdl_ref):
+        return self._reset(hdl_ref, action_id)
+
+    bf_rt_table_key_deallocate = _deallocate
+    bf_rt_table_data_deallocate = _deallocate
+
+    def bf_rt_key_field_set_value(self, key_hdl, field_id, value):
+        return self._set(key_hdl, field_id, value.value)
+
+    def bf_rt_key_field_set_value_and_mask(self, key_hdl, field_id, value, mask):
+        return self._set(key_hdl, field_id, value.value, mask.value)
+
+    def bf_rt_key_field_set_value_lpm(self, key_hdl, field_id, value, p_len):
+        return self._set(key_hdl, field_id, value.value, p_len.value)
+
+    def bf_rt_data_field_set_value_ptr(self, data_hdl, field_id, value, size):
+        return self._set(data_hdl, field_id, bytes(value))
+
+    # Sessions
+    def _check_session(self, begin, end):
+        if self.session_state != begin:
+            return 1
+        self.session_state = end
+        return 0
+
+    def bf_rt_begin_batch(self, session):
+        return self._check_session(None, "batch")
+
+    def bf_rt_end_batch(self, session):
+        return self._check_session("batch", None)
+
+    def bf_rt_begin_transaction(self, session, atomic):
+        return self._check_session(None, "transaction")
+
+    def bf_rt_commit_transaction(self, session, synchronous):
+        for table, entry in self.pending:
+            table.entries.append(entry)
+        self.pending = []
+        return self._check_session("transaction", None)
+
+    def bf_rt_abort_transaction(self, session):
+        self.pending = []
+        return self._check_session("transaction", None)
+
+    def bf_rt_table_entry_add(self, tbl_hdl, session, dev_tgt, flags, key_hdl, data_hdl):
+        table = self._table(tbl_hdl)
+        key = dict(self._object(key_hdl)[1])
+        if any(entry[0] == key for entry in table.entries):
+            return 4
+        action_id, data = self._object(data_hdl)
+        entry = (key, action_id, dict(data))
+        if self.session_state == "transaction":
+            self.pending.append((table, entry))
+        else:
+            table.entries.append(entry)
+        return 0
+
+
+class _StubTable:
+    def __init__(self, table):
+        self.json = table
+        self.name = table["name"].encode()
+        self.keys = {key["id"]: key for key in table["key"]}
+        self.actions = {action["id"]: action for action in table["action_specs"]}
+        self.data = {action["id"]: {field["id"]: field for field in action["data"]}
+                     for action in table["action_specs"]}
+        # (key, action id, data) of the entries added
+        self.entries = []
+
+
+class StubCIntf:
+    """
+    The parts of CIntfBFRT used to build BfRtInfo, BfRtTable and the
+    bfrt_python object tree, and to add entries
+    """
+    handle_type = POINTER(CIntfBFRT.BfRtHandle)
+    annotation_type = CIntfBFRT.BfAnnotation
+
+    def __init__(self, p4_name, bfrt_json, dev_id=0):
+        self._dev_id = dev_id
+        self._driver = StubDriver(p4_name, bfrt_json)
+        self._session = None
+        self.BfRtTable = BfRtTable
+        self.BfRtInfo = BfRtInfo
+        self.BfRtLearn = BfRtLearn
+        self.infos = {}
+
+    def get_driver(self):
+        return self._driver
+
+    def get_dev_id(self):
+        return self._dev_id
+
+    def err_str(self, sts):
+        return "status %d" % sts
+
+    def get_session(self):
+        return self._session
+
+    def get_dev_tgt(self):
+        return None
+
+    def bf_rt_table_entry_add(self, tbl_hdl, session, dev_tgt, flags, key, data):
+        return self._driver.bf_rt_table_entry_add(tbl_hdl, session, dev_tgt, flags, key, data)
+
+    _begin_batch = CIntfBFRT._begin_batch
+    _end_batch = CIntfBFRT._end_batch
+    _begin_transaction = CIntfBFRT._begin_transaction
+    _commit_transaction = CIntfBFRT._commit_transaction
+    _abort_transaction = CIntfBFRT._abort_transaction
+
+
+def load_info(p4_name, bfrt_json):
+    """
+    @return BfRtInfo of the program described by bfrt_json
+    """
+    cintf = StubCIntf(p4_name, bfrt_json)
+    info = BfRtInfo(cintf, p4_name)
+    cintf.infos[p4_name] = info
+    return info
+
+
+def make_tree(info):
+    """
+    Build the bfrt node tree of one program the way populate_bfrt() does
+    @return The root BFNode
+    """
+    cintf = info._cintf
+    bfrt = BFNode("bfrt", cintf, parent_node=None)
+    bfrt.p4_programs_list = []
+    if make_deep_tree(info.name, info, bfrt, cintf) != 0:
+        raise RuntimeError("make_deep_tree failed")
+    set_node_docstrs(bfrt)
+    return bfrt
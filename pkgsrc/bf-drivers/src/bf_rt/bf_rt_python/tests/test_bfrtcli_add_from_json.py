@@ -0,0 +1,70 @@
+"""
+BFLeaf.add_from_json, on a table of the stub C interface
+"""
+import json
+
+import pytest
+
+stub_cintf = pytest.importorskip("stub_cintf")
+
+
+@pytest.fixture
+def leaf():
+    info = stub_cintf.load_info(b"prog", stub_cintf.make_bfrt_json(1, 1))
+    return stub_cintf.make_tree(info).prog.pipe.Ingress.tbl0
+
+
+def entries(leaf):
+    return leaf._c_tbl._cintf.get_driver()._table(leaf._c_tbl._handle).entries
+
+
+def blob(keys, bad=()):
+    return json.dumps([{"table_name": "pipe.Ingress.tbl0",
+                        "action": "Ingress.act%d_0" % (k % 2),
+                        "key": {"hdr.f0_0": k},
+                        "data": {"p0": "bad" if k in bad else k, "p1": 1}}
+                       for k in keys])
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 1000])
+def test_add_in_batches(leaf, capsys, batch_size):
+    leaf.add_from_json(blob(range(10)), batch_size=batch_size)
+    assert "Added 10 of 10 entries" in capsys.readouterr().out
+    added = entries(leaf)
+    assert [key for key, action_id, data in added] == [{1: (k,)} for k in range(10)]
+    assert [action_id for key, action_id, data in added] == [k % 2 + 1 for k in range(10)]
+    assert [data for key, action_id, data in added] == [
+        {1: (bytes([0, k]),), 2: (b"\x00\x01",)} for k in range(10)]
+    assert not leaf._c_tbl._cintf.get_driver()._objects
+
+
+def test_failed_entries_skipped(leaf, capsys):
+    leaf.add_from_json(blob([0, 1, 2]))
+    leaf.add_from_json(blob(range(6), bad=[4]), batch_size=2)
+    out = capsys.readouterr().out
+    assert "Error: entry 0: table_entry_add failed" in out
+    assert "Error: entry 4: could not parse entry" in out
+    assert "Added 2 of 6 entries" in out
+    assert [key for key, action_id, data in entries(leaf)] == [
+        {1: (k,)} for k in (0, 1, 2, 3, 5)]
+
+
+@pytest.mark.parametrize("bad", [[], [7], [0, 9]])
+def test_transaction(leaf, capsys, bad):
+    leaf.add_from_json(blob(range(10), bad=bad), transaction=True)
+    out = capsys.readouterr().out
+    driver = leaf._c_tbl._cintf.get_driver()
+    assert driver.session_state is None
+    if bad:
+        assert "Added 0 of 10 entries" in out
+        assert entries(leaf) == []
+    else:
+        assert "Added 10 of 10 entries" in out
+        assert len(entries(leaf)) == 10
+
+
+def test_transaction_aborted_on_add_failure(leaf, capsys):
+    leaf.add_from_json(blob([5]))
+    leaf.add_from_json(blob(range(10)), transaction=True)
+    assert "Error: entry 5: table_entry_add failed" in capsys.readouterr().out
+    assert [key for key, action_id, data in entries(leaf)] == [{1: (5,)}]
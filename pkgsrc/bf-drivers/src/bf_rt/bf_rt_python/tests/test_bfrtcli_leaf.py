@@ -0,0 +1,71 @@
+"""
+BFLeaf methods generated on first use, on tables of the stub C interface
+"""
+import inspect
+
+import pytest
+
+stub_cintf = pytest.importorskip("stub_cintf")
+
+# Enough tables for two of them to share a layout
+NUM_TABLES = 6
+NUM_LAYOUTS = 3
+
+
+@pytest.fixture
+def bfrt():
+    info = stub_cintf.load_info(b"prog", stub_cintf.make_bfrt_json(NUM_TABLES, NUM_LAYOUTS))
+    return stub_cintf.make_tree(info)
+
+
+def test_tree_built_without_methods(bfrt):
+    leaf = bfrt.prog.pipe.Ingress.tbl1
+    assert not leaf._materialized
+    assert "add_with_act0_1" not in leaf.__dict__
+
+
+@pytest.mark.parametrize("trigger", [
+    lambda leaf: leaf.add_with_act0_1,
+    lambda leaf: dir(leaf),
+    lambda leaf: leaf._get_children(),
+    lambda leaf: leaf.__doc__,
+])
+def test_materialize_on_first_use(bfrt, trigger):
+    leaf = bfrt.prog.pipe.Ingress.tbl1
+    trigger(leaf)
+    assert leaf._materialized
+    assert "add_with_act0_1" in dir(leaf)
+    assert "add_with_act0_1" in leaf._get_children()
+    assert "pipe.Ingress.tbl1" in leaf.__doc__
+    assert "add_with_act0_1" in leaf.__doc__
+    assert not bfrt.prog.pipe.Ingress.tbl2._materialized
+
+
+def test_unknown_attribute(bfrt):
+    leaf = bfrt.prog.pipe.Ingress.tbl1
+    with pytest.raises(AttributeError):
+        leaf.add_with_act0_2
+    assert leaf._materialized
+    with pytest.raises(AttributeError):
+        leaf.no_such_method
+
+
+def test_generated_methods(bfrt):
+    leaf = bfrt.prog.pipe.Ingress.tbl1
+    assert str(inspect.signature(leaf.add_with_act0_1)) == (
+        "(f0_1=None, f1_1=None, f1_1_mask=None, f2_1=None, f2_1_p_length=None, "
+        "f3_1=None, p0=None, p1=None, p2=None, pipe=None, gress_dir=None, prsr_id=None)")
+    assert leaf.add_with_act0_1.__doc__.startswith("Add entry to tbl1 table")
+    assert leaf.add_with_act0_1.__self__ is leaf
+
+
+def test_same_layout_shares_code(bfrt):
+    # tbl1 and tbl4 have the same layout, tbl2 does not. The methods are
+    # wrapped by target_check_and_set, compare the generated functions
+    tbl1, tbl2, tbl4 = (getattr(bfrt.prog.pipe.Ingress, "tbl%d" % i) for i in (1, 2, 4))
+    code1 = tbl1.add_with_act0_1.__wrapped__.__code__
+    assert tbl4.add_with_act0_1.__wrapped__.__code__ is code1
+    assert tbl2.add_with_act0_2.__wrapped__.__code__ is not code1
+    assert tbl1.add_with_act0_1.__func__ is not tbl4.add_with_act0_1.__func__
+    assert tbl1.add_with_act0_1.__doc__.startswith("Add entry to tbl1 table")
+    assert tbl4.add_with_act0_1.__doc__.startswith("Add entry to tbl4 table")
@@ -0,0 +1,154 @@
+################################################################################
+ #  Copyright (C) 2024 Intel Corporation
+ #
+ #  Licensed under the Apache License, Version 2.0 (the "License");
+ #  you may not use this file except in compliance with the License.
+ #  You may obtain a copy of the License at
+ #
+ #  http://www.apache.org/licenses/LICENSE-2.0
+ #
+ #  Unless required by applicable law or agreed to in writing,
+ #  software distributed under the License is distributed on an "AS IS" BASIS,
+ #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ #  See the License for the specific language governing permissions
+ #  and limitations under the License.
+ #
+ #
+ #  SPDX-License-Identifier: Apache-2.0
+################################################################################
+"""BF Runtime client benchmarks against the in-process fake server of tests/
+
+Usage:
+    python benchmarks/bench_client.py [-n COUNT] [--delay SEC] [BENCHMARK ...]
+
+bfrt_grpc is generated from bfruntime.proto in a temporary directory, so
+grpcio-tools has to be installed. --delay adds a fixed service time to every
+Write to stand in for the round trip to a switch.
+"""
+import argparse
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "tests"))
+import build_bfrt_grpc  # noqa: E402
+
+
+def report(name, label, count, elapsed):
+    print("%-6s %-28s %8d entries %8.2f s %10.0f entries/s"
+          % (name, label, count, elapsed, count / elapsed))
+
+
+def bench_bulk(client, fake, args, count=20000):
+    """entry_add per entry against entry_write_bulk"""
+    servicer = fake.FakeBfRuntime(write_delay=args.delay)
+    server, addr = fake.serve(servicer)
+    intf = client.ClientInterface(addr, client_id=0, device_id=0,
+                                  perform_subscribe=False)
+    table = intf.bfrt_info_get(fake.P4_NAME).table_get("pipe.Ingress.t")
+    target = client.Target()
+
+    def entries(base):
+        for i in range(base, base + count):
+            yield (table.make_key([client.KeyTuple("hdr.ipv4.dst", i)]),
+                   table.make_data([client.DataTuple("port", i % 512)],
+                                   "Ingress.fwd"))
+
+    start = time.time()
+    for key, data in entries(0):
+        table.entry_add(target, [key], [data])
+    report("bulk", "entry_add", count, time.time() - start)
+    for chunk_size, max_in_flight in ((1000, 1), (1000, 4), (100, 4)):
+        result = table.entry_write_bulk(target, entries(count),
+                                        chunk_size=chunk_size,
+                                        max_in_flight=max_in_flight)
+        assert not result.errors
+        report("bulk", "entry_write_bulk %d/%d" % (chunk_size, max_in_flight),
+               result.entries, result.elapsed)
+    intf.channel.close()
+    server.stop(None)
+
+
+def bench_read(client, fake, args, count=100000):
+    """entry_get against entry_get_iterator. Peak RSS only grows, so the
+    modes run from the expected smallest to the largest footprint
+    """
+    servicer = fake.FakeBfRuntime(entries=count)
+    server, addr = fake.serve(servicer)
+    intf = client.ClientInterface(addr, client_id=0, device_id=0,
+                                  perform_subscribe=False)
+    table = intf.bfrt_info_get(fake.P4_NAME).table_get("pipe.Ingress.t")
+    target = client.Target()
+
+    def lazy_field():
+        for entry in table.entry_get_iterator(target):
+            yield entry.data_field_get("port")
+
+    def lazy_raw():
+        for entry in table.entry_get_iterator(target):
+            yield entry.key_raw_get(), entry.data_raw_get()
+
+    def eager():
+        for data, key in table.entry_get(target):
+            yield key.to_dict(), data.to_dict()
+
+    for label, walk in (("entry_get_iterator field", lazy_field),
+                        ("entry_get_iterator raw", lazy_raw),
+                        ("entry_get to_dict", eager)):
+        start = time.time()
+        first = None
+        entries = 0
+        for _ in walk():
+            if first is None:
+                first = time.time() - start
+            entries += 1
+        report("read", label, entries, time.time() - start)
+        print("%-6s %-28s first entry %.3f s, peak RSS %d MB"
+              % ("", "", first,
+                 resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024))
+    intf.channel.close()
+    server.stop(None)
+
+
+BENCHMARKS = {
+    "bulk": bench_bulk,
+    "read": bench_read,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int,
+                        help="entries, each benchmark has a default")
+    parser.add_argument("--delay", type=float, default=0,
+                        help="seconds added to every Write on the server")
+    parser.add_argument("benchmarks", nargs="*",
+                        help="one of %s" % ", ".join(sorted(BENCHMARKS)))
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error("unknown benchmark(s): %s" % ", ".join(sorted(unknown)))
+
+    pkg_dir = tempfile.mkdtemp(prefix="bfrt_grpc_pkg")
+    try:
+        if not build_bfrt_grpc.build(pkg_dir):
+            sys.exit("grpcio-tools and googleapis-common-protos are required")
+        sys.path.insert(0, pkg_dir)
+        from bfrt_grpc import client
+        client.logger.setLevel("WARNING")
+        import fake_bfruntime
+        for name in args.benchmarks or sorted(BENCHMARKS):
+            if args.count:
+                BENCHMARKS[name](client, fake_bfruntime, args, args.count)
+            else:
+                BENCHMARKS[name](client, fake_bfruntime, args)
+    finally:
+        shutil.rmtree(pkg_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+################################################################################
+ #  Copyright (C) 2024 Intel Corporation
+ #
+ #  Licensed under the Apache License, Version 2.0 (the "License");
+ #  you may not use this file except in compliance with the License.
+ #  You may obtain a copy of the License at
+ #
+ #  http://www.apache.org/licenses/LICENSE-2.0
+ #
+ #  Unless required by applicable law or agreed to in writing,
+ #  software distributed under the License is distributed on an "AS IS" BASIS,
+ #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ #  See the License for the specific language governing permissions
+ #  and limitations under the License.
+ #
+ #
+ #  SPDX-License-Identifier: Apache-2.0
+################################################################################
+"""bf-rt.json parsing and table metadata lookup benchmark
+
+Usage:
+    python benchmarks/bench_info_parse.py [-n COUNT] [--tables N] [--actions N]
+                                          [--used N]
+
+A synthetic bf-rt.json is parsed with BfRtInfoParser. Every table has two key
+fields, --actions actions of four data fields each, and common data fields
+next to a container of fields as register and counter tables have. Then
+COUNT lookups are spread over the first --used tables, as a test encoding and
+decoding entries of a few tables does:
+  action field   id, size and type of a data field by name, with the action
+  common field   the same for a common data field, with an action given
+  container      the same for a field of the container
+  by id          data field name by ID, with the action
+Only the BfRtInfoParser and _TableInfo interfaces are used, so the script can
+be run against older versions of info_parse.py to compare.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                ".."))
+from info_parse import BfRtInfoParser  # noqa: E402
+
+NON_P4_JSON = json.dumps({"tables": []}).encode()
+
+
+def _field(name, field_id, width):
+    return {"mandatory": False, "read_only": False, "singleton": {
+        "id": field_id, "name": name, "repeated": False,
+        "type": {"type": "bytes", "width": width}}}
+
+
+def make_table(idx, num_actions):
+    actions = []
+    for act in range(num_actions):
+        actions.append({
+            "id": 0x20000000 + idx * 64 + act,
+            "name": "SwitchIngress.t%d_act%d" % (idx, act),
+            "data": [{"id": field_id, "name": "f%d" % field_id,
+                      "repeated": False,
+                      "type": {"type": "bytes", "width": 8 * field_id}}
+                     for field_id in range(1, 5)]})
+    entries = {"mandatory": False, "read_only": False, "singleton": {
+        "id": 65557, "name": "$entries", "repeated": True, "container": [
+            _field("SwitchIngress.reg%d.f1" % idx, 65558, 32),
+            _field("SwitchIngress.reg%d.f2" % idx, 65559, 32),
+            _field("$COUNTER_SPEC_PKTS", 65560, 64)]}}
+    return {
+        "name": "pipe.SwitchIngress.t%d" % idx,
+        "id": 0x02000000 + idx,
+        "table_type": "MatchAction_Direct",
+        "size": 1024,
+        "annotations": [],
+        "depends_on": [],
+        "has_const_default_action": False,
+        "attributes": ["EntryScope"],
+        "supported_operations": ["SyncCounters"],
+        "key": [
+            {"id": 1, "name": "hdr.ipv4.dst_addr", "repeated": False,
+             "annotations": [], "mandatory": False, "match_type": "Exact",
+             "type": {"type": "bytes", "width": 32}},
+            {"id": 2, "name": "$MATCH_PRIORITY", "repeated": False,
+             "annotations": [], "mandatory": False, "match_type": "Exact",
+             "type": {"type": "uint32"}}],
+        "action_specs": actions,
+        "data": [_field("$COUNTER_SPEC_BYTES", 65553, 64),
+                 _field("$ENTRY_TTL", 65554, 32),
+                 entries]}
+
+
+def make_bfrt_json(num_tables, num_actions):
+    return json.dumps({"tables": [make_table(idx, num_actions)
+                                  for idx in range(num_tables)]}).encode()
+
+
+def lookups(tables, num_actions, count):
+    """@return (label, function running count lookups) of each scenario"""
+
+    def metadata(field_name, action_name):
+        def run():
+            for idx in range(count):
+                table = tables[idx % len(tables)]
+                name = field_name(table, idx)
+                action = action_name(table, idx)
+                table.data_field_id_get(name, action)
+                table.data_field_size_get(name, action)
+                table.data_field_type_get(name, action)
+        return run
+
+    def action_name(table, idx):
+        return table.action_name_list_get()[idx % num_actions]
+
+    def by_id():
+        for idx in range(count):
+            table = tables[idx % len(tables)]
+            table.data_field_name_get(1 + idx % 4, action_name(table, idx))
+
+    return (
+        ("action field",
+         metadata(lambda table, idx: "f%d" % (1 + idx % 4), action_name)),
+        ("common field",
+         metadata(lambda table, idx: "$ENTRY_TTL", action_name)),
+        ("container",
+         metadata(lambda table, idx: "$COUNTER_SPEC_PKTS",
+                  lambda table, idx: None)),
+        ("by id", by_id),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=100000)
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--actions", type=int, default=8)
+    parser.add_argument("--used", type=int, default=10,
+                        help="tables the lookups go to")
+    args = parser.parse_args()
+
+    bfrt_json = make_bfrt_json(args.tables, args.actions)
+    elapsed = []
+    for _ in range(3):
+        start = time.time()
+        info = BfRtInfoParser(bfrt_json, NON_P4_JSON)
+        elapsed.append(time.time() - start)
+    print("%-14s %5d tables %10.3f s" % ("parse", args.tables, min(elapsed)))
+
+    tables = [info.table_info_dict_get()["pipe.SwitchIngress.t%d" % idx]
+              for idx in range(min(args.used, args.tables))]
+    for label, run in lookups(tables, args.actions, args.count):
+        start = time.time()
+        run()
+        elapsed = time.time() - start
+        print("%-14s %5d tables %10.3f s %10.0f lookups/s"
+              % (label, len(tables), elapsed, args.count / elapsed))
+
+
+if __name__ == "__main__":
+    main()
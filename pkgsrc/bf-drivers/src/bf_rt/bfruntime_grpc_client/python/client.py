@@ -44,7 +44,7 @@ import six
 import google.rpc.status_pb2 as status_pb2
 import google.rpc.code_pb2 as code_pb2
 
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from functools import total_ordering
 import codecs
 import binascii
@@ -391,6 +391,16 @@ class ClientInterface:
             except grpc.RpcError as e:
                 raise BfruntimeReadWriteRpcException(e)
 
+        def _write_future(self, req, metadata=None):
+            """@brief Internal Send Write req to the client without waiting for
+                the response
+                @param Request to be sent
+                @param metadata : optional metadata to send with write request
+                @return grpc.Future of the WriteResponse
+            """
+            req.client_id = self.client_id
+            return self.stub.Write.future(req, metadata=metadata)
+
         def _read(self, req, metadata=None):
             """@brief Internal Send Read req to the client
                 @param Request to be sent
@@ -402,8 +412,17 @@ class ClientInterface:
             except grpc.RpcError as e:
                 raise BfruntimeReadWriteRpcException(e)
 
+    # Types of the StreamMessageResponse "update" oneof, each one is routed to
+    # a queue of its own by the stream receive thread
+    STREAM_MESSAGE_TYPES = ("subscribe", "digest", "idle_timeout_notification",
+            "port_status_change_notification",
+            "set_forwarding_pipeline_config_response",
+            "selector_update_change_notification")
+    STREAM_OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest")
+
     def __init__(self, grpc_addr, client_id, device_id,
-            notifications=None, timeout=1, num_tries=5, perform_subscribe=True):
+            notifications=None, timeout=1, num_tries=5, perform_subscribe=True,
+            stream_queue_size=0, stream_overflow_policy="block"):
         """@brief The ClientInterface object requires both of the endpoints' info like
             remote-switch address and self's client_id, device_id . Init will lay the
             groundwork to connect to a remote-switch like creating an insecure_channel
@@ -421,12 +440,22 @@ class ClientInterface:
             @param perform_subscribe If the client wants to subscribe for
             notifications Default = True
             @param timeout Max timeout to wait for for subscribe message to succeed
+            @param stream_queue_size Max number of messages kept in the queue of
+            each stream message type. Default = 0 (unbounded)
+            @param stream_overflow_policy What to do with a message whose queue
+            is full: "block" the stream until there is room, "drop_oldest"
+            queued message or "drop_newest" (the incoming one).
+            Default = "block"
             @exception RuntimeError If failed to subscribe within num_tries
+            @exception ValueError On an unknown stream_overflow_policy
         """
         # If subscribe not requested, there should be no notifications
         if not perform_subscribe and notifications:
             raise RuntimeError("Notifications should not be provided if subscribe not \
                 requested")
+        if stream_overflow_policy not in self.STREAM_OVERFLOW_POLICIES:
+            raise ValueError("Invalid stream_overflow_policy %s, expected one of %s"
+                    % (stream_overflow_policy, ", ".join(self.STREAM_OVERFLOW_POLICIES)))
 
         self.is_independent = not perform_subscribe
         self.client_id = client_id
@@ -441,9 +470,21 @@ class ClientInterface:
         self.stub = bfruntime_pb2_grpc.BfRuntimeStub(self.channel)
         self.reader_writer_interface = self._ReaderWriterInterface(self.stub, self.client_id)
         self.stream_out_q = q.Queue()
-        self.stream_in_q = q.Queue()
+        # Messages of a type this client does not know about
+        self.stream_in_q = q.Queue(stream_queue_size)
         self.exception_q = q.Queue()
-        self.digest_q = q.Queue()
+        self.digest_q = q.Queue(stream_queue_size)
+        self.stream_overflow_policy = stream_overflow_policy
+        self._stream_queues = {}
+        for type_ in self.STREAM_MESSAGE_TYPES:
+            self._stream_queues[type_] = q.Queue(stream_queue_size)
+        self._stream_queues["digest"] = self.digest_q
+        self._stream_callbacks = {}
+        # Number of messages dropped per type because their queue was full
+        self.stream_drop_count = {}
+        # Bumped on every SetForwardingPipelineConfig response received on the
+        # stream, i.e. whenever the pipeline config of the device may change
+        self.pipeline_config_generation = 0
         # Subscribe
         if perform_subscribe:
             self.set_up_stream()
@@ -455,7 +496,8 @@ class ClientInterface:
     def __del__(self):
         """@brief Deletes the stream explicitly while destroying this object
         """
-        if not self.is_independent:
+        # __init__ may have raised on its arguments before setting it up
+        if not getattr(self, "is_independent", True):
             self.tear_down_stream()
 
     def bind_pipeline_config(self, p4_name):
@@ -751,26 +793,81 @@ class ClientInterface:
         self.is_independent = True
         self.channel.close()
 
+    def register_stream_callback(self, type_, callback):
+        """@brief Have callback(msg) called for every incoming stream message of
+            a type instead of queueing it. Callbacks run on the stream receive
+            thread, they must not block and should hand heavy work off to
+            another thread.
+            @param type_ Stream message type, one of STREAM_MESSAGE_TYPES
+            @param callback Callable taking the StreamMessageResponse
+            @exception ValueError On an unknown message type
+        """
+        if type_ not in self._stream_queues:
+            raise ValueError("Invalid stream message type %s" % type_)
+        self._stream_callbacks[type_] = callback
+
+    def unregister_stream_callback(self, type_):
+        """@brief Go back to queueing the stream messages of a type
+            @param type_ Stream message type, one of STREAM_MESSAGE_TYPES
+        """
+        self._stream_callbacks.pop(type_, None)
+
+    def _dispatch_stream_message(self, msg):
+        """@brief Route a msg received on the stream to the callback or the
+            queue of its type, applying the overflow policy
+        """
+        type_ = msg.WhichOneof("update")
+        if type_ == "set_forwarding_pipeline_config_response":
+            self.pipeline_config_generation += 1
+        callback = self._stream_callbacks.get(type_)
+        if callback is not None:
+            try:
+                callback(msg)
+            except Exception:
+                logger.exception("Stream callback for %s failed", type_)
+            return
+        queue = self._stream_queues.get(type_, self.stream_in_q)
+        if self.stream_overflow_policy == "block":
+            queue.put(msg)
+            return
+        while True:
+            try:
+                queue.put_nowait(msg)
+                return
+            except q.Full:
+                self.stream_drop_count[type_] = \
+                        self.stream_drop_count.get(type_, 0) + 1
+                if self.stream_overflow_policy == "drop_newest":
+                    return
+                try:
+                    queue.get_nowait()
+                except q.Empty:
+                    pass
+
+    def flush_stream_queues(self):
+        """@brief Drop all the stream messages received but not read yet
+            @return Number of messages dropped
+        """
+        count = 0
+        for queue in list(self._stream_queues.values()) + [self.stream_in_q]:
+            while True:
+                try:
+                    queue.get_nowait()
+                except q.Empty:
+                    break
+                count += 1
+        return count
+
     def _get_stream_message(self, type_, timeout=1):
-        """@brief Get a msg of a certain type from the in_queue
+        """@brief Get a msg of a certain type from the queue of that type
         """
-        start = time.time()
+        queue = self._stream_queues.get(type_)
+        if queue is None:
+            logger.error("Invalid stream message type %s", type_)
+            return None
         try:
-            while True:
-                remaining = timeout - (time.time() - start)
-                if remaining < 0:
-                    break
-                if type_ == "digest":
-                    msg = self.digest_q.get(timeout=remaining)
-                else:
-                    msg = self.stream_in_q.get(timeout=remaining)
-                    if not msg.HasField(type_):
-                        # Put the msg back in for someone else to read
-                        # TODO make separate queues for each msg type
-                        self.stream_in_q.put(msg)
-                        continue
-                return msg
-        except:  # timeout expired
+            return queue.get(timeout=max(timeout, 0))
+        except q.Empty:  # timeout expired
             pass
         return None
 
@@ -838,10 +935,7 @@ class ClientInterface:
         def _stream_recv(stream):
             try:
                 for p in stream:
-                    if p.HasField("digest"):
-                        self.digest_q.put(p)  #modified to better handle digest
-                    else:
-                       self.stream_in_q.put(p)
+                    self._dispatch_stream_message(p)
             except grpc.RpcError as e:
                 self.exception_q.put(BfruntimeSubscribeRpcException(e))
 
@@ -941,6 +1035,44 @@ class Notifications:
         self.enable_entry_active_notifications = enable_entry_active
         self.enable_selector_update_change_notifications = enable_selector_update_change
 
+class BulkWriteResult:
+    """@brief Outcome of a _Table.entry_write_bulk call
+    """
+    def __init__(self):
+        self.entries = 0
+        self.chunks = 0
+        self.elapsed = 0.0
+        # List of (index of the first entry of the chunk, number of entries in
+        # the chunk, BfruntimeRpcException) of every chunk which failed
+        self.errors = []
+
+    def entries_per_sec(self):
+        """@brief Achieved write rate, failed entries included
+        """
+        if self.elapsed <= 0:
+            return 0.0
+        return self.entries / self.elapsed
+
+    def failed_indices(self):
+        """@brief Indices (in the input iterable) of the entries which failed.
+            All the entries of a chunk are reported when the server did not
+            send per entry errors.
+            @return sorted list of int
+        """
+        indices = []
+        for chunk_start, chunk_len, error in self.errors:
+            sub_errors = error.sub_errors_get()
+            if sub_errors:
+                indices.extend(chunk_start + idx for idx, _ in sub_errors)
+            else:
+                indices.extend(range(chunk_start, chunk_start + chunk_len))
+        return sorted(indices)
+
+    def __str__(self):
+        return "%d entries in %d chunks, %.3fs (%.0f entries/s), %d failed chunks" \
+                % (self.entries, self.chunks, self.elapsed,
+                   self.entries_per_sec(), len(self.errors))
+
 @total_ordering
 class DataTuple:
     """@brief Class to create a DataTuple. Apart from the name, only one of them can be set at
@@ -1894,12 +2026,154 @@ class _GetParser:
         except grpc.RpcError as e:
             raise BfruntimeReadWriteRpcException(e)
 
+    def _parse_entry_get_response_lazy(self, response, metadata=None):
+        try:
+            for rep in response:
+                for entity in rep.entities:
+                    table_entry = entity.table_entry
+                    # Same filtering as _parse_entry_get_response, default
+                    # entry data is not returned by a regular get
+                    if not table_entry.HasField("key") and \
+                            (table_entry.is_default_entry or
+                             not table_entry.HasField("data")):
+                        continue
+                    yield _ReadEntry(self, table_entry)
+
+                if metadata is not None and ("error_in_resp", "1") in metadata:
+                    if self._status_has_error(rep.status):
+                        raise BfruntimeErrorInResponseException(rep.status)
+
+        except grpc.RpcError as e:
+            raise BfruntimeReadWriteRpcException(e)
+
     def _status_has_error(self, status):
         for error in status:
             if error.canonical_code != code_pb2.OK:
                 return True
         return False
 
+class _ReadEntry:
+    """@brief Class _ReadEntry (Partially internal). Objects of this class are returned by
+        _Table.entry_get_iterator(), one per entry received. The entry is kept as the
+        received protobuf message and its key, data and target are only converted to
+        _Key, _Data and Target objects on the first call to key_get(), data_get()
+        and target_get(). key_raw_get() and data_raw_get() return the field values
+        as sent by the server, without any conversion.
+    """
+    def __init__(self, get_parser, table_entry):
+        """@brief Internal. Created by _GetParser
+            @param get_parser _GetParser of the table which was read
+            @param table_entry TableEntry protobuf message
+        """
+        self.get_parser = get_parser
+        self.table_entry = table_entry
+        self.is_default_entry = table_entry.is_default_entry
+        self._key = None
+        self._data = None
+        self._action_name = None
+
+    def key_get(self):
+        """@brief Get the key of the entry
+            @return _Key object. None if the entry has no key
+        """
+        if self._key is None and self.table_entry.HasField("key"):
+            self._key = self.get_parser._parse_key(self.table_entry.key)
+            assert self.table_entry.table_id == self._key.table.info.id_get(),\
+            "Table ids do not match, table ID received %d, table ID of key obj = %d"\
+            %(self.table_entry.table_id, self._key.table.info.id_get())
+        return self._key
+
+    def _has_data(self):
+        # Like entry_get(), the data of a default entry is not returned by a
+        # regular get even when the server sends it along with a key
+        return self.table_entry.HasField("data") and not self.is_default_entry
+
+    def data_get(self):
+        """@brief Get the data of the entry
+            @return _Data object. None if the entry has no data
+        """
+        if self._data is None and self._has_data():
+            self._data = self.get_parser._parse_data(self.table_entry.data,
+                    self.is_default_entry)
+            assert self.table_entry.table_id == self._data.obj.info.id_get(),\
+            "Table ids do not match, table ID received %d, table ID of data obj = %d"\
+            %(self.table_entry.table_id, self._data.obj.info.id_get())
+        return self._data
+
+    def target_get(self):
+        """@brief Get the target of the entry, only sent by the server for
+            asymmetric entries
+            @return Target object. None if the entry has no target
+        """
+        if not self.table_entry.HasField("entry_tgt"):
+            return None
+        return self.get_parser._parse_target(self.table_entry.entry_tgt)
+
+    def action_name_get(self):
+        """@brief Get the action name of the entry without decoding the data
+            @return Action name. None if the entry has no action
+        """
+        if self._action_name is None and self._has_data() and \
+                self.table_entry.data.action_id != 0:
+            self._action_name = self.get_parser.obj.info.action_name_get(
+                    self.table_entry.data.action_id)
+        return self._action_name
+
+    def data_field_get(self, field_name):
+        """@brief Decode a single data field of the entry
+            @param field_name Field name
+            @return DataTuple. None if the field was not received
+            @exception KeyError on Not finding the field in the table
+        """
+        if not self._has_data():
+            return None
+        action_name = self.action_name_get()
+        field_id = self.get_parser.obj.info.data_field_id_get(field_name, action_name)
+        for field in self.table_entry.data.fields:
+            if field.field_id == field_id:
+                return self.get_parser._parse_data_field(field, action_name)
+        return None
+
+    def key_raw_get(self):
+        """@brief Get the key fields as received
+            @return Dictionary (field_names -> bytes). The value of a ternary field is a
+            (value, mask) tuple, of an LPM field (value, prefix_len), of a range field
+            (low, high) and of an optional field (value, is_valid)
+        """
+        info = self.get_parser.obj.info
+        ret_dict = {}
+        for key_field in self.table_entry.key.fields:
+            name = info.key_field_name_get(key_field.field_id)
+            match_type = key_field.WhichOneof("match_type")
+            if match_type == "exact":
+                ret_dict[name] = key_field.exact.value
+            elif match_type == "ternary":
+                ret_dict[name] = (key_field.ternary.value, key_field.ternary.mask)
+            elif match_type == "lpm":
+                ret_dict[name] = (key_field.lpm.value, key_field.lpm.prefix_len)
+            elif match_type == "range":
+                ret_dict[name] = (key_field.range.low, key_field.range.high)
+            elif match_type == "optional":
+                ret_dict[name] = (key_field.optional.value, key_field.optional.is_valid)
+        return ret_dict
+
+    def data_raw_get(self):
+        """@brief Get the data fields as received. Containers are not expanded.
+            @return Dictionary (field_names -> value). Byte stream fields are bytes,
+            others are the protobuf value of the field
+        """
+        info = self.get_parser.obj.info
+        action_name = self.action_name_get()
+        ret_dict = {}
+        if not self._has_data():
+            return ret_dict
+        for field in self.table_entry.data.fields:
+            name = info.data_field_name_get(field.field_id, action_name)
+            value_type = field.WhichOneof("value")
+            if value_type is not None:
+                ret_dict[name] = getattr(field, value_type)
+        return ret_dict
+
 class _Table:
     """@brief Class _Table (Partially internal). Objects of this class are created during BfRtInfo Parsing and do not need
         to be created separately. These objects can be queried from a _BfRtInfo class using a table_get()
@@ -2114,6 +2388,92 @@ class _Table:
             None, bfruntime_pb2.Update.RESET, entry_tgt_list=entry_tgt_list), metadata)
         return self.get_parser._parse_entry_write_response(resp, metadata=metadata)
 
+    def entry_write_bulk(self, target, entries,
+            update_type=bfruntime_pb2.Update.INSERT, chunk_size=1000,
+            max_in_flight=4, flags=None,
+            atomicity=bfruntime_pb2.WriteRequest.CONTINUE_ON_ERROR,
+            p4_name=None, metadata=None):
+        """@brief Write a large number of table entries. The entries are
+            split in WriteRequests of chunk_size updates and up to
+            max_in_flight requests are kept outstanding, so the throughput is
+            not bound by the round trip time of each request. Failures do not
+            stop the write, they are reported per chunk in the result.
+            @param target target device
+            @param entries Iterable of (key, data) or (key, data, entry_tgt)
+            tuples. data is None for deletes.
+            @param update_type bfruntime_pb2.Update type. Default is INSERT
+            @param chunk_size Number of entries per WriteRequest. Default = 1000
+            @param max_in_flight Max number of WriteRequests waiting for a
+            response. Default = 4
+            @param flags dictionary of modify flags.
+            @param atomicity Defines atomicity of each WriteRequest. Default is
+            CONTINUE_ON_ERROR
+            @param p4_name string containing name of P4 with which to communicate
+            optional for subscribed clients, it is mainly used for independent clients
+            who want to communicate with a p4 without having to subscribe
+            @param metadata : optional metadata to send with each write request
+            @return BulkWriteResult
+            @exception ValueError If chunk_size or max_in_flight is not positive
+        """
+        if chunk_size < 1 or max_in_flight < 1:
+            raise ValueError("chunk_size and max_in_flight must be positive")
+
+        result = BulkWriteResult()
+        in_flight = deque()
+
+        def _send(chunk):
+            req = bfruntime_pb2.WriteRequest()
+            if p4_name:
+                req.p4_name = p4_name
+            _cpy_target(req, target)
+            req.atomicity = atomicity
+            key_list = [entry[0] for entry in chunk]
+            data_list = [entry[1] for entry in chunk]
+            entry_tgt_list = None
+            if any(len(entry) > 2 for entry in chunk):
+                entry_tgt_list = [entry[2] if len(entry) > 2 else None
+                        for entry in chunk]
+            self._entry_write_req_make(req, key_list, data_list, update_type,
+                    flags=flags, entry_tgt_list=entry_tgt_list)
+            in_flight.append((result.entries, len(chunk),
+                    self.reader_writer_interface._write_future(req, metadata)))
+            result.entries += len(chunk)
+            result.chunks += 1
+
+        def _collect():
+            chunk_start, chunk_len, future = in_flight.popleft()
+            try:
+                resp = future.result()
+            except grpc.RpcError as e:
+                result.errors.append((chunk_start, chunk_len,
+                        BfruntimeReadWriteRpcException(e)))
+                return
+            if self.get_parser._status_has_error(resp.status):
+                result.errors.append((chunk_start, chunk_len,
+                        BfruntimeErrorInResponseException(resp.status)))
+
+        start = time.time()
+        chunk = []
+        for entry in entries:
+            chunk.append(entry)
+            if len(chunk) == chunk_size:
+                if len(in_flight) == max_in_flight:
+                    _collect()
+                _send(chunk)
+                chunk = []
+        if chunk:
+            if len(in_flight) == max_in_flight:
+                _collect()
+            _send(chunk)
+        while in_flight:
+            _collect()
+        result.elapsed = time.time() - start
+        if result.errors:
+            logger.error("Bulk write failed for %d of %d entries in %d chunks",
+                    len(result.failed_indices()), result.entries,
+                    len(result.errors))
+        return result
+
     def default_entry_set(self, target, data, p4_name=None, metadata=None):
         """ @brief Set default entry
             @param target target device
@@ -2238,6 +2598,38 @@ class _Table:
         return self.get_parser._parse_entry_get_response(resp, metadata=metadata)
 
 
+    def entry_get_iterator(self, target,
+            key_list=None, flags={"from_hw":True}, required_data=None, handle=None, p4_name=None, metadata=None,
+            entry_tgt_list=None):
+        """@brief Get table entries without decoding them. Same as entry_get() except
+            that entries are yielded as _ReadEntry objects, as each ReadResponse arrives,
+            and their key and data are only decoded when accessed. This is the cheaper
+            way to walk a large table when only a few fields of each entry are needed, or
+            when comparing raw field values with key_raw_get() and data_raw_get().
+            @param target target device
+            @param key_list List of Keys. In other words, List of list of KeyTuples.
+            @param flags dictionary of read flags.
+            @param required_data (optional) Data object containing info regarding
+            data fields and actions which are of interest. See entry_get()
+            @param metadata : optional metadata to send with read request
+            @param p4_name string containing name of P4 with which to communicate
+            optional for subscribed clients, it is mainly used for independent clients
+            who want to communicate with a p4 without having to subscribe
+            @param handle : optional entry handle to fetch entry by handle.
+            @param entry_tgt_list List of entry_tgts.
+            Used for specifying target at entry level for asymmetric tables.
+
+            @return A generator object of _ReadEntry
+        """
+
+        req = bfruntime_pb2.ReadRequest()
+        if p4_name:
+            req.p4_name = p4_name
+        _cpy_target(req, target)
+        resp = self.reader_writer_interface._read(self._entry_read_req_make(req, key_list, flags,
+            required_data, False, handle, entry_tgt_list=entry_tgt_list), metadata)
+        return self.get_parser._parse_entry_get_response_lazy(resp, metadata=metadata)
+
     def usage_get(self, target, p4_name=None, metadata=None, flags={"from_hw":True}):
         """@brief Get current usage of the table
             @param target target device
@@ -2951,6 +3343,29 @@ class _BfRtInfo:
     def __str__(self):
         return self.parsed_info.__str__()
 
+    def clear_client_annotations(self):
+        """@brief Remove all the custom annotations added with key_field_annotation_add
+            and data_field_annotation_add on the tables and learn objects
+        """
+        def _clear(annotations):
+            annotations[:] = [a for a in annotations if a.name != "$client_annotation"]
+
+        def _clear_data_dict(data_dict):
+            if data_dict is None:
+                return
+            for data_ in list(data_dict.values()):
+                _clear(data_.annotations)
+                _clear_data_dict(data_.container_dict)
+
+        for table_info in list(self.parsed_info.table_info_dict_get().values()):
+            for key_ in list(table_info.key_dict.values()):
+                _clear(key_.annotations)
+            for action_ in list(table_info.action_dict.values()):
+                _clear_data_dict(action_.data_dict)
+            _clear_data_dict(table_info.data_dict)
+        for learn_info in list(self.parsed_info.learn_info_dict_get().values()):
+            _clear_data_dict(learn_info.data_dict)
+
     def key_from_idletime_notification(self, idletimeout_notification_message):
         entry = idletimeout_notification_message.table_entry
         table_id = entry.table_id
@@ -61,6 +61,33 @@ def _create_allname_dict(parent_name_dict, canonical_dict):
         parent_name_dict.pop(name, None)
 
 
+def _create_data_field_index(data_dict, data_dict_allname):
+    """@brief Flatten a data dictionary and the containers within it into
+        (name -> list of _DataInfo) and (field ID -> name) maps. A field of
+        this level hides fields of the same name or ID in its containers.
+        Otherwise, container fields are listed in dictionary order, so
+        lookups return what a depth first walk of the dictionaries would.
+    """
+    name_index = {}
+    id_index = {}
+    for field_name_, field_ in list(data_dict.items()):
+        if field_.container_dict is None:
+            continue
+        container_name_index, container_id_index = _create_data_field_index(
+                field_.container_dict, field_.container_dict_allname)
+        for name, fields in list(container_name_index.items()):
+            name_index.setdefault(name, []).extend(fields)
+        for field_id, name in list(container_id_index.items()):
+            id_index.setdefault(field_id, name)
+    for name, canonical_name in list(data_dict_allname.items()):
+        name_index[name] = [data_dict[canonical_name]]
+    level_id_index = {}
+    for field_name_, field_ in list(data_dict.items()):
+        level_id_index.setdefault(field_.id, field_.name)
+    id_index.update(level_id_index)
+    return name_index, id_index
+
+
 class _TableInfo:
     """ @brief Class _TableInfo (Partially internal). Objects of this class are created during BfRtInfo parsing.
         It contains all metadata information related to a Table. Objects of _TableInfo are
@@ -87,6 +114,14 @@ class _TableInfo:
         self.data_dict = {}
         self.data_dict_allname = {}
 
+        # Flat lookup indexes built by _create_index() on the first lookup,
+        # once the dictionaries above are filled. The data field ones are
+        # keyed by (canonical action name or None, field name or ID)
+        self.action_id_index = None
+        self.key_id_index = None
+        self.data_field_name_index = None
+        self.data_field_id_index = None
+
         self.id = table_id
         self.size = size
         self.name = name
@@ -97,6 +132,39 @@ class _TableInfo:
         self.has_const_default_action = has_const_default_action
         self.depends_on = depends_on
 
+    def _create_index(self):
+        """@brief Internal. Build the flat action, key and data field indexes
+            so that lookups by name or ID do not walk the dictionaries. Only
+            the tables which are used pay for it, so it is called by the
+            first lookup rather than when bf-rt.json is parsed
+        """
+        self.action_id_index = {}
+        for action_name_, action_ in list(self.action_dict.items()):
+            self.action_id_index.setdefault(action_.id, action_.name)
+        self.key_id_index = {}
+        for field_name_, key_ in list(self.key_dict.items()):
+            self.key_id_index.setdefault(key_.id, key_.name)
+
+        common_name_index, common_id_index = _create_data_field_index(
+                self.data_dict, self.data_dict_allname)
+        self.data_field_name_index = {}
+        self.data_field_id_index = {}
+        for field_name, fields in list(common_name_index.items()):
+            self.data_field_name_index[(None, field_name)] = fields
+        for field_id, field_name in list(common_id_index.items()):
+            self.data_field_id_index[(None, field_id)] = field_name
+        for action_name, action_ in list(self.action_dict.items()):
+            name_index, id_index = _create_data_field_index(
+                    action_.data_dict, action_.data_dict_allname)
+            # Only the fields of the action are keyed by its name, lookups
+            # fall back to the common data fields. A name lookup returns the
+            # common data fields of the same name as well
+            for field_name, fields in list(name_index.items()):
+                self.data_field_name_index[(action_name, field_name)] = \
+                        fields + common_name_index.get(field_name, [])
+            for field_id, field_name in list(id_index.items()):
+                self.data_field_id_index[(action_name, field_id)] = field_name
+
     def id_get(self):
         """@brief Get Table ID
             @return Table ID
@@ -175,10 +243,11 @@ class _TableInfo:
             @return Action name
             @exception KeyError on Not finding the action ID
         """
-        for action_name_, action_ in list(self.action_dict.items()):
-            if action_id == action_.id:
-                return action_.name
-        raise KeyError("Action ID %n doesn't exist" %(action_id))
+        if self.action_id_index is None:
+            self._create_index()
+        if action_id in self.action_id_index:
+            return self.action_id_index[action_id]
+        raise KeyError("Action ID %d doesn't exist" %(action_id))
 
     def data_field_name_get(self, field_id, action_name=None):
         """@brief Get Data Field name from field ID.
@@ -189,28 +258,16 @@ class _TableInfo:
             @return Field name
             @exception KeyError on Not finding the field ID
         """
-        def _data_field_name_get_helper(dict_to_search, field_id, ret_list):
-            if dict_to_search is None:
-                return False
-            for field_name_, data_ in list(dict_to_search.items()):
-                if data_.id == field_id:
-                    ret_list.append(data_.name)
-                    return True
-            found = False
-            for field_name_, field_ in list(dict_to_search.items()):
-                found |= _data_field_name_get_helper(field_.container_dict, field_id, ret_list)
-            return found
-
-        ret_list = []
+        if self.data_field_id_index is None:
+            self._create_index()
+        canonical_action_name = None
         if action_name is not None:
-            found = _data_field_name_get_helper(
-                    self.action_dict[self.action_dict_allname[action_name]].data_dict,
-                    field_id, ret_list)
-            if found:
-                return ret_list[0]
-        found = _data_field_name_get_helper(self.data_dict, field_id, ret_list)
-        if found:
-            return ret_list[0]
+            canonical_action_name = self.action_dict_allname[action_name]
+        name = self.data_field_id_index.get((canonical_action_name, field_id))
+        if name is None:
+            name = self.data_field_id_index.get((None, field_id))
+        if name is not None:
+            return name
         # Error 404
         if (action_name):
             raise KeyError("Failed to find field %d for action %s in table %s"
@@ -223,26 +280,15 @@ class _TableInfo:
         """@brief returns all fields which satisfy field and action name in a
             list. This is to facilitate duplicate fields in a container scenario
         """
-        def _data_field_get_helper(dict_to_search, name_dict_to_search, field_name):
-            ret_list = []
-            if dict_to_search is None:
-                return []
-            if field_name in name_dict_to_search:
-                return [dict_to_search[name_dict_to_search[field_name]]]
-            for field_name_, field_ in list(dict_to_search.items()):
-                ret_list.extend(_data_field_get_helper(field_.container_dict,
-                    field_.container_dict_allname,
-                    field_name))
-            return ret_list
-
-        field_list = []
+        if self.data_field_name_index is None:
+            self._create_index()
+        canonical_action_name = None
         if action_name is not None:
-            field_list.extend(_data_field_get_helper(
-                self.action_dict[self.action_dict_allname[action_name]].data_dict,
-                self.action_dict[self.action_dict_allname[action_name]].data_dict_allname,
-                field_name))
-        field_list.extend(_data_field_get_helper(self.data_dict, self.data_dict_allname, field_name))
-        if len(field_list) > 0:
+            canonical_action_name = self.action_dict_allname[action_name]
+        field_list = self.data_field_name_index.get((canonical_action_name, field_name))
+        if field_list is None:
+            field_list = self.data_field_name_index.get((None, field_name))
+        if field_list:
             return field_list
         #error 404
         if (action_name):
@@ -460,9 +506,10 @@ class _TableInfo:
             @return Field Name
             @exception KeyError on Not finding the field
         """
-        for field_name_, key_ in list(self.key_dict.items()):
-            if key_.id == field_id:
-                return key_.name
+        if self.key_id_index is None:
+            self._create_index()
+        if field_id in self.key_id_index:
+            return self.key_id_index[field_id]
         raise KeyError("Failed to find %d as key in table %s" % (field_id, self.name))
 
     def key_field_annotations_get(self, field_name):
@@ -531,6 +578,8 @@ class _LearnInfo:
         """
         self.data_dict = {}
         self.data_dict_allname = {}
+        # field ID -> name, built by _create_index()
+        self.data_field_id_index = {}
         self.id = learn_id
         self.name = learn_name
         self.annotations = annotations
@@ -547,15 +596,21 @@ class _LearnInfo:
         """
         return self.id
 
+    def _create_index(self):
+        """@brief Internal. Build the field ID index once data_dict is filled
+        """
+        self.data_field_id_index = {}
+        for field_name_, data_ in list(self.data_dict.items()):
+            self.data_field_id_index.setdefault(data_.id, data_.name)
+
     def data_field_name_get(self, field_id, *unused):
         """@brief Get Data Field name from field ID.
             @param field_id Field ID
             @return Field name
             @exception KeyError on Not finding the field ID
         """
-        for field_name_, data_ in list(self.data_dict.items()):
-            if data_.id == field_id:
-                return data_.name
+        if field_id in self.data_field_id_index:
+            return self.data_field_id_index[field_id]
         raise KeyError("Field %d not found in learn obj %s"%(field_id, self.name_get()))
 
     def _data_field_metadata_get(self, metadata, field_name):
@@ -885,6 +940,7 @@ class BfRtInfoParser:
         for data_json in learn_json["fields"]:
             BfRtInfoParser._parse_data_helper(learn_info.data_dict, data_json)
         _create_allname_dict(learn_info.data_dict_allname, learn_info.data_dict)
+        learn_info._create_index()
         return learn_info
 
     @staticmethod
@@ -0,0 +1,43 @@
+"""Generate the bfrt_grpc package the way the bf_rt CMake rules install it:
+bfruntime_pb2*.py from bfruntime.proto next to client.py and info_parse.py.
+"""
+import os
+import shutil
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLIENT_DIR = os.path.dirname(HERE)
+BF_RT_DIR = os.path.normpath(os.path.join(CLIENT_DIR, "..", ".."))
+THIRD_PARTY_DIR = os.path.normpath(os.path.join(BF_RT_DIR, "..", "..", "third-party"))
+
+
+def build(dst):
+    """@return True if the package could be generated in dst"""
+    try:
+        from grpc_tools import protoc
+        import google.rpc.status_pb2
+    except ImportError:
+        return False
+    pkg = os.path.join(dst, "bfrt_grpc")
+    os.makedirs(pkg)
+    well_known = os.path.join(os.path.dirname(protoc.__file__), "_proto")
+    ret = protoc.main([
+        "protoc",
+        "-I", THIRD_PARTY_DIR,
+        "-I", os.path.join(BF_RT_DIR, "proto"),
+        "-I", well_known,
+        "--python_out", pkg,
+        "--grpc_python_out", pkg,
+        os.path.join(BF_RT_DIR, "proto", "bfruntime.proto")])
+    if ret != 0:
+        return False
+    # Same fixup as the sed command of the CMake rule
+    grpc_py = os.path.join(pkg, "bfruntime_pb2_grpc.py")
+    with open(grpc_py) as f:
+        src = f.read()
+    with open(grpc_py, "w") as f:
+        f.write(src.replace("import bfruntime_pb2 as bfruntime__pb2",
+                            "from . import bfruntime_pb2 as bfruntime__pb2"))
+    for name in ("client.py", "info_parse.py"):
+        shutil.copy(os.path.join(CLIENT_DIR, name), pkg)
+    open(os.path.join(pkg, "__init__.py"), "w").close()
+    return True
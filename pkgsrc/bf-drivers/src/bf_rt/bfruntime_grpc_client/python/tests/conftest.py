@@ -0,0 +1,62 @@
+"""Build the bfrt_grpc package and start an in-process fake BfRuntime
+server for the client tests.
+"""
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+import build_bfrt_grpc
+
+# Test modules importorskip bfrt_grpc.client, so build the package before
+# they are collected
+_PKG_DIR = tempfile.mkdtemp(prefix="bfrt_grpc_pkg")
+if build_bfrt_grpc.build(_PKG_DIR):
+    sys.path.insert(0, _PKG_DIR)
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_PKG_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def fake_server():
+    """Factory starting a FakeBfRuntime, stopped at the end of the test"""
+    import fake_bfruntime
+
+    servers = []
+
+    def start(**kwargs):
+        fake = fake_bfruntime.FakeBfRuntime(**kwargs)
+        server, addr = fake_bfruntime.serve(fake)
+        servers.append((fake, server))
+        return fake, addr
+
+    yield start
+    for fake, server in servers:
+        fake.close()
+        server.stop(None)
+
+
+@pytest.fixture
+def fake_table(fake_server):
+    """Factory starting a FakeBfRuntime and returning it with the _Table of
+    its "pipe.Ingress.t", read through an independent client
+    """
+    from bfrt_grpc import client
+    import fake_bfruntime
+
+    clients = []
+
+    def connect(**kwargs):
+        servicer, addr = fake_server(**kwargs)
+        intf = client.ClientInterface(addr, client_id=0, device_id=0,
+                                      perform_subscribe=False)
+        clients.append(intf)
+        bfrt_info = intf.bfrt_info_get(fake_bfruntime.P4_NAME)
+        return servicer, bfrt_info.table_get("pipe.Ingress.t")
+
+    yield connect
+    for intf in clients:
+        intf.channel.close()
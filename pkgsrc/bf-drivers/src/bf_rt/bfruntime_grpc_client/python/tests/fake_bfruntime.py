@@ -0,0 +1,252 @@
+"""In-process fake of the BfRuntime gRPC service, enough of it to drive
+bfrt_grpc.client against something real over a loopback channel.
+"""
+import json
+import threading
+import time
+from concurrent import futures
+
+import grpc
+from bfrt_grpc import bfruntime_pb2
+from bfrt_grpc import bfruntime_pb2_grpc
+from google.rpc import status_pb2
+
+try:
+    import queue as q
+except ImportError:
+    import Queue as q
+
+
+P4_NAME = "fake"
+TABLE_ID = 100
+ACTION_ID = 7
+# One exact match table "pipe.Ingress.t" keyed on a 32 bit hdr.ipv4.dst with
+# a single action Ingress.fwd(port)
+TABLE_INFO = {
+    "name": "pipe.Ingress.t", "id": TABLE_ID, "table_type": "MatchAction_Direct",
+    "size": 1 << 20, "attributes": [], "supported_operations": [],
+    "key": [{"id": 1, "name": "hdr.ipv4.dst", "match_type": "Exact",
+             "type": {"type": "bytes", "width": 32}}],
+    "action_specs": [{"id": ACTION_ID, "name": "Ingress.fwd", "data": [
+        {"id": 1, "name": "port", "repeated": False,
+         "type": {"type": "bytes", "width": 9}}]}],
+    "data": []}
+BFRT_INFO = json.dumps({"tables": [TABLE_INFO]}).encode()
+
+
+def entry_key(update):
+    """@return The hdr.ipv4.dst of the table entry of an Update as an int"""
+    value = update.entity.table_entry.key.fields[0].exact.value
+    return int.from_bytes(value, "big")
+
+
+def digest_msg(digest_id, list_id=0):
+    msg = bfruntime_pb2.StreamMessageResponse()
+    msg.digest.digest_id = digest_id
+    msg.digest.list_id = list_id
+    return msg
+
+
+def idle_timeout_msg(table_id):
+    msg = bfruntime_pb2.StreamMessageResponse()
+    msg.idle_timeout_notification.table_entry.table_id = table_id
+    return msg
+
+
+def port_status_msg(port_up):
+    msg = bfruntime_pb2.StreamMessageResponse()
+    msg.port_status_change_notification.port_up = port_up
+    return msg
+
+
+def subscribe_msg(device_id=0, code=0):
+    msg = bfruntime_pb2.StreamMessageResponse()
+    msg.subscribe.device_id = device_id
+    msg.subscribe.status.code = code
+    return msg
+
+
+class FakeBfRuntime(bfruntime_pb2_grpc.BfRuntimeServicer):
+    """@brief Servicer answering StreamChannel subscribes, serving BFRT_INFO
+        and recording Write requests
+
+        @param pre_subscribe StreamMessageResponses sent on a subscribe
+        request before the subscribe response itself
+        @param write_delay Seconds each Write takes
+        @param entry_errors Dict of hdr.ipv4.dst to the canonical_code the
+        update of that entry fails with
+        @param errors_in_status Report entry_errors in WriteResponse.status
+        instead of failing the RPC with UNKNOWN and per update details, like
+        the switch does
+        @param unavailable_keys Fail the whole Write with UNAVAILABLE when it
+        carries one of these hdr.ipv4.dst
+        @param entries Number of entries Read returns, entry i has
+        hdr.ipv4.dst i and port i % 512
+        @param default_entry None, "with_key" or "without_key": send a
+        default entry after the entries, with or without a key
+        @param read_batch Entries per ReadResponse
+        @param read_delay Seconds to wait before each ReadResponse
+        @param p4_names Programs on the device, all with BFRT_INFO, in the
+        order GetForwardingPipelineConfig returns them
+    """
+    def __init__(self, pre_subscribe=(), write_delay=0, entry_errors=None,
+                 errors_in_status=False, unavailable_keys=(), entries=0,
+                 default_entry=None, read_batch=1000, read_delay=0,
+                 p4_names=(P4_NAME,)):
+        self.pre_subscribe = list(pre_subscribe)
+        self.subscribed = threading.Event()
+        self.write_delay = write_delay
+        self.entry_errors = dict(entry_errors or {})
+        self.errors_in_status = errors_in_status
+        self.unavailable_keys = set(unavailable_keys)
+        self.entries = entries
+        self.default_entry = default_entry
+        self.read_batch = read_batch
+        self.read_delay = read_delay
+        self.p4_names = list(p4_names)
+        # Number of GetForwardingPipelineConfig requests served
+        self.pipeline_config_gets = 0
+        # p4_name of every BIND request, in arrival order
+        self.binds = []
+        # Number of ReadResponses sent by the last Read
+        self.read_responses = 0
+        # hdr.ipv4.dst of the updates of every Write, in arrival order
+        self.writes = []
+        self.max_writes_in_flight = 0
+        self._writes_in_flight = 0
+        self._streams = []
+        self._lock = threading.Lock()
+
+    def send(self, msg):
+        """@brief Push a StreamMessageResponse on every open stream"""
+        with self._lock:
+            streams = list(self._streams)
+        for out_q in streams:
+            out_q.put(msg)
+
+    def close(self):
+        """@brief End every open stream"""
+        with self._lock:
+            streams, self._streams = self._streams, []
+        for out_q in streams:
+            out_q.put(None)
+
+    def Write(self, request, context):
+        keys = [entry_key(update) for update in request.updates]
+        with self._lock:
+            self.writes.append(keys)
+            self._writes_in_flight += 1
+            self.max_writes_in_flight = max(self.max_writes_in_flight,
+                                            self._writes_in_flight)
+        try:
+            if self.write_delay:
+                time.sleep(self.write_delay)
+        finally:
+            with self._lock:
+                self._writes_in_flight -= 1
+        if self.unavailable_keys.intersection(keys):
+            context.abort(grpc.StatusCode.UNAVAILABLE, "fake unavailable")
+        response = bfruntime_pb2.WriteResponse()
+        if not self.entry_errors.keys() & set(keys):
+            return response
+        errors = []
+        for key in keys:
+            error = bfruntime_pb2.Error()
+            error.canonical_code = self.entry_errors.get(key, 0)
+            errors.append(error)
+        if self.errors_in_status:
+            response.status.extend(errors)
+            return response
+        status = status_pb2.Status(code=grpc.StatusCode.UNKNOWN.value[0])
+        for error in errors:
+            status.details.add().Pack(error)
+        context.set_trailing_metadata(
+            (("grpc-status-details-bin", status.SerializeToString()),))
+        context.abort(grpc.StatusCode.UNKNOWN, "fake entry errors")
+
+    def Read(self, request, context):
+        self.read_responses = 0
+        for start in range(0, self.entries, self.read_batch):
+            response = bfruntime_pb2.ReadResponse()
+            for i in range(start, min(start + self.read_batch, self.entries)):
+                self._add_entry(response, i, i % 512)
+            if self.read_delay:
+                time.sleep(self.read_delay)
+            self.read_responses += 1
+            yield response
+        if self.default_entry is not None:
+            response = bfruntime_pb2.ReadResponse()
+            table_entry = self._add_entry(response, 0, 0,
+                                          self.default_entry == "with_key")
+            table_entry.is_default_entry = True
+            self.read_responses += 1
+            yield response
+
+    @staticmethod
+    def _add_entry(response, key, port, with_key=True):
+        table_entry = response.entities.add().table_entry
+        table_entry.table_id = TABLE_ID
+        if with_key:
+            field = table_entry.key.fields.add()
+            field.field_id = 1
+            field.exact.value = key.to_bytes(4, "big")
+        table_entry.data.action_id = ACTION_ID
+        field = table_entry.data.fields.add()
+        field.field_id = 1
+        field.stream = port.to_bytes(2, "big")
+        return table_entry
+
+    def GetForwardingPipelineConfig(self, request, context):
+        self.pipeline_config_gets += 1
+        response = bfruntime_pb2.GetForwardingPipelineConfigResponse()
+        for p4_name in self.p4_names:
+            config = response.config.add()
+            config.p4_name = p4_name
+            config.bfruntime_info = BFRT_INFO
+        response.non_p4_config.bfruntime_info = b'{"tables": []}'
+        return response
+
+    def SetForwardingPipelineConfig(self, request, context):
+        if request.action == bfruntime_pb2.SetForwardingPipelineConfigRequest.BIND:
+            self.binds.extend(config.p4_name for config in request.config)
+        return bfruntime_pb2.SetForwardingPipelineConfigResponse()
+
+    def StreamChannel(self, request_iterator, context):
+        out_q = q.Queue()
+        with self._lock:
+            self._streams.append(out_q)
+
+        def _recv():
+            try:
+                for req in request_iterator:
+                    if req.HasField("subscribe"):
+                        for msg in self.pre_subscribe:
+                            out_q.put(msg)
+                        out_q.put(subscribe_msg(req.subscribe.device_id))
+                        self.subscribed.set()
+            except grpc.RpcError:
+                pass
+            out_q.put(None)
+
+        recv_thread = threading.Thread(target=_recv)
+        recv_thread.daemon = True
+        recv_thread.start()
+        while True:
+            msg = out_q.get()
+            if msg is None:
+                break
+            yield msg
+        with self._lock:
+            if out_q in self._streams:
+                self._streams.remove(out_q)
+
+
+def serve(servicer):
+    """@brief Start a server for servicer on a free loopback port
+        @return (server, "host:port")
+    """
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    bfruntime_pb2_grpc.add_BfRuntimeServicer_to_server(servicer, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, "127.0.0.1:%d" % port
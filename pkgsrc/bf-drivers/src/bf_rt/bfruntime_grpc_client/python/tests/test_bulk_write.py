@@ -0,0 +1,84 @@
+"""_Table.entry_write_bulk against the fake server: chunking, the in-flight
+limit and mapping server errors back to input indices.
+"""
+import pytest
+
+client = pytest.importorskip("bfrt_grpc.client")
+
+
+def make_entries(table, count):
+    return [(table.make_key([client.KeyTuple("hdr.ipv4.dst", i)]),
+             table.make_data([client.DataTuple("port", i % 512)], "Ingress.fwd"))
+            for i in range(count)]
+
+
+def test_chunking(fake_table):
+    servicer, table = fake_table()
+    entries = make_entries(table, 2500)
+    result = table.entry_write_bulk(client.Target(), iter(entries),
+                                    chunk_size=1000)
+    assert [len(keys) for keys in servicer.writes] == [1000, 1000, 500]
+    assert sum(servicer.writes, []) == list(range(2500))
+    assert (result.entries, result.chunks, result.errors) == (2500, 3, [])
+    assert result.failed_indices() == []
+    assert result.entries_per_sec() > 0
+
+
+def test_chunk_size_divides_input(fake_table):
+    servicer, table = fake_table()
+    result = table.entry_write_bulk(client.Target(), make_entries(table, 20),
+                                    chunk_size=5)
+    assert [len(keys) for keys in servicer.writes] == [5] * 4
+    assert result.chunks == 4
+
+
+def test_empty_input(fake_table):
+    servicer, table = fake_table()
+    result = table.entry_write_bulk(client.Target(), [])
+    assert servicer.writes == []
+    assert (result.entries, result.chunks) == (0, 0)
+
+
+@pytest.mark.parametrize("max_in_flight", [1, 3])
+def test_in_flight_limit(fake_table, max_in_flight):
+    servicer, table = fake_table(write_delay=0.05)
+    table.entry_write_bulk(client.Target(), make_entries(table, 40),
+                           chunk_size=4, max_in_flight=max_in_flight)
+    assert len(servicer.writes) == 10
+    assert servicer.max_writes_in_flight == max_in_flight
+
+
+def test_entry_errors_in_rpc_details(fake_table):
+    servicer, table = fake_table(entry_errors={3: 6, 1002: 6, 1003: 5})
+    result = table.entry_write_bulk(client.Target(), make_entries(table, 2100),
+                                    chunk_size=1000)
+    assert result.chunks == 3
+    assert [chunk_start for chunk_start, _, _ in result.errors] == [0, 1000]
+    assert result.failed_indices() == [3, 1002, 1003]
+    # The chunks after a failed one are still written
+    assert len(servicer.writes) == 3
+
+
+def test_entry_errors_in_response_status(fake_table):
+    servicer, table = fake_table(entry_errors={7: 6, 12: 6},
+                              errors_in_status=True)
+    result = table.entry_write_bulk(client.Target(), make_entries(table, 30),
+                                    chunk_size=10)
+    assert [chunk_start for chunk_start, _, _ in result.errors] == [0, 10]
+    assert result.failed_indices() == [7, 12]
+
+
+def test_failed_chunk_without_details(fake_table):
+    servicer, table = fake_table(unavailable_keys={25})
+    result = table.entry_write_bulk(client.Target(), make_entries(table, 45),
+                                    chunk_size=10)
+    assert result.failed_indices() == list(range(20, 30))
+    assert len(servicer.writes) == 5
+
+
+@pytest.mark.parametrize("kwargs", [{"chunk_size": 0}, {"max_in_flight": 0}])
+def test_invalid_arguments(fake_table, kwargs):
+    servicer, table = fake_table()
+    with pytest.raises(ValueError):
+        table.entry_write_bulk(client.Target(), make_entries(table, 1), **kwargs)
+    assert servicer.writes == []
@@ -0,0 +1,107 @@
+"""_Table.entry_get_iterator against entry_get, on the fake server.
+"""
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+client = pytest.importorskip("bfrt_grpc.client")
+
+
+def test_same_entries_as_entry_get(fake_table):
+    servicer, table = fake_table(entries=2500)
+    eager = list(table.entry_get(client.Target(), flags={"from_hw": False}))
+    lazy = list(table.entry_get_iterator(client.Target(),
+                                         flags={"from_hw": False}))
+    assert len(lazy) == len(eager) == 2500
+    for (data, key), entry in zip(eager, lazy):
+        assert entry.key_get().to_dict() == key.to_dict()
+        assert entry.data_get().to_dict() == data.to_dict()
+        assert entry.action_name_get() == data.action_name == "Ingress.fwd"
+        assert entry.data_field_get("port").val == data["port"].val
+        assert entry.target_get() is None
+    assert lazy[3].key_raw_get() == {"hdr.ipv4.dst": b"\x00\x00\x00\x03"}
+    assert lazy[515].data_raw_get() == {"port": b"\x00\x03"}
+
+
+def test_decode_on_first_use(fake_table):
+    servicer, table = fake_table(entries=1)
+    entry = next(table.entry_get_iterator(client.Target()))
+    assert entry._key is None and entry._data is None
+    key = entry.key_get()
+    assert entry.key_get() is key
+    assert entry._data is None
+    data = entry.data_get()
+    assert entry.data_get() is data
+
+
+def test_default_entry_with_key(fake_table):
+    # entry_get() yields the key of such an entry but not its data
+    servicer, table = fake_table(entries=2, default_entry="with_key")
+    eager = list(table.entry_get(client.Target()))
+    lazy = list(table.entry_get_iterator(client.Target()))
+    assert len(lazy) == len(eager) == 3
+    data, key = eager[2]
+    assert data is None
+    entry = lazy[2]
+    assert entry.is_default_entry
+    assert entry.key_get().to_dict() == key.to_dict()
+    assert entry.data_get() is None
+    assert entry.action_name_get() is None
+    assert entry.data_field_get("port") is None
+    assert entry.data_raw_get() == {}
+
+
+def test_default_entry_without_key(fake_table):
+    servicer, table = fake_table(entries=2, default_entry="without_key")
+    assert len(list(table.entry_get(client.Target()))) == 2
+    assert len(list(table.entry_get_iterator(client.Target()))) == 2
+
+
+def test_first_entry_before_end_of_stream(fake_table):
+    servicer, table = fake_table(entries=2000, read_batch=100, read_delay=0.02)
+    entries = table.entry_get_iterator(client.Target())
+    next(entries)
+    assert servicer.read_responses < 20
+    assert sum(1 for _ in entries) == 1999
+    assert servicer.read_responses == 20
+
+
+PEAK_RSS_SCRIPT = textwrap.dedent("""
+    import resource, sys, time
+    sys.path[:0] = sys.argv[1:3]
+    from bfrt_grpc import client
+    import fake_bfruntime as fake
+    servicer = fake.FakeBfRuntime(entries=int(sys.argv[3]))
+    server, addr = fake.serve(servicer)
+    intf = client.ClientInterface(addr, 0, 0, perform_subscribe=False)
+    table = intf.bfrt_info_get(fake.P4_NAME).table_get("pipe.Ingress.t")
+    list(table.entry_get_iterator(client.Target()))  # warm up, then drop
+    servicer.entries *= 4
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    first = None
+    for entry in table.entry_get_iterator(client.Target()):
+        if first is None:
+            first = time.time() - start
+        entry.data_field_get("port")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(peak - base, first)
+""")
+
+
+def test_peak_rss_and_first_entry(fake_table):
+    # Walking 4x more entries than a warm-up list holds must not grow the
+    # peak RSS of the process by anywhere near the size of that list
+    pytest.importorskip("resource")
+    import fake_bfruntime
+    pkg_dir = os.path.dirname(os.path.dirname(client.__file__))
+    tests_dir = os.path.dirname(fake_bfruntime.__file__)
+    out = subprocess.check_output(
+        [sys.executable, "-c", PEAK_RSS_SCRIPT, pkg_dir, tests_dir, "20000"],
+        stderr=subprocess.DEVNULL)
+    rss_growth_kb, first = out.split()
+    assert int(rss_growth_kb) < 16 * 1024
+    assert float(first) < 1.0
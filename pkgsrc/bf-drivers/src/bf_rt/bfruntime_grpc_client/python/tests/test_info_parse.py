@@ -0,0 +1,218 @@
+"""Data field, key field and action lookups of _TableInfo on a bf-rt.json
+with containers and with common data fields of the same name or ID as
+action data fields.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                ".."))
+from info_parse import BfRtInfoParser  # noqa: E402
+
+
+def _data(name, field_id, width=32, container=None):
+    singleton = {"id": field_id, "name": name, "repeated": container is not None}
+    if container is None:
+        singleton["type"] = {"type": "bytes", "width": width}
+    else:
+        singleton["container"] = container
+    return {"mandatory": False, "read_only": False, "singleton": singleton}
+
+
+def _action_data(name, field_id, width):
+    return {"id": field_id, "name": name, "repeated": False,
+            "type": {"type": "bytes", "width": width}}
+
+
+TABLE = {
+    "name": "pipe.Ingress.t", "id": 100, "table_type": "MatchAction_Direct",
+    "size": 1024, "attributes": [], "supported_operations": [],
+    "key": [
+        {"id": 1, "name": "hdr.ipv4.dst", "match_type": "Exact",
+         "type": {"type": "bytes", "width": 32}},
+        {"id": 2, "name": "$MATCH_PRIORITY", "match_type": "Exact",
+         "type": {"type": "uint32"}}],
+    "action_specs": [
+        # "port" is a common data field as well, with another ID and width
+        {"id": 7, "name": "Ingress.fwd", "data": [
+            _action_data("port", 1, 9),
+            _action_data("Ingress.fwd.vlan", 2, 12)]},
+        # ID 65553 is the ID of a common data field
+        {"id": 8, "name": "Ingress.tunnel", "data": [
+            _action_data("vni", 65553, 24)]},
+        {"id": 9, "name": "Ingress.drop", "data": []}],
+    "data": [
+        _data("port", 65552, 16),
+        _data("$ENTRY_TTL", 65553),
+        # "mirror" and ID 65553 are fields of this level and of the
+        # container below it, which they hide. "f" and ID 3 are in both
+        # nested containers
+        _data("mirror", 65554, 8),
+        _data("$entries", 65555, container=[
+            _data("mirror", 1, 4),
+            _data("Ingress.reg.value", 2, 32),
+            _data("$inner", 65556, container=[
+                _data("f", 3, 16),
+                _data("other", 65553, 8)]),
+            _data("$inner2", 65557, container=[
+                _data("f", 5, 64),
+                _data("again", 3, 8)])])],
+}
+LEARN = {"name": "Ingress.digest", "id": 200, "annotations": [], "fields": [
+    {"id": 1, "name": "src_addr", "repeated": False,
+     "type": {"type": "bytes", "width": 48}}]}
+BFRT_JSON = json.dumps({"tables": [TABLE], "learn_filters": [LEARN]}).encode()
+NON_P4_JSON = json.dumps({"tables": []}).encode()
+
+
+@pytest.fixture(scope="module")
+def info():
+    return BfRtInfoParser(BFRT_JSON, NON_P4_JSON)
+
+
+@pytest.fixture(scope="module")
+def table(info):
+    return info.table_info_dict_get()["pipe.Ingress.t"]
+
+
+def walk_data_field_get(table, field_name, action_name=None):
+    """Data field lookup by name as it was done before the indexes: a walk
+    of the action data fields, then of the common ones, where a field of a
+    level hides the ones of its containers
+    """
+    def helper(dict_to_search, name_dict_to_search, field_name):
+        if dict_to_search is None:
+            return []
+        if field_name in name_dict_to_search:
+            return [dict_to_search[name_dict_to_search[field_name]]]
+        ret_list = []
+        for field_ in dict_to_search.values():
+            ret_list.extend(helper(field_.container_dict,
+                                   field_.container_dict_allname, field_name))
+        return ret_list
+
+    field_list = []
+    if action_name:
+        action = table.action_dict[table.action_dict_allname[action_name]]
+        field_list.extend(helper(action.data_dict, action.data_dict_allname,
+                                 field_name))
+    field_list.extend(helper(table.data_dict, table.data_dict_allname,
+                             field_name))
+    return field_list
+
+
+def walk_data_field_name_get(table, field_id, action_name=None):
+    """Data field lookup by ID as it was done before the indexes"""
+    def helper(dict_to_search, field_id):
+        if dict_to_search is None:
+            return None
+        for data_ in dict_to_search.values():
+            if data_.id == field_id:
+                return data_.name
+        for field_ in dict_to_search.values():
+            name = helper(field_.container_dict, field_id)
+            if name is not None:
+                return name
+        return None
+
+    name = None
+    if action_name:
+        action = table.action_dict[table.action_dict_allname[action_name]]
+        name = helper(action.data_dict, field_id)
+    if name is None:
+        name = helper(table.data_dict, field_id)
+    return name
+
+
+def all_data_fields(data_dict):
+    for field_ in data_dict.values():
+        yield field_
+        if field_.container_dict is not None:
+            for inner in all_data_fields(field_.container_dict):
+                yield inner
+
+
+ACTION_NAMES = [None, "Ingress.fwd", "fwd", "Ingress.tunnel", "tunnel", "drop"]
+
+
+def test_lookups_match_walking_the_dictionaries(table):
+    fields = list(all_data_fields(table.data_dict))
+    for action in table.action_dict.values():
+        fields.extend(all_data_fields(action.data_dict))
+    names = set(["missing", "vlan", "fwd.vlan", "reg.value", "value"])
+    ids = set([0, 99])
+    for field_ in fields:
+        names.add(field_.name)
+        ids.add(field_.id)
+    for action_name in ACTION_NAMES:
+        for name in names:
+            expected = walk_data_field_get(table, name, action_name)
+            if expected:
+                assert table._data_field_get(name, action_name) == expected
+            else:
+                with pytest.raises(KeyError):
+                    table._data_field_get(name, action_name)
+        for field_id in ids:
+            expected = walk_data_field_name_get(table, field_id, action_name)
+            if expected is not None:
+                assert table.data_field_name_get(field_id, action_name) == \
+                    expected
+            else:
+                with pytest.raises(KeyError):
+                    table.data_field_name_get(field_id, action_name)
+
+
+def test_action_fields_come_before_common_fields(table):
+    # by name, the action field first and the common field of the same name
+    # after it, metadata comes from the action field
+    port = table._data_field_get("port", "Ingress.fwd")
+    assert [(f.name, f.id) for f in port] == [("port", 1), ("port", 65552)]
+    assert table.data_field_id_get("port", "fwd") == 1
+    assert table.data_field_size_get("port", "fwd") == (2, 9)
+    # without the action, or with another one, only the common field
+    assert table.data_field_id_get("port") == 65552
+    assert table.data_field_id_get("port", "Ingress.tunnel") == 65552
+    # by ID, the action field hides the common field
+    assert table.data_field_name_get(65553, "tunnel") == "vni"
+    assert table.data_field_name_get(65553, "Ingress.fwd") == "$ENTRY_TTL"
+    assert table.data_field_name_get(65553) == "$ENTRY_TTL"
+    # common fields are found through an action which has no such field
+    assert table.data_field_id_get("$ENTRY_TTL", "drop") == 65553
+    assert table.data_field_name_get(1, "drop") == "mirror"
+
+
+def test_container_fields(table):
+    # a field of a level hides the container fields of the same name
+    assert [f.id for f in table._data_field_get("mirror")] == [65554]
+    # fields of nested containers are all returned, in dictionary order
+    assert [f.id for f in table._data_field_get("f")] == [3, 5]
+    assert table.data_field_id_get("reg.value") == 2
+    assert table.data_field_id_get("other") == 65553
+    # by ID, the first container field in dictionary order
+    assert table.data_field_name_get(3) == "f"
+    assert table.data_field_name_get(65556) == "$inner"
+
+
+def test_key_and_action_lookups(info, table):
+    assert table.key_field_name_get(1) == "hdr.ipv4.dst"
+    assert table.key_field_name_get(2) == "$MATCH_PRIORITY"
+    with pytest.raises(KeyError):
+        table.key_field_name_get(3)
+    assert table.action_name_get(8) == "Ingress.tunnel"
+    with pytest.raises(KeyError):
+        table.action_name_get(10)
+    learn = info.learn_info_dict_get()["Ingress.digest"]
+    assert learn.data_field_name_get(1) == "src_addr"
+    with pytest.raises(KeyError):
+        learn.data_field_name_get(2)
+
+
+def test_annotations_added_after_the_first_lookup(table):
+    assert table.data_field_id_get("vni", "tunnel") == 65553
+    table.data_field_annotation_add("vni", "tunnel", "ipv4")
+    annotations = table.data_field_annotations_get("vni", "tunnel")
+    assert [(a.name, a.value) for a in annotations] == \
+        [("$client_annotation", "ipv4")]
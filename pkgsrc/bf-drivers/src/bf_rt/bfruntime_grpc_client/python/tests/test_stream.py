@@ -0,0 +1,143 @@
+"""Routing of StreamChannel messages to per-type queues and the
+stream_queue_size/stream_overflow_policy knobs of ClientInterface.
+"""
+import threading
+
+import pytest
+
+client = pytest.importorskip("bfrt_grpc.client")
+import fake_bfruntime as fake  # noqa: E402
+
+
+@pytest.fixture
+def connect(fake_server):
+    clients = []
+
+    def _connect(pre_subscribe=(), **kwargs):
+        servicer, addr = fake_server(pre_subscribe=pre_subscribe)
+        intf = client.ClientInterface(addr, client_id=0, device_id=0,
+                                      num_tries=1, **kwargs)
+        clients.append(intf)
+        return servicer, intf
+
+    yield _connect
+    for intf in clients:
+        if not intf.is_independent:
+            intf.tear_down_stream()
+
+
+def drain_digest_ids(intf):
+    return [digest.digest_id for digest in intf.digest_get_iterator(timeout=0)]
+
+
+def test_subscribe_behind_other_messages(connect):
+    # Notifications queued ahead of the subscribe response used to be
+    # consumed and dropped by subscribe()
+    pre = [fake.digest_msg(1), fake.idle_timeout_msg(100),
+           fake.port_status_msg(True), fake.digest_msg(2)]
+    _, intf = connect(pre)
+    assert drain_digest_ids(intf) == [1, 2]
+    msg = intf.idletime_notification_get(timeout=1)
+    assert msg.table_entry.table_id == 100
+    assert intf.portstatus_notification_get(timeout=1).port_up
+    with pytest.raises(RuntimeError):
+        intf.idletime_notification_get(timeout=0)
+    with pytest.raises(RuntimeError):
+        intf.portstatus_notification_get(timeout=0)
+    assert intf.stream_drop_count == {}
+
+
+def test_route_after_subscribe(connect):
+    servicer, intf = connect()
+    servicer.send(fake.port_status_msg(False))
+    servicer.send(fake.digest_msg(5))
+    assert intf.digest_get(timeout=5).digest_id == 5
+    assert not intf.portstatus_notification_get(timeout=5).port_up
+    assert intf.stream_in_q.empty()
+
+
+def test_drop_oldest(connect):
+    pre = [fake.digest_msg(i) for i in range(10)]
+    _, intf = connect(pre, stream_queue_size=3,
+                      stream_overflow_policy="drop_oldest")
+    assert drain_digest_ids(intf) == [7, 8, 9]
+    assert intf.stream_drop_count == {"digest": 7}
+
+
+def test_drop_newest(connect):
+    pre = [fake.digest_msg(i) for i in range(10)]
+    _, intf = connect(pre, stream_queue_size=3,
+                      stream_overflow_policy="drop_newest")
+    assert drain_digest_ids(intf) == [0, 1, 2]
+    assert intf.stream_drop_count == {"digest": 7}
+
+
+def test_drop_is_per_type(connect):
+    # A full digest queue must not cost other types their messages
+    pre = [fake.digest_msg(i) for i in range(5)] + [fake.port_status_msg(True)]
+    _, intf = connect(pre, stream_queue_size=2,
+                      stream_overflow_policy="drop_newest")
+    assert intf.portstatus_notification_get(timeout=1).port_up
+    assert drain_digest_ids(intf) == [0, 1]
+    assert intf.stream_drop_count == {"digest": 3}
+
+
+def test_block_keeps_every_message(connect):
+    servicer, intf = connect(stream_queue_size=2)
+    for i in range(20):
+        servicer.send(fake.digest_msg(i))
+    ids = []
+    while len(ids) < 20:
+        msg = intf.digest_get(timeout=5)
+        assert msg is not None
+        ids.append(msg.digest_id)
+    assert ids == list(range(20))
+    assert intf.stream_drop_count == {}
+
+
+def test_callback(connect):
+    servicer, intf = connect()
+    got = []
+    done = threading.Event()
+
+    def on_digest(msg):
+        got.append(msg.digest.digest_id)
+        if len(got) == 3:
+            done.set()
+
+    intf.register_stream_callback("digest", on_digest)
+    for i in range(3):
+        servicer.send(fake.digest_msg(i))
+    assert done.wait(5)
+    assert got == [0, 1, 2]
+    with pytest.raises(RuntimeError):
+        intf.digest_get(timeout=0)
+
+    intf.unregister_stream_callback("digest")
+    servicer.send(fake.digest_msg(3))
+    assert intf.digest_get(timeout=5).digest_id == 3
+    assert got == [0, 1, 2]
+
+
+def test_callback_exception_keeps_stream(connect):
+    servicer, intf = connect()
+
+    def on_port_status(msg):
+        raise RuntimeError("boom")
+
+    intf.register_stream_callback("port_status_change_notification",
+                                  on_port_status)
+    servicer.send(fake.port_status_msg(True))
+    servicer.send(fake.digest_msg(1))
+    assert intf.digest_get(timeout=5).digest_id == 1
+    assert intf.stream_recv_thread.is_alive()
+
+
+def test_invalid_arguments(connect):
+    with pytest.raises(ValueError):
+        client.ClientInterface("127.0.0.1:1", 0, 0, perform_subscribe=False,
+                               stream_overflow_policy="drop_all")
+    _, intf = connect()
+    with pytest.raises(ValueError):
+        intf.register_stream_callback("packet", lambda msg: None)
+    assert intf._get_stream_message("packet", timeout=0) is None
@@ -29,6 +29,7 @@ import csv
 import sys
 
 import os.path
+import csr_blocks
 import hashlib
 import copy
 import re
@@ -803,7 +804,7 @@ def parse_csrcompiler_csv (filename, section_name):
 #
 # Pass0 outputs the register decoder structures, documenting the register fields
 #
-def csr_compiler_pass0( filename ):
+def csr_compiler_pass0_block( rows ):
 
     csr_map_types = {
         "addressmap",
@@ -841,96 +842,99 @@ def csr_compiler_pass0( filename ):
     list_elts  = 0
     active_reg_width = 0;
 
-    with open(filename, "rb") as csv_file:
-        csv_reader = csv.DictReader(csv_file)
-        row_num = 0
-        for row in csv_reader:
-            array_size = str_to_array_size(row["Array"])
-            if row["Type"] in ["endgroup"]:
-                active_map_name = nested_map.pop()
-                #print "POP : " + active_map_name
-
-            elif row["Type"] in csr_map_types:
-                #active_map_name = row["Identifier"]
-                active_map_name = row["Type Name"]
-
-            elif row["Type"] in csr_group_types:
-                if active_map_name != "":
-                    nested_map.append( active_map_name )
-                    active_map_name = active_map_name + "__" + row["Type Name"] + "__" + row["Identifier"]
-                else:
-                    active_map_name = row["Type Name"] + "__" + row["Identifier"]
+    for row in rows:
+        array_size = str_to_array_size(row["Array"])
+        if row["Type"] in ["endgroup"]:
+            active_map_name = nested_map.pop()
+            #print "POP : " + active_map_name
 
-            elif row["Type"] in csr_register_types or row["Type"] in csv_memory_types:
-                if active_reg_name != "":
-                    # terminate previous reg
-                    print "};"
-                    print ("reg_decoder_t " + "tof2_" + active_reg_name +
-                           " = { " + str(list_elts) + ", " + "tof2_" +
-                           active_reg_name + "_fld_list, " +
-                           str(active_reg_width) + " /* bits */, " + str(is_int_reg) + " };" )
-
-                active_reg_name = active_map_name + "__" + row["Identifier"]
-
-                print ""
-                print ( "reg_decoder_fld_t " + "tof2_" +
-                         active_reg_name + "_fld_list[] = {" )
+        elif row["Type"] in csr_map_types:
+            #active_map_name = row["Identifier"]
+            active_map_name = row["Type Name"]
 
-                active_reg_width = int(row["Register Size"].replace(" bits",""),0)
-                is_int_reg = 0
-                list_elts  = 0
+        elif row["Type"] in csr_group_types:
+            if active_map_name != "":
+                nested_map.append( active_map_name )
+                active_map_name = active_map_name + "__" + row["Type Name"] + "__" + row["Identifier"]
+            else:
+                active_map_name = row["Type Name"] + "__" + row["Identifier"]
+
+        elif row["Type"] in csr_register_types or row["Type"] in csv_memory_types:
+            if active_reg_name != "":
+                # terminate previous reg
+                print "};"
+                print ("reg_decoder_t " + "tof2_" + active_reg_name +
+                       " = { " + str(list_elts) + ", " + "tof2_" +
+                       active_reg_name + "_fld_list, " +
+                       str(active_reg_width) + " /* bits */, " + str(is_int_reg) + " };" )
+
+            active_reg_name = active_map_name + "__" + row["Identifier"]
+
+            print ""
+            print ( "reg_decoder_fld_t " + "tof2_" +
+                     active_reg_name + "_fld_list[] = {" )
+
+            active_reg_width = int(row["Register Size"].replace(" bits",""),0)
+            is_int_reg = 0
+            list_elts  = 0
+
+        elif row["Type"] in csr_field_types:
+            # dump field def
+            list_elts = list_elts + 1
+            range_tokens = row["Position"].replace("[","").replace("]","").split(":")
+            msb = int(range_tokens[0])
+            if len(range_tokens) == 1:
+                lsb = msb
+            else:
+                lsb = int(range_tokens[1])
+            # have to manually expand arrays
+            if len(array_size) == 1:
+                if array_size[0] == 1:
+                    #print "    [" + str(msb) + ":" + str(lsb) + "] : " + row["Identifier"] + row["Array"]
 
-            elif row["Type"] in csr_field_types:
-                # dump field def
-                list_elts = list_elts + 1
-                range_tokens = row["Position"].replace("[","").replace("]","").split(":")
-                msb = int(range_tokens[0])
-                if len(range_tokens) == 1:
-                    lsb = msb
+                    print ( "    { \"" + row["Identifier"] + "\", "
+                                   + str(msb) + ", " + str(lsb) + ", 0, "
+                                   + str(0) + "," )
+                    print ( "      " + "\"" + row["Description"].replace('\n','').replace('\r','') + "\"" + " }," )
                 else:
-                    lsb = int(range_tokens[1])
-                # have to manually expand arrays
-                if len(array_size) == 1:
-                    if array_size[0] == 1:
-                        #print "    [" + str(msb) + ":" + str(lsb) + "] : " + row["Identifier"] + row["Array"]
+                    field_width = msb - lsb + 1
+                    for idx in range(0,array_size[0]):
+                        #print "    [" + str(msb) + ":" + str(lsb) + "] : " + row["Identifier"] + "[" + str(idx) + "]"
 
-                        print ( "    { \"" + row["Identifier"] + "\", "
+                        print ( "    { \"" + row["Identifier"] + "[" + str(idx) + "]" + "\", "
                                        + str(msb) + ", " + str(lsb) + ", 0, "
                                        + str(0) + "," )
                         print ( "      " + "\"" + row["Description"].replace('\n','').replace('\r','') + "\"" + " }," )
-                    else:
-                        field_width = msb - lsb + 1
-                        for idx in range(0,array_size[0]):
-                            #print "    [" + str(msb) + ":" + str(lsb) + "] : " + row["Identifier"] + "[" + str(idx) + "]"
-
-                            print ( "    { \"" + row["Identifier"] + "[" + str(idx) + "]" + "\", "
-                                           + str(msb) + ", " + str(lsb) + ", 0, "
-                                           + str(0) + "," )
-                            print ( "      " + "\"" + row["Description"].replace('\n','').replace('\r','') + "\"" + " }," )
-                            msb = msb + field_width
-                            lsb = lsb + field_width
-                            list_elts = list_elts + 1
-                        # fix-up after loop (leaves it with one extra
-                        list_elts = list_elts - 1
+                        msb = msb + field_width
+                        lsb = lsb + field_width
+                        list_elts = list_elts + 1
+                    # fix-up after loop (leaves it with one extra
+                    list_elts = list_elts - 1
 
-        # terminate previous reg
+    # terminate last reg
+    if active_reg_name != "":
         print "};"
         print ("reg_decoder_t " + "tof2_" + active_reg_name +
                " = { " + str(list_elts) + ", " + "tof2_" +
                active_reg_name + "_fld_list, " +
                str(active_reg_width) + " /* bits */, " + str(is_int_reg) + " };" )
 
+def csr_compiler_pass0( filename, cache_dir=None ):
+    blocks = csr_blocks.read_blocks( filename )
+    csr_blocks.run_blocks( csr_compiler_pass0_block, blocks, cache_dir )
     print ("")
-    csv_file.close()
 
-def build_reg_info(dir):
+def build_reg_info(dir, cache_dir=None):
     full_csr_file = os.path.join(dir,"jbay_mem.csv")
     # Generate decoder information
-    csr_compiler_pass0( full_csr_file )
+    csr_compiler_pass0( full_csr_file, cache_dir )
     # parse_csrcompiler_csv_fields( full_csr_file, "regs" )
     parse_csrcompiler_csv( full_csr_file, "regs" )
 
 # Unit tests
 if __name__ == "__main__":
 
-    build_reg_info( str(sys.argv[1]) )
+    # The optional second argument is a directory where the output of each
+    # addressmap is cached, see csr_blocks
+    cache_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    build_reg_info( str(sys.argv[1]), cache_dir )
@@ -30,6 +30,7 @@ import sys
 import pdb
 
 import os.path
+import csr_blocks
 import hashlib
 import copy
 
@@ -201,7 +202,7 @@ def csr_compiler_dump_db( addr_maps ):
 #
 # Pass0 outputs the register decoder structures, documenting the register fields
 #
-def csr_compiler_pass0( filename ):
+def csr_compiler_pass0_block( rows ):
 
     csr_map_types = {
         "addressmap", 
@@ -235,109 +236,119 @@ def csr_compiler_pass0( filename ):
     list_elts  = 0
     active_reg_width = 0;
     
-    with open(filename, "rb") as csv_file:
-        csv_reader = csv.DictReader(csv_file)
-        row_num = 0
-        for row in csv_reader:
-            array_size = str_to_array_size(row["Array"])
-            if row["Type"] in ["endgroup"]:
-                active_map_name = nested_map.pop()
-                #print "POP : " + active_map_name
+    for row in rows:
+        array_size = str_to_array_size(row["Array"])
+        if row["Type"] in ["endgroup"]:
+            active_map_name = nested_map.pop()
+            #print "POP : " + active_map_name
+
+        elif row["Type"] in csr_map_types:
+            #active_map_name = row["Identifier"]
+            active_map_name = row["Type Name"] 
+
+        elif row["Type"] in csr_group_types:
+            if active_map_name != "":
+                nested_map.append( active_map_name )
+                active_map_name = active_map_name + "__" + row["Type Name"] + "__" + row["Identifier"]
+            else:
+                active_map_name = row["Type Name"] + "__" + row["Identifier"]
 
-            elif row["Type"] in csr_map_types:
-                #active_map_name = row["Identifier"]
-                active_map_name = row["Type Name"] 
+        elif row["Type"] in csr_register_types:
+            if active_reg_name != "":
+                # terminate previous reg
+                print "};"
+                print ("reg_decoder_t " + "tof2_" + active_reg_name + 
+                       " = { " + str(list_elts) + ", " + "tof2_" +
+                       active_reg_name + "_fld_list, " + 
+                       str(active_reg_width) + " /* bits */, " + str(is_int_reg) + " };" )
 
-            elif row["Type"] in csr_group_types:
-                if active_map_name != "":
-                    nested_map.append( active_map_name )
-                    active_map_name = active_map_name + "__" + row["Type Name"] + "__" + row["Identifier"]
-                else:
-                    active_map_name = row["Type Name"] + "__" + row["Identifier"]
+            active_reg_name = active_map_name + "__" + row["Identifier"]
 
-            elif row["Type"] in csr_register_types:
-                if active_reg_name != "":
-                    # terminate previous reg
-                    print "};"
-                    print ("reg_decoder_t " + "tof2_" + active_reg_name + 
-                           " = { " + str(list_elts) + ", " + "tof2_" +
-                           active_reg_name + "_fld_list, " + 
-                           str(active_reg_width) + " /* bits */, " + str(is_int_reg) + " };" )
-
-                active_reg_name = active_map_name + "__" + row["Identifier"]
-
-                print ""
-                print ( "reg_decoder_fld_t " + "tof2_" +
-                         active_reg_name + "_fld_list[] = {" )
-
-                active_reg_width = int(row["Register Size"].replace(" bits",""),0)
-                is_int_reg = 0
-                list_elts  = 0
-
-            elif row["Type"] in csr_field_types:
-                # dump field def
-                list_elts = list_elts + 1
-                range_tokens = row["Position"].replace("[","").replace("]","").split(":")
-                msb = int(range_tokens[0])
-                if len(range_tokens) == 1:
-                    lsb = msb
+            print ""
+            print ( "reg_decoder_fld_t " + "tof2_" +
+                     active_reg_name + "_fld_list[] = {" )
+
+            active_reg_width = int(row["Register Size"].replace(" bits",""),0)
+            is_int_reg = 0
+            list_elts  = 0
+
+        elif row["Type"] in csr_field_types:
+            # dump field def
+            list_elts = list_elts + 1
+            range_tokens = row["Position"].replace("[","").replace("]","").split(":")
+            msb = int(range_tokens[0])
+            if len(range_tokens) == 1:
+                lsb = msb
+            else:
+                lsb = int(range_tokens[1])
+            # have to manually expand arrays
+            if len(array_size) == 1:
+                if array_size[0] == 1:
+                    #print "    [" + str(msb) + ":" + str(lsb) + "] : " + row["Identifier"] + row["Array"]
+
+                    print ( "    { \"" + row["Identifier"] + "\", " 
+                                   + str(msb) + ", " + str(lsb) + ", 0,"
+                                   + str(0) + ", " )
+                    print ( "      " + "\"" + row["Description"].replace('\n','').replace('\r','') + "\"" + " }," )
                 else:
-                    lsb = int(range_tokens[1])
-                # have to manually expand arrays
-                if len(array_size) == 1:
-                    if array_size[0] == 1:
-                        #print "    [" + str(msb) + ":" + str(lsb) + "] : " + row["Identifier"] + row["Array"]
+                    field_width = msb - lsb + 1
+                    for idx in range(0,array_size[0]):
+                        #print "    [" + str(msb) + ":" + str(lsb) + "] : " + row["Identifier"] + "[" + str(idx) + "]"
 
-                        print ( "    { \"" + row["Identifier"] + "\", " 
+                        print ( "    { \"" + row["Identifier"] + "[" + str(idx) + "]" + "\", " 
                                        + str(msb) + ", " + str(lsb) + ", 0,"
                                        + str(0) + ", " )
                         print ( "      " + "\"" + row["Description"].replace('\n','').replace('\r','') + "\"" + " }," )
-                    else:
-                        field_width = msb - lsb + 1
-                        for idx in range(0,array_size[0]):
-                            #print "    [" + str(msb) + ":" + str(lsb) + "] : " + row["Identifier"] + "[" + str(idx) + "]"
-
-                            print ( "    { \"" + row["Identifier"] + "[" + str(idx) + "]" + "\", " 
-                                           + str(msb) + ", " + str(lsb) + ", 0,"
-                                           + str(0) + ", " )
-                            print ( "      " + "\"" + row["Description"].replace('\n','').replace('\r','') + "\"" + " }," )
-                            msb = msb + field_width
-                            lsb = lsb + field_width
-                            list_elts = list_elts + 1
-                        # fix-up after loop (leaves it with one extra
-                        list_elts = list_elts - 1
-               
-        # terminate previous reg
+                        msb = msb + field_width
+                        lsb = lsb + field_width
+                        list_elts = list_elts + 1
+                    # fix-up after loop (leaves it with one extra
+                    list_elts = list_elts - 1
+           
+    # terminate last reg
+    if active_reg_name != "":
         print "};"
         print ("reg_decoder_t " + "tof2_" + active_reg_name + 
                " = { " + str(list_elts) + ", " + "tof2_" +
                active_reg_name + "_fld_list, " + 
                str(active_reg_width) + " /* bits */, " + str(is_int_reg) + " };" )
 
-    csv_file.close()
+def csr_compiler_pass0( filename, cache_dir=None ):
+    blocks = csr_blocks.read_blocks( filename )
+    csr_blocks.run_blocks( csr_compiler_pass0_block, blocks, cache_dir )
 
 already_created_maps = {}
 
 
+map_widths = {}
+
+
 def get_map_width( addr_maps, map_name, arr_sz ):
+    # Maps are referenced many times, compute each width once
+    if (map_name, arr_sz) not in map_widths:
+        map_widths[ (map_name, arr_sz) ] = compute_map_width( addr_maps, map_name, arr_sz )
+    return map_widths[ (map_name, arr_sz) ]
+
+
+def compute_map_width( addr_maps, map_name, arr_sz ):
     width = 0
     #print "// OBJ GET_WIDTH: " + map_name + " arr_sz: " + str(arr_sz)
-    for map in addr_maps:
-        this_map = addr_maps[ map ]
-        if this_map.type_name == map_name:
-            for sub_map in this_map.regs_and_maps:
-                if sub_map['obj_type'] in ( "map", "group" ):
-                    this_width = get_map_width( addr_maps, sub_map['type_name'], sub_map['arr_sz'] )
-                elif sub_map['obj_type'] in ( "reg" ):
-                    this_width = sub_map['width']
-                    this_offset = int(sub_map['offset'], 16)
-                    if width < this_offset:
-                        width = this_offset
-                    if (width & (this_width - 1)) != 0:
-                        # must pad for natural alignment
-                        width = (width + (this_width - 1)) & ~(this_width - 1)
-                width = width + this_width
-                #print "//    SUB-OBJ: sz= " + hex(this_width) + " : " + sub_map['name']
+    # addr_maps is indexed by type name
+    this_map = addr_maps.get( map_name )
+    if this_map is not None:
+        for sub_map in this_map.regs_and_maps:
+            if sub_map['obj_type'] in ( "map", "group" ):
+                this_width = get_map_width( addr_maps, sub_map['type_name'], sub_map['arr_sz'] )
+            elif sub_map['obj_type'] in ( "reg" ):
+                this_width = sub_map['width']
+                this_offset = int(sub_map['offset'], 16)
+                if width < this_offset:
+                    width = this_offset
+                if (width & (this_width - 1)) != 0:
+                    # must pad for natural alignment
+                    width = (width + (this_width - 1)) & ~(this_width - 1)
+            width = width + this_width
+            #print "//    SUB-OBJ: sz= " + hex(this_width) + " : " + sub_map['name']
 
     # arrays are packed, so cant round at this level
     if arr_sz == (1,):
@@ -353,51 +364,51 @@ def get_map_width( addr_maps, map_name, arr_sz ):
     return stride
           
 def parse_addr_map( addr_maps, map_name ):
-    for map in addr_maps:
-        this_map = addr_maps[ map ]
-        if this_map.type_name == map_name:
-            for sub_map in this_map.regs_and_maps:
-                if sub_map['obj_type'] in ( "map", "group" ): 
-                    if sub_map['type_name'] not in already_created_maps:
-                        already_created_maps[ sub_map['type_name'] ] = 'done'
-                        parse_addr_map( addr_maps, sub_map['type_name'] )
-
-            sz_str = array_sz_to_str( this_map.array_sz )
-            #
-            print "cmd_arg_item_t " + "tof2_" + this_map.type_name + "_list[] = {"
+    # addr_maps is indexed by type name
+    this_map = addr_maps.get( map_name )
+    if this_map is not None:
+        for sub_map in this_map.regs_and_maps:
+            if sub_map['obj_type'] in ( "map", "group" ): 
+                if sub_map['type_name'] not in already_created_maps:
+                    already_created_maps[ sub_map['type_name'] ] = 'done'
+                    parse_addr_map( addr_maps, sub_map['type_name'] )
+
+        sz_str = array_sz_to_str( this_map.array_sz )
+        #
+        print "cmd_arg_item_t " + "tof2_" + this_map.type_name + "_list[] = {"
             
-            n_entry = 0
-            for entry in this_map.regs_and_maps:
-                stride = 0
-                if entry['obj_type'] == "reg":
-                    stride = int(entry['width'])
-                elif entry['obj_type'] in ( "map", "group"):
-                    stride = int(entry['width'])
-                    if stride == 0:
-                        stride = get_map_width( addr_maps, entry['type_name'], entry['arr_sz'] )
-                #print "// obj: sz = " + hex(stride) + " : " + entry['name'] + ", type : " + entry['type_name'] + ", obj_type : " + entry['obj_type'] + ", width : ", + entry['width']
-
-                # array is expanded below, so stride should be stride of a single entry
-                # stride = (stride * product(entry['arr_sz']))
-
-                if entry['obj_type'] == "reg":
-                    type_name_to_pass = this_map.type_name
-                else:
-                    type_name_to_pass = entry['type_name']
-
-                n_entry = n_entry + output_list_lines( entry["name"], "tof2_" + type_name_to_pass, entry["offset"], entry['arr_sz'], stride, entry['obj_type'] )
-                #if entry['obj_type'] in ( "map", "group" ):
-                #    print "{ \"" + entry["name"] + "\", &" + entry['type_name'] + ", " + entry["offset"] + ", NULL }," 
-                #    #print "    " + entry["offset"] + " : " + entry['name'] + str(sz_str) + " : " + entry['obj_type'] + " : <" + entry['type_name'] + ">"
-                #else:
-                #    print "{ \"" + entry["name"] + "\", NULL, " + entry["offset"] + ", &" + this_map.type_name + "__" + entry["name"] + " }," 
-                #    #print "    " + entry["offset"] + " : " + entry['name'] + str(sz_str) + " : " + entry['obj_type'] + " : " + entry['width']
-                #n_entry = n_entry + 1
-            #print this_map.type_name + "    : END"
-            print "};"
-            print ""
-            print "cmd_arg_t " + "tof2_" + this_map.type_name + " = { " + str(n_entry) + ", " + "tof2_" + this_map.type_name + "_list };"
-            print ""
+        n_entry = 0
+        for entry in this_map.regs_and_maps:
+            stride = 0
+            if entry['obj_type'] == "reg":
+                stride = int(entry['width'])
+            elif entry['obj_type'] in ( "map", "group"):
+                stride = int(entry['width'])
+                if stride == 0:
+                    stride = get_map_width( addr_maps, entry['type_name'], entry['arr_sz'] )
+            #print "// obj: sz = " + hex(stride) + " : " + entry['name'] + ", type : " + entry['type_name'] + ", obj_type : " + entry['obj_type'] + ", width : ", + entry['width']
+
+            # array is expanded below, so stride should be stride of a single entry
+            # stride = (stride * product(entry['arr_sz']))
+
+            if entry['obj_type'] == "reg":
+                type_name_to_pass = this_map.type_name
+            else:
+                type_name_to_pass = entry['type_name']
+
+            n_entry = n_entry + output_list_lines( entry["name"], "tof2_" + type_name_to_pass, entry["offset"], entry['arr_sz'], stride, entry['obj_type'] )
+            #if entry['obj_type'] in ( "map", "group" ):
+            #    print "{ \"" + entry["name"] + "\", &" + entry['type_name'] + ", " + entry["offset"] + ", NULL }," 
+            #    #print "    " + entry["offset"] + " : " + entry['name'] + str(sz_str) + " : " + entry['obj_type'] + " : <" + entry['type_name'] + ">"
+            #else:
+            #    print "{ \"" + entry["name"] + "\", NULL, " + entry["offset"] + ", &" + this_map.type_name + "__" + entry["name"] + " }," 
+            #    #print "    " + entry["offset"] + " : " + entry['name'] + str(sz_str) + " : " + entry['obj_type'] + " : " + entry['width']
+            #n_entry = n_entry + 1
+        #print this_map.type_name + "    : END"
+        print "};"
+        print ""
+        print "cmd_arg_t " + "tof2_" + this_map.type_name + " = { " + str(n_entry) + ", " + "tof2_" + this_map.type_name + "_list };"
+        print ""
 
 
 def output_list_lines( name, type_name, offset_str, array_sz, stride, obj_type ):
@@ -473,12 +484,12 @@ def csr_compiler_pass2( addr_maps ):
     parse_addr_map( addr_maps, "jbay_reg" )
 
 
-def build_reg_info(dir):
+def build_reg_info(dir, cache_dir=None):
 
     addr_maps = {}
 
     full_csr_file = os.path.join(dir,"jbay_reg.csv")
-    csr_compiler_pass0( full_csr_file )
+    csr_compiler_pass0( full_csr_file, cache_dir )
     addr_maps = csr_compiler_pass1( full_csr_file )
     #csr_compiler_dump_db( addr_maps )
     csr_compiler_pass2( addr_maps )
@@ -487,4 +498,7 @@ def build_reg_info(dir):
 # Unit tests
 if __name__ == "__main__":
 
-    build_reg_info( str(sys.argv[1]) )
+    # The optional second argument is a directory where the output of each
+    # addressmap is cached, see csr_blocks
+    cache_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    build_reg_info( str(sys.argv[1]), cache_dir )
@@ -42,6 +42,9 @@ if __name__ == "__main__":
 
     reg_version = str(sys.argv[4])
     csv_path = os.path.join(str(sys.argv[1]),"csv/")
+    # Optional directory, e.g. in the build tree, where the build scripts cache
+    # their output per addressmap
+    cache_args = sys.argv[5:6]
     csv_file = os.path.join(csv_path,"cb_reg.csv")
     md5_path = "tof3_reg.csv" + ".md5"
     # make sure the md5 files exist
@@ -54,11 +57,11 @@ if __name__ == "__main__":
     retcode = subprocess.call(["diff", "tof3_reg.csv.current.md5", md5_path])
     if retcode == 0:
         #
-        # Check for changes to the python build script
+        # Check for changes to the python build scripts
         #
         subprocess.call(["touch", "build_tof3_reg_info.py.current.md5"])
         with open('build_tof3_reg_info.py.current.md5', "w") as outfile:
-            my_cmd = ["md5sum", "build_tof3_reg_info.py"]
+            my_cmd = ["md5sum", "build_tof3_reg_info.py", "build_tof3_mem_info.py", "csr_blocks.py"]
             subprocess.call(my_cmd, stdout=outfile)
             outfile.close()
         retcode = subprocess.call(["diff", "build_tof3_reg_info.py.current.md5", "build_tof3_reg_info.py.md5"])
@@ -83,7 +86,7 @@ if __name__ == "__main__":
         outfile2.write(copyright_header)
         outfile2.write("/* clang-format off */\n")
         outfile2.flush()
-        subprocess.call(["python", "build_tof3_reg_info.py", csv_path], stdout=outfile2 )
+        subprocess.call(["python", "build_tof3_reg_info.py", csv_path] + cache_args, stdout=outfile2 )
         outfile2.write("/* clang-format on */\n")
         outfile2.flush()
         outfile2.close()
@@ -92,7 +95,7 @@ if __name__ == "__main__":
         outfile3.write(copyright_header)
         outfile3.write("/* clang-format off */\n")
         outfile3.flush()
-        subprocess.call(["python", "build_tof3_mem_info.py", csv_path], stdout=outfile3 )
+        subprocess.call(["python", "build_tof3_mem_info.py", csv_path] + cache_args, stdout=outfile3 )
         outfile3.write("/* clang-format on */\n")
         outfile3.flush()
         outfile3.close()
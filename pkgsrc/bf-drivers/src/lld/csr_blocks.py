@@ -0,0 +1,232 @@
+################################################################################
+ #  Copyright (C) 2024 Intel Corporation
+ #
+ #  Licensed under the Apache License, Version 2.0 (the "License");
+ #  you may not use this file except in compliance with the License.
+ #  You may obtain a copy of the License at
+ #
+ #  http://www.apache.org/licenses/LICENSE-2.0
+ #
+ #  Unless required by applicable law or agreed to in writing,
+ #  software distributed under the License is distributed on an "AS IS" BASIS,
+ #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ #  See the License for the specific language governing permissions
+ #  and limitations under the License.
+ #
+ #
+ #  SPDX-License-Identifier: Apache-2.0
+################################################################################
+
+"""
+csr_blocks: Block-wise, cached and parallel generation from Semifore CSV files
+
+A Semifore CSV lists its addressmaps one after the other.  Passes which only
+need the rows of one addressmap at a time (like the register decoder pass of
+the build_*_info.py scripts) can run on each of these blocks separately: the
+blocks are generated in parallel worker processes and the output of each block
+is cached by a hash of its rows, so that changing a line of the CSV only
+regenerates the addressmap it belongs to.
+
+Pass functions print their output, as the rest of these scripts do.
+"""
+
+import csv
+import hashlib
+import multiprocessing
+import os
+import sys
+
+try:
+    from cStringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
+if sys.version_info[0] < 3:
+    # CSV rows are already byte strings
+    _to_bytes = str
+else:
+    def _to_bytes(text):
+        return text.encode("utf-8")
+
+
+csr_map_types = {
+    "addressmap",
+    "userdefined addressmap",
+}
+
+
+class csr_block(object):
+    """
+    The rows of one addressmap of a Semifore CSV file, kept as lists of
+    strings (as read by csv.reader) until a pass needs them.
+    """
+    def __init__(self, fieldnames):
+        self.fieldnames = fieldnames
+        self.rows = []
+
+    def digest(self, salt):
+        key = hashlib.sha1(salt.encode())
+        for row in self.rows:
+            key.update(_to_bytes("\x1f".join(row)))
+            key.update(b"\x1e")
+        return key.hexdigest()
+
+    def dict_rows(self):
+        """
+        The rows as dicts, like csv.DictReader returns them
+        """
+        return [_row_dict(self.fieldnames, row) for row in self.rows]
+
+
+def _row_dict(fieldnames, row):
+    d = dict(zip(fieldnames, row))
+    if len(row) > len(fieldnames):
+        d[None] = row[len(fieldnames):]
+    for key in fieldnames[len(row):]:
+        d[key] = None
+    return d
+
+
+def read_blocks(filename, skip=None):
+    """
+    Split the rows of a Semifore CSV file into blocks, each one starting at an
+    addressmap row.
+
+    @param  filename    The filename of the CSV file
+    @param  skip        Optional function returning True for the rows (as
+                        dicts) to drop before splitting
+    @return A list of csr_block
+    """
+    blocks = []
+    with open(filename, "rb" if sys.version_info[0] < 3 else "r") as csv_file:
+        csv_reader = csv.reader(csv_file)
+        fieldnames = next(csv_reader)
+        type_idx = fieldnames.index("Type")
+        block = csr_block(fieldnames)
+        for row in csv_reader:
+            if not row:
+                continue
+            if skip is not None and skip(_row_dict(fieldnames, row)):
+                continue
+            if row[type_idx] in csr_map_types and block.rows:
+                blocks.append(block)
+                block = csr_block(fieldnames)
+            block.rows.append(row)
+    if block.rows:
+        blocks.append(block)
+    return blocks
+
+
+def run_blocks(func, blocks, cache_dir=None, processes=None):
+    """
+    Call func on each block and print the concatenated output, in block order.
+
+    @param  func        Module level function printing the output of the list
+                        of rows (dicts) it is given
+    @param  blocks      A list of csr_block, see read_blocks()
+    @param  cache_dir   Optional directory where the output of each block is
+                        kept, keyed by a hash of the rows and of the source of
+                        the module defining func
+    @param  processes   Number of worker processes, defaults to the number of
+                        CPUs
+    """
+    keys = [None] * len(blocks)
+    outputs = [None] * len(blocks)
+    if cache_dir:
+        cache_dir = os.path.join(cache_dir, _func_id(func))
+        salt = _source_hash(func)
+        for idx, block in enumerate(blocks):
+            keys[idx] = block.digest(salt)
+            outputs[idx] = _cache_read(cache_dir, keys[idx])
+
+    missing = [idx for idx, output in enumerate(outputs) if output is None]
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(missing))
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_run_block,
+                               [(func, blocks[idx]) for idx in missing])
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_run_block((func, blocks[idx])) for idx in missing]
+
+    for idx, output in zip(missing, results):
+        outputs[idx] = output
+        if cache_dir:
+            _cache_write(cache_dir, keys[idx], output)
+    if cache_dir:
+        _cache_trim(cache_dir, keys)
+
+    for output in outputs:
+        sys.stdout.write(output)
+
+
+def _run_block(args):
+    func, block = args
+    stdout = sys.stdout
+    sys.stdout = StringIO()
+    try:
+        func(block.dict_rows())
+        return sys.stdout.getvalue()
+    finally:
+        sys.stdout = stdout
+
+
+def _func_id(func):
+    module = sys.modules[func.__module__]
+    source = getattr(module, "__file__", None) or func.__module__
+    name = os.path.splitext(os.path.basename(source))[0]
+    return name + "." + func.__name__
+
+
+def _source_hash(func):
+    # The cached output must change with the code generating it
+    module = sys.modules[func.__module__]
+    source = getattr(module, "__file__", None)
+    key = hashlib.sha1()
+    if source:
+        with open(os.path.splitext(source)[0] + ".py", "rb") as src_file:
+            key.update(src_file.read())
+    key.update(func.__name__.encode())
+    return key.hexdigest()
+
+
+def _cache_read(cache_dir, key):
+    try:
+        with open(os.path.join(cache_dir, key), "r") as cache_file:
+            return cache_file.read()
+    except (IOError, OSError):
+        return None
+
+
+def _cache_write(cache_dir, key, output):
+    path = os.path.join(cache_dir, key)
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with open(tmp_path, "w") as cache_file:
+            cache_file.write(output)
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        pass
+
+
+def _cache_trim(cache_dir, keys):
+    # Only the blocks of the last generation are kept
+    keys = set(keys)
+    try:
+        names = os.listdir(cache_dir)
+    except (IOError, OSError):
+        return
+    for name in names:
+        if name not in keys:
+            try:
+                os.unlink(os.path.join(cache_dir, name))
+            except (IOError, OSError):
+                pass
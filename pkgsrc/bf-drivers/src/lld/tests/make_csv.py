@@ -0,0 +1,108 @@
+################################################################################
+ #  Copyright (C) 2024 Intel Corporation
+ #
+ #  Licensed under the Apache License, Version 2.0 (the "License");
+ #  you may not use this file except in compliance with the License.
+ #  You may obtain a copy of the License at
+ #
+ #  http://www.apache.org/licenses/LICENSE-2.0
+ #
+ #  Unless required by applicable law or agreed to in writing,
+ #  software distributed under the License is distributed on an "AS IS" BASIS,
+ #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ #  See the License for the specific language governing permissions
+ #  and limitations under the License.
+ #
+ #
+ #  SPDX-License-Identifier: Apache-2.0
+################################################################################
+
+"""
+Synthetic Semifore CSV files, in the layout the build_*_info.py scripts read.
+
+Each addressmap has registers (some of them arrays, wide or with array
+fields), a group of more registers and sometimes an instance of an earlier
+addressmap. The last addressmap is the top one, instantiating all others.
+"""
+
+import csv
+import random
+
+FIELDNAMES = ["Type", "Type Name", "Identifier", "Offset", "Array", "Stride",
+              "Register Size", "Position", "Description", "Word Count"]
+
+# The CSV file, the top addressmap and whether userdefined memories are
+# supported, for each build script
+CSV_FILES = {
+    "build_tofino_reg_info": ("tofino.csv", "tofino", False),
+    "build_tofino_mem_info": ("pipe_top_level.csv", "pipe_top", False),
+    "build_tof2_reg_info": ("jbay_reg.csv", "jbay_reg", False),
+    "build_tof2_mem_info": ("jbay_mem.csv", "jbay_mem", True),
+    "build_tof3_reg_info": ("cb_reg.csv", "cb_reg", False),
+    "build_tof3_mem_info": ("cb_mem.csv", "cb_mem", True),
+}
+
+
+def make_rows(top, num_maps, regs_per_map, seed, memories=False):
+    """
+    @return The rows, as lists of strings, of a CSV with num_maps addressmaps
+            and the top one
+    """
+    rnd = random.Random(seed)
+    rows = []
+
+    def row(*values):
+        rows.append(list(values) + [""] * (len(FIELDNAMES) - len(values)))
+
+    def registers(prefix, count):
+        offset = 0
+        for reg in range(count):
+            array = rnd.choice(["", "", "", "[4]", "[2][3]"])
+            if memories and rnd.random() < 0.2:
+                row("userdefined memory", "", "%smem%d" % (prefix, reg),
+                    hex(offset), rnd.choice(["", "[2]"]), "", "128 bits", "",
+                    "mem", str(rnd.choice([16, 64])))
+            else:
+                row(rnd.choice(["register", "register", "wide register"]), "",
+                    "%sreg%d" % (prefix, reg), hex(offset), array, "",
+                    "%d bits" % rnd.choice([32, 32, 64]))
+            offset += 0x40
+            pos = 0
+            for field in range(rnd.randint(1, 5)):
+                width = rnd.randint(1, 6)
+                field_array = rnd.choice(["", "", "[2]"])
+                if width > 1:
+                    position = "[%d:%d]" % (pos + width - 1, pos)
+                else:
+                    position = "[%d]" % pos
+                row(rnd.choice(["configuration", "status", "counter", "constant"]),
+                    "", "f%d" % field, "", field_array, "", "", position,
+                    'field %d, "quoted"\nsecond line' % field)
+                pos += width * (2 if field_array else 1)
+
+    names = []
+    for idx in range(num_maps):
+        name = "blk%d_map" % idx
+        row("addressmap", name, name, "0x0")
+        registers("a", regs_per_map // 2)
+        row("group", "grp_t", "g%d" % idx, hex(0x10000))
+        registers("g", regs_per_map - regs_per_map // 2)
+        row("endgroup")
+        if names and rnd.random() < 0.5:
+            ref = rnd.choice(names)
+            row("addressmap instance", ref, "inst_" + ref, hex(0x20000),
+                rnd.choice(["", "[2]", "[2][2]"]),
+                rnd.choice(["", "0x40000 bytes"]))
+        names.append(name)
+    row("addressmap", top, top, "0x0")
+    for idx, name in enumerate(names):
+        row("addressmap instance", name, name, hex(idx * 0x100000),
+            rnd.choice(["", "", "[2]"]))
+    return rows
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(FIELDNAMES)
+        writer.writerows(rows)
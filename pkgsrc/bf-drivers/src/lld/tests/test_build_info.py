@@ -0,0 +1,70 @@
+"""
+The build_*_info.py scripts on synthetic Semifore CSV files, with and without
+the block cache. The scripts are Python 2 only, these tests are skipped when
+no python2 interpreter runs.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import make_csv  # noqa: E402
+
+LLD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def find_python2():
+    for name in ("python2", "python2.7"):
+        try:
+            out = subprocess.check_output(
+                [name, "-c", "import sys; print(sys.version_info[0])"],
+                stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.CalledProcessError):
+            continue
+        if out.strip() == b"2":
+            return name
+    return None
+
+
+PYTHON2 = find_python2()
+pytestmark = pytest.mark.skipif(PYTHON2 is None, reason="needs python2")
+
+
+def write_csv(csv_dir, script, changed_reg=None):
+    filename, top, memories = make_csv.CSV_FILES[script]
+    rows = make_csv.make_rows(top, 12, 10, seed=len(script), memories=memories)
+    if changed_reg is not None:
+        next(row for row in rows if row[2] == changed_reg)[8] = "changed"
+    make_csv.write_csv(os.path.join(csv_dir, filename), rows)
+
+
+def build(script, csv_dir, run_dir, cache_dir=None):
+    cmd = [PYTHON2, os.path.join(LLD_DIR, script + ".py"), csv_dir]
+    if cache_dir is not None:
+        cmd.append(cache_dir)
+    return subprocess.check_output(cmd, cwd=run_dir)
+
+
+@pytest.mark.parametrize("script", sorted(make_csv.CSV_FILES))
+def test_cache(tmp_path, script):
+    csv_dir = str(tmp_path / "csv") + "/"
+    run_dir = str(tmp_path / "run")
+    cache_dir = str(tmp_path / "build" / "cache")
+    os.makedirs(csv_dir)
+    os.makedirs(run_dir)
+    write_csv(csv_dir, script)
+
+    uncached = build(script, csv_dir, run_dir)
+    assert b"_fld_list" in uncached
+    assert build(script, csv_dir, run_dir, cache_dir) == uncached
+    cache_entries = os.listdir(os.path.join(cache_dir, script + ".csr_compiler_pass0_block"))
+    assert len(cache_entries) == 13
+    assert build(script, csv_dir, run_dir, cache_dir) == uncached
+    # Nothing is cached in the working directory
+    assert os.listdir(run_dir) == []
+
+    write_csv(csv_dir, script, changed_reg="areg1")
+    uncached = build(script, csv_dir, run_dir)
+    assert build(script, csv_dir, run_dir, cache_dir) == uncached
@@ -0,0 +1,118 @@
+"""
+csr_blocks on synthetic Semifore CSV files
+"""
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import csr_blocks  # noqa: E402
+import make_csv  # noqa: E402
+
+# Blocks handed to print_block, in this process
+CALLS = []
+
+
+def print_block(rows):
+    CALLS.append(rows[0]["Identifier"])
+    for row in rows:
+        print("%s %s %s" % (row["Type"], row["Identifier"], row["Description"]))
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = str(tmp_path / "regs.csv")
+    make_csv.write_csv(path, make_csv.make_rows("top", 12, 8, seed=1))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    del CALLS[:]
+
+
+def expected_output(path):
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    return "".join("%s %s %s\n" % (row["Type"], row["Identifier"], row["Description"])
+                   for row in rows)
+
+
+def run(capsys, blocks, **kwargs):
+    csr_blocks.run_blocks(print_block, blocks, **kwargs)
+    return capsys.readouterr().out
+
+
+def test_read_blocks(csv_file):
+    blocks = csr_blocks.read_blocks(csv_file)
+    assert len(blocks) == 13
+    assert [block.rows[0][2] for block in blocks] == (
+        ["blk%d_map" % i for i in range(12)] + ["top"])
+    for block in blocks:
+        assert block.rows[0][0] == "addressmap"
+        assert all(row[0] not in csr_blocks.csr_map_types for row in block.rows[1:])
+    with open(csv_file, newline="") as f:
+        assert [row for block in blocks for row in block.dict_rows()] == list(
+            csv.DictReader(f))
+
+
+def test_read_blocks_skip(csv_file):
+    blocks = csr_blocks.read_blocks(csv_file, skip=lambda row: row["Type"] == "status")
+    rows = [row for block in blocks for row in block.rows]
+    assert rows and all(row[0] != "status" for row in rows)
+
+
+def test_short_and_long_rows(tmp_path):
+    path = str(tmp_path / "short.csv")
+    with open(path, "w") as f:
+        f.write("Type,Identifier,Description\naddressmap,m\nregister,r,d,extra\n\n")
+    block, = csr_blocks.read_blocks(path)
+    assert block.dict_rows() == [
+        {"Type": "addressmap", "Identifier": "m", "Description": None},
+        {"Type": "register", "Identifier": "r", "Description": "d", None: ["extra"]},
+    ]
+
+
+@pytest.mark.parametrize("processes", [1, 3])
+def test_output_in_block_order(capsys, csv_file, processes):
+    blocks = csr_blocks.read_blocks(csv_file)
+    assert run(capsys, blocks, processes=processes) == expected_output(csv_file)
+
+
+def test_cache(capsys, csv_file, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    blocks = csr_blocks.read_blocks(csv_file)
+    expected = expected_output(csv_file)
+    assert run(capsys, blocks, cache_dir=cache_dir, processes=1) == expected
+    assert len(CALLS) == 13
+    entries = os.listdir(os.path.join(cache_dir, "test_csr_blocks.print_block"))
+    assert len(entries) == 13
+
+    del CALLS[:]
+    assert run(capsys, blocks, cache_dir=cache_dir, processes=1) == expected
+    assert CALLS == []
+
+    # Only the changed block is generated again, stale entries are removed
+    rows = make_csv.make_rows("top", 12, 8, seed=1)
+    next(row for row in rows if row[2] == "areg1")[8] = "changed"
+    make_csv.write_csv(csv_file, rows)
+    blocks = csr_blocks.read_blocks(csv_file)
+    assert run(capsys, blocks, cache_dir=cache_dir, processes=1) == expected_output(csv_file)
+    assert len(CALLS) == 1
+    assert sorted(os.listdir(os.path.join(cache_dir, "test_csr_blocks.print_block"))) != sorted(entries)
+    assert len(os.listdir(os.path.join(cache_dir, "test_csr_blocks.print_block"))) == 13
+
+
+def test_unusable_cache_dir(capsys, csv_file, tmp_path):
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("")
+    blocks = csr_blocks.read_blocks(csv_file)
+    assert run(capsys, blocks, cache_dir=str(not_a_dir), processes=1) == expected_output(csv_file)
+
+
+def test_no_cache_dir_by_default(capsys, csv_file, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    run(capsys, csr_blocks.read_blocks(csv_file))
+    assert sorted(os.listdir(str(tmp_path))) == ["regs.csv"]
@@ -105,6 +105,12 @@ perf.env()                   - prints environment information
 perf.>test_name<.info()      - prints the detailed test description
                                and example of use;
 perf.>test_name<.run(params) - runs specified test; params are optional;
+perf.>test_name<.benchmark(params, warmup=1, runs=10, baseline=None)
+                             - runs specified test repeatedly, prints
+                               median/p95/p99/confidence interval, records
+                               them in perf_>test_name<_history.json and
+                               flags regressions against the previous run
+                               with the same params (or baseline file);
 
 -----------------------------------------------------------------------------"""
         print(msg)
@@ -85,3 +85,11 @@ def cast_to_ctypes(python_type_name):
 
 def get_csv_file_name(name):
     return f"perf_{name}.csv"
+
+
+def get_history_file_name(name):
+    return f"perf_{name}_history.json"
+
+
+def get_stats_csv_file_name(name):
+    return f"perf_{name}_stats.csv"
@@ -0,0 +1,161 @@
+################################################################################
+ #  Copyright (C) 2024 Intel Corporation
+ #
+ #  Licensed under the Apache License, Version 2.0 (the "License");
+ #  you may not use this file except in compliance with the License.
+ #  You may obtain a copy of the License at
+ #
+ #  http://www.apache.org/licenses/LICENSE-2.0
+ #
+ #  Unless required by applicable law or agreed to in writing,
+ #  software distributed under the License is distributed on an "AS IS" BASIS,
+ #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ #  See the License for the specific language governing permissions
+ #  and limitations under the License.
+ #
+ #
+ #  SPDX-License-Identifier: Apache-2.0
+################################################################################
+
+import json
+import math
+import os
+import statistics
+
+HISTORY_VERSION = 1
+
+# two-sided 95% Student's t critical values by degrees of freedom, the normal
+# value is used past the end of the table
+T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+TIME_UNITS = ["s", "ms", "us", "ns", "cycles"]
+
+
+def percentile(samples, pct):
+    """Percentile pct (0-100) of samples, linearly interpolated"""
+    ordered = sorted(samples)
+    pos = (len(ordered) - 1) * pct / 100
+    low = math.floor(pos)
+    high = math.ceil(pos)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def summarize(samples):
+    """Median, p95, p99, mean and its 95% confidence interval of samples"""
+    count = len(samples)
+    mean = statistics.fmean(samples)
+    stdev = statistics.stdev(samples) if count > 1 else 0.0
+    t_value = T_95[count - 2] if 1 < count <= len(T_95) + 1 else 1.960
+    half_width = t_value * stdev / math.sqrt(count)
+    return {
+        "n": count,
+        "mean": mean,
+        "stdev": stdev,
+        "median": statistics.median(samples),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "min": min(samples),
+        "max": max(samples),
+        "ci_low": mean - half_width,
+        "ci_high": mean + half_width,
+    }
+
+
+def mann_whitney_p_value(first, second):
+    """
+    Two-sided p-value of the Mann-Whitney U test (normal approximation with
+    tie and continuity corrections) that first and second come from the same
+    distribution. Unlike a t-test it does not assume the timings are normally
+    distributed, which they rarely are.
+    """
+    n1 = len(first)
+    n2 = len(second)
+    if not n1 or not n2:
+        return 1.0
+    combined = sorted([(value, 0) for value in first] + [(value, 1) for value in second])
+    total = n1 + n2
+    rank_sum = 0.0
+    ties = 0.0
+    index = 0
+    while index < total:
+        end = index
+        while end + 1 < total and combined[end + 1][0] == combined[index][0]:
+            end += 1
+        # tied values share the average of their ranks (1 based)
+        rank = (index + end) / 2 + 1
+        group_size = end - index + 1
+        ties += group_size ** 3 - group_size
+        rank_sum += rank * sum(1 for item in combined[index:end + 1] if item[1] == 0)
+        index = end + 1
+    u_value = rank_sum - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((total + 1) - ties / (total * (total - 1)))
+    if variance <= 0:
+        return 1.0
+    z_value = max(abs(u_value - n1 * n2 / 2) - 0.5, 0) / math.sqrt(variance)
+    return min(1.0, math.erfc(z_value / math.sqrt(2)))
+
+
+def lower_is_better(unit):
+    """
+    True for durations ([us], [us/MB], ...), False for rates ([MB/s],
+    [op/s]) and None for units which cannot regress ([-])
+    """
+    unit = unit.strip("[]")
+    if unit.endswith("/s"):
+        return False
+    if unit.split("/")[0] in TIME_UNITS:
+        return True
+    return None
+
+
+def compare(baseline, current, lower_better, alpha=0.05, min_change=0.02):
+    """
+    Compare two lists of samples of the same metric. The current samples are
+    flagged as a regression (or an improvement) when the Mann-Whitney test is
+    significant at level alpha and the median moved by more than min_change
+    (relative) in the bad (or good) direction.
+    """
+    base_median = statistics.median(baseline)
+    cur_median = statistics.median(current)
+    change = (cur_median - base_median) / base_median if base_median else 0.0
+    p_value = mann_whitney_p_value(baseline, current)
+    verdict = ""
+    if lower_better is not None and p_value < alpha and abs(change) > min_change:
+        worse = change > 0 if lower_better else change < 0
+        verdict = "regression" if worse else "improvement"
+    return {
+        "baseline_median": base_median,
+        "change": change,
+        "p_value": p_value,
+        "verdict": verdict,
+    }
+
+
+def load_history(filename):
+    if not os.path.exists(filename):
+        return {"version": HISTORY_VERSION, "runs": []}
+    with open(filename) as history_file:
+        history = json.load(history_file)
+    if history.get("version") != HISTORY_VERSION:
+        raise ValueError(f"Unsupported history version {history.get('version')} "
+                         f"in {filename}")
+    return history
+
+
+def append_history(filename, record):
+    history = load_history(filename)
+    history["runs"].append(record)
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w") as history_file:
+        json.dump(history, history_file, indent=1)
+    os.replace(tmp_filename, filename)
+
+
+def find_baseline(history, test_name, params):
+    """Latest run of test_name with the same parameters in history"""
+    for record in reversed(history["runs"]):
+        if record["test"] == test_name and record["params"] == params:
+            return record
+    return None
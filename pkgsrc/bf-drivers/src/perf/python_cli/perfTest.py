@@ -19,9 +19,11 @@
 
 import csv
 import os
+import time
 from tabulate import tabulate
 
 from perfHelpers import *
+import perfStats
 
 
 class PerfTest:
@@ -89,6 +91,86 @@ class PerfTest:
         if self.results.status:
             self._export_results_to_csv()
 
+    def benchmark(self, *args, warmup=1, runs=10, baseline=None, alpha=0.05,
+                  min_change=0.02, **kwargs):
+        """
+        Run the test warmup times, then runs times, and report the median,
+        p95, p99 and 95% confidence interval of every result. The samples are
+        appended to the test history file and compared with the latest run
+        with the same parameters in baseline (a history file, the test history
+        file by default). Results which differ significantly (Mann-Whitney
+        p-value below alpha and median change above min_change) are flagged.
+        """
+        if not isinstance(runs, int) or runs < 1:
+            print(f"runs must be an integer of at least 1, not {runs!r}")
+            return
+        if not isinstance(warmup, int) or warmup < 0:
+            print(f"warmup must be a non-negative integer, not {warmup!r}")
+            return
+        try:
+            params = self._parse_test_parameters(*args, **kwargs)
+        except ArgumentError as exc:
+            print(f"Problem occurred while parsing test parameters. "
+                  f"Details: {str(exc)}")
+            self.info()
+            return
+
+        samples = []
+        for iteration in range(warmup + runs):
+            self._run_test_function(params)
+            if not self.results.status:
+                print_banner(f"Test {self.test_name}: failed")
+                return
+            if iteration >= warmup:
+                samples.append(self._list_results())
+
+        history_file = get_history_file_name(self.test_name)
+        if baseline is None:
+            baseline = history_file
+        param_values = {
+            param["name"]: str(value.value.decode() if isinstance(value.value, bytes)
+                               else value.value)
+            for param, value in zip(self._tests_list[self.test_name]["params"], params)
+        }
+        base_record = perfStats.find_baseline(perfStats.load_history(baseline),
+                                              self.test_name, param_values)
+        record = {
+            "test": self.test_name,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "params": param_values,
+            "metrics": {},
+        }
+        rows = []
+        for index, item in enumerate(self._tests_list[self.test_name]["results"]):
+            if item["type"] not in ["int", "double"]:
+                continue
+            metric = f"{item['header']} {item['unit']}"
+            values = [sample[index] for sample in samples]
+            stats = perfStats.summarize(values)
+            record["metrics"][metric] = {"samples": values, "stats": stats}
+            row = [metric, stats["median"], stats["p95"], stats["p99"],
+                   f"{stats['ci_low']:.2f} - {stats['ci_high']:.2f}"]
+            if base_record is not None and metric in base_record["metrics"]:
+                result = perfStats.compare(base_record["metrics"][metric]["samples"],
+                                           values,
+                                           perfStats.lower_is_better(item["unit"]),
+                                           alpha, min_change)
+                record["metrics"][metric]["comparison"] = result
+                row += [result["baseline_median"], f"{result['change'] * 100:+.1f}%",
+                        result["p_value"], result["verdict"].upper()]
+            rows.append(row)
+
+        print_banner(f"{self.test_name}: {runs} runs after {warmup} warm-up")
+        headers = ["Result", "Median", "p95", "p99", "95% CI (mean)"]
+        if base_record is not None:
+            headers += ["Baseline\nmedian", "Change", "p-value", ""]
+        print(tabulate(rows, headers, floatfmt=".2f"))
+
+        perfStats.append_history(history_file, record)
+        self._export_stats_to_csv(record)
+        print(f"\nBenchmark results have been added to {history_file}\n")
+        return record
+
     def _parse_test_parameters(self, *args, **kwargs):
         if kwargs:
             return self._parse_kwargs(**kwargs)
@@ -176,6 +258,26 @@ class PerfTest:
             writer.writerow(results)
         print(f"\nTest results have been written to {filename}\n")
 
+    def _export_stats_to_csv(self, record):
+        filename = get_stats_csv_file_name(self.test_name)
+        stats_keys = ["n", "median", "p95", "p99", "mean", "stdev", "ci_low", "ci_high"]
+        new_file = not os.path.exists(filename)
+        with open(filename, 'a') as csv_file:
+            writer = csv.writer(csv_file)
+            if new_file:
+                writer.writerow(["timestamp", "params", "result"] + stats_keys +
+                                ["baseline_median", "change", "p_value", "verdict"])
+            params = " ".join(f"{name}={value}"
+                              for name, value in record["params"].items())
+            for metric, data in record["metrics"].items():
+                row = [record["timestamp"], params, metric]
+                row += [data["stats"][key] for key in stats_keys]
+                comparison = data.get("comparison")
+                if comparison is not None:
+                    row += [comparison["baseline_median"], comparison["change"],
+                            comparison["p_value"], comparison["verdict"]]
+                writer.writerow(row)
+
     def _list_results(self):
         enum_index = 0
         int_index = 0
@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+from ctypes import c_bool, c_double, c_int
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from perfHelpers import test_results  # noqa: E402
+
+# The sizes come from libperf at CPerf start, any will do without it
+test_results._fields_ = [
+    ("status", c_bool),
+    ("res_enum", c_int * 4),
+    ("res_int", c_int * 4),
+    ("res_double", c_double * 4)
+]
+
+TESTS_LIST = {
+    "reg_dir": {
+        "filename": "perf_reg_dir.csv",
+        "description": "Register writes",
+        "params": [{"name": "bus", "type": "enum", "defaults": 0},
+                   {"name": "iterations", "type": "int", "defaults": 1000}],
+        "results": [{"header": "bus", "unit": "[-]", "type": "enum"},
+                    {"header": "iterations", "unit": "[-]", "type": "int"},
+                    {"header": "write time", "unit": "[ns]", "type": "double"},
+                    {"header": "write rate", "unit": "[op/s]", "type": "double"}],
+    },
+}
+ENUM_LIST = {"bus": {"0": "PBUS", "1": "MBUS"}}
+
+
+class MockDriver:
+    """
+    Stands in for libperf. reg_dir() takes write_ns nanoseconds per write,
+    give or take noise
+    """
+    def __init__(self, write_ns=100.0, noise=3.0, seed=1):
+        self.write_ns = write_ns
+        self.noise = noise
+        self.fail = False
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def reg_dir(self, dev_id, bus, iterations):
+        self.calls += 1
+        results = test_results()
+        results.status = not self.fail
+        results.res_enum[0] = bus.value
+        results.res_int[0] = iterations.value
+        write_ns = self._random.gauss(self.write_ns, self.noise)
+        results.res_double[0] = write_ns
+        results.res_double[1] = 1e9 / write_ns
+        return results
+
+
+@pytest.fixture
+def perf_test(tmp_path, monkeypatch):
+    """A reg_dir PerfTest on a MockDriver, writing its files in tmp_path"""
+    from perfTest import PerfTest
+    monkeypatch.chdir(tmp_path)
+    return PerfTest("reg_dir", MockDriver(), 0, TESTS_LIST, ENUM_LIST)
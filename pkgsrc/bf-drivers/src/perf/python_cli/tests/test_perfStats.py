@@ -0,0 +1,119 @@
+import math
+
+import pytest
+
+import perfStats
+
+
+@pytest.mark.parametrize("samples, pct, expected", [
+    ([5], 50, 5),
+    ([3, 1, 2, 5, 4], 0, 1),
+    ([3, 1, 2, 5, 4], 50, 3),
+    ([3, 1, 2, 5, 4], 100, 5),
+    ([1, 2, 3, 4], 50, 2.5),
+    ([1, 2, 3, 4], 95, 3.85),
+])
+def test_percentile(samples, pct, expected):
+    assert perfStats.percentile(samples, pct) == pytest.approx(expected)
+
+
+def test_summarize():
+    stats = perfStats.summarize([2, 4, 4, 4, 5, 5, 7, 9])
+    stdev = math.sqrt(32 / 7)
+    # 2.365 is the 95% t value for 7 degrees of freedom
+    half_width = 2.365 * stdev / math.sqrt(8)
+    assert stats == pytest.approx({
+        "n": 8, "mean": 5, "stdev": stdev, "median": 4.5, "p95": 8.3,
+        "p99": 8.86, "min": 2, "max": 9,
+        "ci_low": 5 - half_width, "ci_high": 5 + half_width})
+
+
+def test_summarize_large_and_single():
+    stats = perfStats.summarize(list(range(100)))
+    # past the t table, the normal value is used
+    assert stats["ci_high"] - stats["mean"] == pytest.approx(
+        1.960 * stats["stdev"] / 10)
+    stats = perfStats.summarize([7])
+    assert stats["stdev"] == 0
+    assert stats["ci_low"] == stats["ci_high"] == stats["median"] == 7
+
+
+@pytest.mark.parametrize("first, second, expected", [
+    # normal approximation with continuity correction, as scipy's
+    # mannwhitneyu(method="asymptotic")
+    ([1, 2, 3], [4, 5, 6], 0.080856),
+    ([4, 5, 6], [1, 2, 3], 0.080856),
+    # with the tie correction
+    ([1, 2, 2, 3], [2, 3, 4, 4], 0.134169),
+    ([1, 2, 3], [1, 2, 3], 1.0),
+    ([5, 5, 5], [5, 5, 5], 1.0),
+    ([], [1, 2], 1.0),
+])
+def test_mann_whitney_p_value(first, second, expected):
+    assert perfStats.mann_whitney_p_value(first, second) == pytest.approx(
+        expected, abs=1e-6)
+
+
+def test_mann_whitney_p_value_shift():
+    baseline = [100 + i % 7 for i in range(30)]
+    assert perfStats.mann_whitney_p_value(baseline, [x + 10 for x in baseline]) < 0.001
+    assert perfStats.mann_whitney_p_value(baseline, list(reversed(baseline))) == 1.0
+
+
+@pytest.mark.parametrize("unit, expected", [
+    ("[ns]", True),
+    ("[us]", True),
+    ("[cycles]", True),
+    ("[us/MB]", True),
+    ("[MB/s]", False),
+    ("[op/s]", False),
+    ("[-]", None),
+    ("[entries]", None),
+])
+def test_lower_is_better(unit, expected):
+    assert perfStats.lower_is_better(unit) is expected
+
+
+BASELINE = [100 + i % 5 for i in range(20)]
+SLOWER = [x * 1.1 for x in BASELINE]
+
+
+@pytest.mark.parametrize("current, lower_better, verdict", [
+    (BASELINE, True, ""),
+    (SLOWER, True, "regression"),
+    (SLOWER, False, "improvement"),
+    (SLOWER, None, ""),
+    # significant, but within min_change
+    ([x + 1 for x in BASELINE], True, ""),
+])
+def test_compare(current, lower_better, verdict):
+    result = perfStats.compare(BASELINE, current, lower_better)
+    assert result["verdict"] == verdict
+    assert result["baseline_median"] == 102
+    assert result["change"] == pytest.approx(
+        (sorted(current)[9] + sorted(current)[10]) / 2 / 102 - 1)
+
+
+def test_compare_thresholds():
+    result = perfStats.compare(BASELINE, SLOWER, True, alpha=1e-12)
+    assert result["p_value"] < 0.001 and result["verdict"] == ""
+    result = perfStats.compare(BASELINE, SLOWER, True, min_change=0.2)
+    assert result["verdict"] == ""
+    result = perfStats.compare([0, 0, 0], [1, 1, 1], True)
+    assert result["change"] == 0.0
+
+
+def test_history(tmp_path):
+    filename = str(tmp_path / "history.json")
+    assert perfStats.load_history(filename) == {"version": 1, "runs": []}
+    perfStats.append_history(filename, {"test": "t", "params": {"a": "1"}, "n": 1})
+    perfStats.append_history(filename, {"test": "t", "params": {"a": "2"}, "n": 2})
+    perfStats.append_history(filename, {"test": "t", "params": {"a": "1"}, "n": 3})
+    history = perfStats.load_history(filename)
+    assert perfStats.find_baseline(history, "t", {"a": "1"})["n"] == 3
+    assert perfStats.find_baseline(history, "t", {"a": "2"})["n"] == 2
+    assert perfStats.find_baseline(history, "t", {"a": "3"}) is None
+    assert perfStats.find_baseline(history, "u", {"a": "1"}) is None
+    (tmp_path / "history.json").write_text('{"version": 99, "runs": []}')
+    with pytest.raises(ValueError):
+        perfStats.load_history(filename)
@@ -0,0 +1,93 @@
+import csv
+import json
+
+import pytest
+
+METRICS = ["iterations [-]", "write time [ns]", "write rate [op/s]"]
+
+
+def history():
+    with open("perf_reg_dir_history.json") as history_file:
+        return json.load(history_file)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"runs": 0},
+    {"runs": -1},
+    {"runs": 2.5},
+    {"warmup": -1},
+    {"warmup": None},
+])
+def test_invalid_runs_and_warmup(perf_test, tmp_path, capsys, kwargs):
+    assert perf_test.benchmark(**kwargs) is None
+    assert "must be" in capsys.readouterr().out
+    assert perf_test._driver.calls == 0
+    assert not list(tmp_path.iterdir())
+
+
+def test_first_run(perf_test, capsys):
+    record = perf_test.benchmark(bus="MBUS", warmup=2, runs=5)
+    assert perf_test._driver.calls == 7
+    assert record["params"] == {"bus": "1", "iterations": "1000"}
+    assert list(record["metrics"]) == METRICS
+    for metric in METRICS:
+        assert len(record["metrics"][metric]["samples"]) == 5
+        assert "comparison" not in record["metrics"][metric]
+    assert record["metrics"]["iterations [-]"]["stats"]["median"] == 1000
+    assert history() == {"version": 1, "runs": [record]}
+    with open("perf_reg_dir_stats.csv") as csv_file:
+        rows = list(csv.reader(csv_file))
+    assert len(rows) == 4
+    assert [row[2] for row in rows[1:]] == METRICS
+    assert "Baseline" not in capsys.readouterr().out
+
+
+def test_failed_run(perf_test, tmp_path):
+    perf_test._driver.fail = True
+    assert perf_test.benchmark(runs=3) is None
+    assert perf_test._driver.calls == 1
+    assert not list(tmp_path.iterdir())
+
+
+def test_same_speed_not_flagged(perf_test, capsys):
+    perf_test.benchmark(runs=15)
+    record = perf_test.benchmark(runs=15)
+    for metric in METRICS:
+        assert record["metrics"][metric]["comparison"]["verdict"] == ""
+    out = capsys.readouterr().out
+    assert "REGRESSION" not in out and "IMPROVEMENT" not in out
+    assert len(history()["runs"]) == 2
+
+
+def test_slowdown_flagged(perf_test, capsys):
+    perf_test.benchmark(runs=15)
+    perf_test._driver.write_ns *= 1.1
+    record = perf_test.benchmark(runs=15)
+    metrics = record["metrics"]
+    assert metrics["iterations [-]"]["comparison"]["verdict"] == ""
+    for metric in ["write time [ns]", "write rate [op/s]"]:
+        assert metrics[metric]["comparison"]["verdict"] == "regression"
+        assert metrics[metric]["comparison"]["p_value"] < 0.001
+    assert metrics["write time [ns]"]["comparison"]["change"] == pytest.approx(0.1, abs=0.03)
+    assert "REGRESSION" in capsys.readouterr().out
+
+    perf_test._driver.write_ns /= 1.2
+    record = perf_test.benchmark(runs=15)
+    assert record["metrics"]["write time [ns]"]["comparison"]["verdict"] == "improvement"
+
+
+def test_baseline_per_params(perf_test):
+    perf_test.benchmark(runs=5)
+    record = perf_test.benchmark(iterations=500, runs=5)
+    assert "comparison" not in record["metrics"]["write time [ns]"]
+    record = perf_test.benchmark(runs=5)
+    assert "comparison" in record["metrics"]["write time [ns]"]
+
+
+def test_baseline_file(perf_test, tmp_path):
+    perf_test.benchmark(runs=15)
+    (tmp_path / "perf_reg_dir_history.json").rename(tmp_path / "release.json")
+    perf_test._driver.write_ns *= 1.1
+    record = perf_test.benchmark(runs=15, baseline=str(tmp_path / "release.json"))
+    assert record["metrics"]["write time [ns]"]["comparison"]["verdict"] == "regression"
+    assert len(history()["runs"]) == 1
@@ -18,9 +18,34 @@
 """
 TODO: document this file
 """
+import binascii
 import struct
+import sys
 from copy import copy
 
+def word_bytes(value, width):
+    """
+    Little-endian bytes of a non-negative integer, zero-padded to width bits
+    (rounded down to whole bytes). Values too wide for the word are not
+    truncated, and at least one byte is always returned.
+    """
+    nbytes = max(width//8, (value.bit_length()+7)//8, 1)
+    if hasattr(value, "to_bytes"):
+        return value.to_bytes(nbytes, "little")
+    return binascii.unhexlify("%0*x" % (2*nbytes, value))[::-1]
+
+def _pack128(value, _pack=struct.Struct("<QQ").pack, _mask=(1<<64)-1):
+    return _pack(value & _mask, value >> 64)
+
+# Fast packers for the common word widths, only valid for values that fit
+_word_packers = {
+    8: struct.Struct("<B").pack,
+    16: struct.Struct("<H").pack,
+    32: struct.Struct("<I").pack,
+    64: struct.Struct("<Q").pack,
+    128: _pack128,
+}
+
 class chip_object(object):
     """
     TODO: docstring
@@ -32,6 +57,9 @@ class chip_object(object):
     def add_offset (self, offset):
         self.addr += offset
 
+    def write(self, outfile):
+        outfile.write(self.bytes())
+
 class direct_reg(chip_object):
     """
     A single register write operation, of the format:
@@ -56,7 +84,7 @@ class direct_reg(chip_object):
         return copy(self)
 
     def bytes(self):
-        return "\0\0\0R" + struct.pack("<I",self.addr) + self.value
+        return b"\0\0\0R" + struct.pack("<I",self.addr) + self.value
 
 class indirect_reg(chip_object):
     """
@@ -73,12 +101,7 @@ class indirect_reg(chip_object):
         chip_object.__init__(self, addr, src_key)
         self.width=width
 
-        hexstr = hex(value).replace('0x','').replace('L','')
-        if len(hexstr) % 2 != 0:
-            hexstr = '0' + hexstr
-        self.value=bytearray.fromhex(hexstr)
-        self.value = self.value.rjust(self.width//8,chr(0))
-        self.value.reverse()
+        self.value = word_bytes(value, width)
         self.orig_value = value
 
     def __str__(self):
@@ -95,12 +118,12 @@ class indirect_reg(chip_object):
         # Make sure to write pieces of the register starting from the
         # most-significant end, to ensure atomicity
         offset = (self.width//8) - 4
-        byte_str = ""
+        byte_str = bytearray()
         while offset >= 0:
-            byte_str += "\0\0\0R" + struct.pack("<I",self.addr+offset) + self.value[offset:offset+4].ljust(4,chr(0))
+            byte_str += b"\0\0\0R" + struct.pack("<I",self.addr+offset) + self.value[offset:offset+4].ljust(4,b"\0")
             offset -= 4
 
-        return byte_str
+        return bytes(byte_str)
 
 class dma_block(chip_object):
     """
@@ -123,17 +146,25 @@ class dma_block(chip_object):
     def __init__(self, addr, width, src_key=None, is_reg=False):
         chip_object.__init__(self, addr, src_key)
         self.width=width
-        self.values=[]
         self.is_reg = is_reg
+        # Words are appended to one little-endian buffer as they are added,
+        # so emitting the block is a header plus a single write of the data
+        self.data = bytearray()
+        self.count = 0
+        self.pack_word = _word_packers.get(width)
 
     def add_word(self, value):
-        hexstr = hex(value).replace('0x','').replace('L','')
-
-        if len(hexstr) % 2 != 0:
-            hexstr = '0' + hexstr
-        self.values.append(bytearray.fromhex(hexstr))
-        self.values[-1] = self.values[-1].rjust(self.width//8,chr(0))
-        self.values[-1].reverse()
+        if self.pack_word and not value >> self.width:
+            self.data += self.pack_word(value)
+            self.count += 1
+            return
+        word = word_bytes(value, self.width)
+        if self.width > 128:
+            # Wide words are emitted as 128-bit chunks covering exactly
+            # width bits, anything above that is dropped
+            word = word[:self.width//8]
+        self.data += word
+        self.count += 1
 
     def __str__(self):
         # TODO
@@ -141,27 +172,29 @@ class dma_block(chip_object):
     
     def deepcopy(self):
         new = copy(self)
-        new.values = new.values[:]
+        new.data = bytearray(self.data)
         return new
 
-    def bytes(self):
-        if self.width > 128:
+    def header(self):
+        width = self.width
+        count = self.count
+        if width > 128:
             # FIXME: this only works cleanly if width is a multiple of 128, can it be otherwise?
-            if self.width % 128 != 0:
-                sys.stderr.write("ERROR: register width %d not a multiple of 128" % self.width);
+            if width % 128 != 0:
+                sys.stderr.write("ERROR: register width %d not a multiple of 128" % width);
                 sys.exit(1)
-            new_values = []
-            for value in self.values:
-                for chunk in range(0, self.width//8, 16):
-                    new_values.append(value[chunk:chunk+16].rjust(128//8,chr(0)))
-            self.values = new_values
-            self.width = 128
+            count *= width//128
+            width = 128
 
         if self.is_reg:
-            op_type = "\0\0\0B"
+            op_type = b"\0\0\0B"
         else:
-            op_type = "\0\0\0D"
-        bytestr = op_type + struct.pack("<Q",self.addr) + struct.pack("<I",self.width) + struct.pack("<I",len(self.values))
-        for value in self.values:
-            bytestr += value
-        return bytestr
+            op_type = b"\0\0\0D"
+        return op_type + struct.pack("<QII", self.addr, width, count)
+
+    def write(self, outfile):
+        outfile.write(self.header())
+        outfile.write(self.data)
+
+    def bytes(self):
+        return self.header() + bytes(self.data)
@@ -36,6 +36,11 @@ from operator import ior
 import chip
 from functools import reduce
 
+try:
+    basestring
+except NameError:
+    basestring = str
+
 ########################################################################
 ## Utility functions
 
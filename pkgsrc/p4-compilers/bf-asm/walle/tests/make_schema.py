@@ -0,0 +1,147 @@
+################################################################################
+ #  Copyright (C) 2024 Intel Corporation
+ #
+ #  Licensed under the Apache License, Version 2.0 (the "License");
+ #  you may not use this file except in compliance with the License.
+ #  You may obtain a copy of the License at
+ #
+ #  http://www.apache.org/licenses/LICENSE-2.0
+ #
+ #  Unless required by applicable law or agreed to in writing,
+ #  software distributed under the License is distributed on an "AS IS" BASIS,
+ #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ #  See the License for the specific language governing permissions
+ #  and limitations under the License.
+ #
+ #
+ #  SPDX-License-Identifier: Apache-2.0
+################################################################################
+
+"""
+A synthetic chip schema and config sets to crunch with it, since the real
+schemas are generated from register CSVs that are not in this tree.
+
+Both the memories and the regs section have a 'top' address map instantiating
+num_pipes 'pipe' address maps. A pipe has 32- and 64-bit registers and arrays
+of 128- and 256-bit registers. Padding address maps make the schema larger
+without being crunched.
+
+Usage:
+    python tests/make_schema.py OUT_DIR [--pipes N] [--words N] [--pad N]
+                                        [--configs N]
+
+writes OUT_DIR/chip.schema, OUT_DIR/cfgI/*.json and OUT_DIR/batch.yaml with
+a job crunching each config set into OUT_DIR/cfgI.bin.
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import csr  # noqa: E402
+
+SCHEMA_HASH = "0123"
+SECTIONS = ("memories", "regs")
+
+
+def make_reg(name, count, offset, width, parent, num_fields):
+    reg = csr.reg(name, count, offset, width, parent)
+    field_width = width // num_fields
+    for idx in range(num_fields):
+        reg.fields.append(csr.field("f%d" % idx, (1,), (idx + 1) * field_width - 1,
+                                    idx * field_width, [0], reg))
+    return reg
+
+
+def make_schema(num_pipes, num_words, num_pad=0):
+    schema = {"_schema_hash": SCHEMA_HASH, "_reg_version": "synthetic",
+              "_walle_version": "0.4.13"}
+    for section in SECTIONS:
+        pipe = csr.address_map("pipe", (1,), section)
+        pipe.objs.append(make_reg("ctl", (1,), 0, 32, pipe, 4))
+        pipe.objs.append(make_reg("wide", (1,), 0x10, 64, pipe, 2))
+        pipe.objs.append(make_reg("tbl", (num_words,), 0x1000, 128, pipe, 4))
+        pipe.objs.append(make_reg("wtbl", (num_words // 4,), 0x100000, 256, pipe, 8))
+        top = csr.address_map("top", (1,), section)
+        top.objs.append(csr.address_map_instance("pipes", (num_pipes,), 0, pipe,
+                                                 0x1000000))
+        schema[section] = {"top": top, "pipe": pipe}
+    for idx in range(num_pad):
+        amap = csr.address_map("pad%d" % idx, (1,), "regs")
+        for reg in range(50):
+            amap.objs.append(make_reg("r%d" % reg, (1,), reg * 4, 32, amap, 8))
+        schema["regs"]["pad%d" % idx] = amap
+    return schema
+
+
+def write_schema(path, num_pipes, num_words, num_pad=0):
+    with open(path, "wb") as schema_file:
+        pickle.dump(make_schema(num_pipes, num_words, num_pad), schema_file,
+                    protocol=2)
+
+
+def write_configs(config_dir, num_pipes, num_words, seed):
+    """
+    Write the config JSON files of one binary, with random field values
+    """
+    rnd = random.Random(seed)
+
+    def reg_value(num_fields, field_width):
+        return dict(("f%d" % idx, rnd.getrandbits(field_width))
+                    for idx in range(num_fields))
+
+    if not os.path.isdir(config_dir):
+        os.makedirs(config_dir)
+    for section in SECTIONS:
+        templates = []
+        for pipe in range(num_pipes):
+            templates.append({
+                "_name": "%s.pipe%d" % (section, pipe),
+                "_type": "%s.pipe" % section,
+                "_schema_hash": SCHEMA_HASH,
+                "ctl": reg_value(4, 8),
+                "wide": reg_value(2, 32),
+                "tbl": [reg_value(4, 32) for _ in range(num_words)],
+                "wtbl": [reg_value(8, 32) for _ in range(num_words // 4)],
+            })
+        templates.append({
+            "_name": "%s.top" % section,
+            "_type": "%s.top" % section,
+            "_schema_hash": SCHEMA_HASH,
+            "pipes": ["%s.pipe%d" % (section, pipe) for pipe in range(num_pipes)],
+        })
+        for template in templates:
+            with open(os.path.join(config_dir, template["_name"] + ".json"), "w") as f:
+                json.dump(template, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--pipes", type=int, default=8)
+    parser.add_argument("--words", type=int, default=4096)
+    parser.add_argument("--pad", type=int, default=1000,
+                        help="number of padding address maps")
+    parser.add_argument("--configs", type=int, default=3,
+                        help="number of config sets")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.out_dir):
+        os.makedirs(args.out_dir)
+    write_schema(os.path.join(args.out_dir, "chip.schema"), args.pipes,
+                 args.words, args.pad)
+    batch = []
+    for idx in range(args.configs):
+        name = "cfg%d" % idx
+        write_configs(os.path.join(args.out_dir, name), args.pipes, args.words,
+                      seed=idx)
+        batch.append("- configs: [%s/*.json]\n  o: %s.bin\n" % (name, name))
+    with open(os.path.join(args.out_dir, "batch.yaml"), "w") as f:
+        f.write("".join(batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+walle.py --batch on a synthetic schema, against one regular invocation per
+binary
+"""
+import glob
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import make_schema  # noqa: E402
+
+WALLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "walle.py")
+NUM_PIPES = 2
+NUM_WORDS = 16
+
+# The binaries of the batch: the config set and the top identifiers
+JOBS = [
+    ("cfg0", None),
+    ("cfg1", None),
+    ("cfg2", ["regs.top"]),
+]
+
+BATCH = """\
+- configs: [cfg0/*.json]
+  o: out/cfg0.bin
+- configs: [cfg1/memories.*.json, cfg1/regs.*.json]
+  o: out/cfg1.bin
+- configs: cfg2/*.json
+  o: out/cfg2.bin
+  top: regs.top
+"""
+
+
+def walle(*args):
+    return subprocess.run([sys.executable, WALLE] + list(args),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+
+
+@pytest.fixture(scope="module")
+def synthetic(tmp_path_factory):
+    """
+    The directory with the schema and config sets, and the binaries of the
+    batch jobs crunched by regular invocations
+    """
+    path = tmp_path_factory.mktemp("walle")
+    schema = str(path / "chip.schema")
+    make_schema.write_schema(schema, NUM_PIPES, NUM_WORDS)
+    expected = {}
+    for seed, (name, top) in enumerate(JOBS):
+        make_schema.write_configs(str(path / name), NUM_PIPES, NUM_WORDS, seed)
+        out = str(path / (name + ".bin"))
+        args = ["-s", schema, "-o", out] + sorted(glob.glob(str(path / name / "*.json")))
+        for identifier in top or []:
+            args += ["--top", identifier]
+        result = walle(*args)
+        assert result.returncode == 0, result.stderr
+        with open(out, "rb") as binfile:
+            expected[name] = binfile.read()
+    # The job with its own top crunches less
+    assert 0 < len(expected["cfg2"]) < len(expected["cfg1"])
+    return path, expected
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_batch_matches_single_invocations(synthetic, tmp_path, jobs):
+    path, expected = synthetic
+    batch = path / ("batch%d.yaml" % jobs)
+    batch.write_text(BATCH.replace("out/", "out%d/" % jobs))
+    os.makedirs(str(path / ("out%d" % jobs)))
+
+    result = walle("-s", str(path / "chip.schema"), "--batch", str(batch), "-j", str(jobs))
+    assert result.returncode == 0, result.stderr
+    assert "3 of 3 binaries generated" in result.stdout
+    for name, _ in JOBS:
+        with open(str(path / ("out%d" % jobs) / (name + ".bin")), "rb") as binfile:
+            assert binfile.read() == expected[name], name
+
+
+def test_failed_job(synthetic):
+    path, expected = synthetic
+    batch = path / "failing.yaml"
+    batch.write_text("- configs: [missing.json]\n  o: failed.bin\n"
+                     "- configs: [cfg0/*.json]\n  o: after_failure.bin\n")
+
+    result = walle("-s", str(path / "chip.schema"), "--batch", str(batch), "-j", "1")
+    assert result.returncode != 0
+    assert "missing.json" in result.stderr
+    assert "1 of 2 binaries generated" in result.stdout
+    with open(str(path / "after_failure.bin"), "rb") as binfile:
+        assert binfile.read() == expected["cfg0"]
+
+
+def test_batch_with_configs():
+    result = walle("--batch", "batch.yaml", "config.json")
+    assert result.returncode != 0
+    assert "cannot be combined" in result.stderr
@@ -0,0 +1,131 @@
+"""
+Binary output of the chip objects, against vectors recorded with the chip.py
+that formatted every word through a hex string
+"""
+import binascii
+import hashlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import chip  # noqa: E402
+
+PATTERN = int("0123456789abcdef" * 17, 16)
+
+
+def values(width):
+    """
+    Zero, one, all-ones, a pattern, one bit too wide and well over the width
+    """
+    ones = (1 << width) - 1
+    return [0, 1, ones, PATTERN & ones, 1 << width, (1 << (width + 12)) - 5]
+
+
+def block(width, words):
+    blk = chip.dma_block(0x1000 + width, width, is_reg=bool(width % 2))
+    for value in words:
+        blk.add_word(value)
+    return blk
+
+
+DMA_BLOCKS = {
+    1: "00000042011000000000000001000000050000000001010102",
+    7: "000000420710000000000000070000000500000000017f6f80",
+    8: "00000044081000000000000008000000050000000001ffef0001",
+    12: "000000440c100000000000000c000000050000000001ff0fef0d0010",
+    32: "00000044201000000000000020000000050000000000000001000000ffffffff"
+        "efcdab890000000001",
+    33: "00000042211000000000000021000000050000000000000001000000ffffffff"
+        "01efcdab89010000000002",
+    128: "0000004480100000000000008000000005000000000000000000000000000000"
+         "0000000001000000000000000000000000000000ffffffffffffffffffffffff"
+         "ffffffffefcdab8967452301efcdab8967452301000000000000000000000000"
+         "0000000001",
+    256: "000000440011000000000000800000000a000000000000000000000000000000"
+         "0000000000000000000000000000000000000000010000000000000000000000"
+         "0000000000000000000000000000000000000000ffffffffffffffffffffffff"
+         "ffffffffffffffffffffffffffffffffffffffffefcdab8967452301efcdab89"
+         "67452301efcdab8967452301efcdab8967452301000000000000000000000000"
+         "0000000000000000000000000000000000000000",
+}
+
+INDIRECT_REGS = {
+    32: "0000005200200000efcdab89",
+    64: "0000005204200000674523010000005200200000efcdab89",
+    96: "0000005208200000efcdab890000005204200000674523010000005200200000"
+        "efcdab89",
+    128: "000000520c200000674523010000005208200000efcdab890000005204200000"
+         "674523010000005200200000efcdab89",
+}
+
+# Digest of the blocks of every width from 1 to 1024 that can be emitted,
+# each followed by a copy moved with add_offset and one more word
+SWEEP_DIGEST = "6c84d308e00ca00dc88939872fe21609de95db83cbc04208fa887af8fad405cc"
+
+
+def hexlify(data):
+    return binascii.hexlify(bytes(data)).decode()
+
+
+@pytest.mark.parametrize("width", sorted(DMA_BLOCKS))
+def test_dma_block(width):
+    blk = block(width, values(width)[:5])
+    assert hexlify(blk.bytes()) == DMA_BLOCKS[width]
+
+
+@pytest.mark.parametrize("width", sorted(INDIRECT_REGS))
+def test_indirect_reg(width):
+    reg = chip.indirect_reg(0x2000, PATTERN & ((1 << width) - 1), width)
+    assert hexlify(reg.bytes()) == INDIRECT_REGS[width]
+
+
+def test_direct_reg():
+    assert hexlify(chip.direct_reg(0x3000, 0x12345678).bytes()) == "000000520030000078563412"
+
+
+def test_all_widths():
+    digest = hashlib.sha256()
+    for width in range(1, 1025):
+        if width > 128 and width % 128 != 0:
+            continue
+        blk = block(width, values(width))
+        copied = blk.deepcopy()
+        copied.add_offset(0x40)
+        copied.add_word(7)
+        digest.update(blk.bytes())
+        digest.update(copied.bytes())
+    assert digest.hexdigest() == SWEEP_DIGEST
+
+
+def test_wide_width_not_multiple_of_128():
+    with pytest.raises(SystemExit):
+        block(130, [1]).bytes()
+
+
+@pytest.mark.parametrize("width", [32, 100, 256])
+def test_repeated_bytes(width):
+    blk = block(width, values(width))
+    first = blk.bytes()
+    assert blk.bytes() == first
+    assert blk.width == width
+    out = io.BytesIO()
+    blk.write(out)
+    assert out.getvalue() == first
+
+    # The block can still grow after being emitted
+    blk.add_word(3)
+    assert blk.bytes() == block(width, values(width) + [3]).bytes()
+
+
+def test_deepcopy_add_offset():
+    blk = block(256, [1, 2])
+    copied = blk.deepcopy()
+    copied.add_offset(0x40)
+    copied.add_word(3)
+    assert blk.bytes() == block(256, [1, 2]).bytes()
+    expected = block(256, [1, 2, 3])
+    expected.addr += 0x40
+    assert copied.bytes() == expected.bytes()
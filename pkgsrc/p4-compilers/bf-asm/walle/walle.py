@@ -43,9 +43,9 @@ schema. The details of this format are specified in the README.md fileself.
       along the relevent tree of JSON data. These methods create a flat list of
       objects that represent driver write operations, all of which are classes
       from the chip module that inherit from chip_obj.
-    - The flat list of chip objects is looped over, calling each one's bytes()
-      method which returns the actual binary string to be passed to the driver.
-      These bytes are concatenated onto the binary file being output.
+    - The flat list of chip objects is looped over, calling each one's write()
+      method which writes the actual binary string to be passed to the driver
+      straight onto the binary file being output.
       The address of this write may be manipulated, since Semifore addresses
       are auto-generated and may need to be operated on before they appear as
       the chip expects (for instance, chip memories are word-addressed while
@@ -59,9 +59,14 @@ files, Walle will alter the addresses calculated for the _included_ JSON
 to be relative to the addresses in the _including_ JSON.
 """
 import argparse
+import gc
+import glob
+import multiprocessing
 import sys
 import os
 import subprocess
+import time
+import traceback
 
 import pickle
 import json
@@ -498,8 +503,8 @@ def build_binary_cache (args, schema):
 
                 cache.templates[template["_name"]] = template
     except IOError as e:
-        sys.stderr.write("ERROR: Could not open '%s' for reading: %s (errno %i).\n"%(config_filename,e[1],e[0]))
-        sys.exit(e[0])
+        sys.stderr.write("ERROR: Could not open '%s' for reading: %s (errno %i).\n"%(config_filename,e.strerror,e.errno))
+        sys.exit(e.errno)
 
     return cache
 
@@ -543,14 +548,129 @@ def dump_binary (args, binary_cache, out_file):
         template_section = data_type.split(".")[0]
         for chip_obj in data:
             chip_obj.addr = addr_func[template_section](chip_obj.addr)
-            out_file.write(chip_obj.bytes())
+            chip_obj.write(out_file)
 
     if args.append_sentinel:
-        out_file.write(chip.direct_reg(0xFFFFFFFF, 0).bytes())
+        chip.direct_reg(0xFFFFFFFF, 0).write(out_file)
+
+def crunch_binary (args, schema):
+    cache = build_binary_cache(args, schema)
+    with open(args.o,"wb") as binfile:
+        dump_binary(args, cache, binfile)
+
+def read_batch_file (batch_filename, args):
+    """
+    Read a batch file: a YAML (or JSON) list of jobs, each a dictionary with
+    the list of 'configs' to crunch (shell wildcards allowed), the binary file
+    'o' to write and optionally the 'top' identifiers to drill down from.
+    Relative paths are relative to the directory of the batch file.
+    Returns one copy of args per job.
+    """
+    try:
+        with open(batch_filename, "r") as batch_file:
+            batch = yaml.load(batch_file, Loader=yaml.SafeLoader)
+    except (IOError, yaml.YAMLError) as e:
+        sys.stderr.write("ERROR: Could not read batch file '%s': %s\n" % (batch_filename, e))
+        sys.exit(1)
+
+    if type(batch) is not list:
+        sys.stderr.write("ERROR: Batch file '"+batch_filename+"' is not a list of jobs.\n")
+        sys.exit(1)
+
+    batch_dir = os.path.dirname(batch_filename)
+    jobs = []
+    for idx, entry in enumerate(batch):
+        if type(entry) is not dict or "configs" not in entry or "o" not in entry:
+            sys.stderr.write("ERROR: Job %i of batch file '%s' needs 'configs' and 'o' keys.\n" % (idx, batch_filename))
+            sys.exit(1)
+        for key in ("configs", "top"):
+            if isinstance(entry.get(key), str):
+                entry[key] = [entry[key]]
+        job = copy.copy(args)
+        job.configs = []
+        for pattern in entry["configs"]:
+            pattern = os.path.join(batch_dir, pattern)
+            job.configs.extend(sorted(glob.glob(pattern)) or [pattern])
+        job.o = os.path.join(batch_dir, entry["o"])
+        job.top = entry.get("top", args.top)
+        jobs.append(job)
+    return jobs
+
+# Schema shared by the batch workers, set before they are forked
+batch_schema = None
+
+def crunch_batch_job (job):
+    start = time.time()
+    try:
+        crunch_binary(job, batch_schema)
+        status = 0
+    except SystemExit as e:
+        # Errors have already been reported, keep the worker alive
+        status = e.code if e.code else 1
+    except Exception:
+        # Fail this job only, not the rest of the batch
+        sys.stderr.write(traceback.format_exc())
+        status = 1
+    return job.o, status, time.time() - start
+
+def crunch_batch (args, schema):
+    """
+    Crunch every job of the batch file with the schema loaded once, in a pool
+    of forked workers when more than one job is run at a time
+    """
+    global batch_schema
+    jobs = read_batch_file(args.batch, args)
+    batch_schema = schema
+    processes = min(args.jobs or multiprocessing.cpu_count(), len(jobs))
+
+    start = time.time()
+    pool = None
+    if processes > 1 and hasattr(os, "fork"):
+        pool = multiprocessing.get_context("fork").Pool(processes)
+        results = pool.imap(crunch_batch_job, jobs)
+    else:
+        results = map(crunch_batch_job, jobs)
+
+    failed = 0
+    for binary_name, status, seconds in results:
+        if status:
+            failed += 1
+            sys.stderr.write("ERROR: Binary '%s' failed (%.2fs).\n" % (binary_name, seconds))
+        else:
+            sys.stdout.write("Binary '%s' generated successfully (%.2fs).\n" % (binary_name, seconds))
+        sys.stdout.flush()
+
+    if pool:
+        pool.close()
+        pool.join()
+
+    sys.stdout.write("%i of %i binaries generated in %.2fs.\n" % (len(jobs) - failed, len(jobs), time.time() - start))
+    if failed:
+        sys.exit(1)
+
+def load_schema (schema_filename):
+    # The schema is one large graph of small objects that all stay alive, so
+    # the garbage collector only slows the load down, and once loaded it is
+    # moved out of the collector's sight (which also keeps its pages shared
+    # with forked batch workers)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(schema_filename, "rb") as infile:
+            schema = CsrUnpickler(infile).load()
+    finally:
+        if gc_enabled:
+            gc.enable()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
+    return schema
 
 def walle_process(parser, args=None):
     if len(args.top) == 0:
         args.top = ["memories.top", "regs.top"]
+    if args.batch != None and (len(args.configs) != 0 or args.o != None):
+        sys.stderr.write("ERROR: --batch cannot be combined with config files or -o.\n")
+        sys.exit(1)
 
     if args.generate_schema != None:
         schema = csr.build_schema(args.generate_schema, __version__)
@@ -575,8 +695,10 @@ def walle_process(parser, args=None):
                              "' could not be opened or does not exist.\n")
             sys.exit(1)
 
-        with open(args.schema, "rb") as infile:
-            schema = CsrUnpickler(infile).load()
+        start = time.time()
+        schema = load_schema(args.schema)
+        if args.batch != None:
+            sys.stdout.write("Schema '%s' loaded in %.2fs.\n" % (args.schema, time.time() - start))
 
         if args.schema_info:
             print_schema_info(os.path.abspath(args.schema), schema)
@@ -588,15 +710,15 @@ def walle_process(parser, args=None):
             generate_templates(args, schema)
         elif args.generate_cpp != None:
             generate_cpp(args, schema)
+        elif args.batch != None:
+            crunch_batch(args, schema)
         else:
             if len(args.configs)==0:
                 parser.print_help()
             else:
                 if args.o == None:
                     args.o = "a.out"
-                cache = build_binary_cache(args, schema)
-                with open(args.o,"wb") as binfile:
-                    dump_binary(args, cache, binfile)
+                crunch_binary(args, schema)
 
                 sys.stdout.write("Binary '"+args.o+"' generated successfully.\n")
 
@@ -683,6 +805,20 @@ def main():
         default=[],
         help='Identifier of a template to generate binary config data for'
     )
+    parser.add_argument(
+        '--batch',
+        metavar='BATCH-FILE',
+        type=str,
+        default=None,
+        help="Crunch each job of a YAML/JSON list of {configs, o, top} jobs into its own binary, loading the schema once"
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        metavar='N',
+        type=int,
+        default=None,
+        help="Number of batch jobs crunched in parallel (default: number of CPUs)"
+    )
     parser.add_argument(
         '-o',
         metavar='FILE',
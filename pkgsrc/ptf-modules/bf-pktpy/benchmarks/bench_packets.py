@@ -0,0 +1,188 @@
+# Copyright (c) 2021 Intel Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+###############################################################################
+"""Packet micro-benchmarks
+
+Usage:
+    | PYTHONPATH=. python benchmarks/bench_packets.py [-n COUNT] [BENCHMARK ...]
+
+Every benchmark prints packets (or operations) per second for a few typical
+header stacks. Run it on the tree before and after a change to compare.
+"""
+import argparse
+import binascii
+import time
+import warnings
+
+from bf_pktpy.library.helpers.chksum import checksum, checksum_bytes, update_checksum
+from bf_pktpy.packets import Ether, IP, IPv6, MPLS, TCP, UDP, VXLAN
+
+STACKS = (
+    ("Ether/IP/TCP", lambda: Ether() / IP() / TCP()),
+    (
+        "IPv6/UDP/VXLAN",
+        lambda: Ether() / IPv6() / UDP(dport=4789) / VXLAN() / Ether() / IP() / UDP(),
+    ),
+    ("MPLS", lambda: Ether() / MPLS(label=1) / MPLS(label=2, s=1) / IP() / UDP()),
+)
+
+
+def rate(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - start)
+
+
+def report(name, label, value):
+    print("%-10s %-16s %10.0f /s" % (name, label, value))
+
+
+def bench_attrs(count=100000):
+    """Read and write header fields and internal attributes"""
+    ip = IP(ttl=5)
+    pkt = Ether() / ip
+
+    def set_ttl():
+        ip.ttl = 6
+
+    for label, func in (
+        ("get IP.ttl", lambda: ip.ttl),
+        ("set IP.ttl", set_ttl),
+        ("get IP._lock", lambda: ip._lock),
+        ("get Ether.type", lambda: pkt.type),
+    ):
+        report("attrs", label, rate(func, count))
+
+
+def bench_build(count=300):
+    """Serialize an already built packet"""
+    for label, make in STACKS:
+        pkt = make()
+        report("build", label, rate(pkt.pack, count))
+        report(
+            "build-old",
+            label,
+            rate(lambda: binascii.unhexlify(pkt.hex(whitespace=False)), count),
+        )
+
+
+def bench_parse(count=300):
+    """Dissect a frame with load_bytes() and read one IP field"""
+    for label, make in STACKS:
+        template = make() / (b"x" * 1000)
+        frame = bytes(template)
+        report("parse", label, rate(lambda: template.load_bytes(frame), count))
+        report(
+            "parse+read",
+            label,
+            rate(lambda: template.load_bytes(frame)[IP].ttl, count),
+        )
+
+
+def bench_checksum(count=2000):
+    """Internet checksum of a 1500 byte frame and an incremental update"""
+    data = bytes(range(256)) * 5 + bytes(220)
+    binary = "".join(format(byte, "08b") for byte in data)
+    report("checksum", "bytes 1500B", rate(lambda: checksum_bytes(data), count))
+    report("checksum", "bit-string 1500B", rate(lambda: checksum(binary), count))
+    report(
+        "checksum",
+        "update 2B",
+        rate(lambda: update_checksum(0x1234, b"\x40\x06", b"\x3f\x06"), count),
+    )
+    for label, make in STACKS:
+        report("build1k", label, rate(lambda: make() / (b"x" * 1000), count // 10))
+
+
+def _flow(i):
+    return (
+        "10.%d.%d.%d" % (i >> 16 & 255, i >> 8 & 255, i & 255),
+        1024 + i % 60000,
+    )
+
+
+def bench_flows(count=100000):
+    """Build one Ether/IP/UDP packet per flow, as traffic tests do"""
+    payload = b"x" * 64
+
+    def chained(i):
+        src, sport = _flow(i)
+        return (
+            Ether(dst="00:01:02:03:04:05")
+            / IP(src=src, dst="192.168.0.1")
+            / UDP(sport=sport, dport=4791)
+            / payload
+        )
+
+    def in_place(i):
+        src, sport = _flow(i)
+        pkt = Ether(dst="00:01:02:03:04:05")
+        pkt.add_payload(IP(src=src, dst="192.168.0.1"))
+        pkt.add_payload(UDP(sport=sport, dport=4791))
+        pkt.add_payload(payload)
+        return pkt
+
+    template = chained(0)
+
+    def from_template(i):
+        src, sport = _flow(i)
+        pkt = template.copy()
+        pkt[IP].src = src
+        pkt[UDP].sport = sport
+        return pkt
+
+    for label, build in (
+        ("a / b / c", chained),
+        ("add_payload()", in_place),
+        ("template.copy()", from_template),
+    ):
+        start = time.perf_counter()
+        for i in range(count):
+            build(i)
+        elapsed = time.perf_counter() - start
+        report("flows", label, count / elapsed)
+        print("%-10s %-16s %10.1f s for %i flows" % ("", "", elapsed, count))
+
+
+BENCHMARKS = {
+    "attrs": bench_attrs,
+    "build": bench_build,
+    "checksum": bench_checksum,
+    "flows": bench_flows,
+    "parse": bench_parse,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-n", "--count", type=int, help="iterations, each benchmark has a default"
+    )
+    parser.add_argument(
+        "benchmarks", nargs="*", help="one of %s" % ", ".join(sorted(BENCHMARKS))
+    )
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error("unknown benchmark(s): %s" % ", ".join(sorted(unknown)))
+    warnings.simplefilter("ignore")
+    for name in args.benchmarks or sorted(BENCHMARKS):
+        if args.count:
+            BENCHMARKS[name](args.count)
+        else:
+            BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from bf_pktpy.library.helpers.serializer import int_from_bytes
+
 
 def checksum(binary):
     """Calculate checksum"""
@@ -27,3 +29,37 @@ def checksum(binary):
             total = (total >> 16) + (total & 0xFFFF)
         prev = bin(total)
     return total ^ 0xFFFF
+
+
+def ones_complement_sum(data):
+    """16-bit one's complement sum of bytes (bytes, bytearray or memoryview)
+
+    A trailing odd byte is padded with zero. The sum is folded with a single
+    big integer modulo: 2**16 == 1 (mod 0xFFFF), so the frame read as one big
+    endian integer is congruent to the sum of its 16-bit words.
+    """
+    if len(data) % 2:
+        data = bytearray(data) + b"\x00"
+    value = int_from_bytes(data, "big")
+    total = value % 0xFFFF
+    if not total and value:
+        # nonzero sum congruent to 0 is 0xFFFF in one's complement
+        return 0xFFFF
+    return total
+
+
+def checksum_bytes(data):
+    """Calculate internet checksum (RFC 1071) of bytes"""
+    return ones_complement_sum(data) ^ 0xFFFF
+
+
+def update_checksum(chksum, old, new):
+    """Update checksum after a field changed from old to new bytes (RFC 1624)
+
+    HC' = ~(~HC + ~m + m'), with old and new of the same, even, length.
+    """
+    old_sum = ones_complement_sum(old)
+    total = (chksum ^ 0xFFFF) + (old_sum ^ 0xFFFF) + ones_complement_sum(new)
+    while total >> 16:
+        total = (total >> 16) + (total & 0xFFFF)
+    return total ^ 0xFFFF
@@ -0,0 +1,199 @@
+# Copyright (c) 2021 Intel Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+###############################################################################
+""" Byte-level packet serializer """
+from collections import namedtuple
+import binascii
+import six
+
+from bf_pktpy.library.helpers.bin import to_bin
+
+
+FieldPlan = namedtuple("FieldPlan", "name field size conditional")
+
+if six.PY2:
+
+    def int_from_bytes(data, byteorder):
+        """int.from_bytes() for big endian bytes, bytearray or memoryview"""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return int(binascii.hexlify(data), 16) if data else 0
+
+    def int_to_bytes(value, length, byteorder):
+        """int.to_bytes() to big endian bytes"""
+        return binascii.unhexlify("%0*x" % (length * 2, value)) if length else b""
+
+else:
+    int_from_bytes = int.from_bytes
+    int_to_bytes = int.to_bytes
+
+
+class BitWriter:
+    """Accumulate header fields into a bytearray
+
+    Fields are shifted into an integer accumulator which is flushed to the
+    output buffer each time a byte boundary is reached, so sub-byte fields
+    cost a shift and an or instead of a string of '0'/'1' characters.
+
+    Examples:
+        | writer = BitWriter()
+        | writer.write(4, 4)
+        | writer.write(5, 4)
+        | writer.getvalue()  # b"E"
+    """
+
+    __slots__ = ("buf", "acc", "nbits")
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.acc = 0
+        self.nbits = 0
+
+    def write(self, value, size):
+        """Write non-negative int value on exactly size bits"""
+        self.acc = (self.acc << size) | value
+        self.nbits += size
+        if not self.nbits & 7:
+            self.buf += int_to_bytes(self.acc, self.nbits >> 3, "big")
+            self.acc = 0
+            self.nbits = 0
+
+    def write_bytes(self, value):
+        if self.nbits:
+            self.write(int_from_bytes(value, "big"), len(value) * 8)
+        else:
+            self.buf += value
+
+    def write_bits(self, binary):
+        """Write a string of '0'/'1' characters"""
+        if binary:
+            self.write(int(binary, 2), len(binary))
+
+    def write_value(self, value, size):
+        """Write a member value the same way as to_bin(value, size) does"""
+        if (
+            isinstance(value, six.integer_types)
+            and size > 0
+            and value >= 0
+            and value.bit_length() <= size
+        ):
+            self.write(value, size)
+        elif isinstance(value, six.binary_type) and value:
+            self.write_bytes(value)
+        else:
+            # Anything else (strings, lists, values wider than their field)
+            # keeps the exact bit layout produced by to_bin
+            self.write_bits(to_bin(value, size))
+
+    def getvalue(self):
+        """Return written bytes, trailing bits of an incomplete byte are dropped"""
+        tail = self.nbits & 7
+        return bytes(self.buf) + int_to_bytes(self.acc >> tail, self.nbits >> 3, "big")
+
+
+_PLANS = {}
+
+
+def compile_fields(cls):
+    """Return the serialization plan of a Packet class
+
+    The plan is built once per class from its fields_desc and tells for each
+    field whether its size is fixed and whether it is conditional.
+    """
+    fields_desc = cls.fields_desc
+    plan = _PLANS.get(cls)
+    if plan is None or plan[0] is not fields_desc:
+        plan = (
+            fields_desc,
+            tuple(
+                FieldPlan(
+                    field.name,
+                    field,
+                    None if callable(field.size) else field.size,
+                    field.__class__.__name__ == "ConditionalField",
+                )
+                for field in fields_desc
+            ),
+        )
+        _PLANS[cls] = plan
+    return plan[1]
+
+
+class BitReader:
+    """Read fields at arbitrary bit offsets of a frame
+
+    The frame is kept as a memoryview and every read converts only the bytes
+    spanned by the requested field, the frame is never expanded into a string
+    of '0'/'1' characters.
+    """
+
+    __slots__ = ("view", "nbits")
+
+    def __init__(self, value):
+        self.view = memoryview(value)
+        self.nbits = len(self.view) * 8
+
+    def __reduce__(self):
+        return BitReader, (self.view.tobytes(),)
+
+    def read(self, offset, size):
+        """Return size bits starting at bit offset as an int"""
+        if size <= 0:
+            return 0
+        start, end = offset >> 3, (offset + size + 7) >> 3
+        value = int_from_bytes(self.view[start:end], "big")
+        return (value >> ((end << 3) - offset - size)) & ((1 << size) - 1)
+
+    def read_bytes(self, offset, size=None):
+        """Return bytes of size bits (or up to the end) starting at bit offset
+
+        A trailing group of less than 8 bits is returned as a byte of its own.
+        """
+        if size is None:
+            size = self.nbits - offset
+        if not offset & 7 and not size & 7:
+            return self.view[offset >> 3 : (offset + size) >> 3].tobytes()
+        value = self.read(offset, size)
+        tail = size & 7
+        binary = int_to_bytes(value >> tail, size >> 3, "big")
+        if tail:
+            binary += six.int2byte(value & ((1 << tail) - 1))
+        return binary
+
+
+class LazyValue:
+    """Field of a frame which is decoded only when it is first accessed
+
+    Packet stores it in place of the internal value of a field and resolves it
+    through decode() on first access. It refers to the frame and never changes,
+    so copies of a packet can share it.
+    """
+
+    __slots__ = ("reader", "offset", "size")
+
+    def __init__(self, reader, offset, size):
+        self.reader = reader
+        self.offset = offset
+        self.size = size
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return LazyValue, (self.reader, self.offset, self.size)
+
+    def decode(self):
+        return self.reader.read(self.offset, self.size)
@@ -24,12 +24,20 @@ import pprint
 import six
 
 from bf_pktpy.library.helpers.bin import to_bin
+from bf_pktpy.library.helpers.serializer import BitReader, BitWriter, LazyValue
 from bf_pktpy.library.specs.pretty import pretty, docnote, footnote, todict
 
 # =============================================================================
 
 _INSTANCES = {}
 
+# Types of values which are shared rather than copied by Base.copy()
+_IMMUTABLE = frozenset(
+    six.integer_types
+    + six.string_types
+    + (six.binary_type, six.text_type, float, bool, type(None), LazyValue)
+)
+
 
 def singleton(cls):
     """Singleton"""
@@ -237,9 +245,25 @@ class Base:
         else:
             raise ValueError("Unsupported value type: %s" % type(body))
 
+    def add_payload(self, body):
+        """Append body to this packet in place, like scapy's add_payload()
+
+        "/" has to clone the whole left-hand stack, because its last layer and
+        the checksums/lengths of the others are rewritten when body is linked.
+        add_payload() links a copy of body to this stack directly, so building
+        a packet layer by layer costs one clone of each appended layer. Other
+        references to this packet see the new layer.
+        """
+        if isinstance(body, (Base, six.binary_type, six.string_types)):
+            body_copy = body.copy() if hasattr(body, "copy") else body
+            self._add_layer(body_copy)
+            self.post_build()
+        else:
+            raise ValueError("Unsupported value type: %s" % type(body))
+
     def __len__(self):
         """ptf's len compatibility"""
-        return len(self.bin()) // 8
+        return len(self.pack())
 
     def _add_layer(self, body_copy):
         if self.body is not None:
@@ -440,10 +464,33 @@ class Base:
             return hexa.rstrip()
         return "".join(hexa.rstrip().split())
 
+    def _serialize_header(self, writer, **fields_to_override):
+        """Write header fields into BitWriter"""
+        _, props = tuple(six.iteritems(self._members(**fields_to_override)))[0]
+        for name, value, size in props:
+            if self._member_mask and name not in self._member_mask:
+                continue
+            writer.write_value(value, size)
+
+    def _serialize(self, writer, **fields_to_override):
+        """Write header and body into BitWriter, same layout as bin()"""
+        self._serialize_header(writer, **fields_to_override)
+        if hasattr(self._body, "bin"):
+            self._body.post_build()
+            if isinstance(self._body, Base):
+                self._body._serialize(writer)
+            else:
+                writer.write_bits(self._body.bin())
+        elif isinstance(self._body, (six.binary_type, six.string_types)) and self._body:
+            writer.write_bytes(six.ensure_binary(self._body))
+        elif isinstance(self._body, int):
+            writer.write_bits(bin(self._body)[2:])
+
     def pack(self):
-        """Hex to bin"""
-        hexa = self.hex().replace(" ", "")
-        return binascii.unhexlify(hexa)
+        """To bytes"""
+        writer = BitWriter()
+        self._serialize(writer)
+        return writer.getvalue()
 
     def build(self):
         """alias for "pack" for compatibility with Scapy
@@ -457,8 +504,32 @@ class Base:
         return self._body
 
     def copy(self):
-        """ptf's packet.copy() compatibility"""
-        return copy.deepcopy(self)
+        """ptf's packet.copy() compatibility
+
+        Gives the same result as copy.deepcopy(self), but all layers of the
+        stack are cloned in a single pass and values which cannot be mutated
+        (ints, strings, payload bytes) are shared with the original instead of
+        going through the deepcopy machinery.
+        """
+        layers = []
+        current = self
+        while isinstance(current, Base):
+            layers.append(current)
+            current = current._body
+
+        memo = {}
+        clones = []
+        for layer in layers:
+            clone = type(layer).__new__(type(layer))
+            memo[id(layer)] = clone
+            clones.append(clone)
+        for layer, clone in zip(layers, clones):
+            state = clone.__dict__
+            for key, value in six.iteritems(layer.__dict__):
+                if type(value) not in _IMMUTABLE:
+                    value = copy.deepcopy(value, memo)
+                state[key] = value
+        return clones[0]
 
     @property
     def members(self):
@@ -500,6 +571,10 @@ class Base:
         """
         Load bytes into packet structure.
 
+        The frame is laid out following the headers of this packet. Fields of
+        headers defined with fields_desc keep a view on the frame and are only
+        decoded when they are accessed.
+
         pkt = Ether() / IP() / TCP()
         new_packet = pkt.load_bytes(bytes(pkt)
         :param value: bytes array
@@ -526,66 +601,58 @@ class Base:
                 packets_list.append((key_member, temp_ordered_dict))
             return packets_list
 
-        def bitstring_to_bytes(bit_string):
-            return int(bit_string, 2).to_bytes(len(bit_string) // 8, byteorder="big")
-
         def combine(structure):
             from importlib import import_module
 
+            reader = BitReader(value)
             last = 0
             packet = None
 
             for packet_class, members in structure:
-                if last >= len(value):
+                if last >= reader.nbits:
                     break
                 member_mask = set()
                 packet_template = import_module("bf_pktpy.packets").__getattribute__(
                     packet_class
                 )
+                # Fields declared in fields_desc are decoded on first access
+                lazy_names = getattr(packet_template, "_fields_index", ())
                 kwargs = {}
                 for arg_name, arg_len in members.items():
-                    bin_value = value[last : last + arg_len]
-                    if len(bin_value) != arg_len and packet_class != "Raw":
-                        last = len(value)
-                        break
                     if packet_class == "Raw":
-                        payload_bit_strs = [
-                            bin_value[i : i + 8] for i in range(0, len(bin_value), 8)
-                        ]
-                        kwargs[arg_name] = b"".join(
-                            bitstring_to_bytes(bit_str) for bit_str in payload_bit_strs
-                        )
+                        arg_len = min(arg_len, reader.nbits - last)
+                        kwargs[arg_name] = reader.read_bytes(last, arg_len & ~7)
+                    elif last + arg_len > reader.nbits:
+                        last = reader.nbits
+                        break
+                    elif arg_name in lazy_names:
+                        kwargs[arg_name] = LazyValue(reader, last, arg_len)
                     else:
-                        kwargs[arg_name] = int(value[last : last + arg_len], 2)
+                        kwargs[arg_name] = reader.read(last, arg_len)
                     member_mask.add(arg_name)
                     last += arg_len
-                if not packet:
-                    packet = packet_template(**kwargs)
-                    packet._member_mask = member_mask
-                    continue
                 part = packet_template(**kwargs)
                 part._member_mask = member_mask
+                if packet is None:
+                    packet = part
+                    continue
                 part.lock_all()
-                packet = packet / part
-            if last < len(value):
-                remainder = value[last:]
-                payload_bytes = binascii.unhexlify(
-                    "".join(
-                        "%02x" % int(remainder[i : i + 8], 2)
-                        for i in range(0, len(remainder), 8)
-                    )
-                )
-                packet = packet / payload_bytes
+                # Both sides are fresh objects owned by this function, so they
+                # are linked in place rather than copied by the "/" operator
+                packet._add_layer(part)
+                packet.post_build()
+            if last < reader.nbits:
+                packet._add_layer(reader.read_bytes(last))
+                packet.post_build()
             packet.lock_all()
             return packet
 
         if not value:
             return self.copy()
 
-        if six.PY2:
-            value = "".join(format(ord(byte), "08b") for byte in value)
-        else:
-            value = "".join(format(byte, "08b") for byte in value)
+        if not isinstance(value, bytes):
+            # Lazy fields keep a view on the frame, it must not change later
+            value = bytes(value)
 
         return combine(create_structure())
 
@@ -10,7 +10,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from bf_pktpy.library.helpers.chksum import checksum
+from bf_pktpy.library.helpers.chksum import checksum_bytes
+from bf_pktpy.library.helpers.serializer import BitWriter
 
 
 class L4Checksum:
@@ -27,7 +28,6 @@ class L4Checksum:
                 self._body._chksum = 0
             else:
                 self._body.chksum = 0
-        binary = self._body.bin()
-        if len(binary) % 16 > 0:
-            binary += "00000000"
-        return checksum(binary)
+        writer = BitWriter()
+        self._body._serialize(writer)
+        return checksum_bytes(writer.getvalue())
@@ -18,10 +18,32 @@
 import six
 import warnings
 
+from bf_pktpy.library.helpers.serializer import LazyValue, compile_fields
 from bf_pktpy.library.specs.base import Base
 
 
-class Packet(Base):
+class PacketMeta(type):
+    """Metaclass which indexes fields_desc of every Packet class by field name,
+    so that field lookups done on each attribute access are a dict hit."""
+
+    def __init__(cls, name, bases, namespace):
+        super(PacketMeta, cls).__init__(name, bases, namespace)
+        cls._index_fields()
+
+    def __setattr__(cls, key, value):
+        super(PacketMeta, cls).__setattr__(key, value)
+        if key == "fields_desc":
+            cls._index_fields()
+
+    def _index_fields(cls):
+        fields_index = {}
+        for field in cls.fields_desc:
+            # keep the first definition, as the former linear lookup did
+            fields_index.setdefault(field.name, field)
+        type.__setattr__(cls, "_fields_index", fields_index)
+
+
+class Packet(six.with_metaclass(PacketMeta, Base, object)):
     """Packet class which holds validation fields logic.
 
     In order to use it one needs to define headers like this:
@@ -70,6 +92,8 @@ class Packet(Base):
         # NOTE(sborkows): in order to get raw (internal) value of field, we need
         # to surpass __getattribute__ of the Packet class
         val = object.__getattribute__(self, field_name)
+        if type(val) is LazyValue:
+            val = self._decode_lazy(self._fields_desc_lookup(field_name), val)
         if val is None and default_if_none:
             field_def = self._fields_desc_lookup(field_name)
             # noinspection PyProtectedMember
@@ -80,6 +104,18 @@ class Packet(Base):
             )
         return val
 
+    def _decode_lazy(self, field_def, lazy):
+        """Decode a field loaded by load_bytes() and store its internal value"""
+        value = lazy.decode()
+        if not field_def.validate(value):
+            raise ValueError(
+                "Value %s is not valid for field of type %s"
+                % (repr(value), type(field_def).__name__)
+            )
+        value = field_def.to_internal(value)
+        object.__setattr__(self, field_def.name, value)
+        return value
+
     def _cond_field_condition(self, field):
         return field.__class__.__name__ != "ConditionalField" or bool(
             field.condition(self)
@@ -110,12 +146,40 @@ class Packet(Base):
             members[self.name].append((field.name, value, size))
         return members
 
+    def _serialize_header(self, writer, **fields_to_override):
+        # Headers which build their own members go through the generic path
+        if type(self)._members is not Packet._members:
+            return super(Packet, self)._serialize_header(writer, **fields_to_override)
+
+        member_mask = self._member_mask
+        for name, field, size, conditional in compile_fields(type(self)):
+            if name in fields_to_override:
+                value = fields_to_override[name]
+            elif conditional and not field.condition(self):
+                continue
+            else:
+                value = self.internal_value(name, default_if_none=True)
+            if value is None:
+                continue
+
+            # for IPOptions and TCPOptions
+            if isinstance(value, list):
+                value = b"".join(value)
+                padding = len(value) % 4
+                if padding != 0:
+                    value += b"\x00" * (4 - padding)
+
+            if size is None:
+                size = field.size(value)
+            if size == 0 or (member_mask and name not in member_mask):
+                continue
+            writer.write_value(value, size)
+
     def _fields_desc_lookup(self, field_name):
-        return next(
-            field
-            for field in object.__getattribute__(self, "fields_desc")
-            if field.name == str(field_name)
-        )
+        try:
+            return type(self)._fields_index[str(field_name)]
+        except KeyError:
+            raise StopIteration(field_name)
 
     @property
     def hdr_len(self):
@@ -137,28 +201,27 @@ class Packet(Base):
         defined field. If found, returns transformed value (from the internal one).
         """
         value = object.__getattribute__(self, str(item))
-        if callable(value):
-            return value
-        try:
-            field_def = self._fields_desc_lookup(item)
-            if value is None:
-                return field_def.default_value
-            return field_def.from_internal(value)
-        except StopIteration:
+        field_def = type(self)._fields_index.get(item)
+        if field_def is None or callable(value):
             return value
+        if value is None:
+            return field_def.default_value
+        if type(value) is LazyValue:
+            value = self._decode_lazy(field_def, value)
+        return field_def.from_internal(value)
 
     def __setattr__(self, key, value):
         """Besides normal functionality, lookups `field_desc` in order to find a
         defined field. If found, validates new value and if it's ok, transform it to
         an internal representation (usually int).
         """
-        try:
-            field_def = self._fields_desc_lookup(key)
-        except StopIteration:
+        field_def = type(self)._fields_index.get(key)
+        if field_def is None:
             object.__setattr__(self, key, value)
             return
 
-        if value is None:
+        if value is None or type(value) is LazyValue:
+            # Lazy values are validated when they are decoded
             object.__setattr__(self, field_def.name, value)
         elif field_def.validate(value):
             object.__setattr__(self, field_def.name, field_def.to_internal(value))
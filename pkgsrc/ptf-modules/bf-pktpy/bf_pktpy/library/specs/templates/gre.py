@@ -15,9 +15,9 @@
 
 ###############################################################################
 """ GRE template """
-from bf_pktpy.library.helpers.bin import to_bin
-from bf_pktpy.library.helpers.chksum import checksum
+from bf_pktpy.library.helpers.chksum import checksum_bytes
 from bf_pktpy.library.helpers.ether_types import ETYPES
+from bf_pktpy.library.helpers.serializer import BitWriter
 from bf_pktpy.library.specs.packet import Packet
 from bf_pktpy.library.fields import (
     BitField,
@@ -32,12 +32,10 @@ def gre_checksum(packet):
     """Calculate GRE checksum"""
     # noinspection PyProtectedMember
     members = packet._members(chksum=0)
-    binary = ""
+    writer = BitWriter()
     for _, value, size in members[packet.name]:
-        binary += to_bin(value, size)
-    if len(binary) % 16 > 0:
-        binary += "00000000"
-    return checksum(binary)
+        writer.write_value(value, size)
+    return checksum_bytes(writer.getvalue())
 
 
 class GRE(Packet):
@@ -17,8 +17,8 @@
 """ IP template """
 import six
 
-from bf_pktpy.library.helpers.bin import to_bin
-from bf_pktpy.library.helpers.chksum import checksum
+from bf_pktpy.library.helpers.chksum import checksum_bytes
+from bf_pktpy.library.helpers.serializer import BitWriter
 from bf_pktpy.library.helpers.ip_types import ITYPES
 from bf_pktpy.library.specs.packet import Packet
 from bf_pktpy.library.fields import (
@@ -47,10 +47,10 @@ def ipv4_checksum(packet):
     """Calculate ipv4 checksum"""
     # noinspection PyProtectedMember
     members = packet._members(chksum=0)
-    binary = ""
+    writer = BitWriter()
     for _, value, size in members[packet.name]:
-        binary += to_bin(value, size)
-    return checksum(binary)
+        writer.write_value(value, size)
+    return checksum_bytes(writer.getvalue())
 
 
 class IP(Packet):
@@ -175,28 +175,20 @@ class IP(Packet):
                 (val, size) for name, val, size in members if name == field_name
             )
 
-        binary = ""
+        writer = BitWriter()
         if self._body.name == "TCP":
             _members = self._members()["IP"]
-            src_ip = to_bin(*members_lookup(_members, "src"))
-            dst_ip = to_bin(*members_lookup(_members, "dst"))
-            l4_proto = to_bin(*members_lookup(_members, "proto"))
-            ttlen = self.total_len
-            temp = ttlen - self.hdr_len
-            l4_len = to_bin(temp, 16)
-            resved = "00000000"
-            pseudo = src_ip + dst_ip + l4_len + resved + l4_proto
+            writer.write_value(*members_lookup(_members, "src"))
+            writer.write_value(*members_lookup(_members, "dst"))
+            writer.write_value(self.total_len - self.hdr_len, 16)
+            writer.write(0, 8)
+            writer.write_value(*members_lookup(_members, "proto"))
             reset_l4_chksum()
-            l4_bin = self._body.bin()
-            binary = pseudo + l4_bin
-            if len(binary) % 16 > 0:
-                binary += "00000000"
+            self._body._serialize(writer)
         if self._body.name in ("ICMP", "GRE", "IGMP"):
             reset_l4_chksum()
-            binary = self._body.bin()
-            if len(binary) % 16 > 0:
-                binary += "00000000"
-        return checksum(binary)
+            self._body._serialize(writer)
+        return checksum_bytes(writer.getvalue())
 
     def _post_build(self):
         self.update_l4_checksum()
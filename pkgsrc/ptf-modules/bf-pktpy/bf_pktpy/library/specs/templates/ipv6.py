@@ -18,8 +18,8 @@
 import ipaddress
 import six
 
-from bf_pktpy.library.helpers.bin import to_bin
-from bf_pktpy.library.helpers.chksum import checksum
+from bf_pktpy.library.helpers.chksum import checksum_bytes
+from bf_pktpy.library.helpers.serializer import BitWriter
 from bf_pktpy.library.specs.base import Base
 
 
@@ -120,32 +120,24 @@ class IPv6(Base, ValidateSrcDst):
 
     def l4_checksum(self):
         """Calculate tcp checksum"""
-        binary = ""
+        writer = BitWriter()
         if self._body.name == "TCP":
             src = int(ipaddress.IPv6Address(six.ensure_text(self.src)))
             dst = int(ipaddress.IPv6Address(six.ensure_text(self.dst)))
-            src_ip = to_bin(src, 128)
-            dst_ip = to_bin(dst, 128)
-            l4_proto = to_bin(self.nh, 8)
-            ttlen = self.total_len
-            temp = ttlen - self.hdr_len
-            l4_len = to_bin(temp, 16)
-            resved = "00000000"
-            pseudo = src_ip + dst_ip + l4_len + resved + l4_proto
+            writer.write_value(src, 128)
+            writer.write_value(dst, 128)
+            writer.write_value(self.total_len - self.hdr_len, 16)
+            writer.write(0, 8)
+            writer.write_value(self.nh, 8)
             if hasattr(self._body, "_chksum"):
                 self._body._chksum = 0
             else:
                 self._body.chksum = 0
-            l4_bin = self._body.bin()
-            binary = pseudo + l4_bin
-            if len(binary) % 16 > 0:
-                binary += "00000000"
+            self._body._serialize(writer)
         if self._body.name in ("ICMP", "GRE"):
             self._body.chksum = 0
-            binary = self._body.bin()
-            if len(binary) % 16 > 0:
-                binary += "00000000"
-        return checksum(binary)
+            self._body._serialize(writer)
+        return checksum_bytes(writer.getvalue())
 
     def _post_build(self):
         self.update_l4_checksum()
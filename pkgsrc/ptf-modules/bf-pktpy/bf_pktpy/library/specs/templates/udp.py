@@ -15,8 +15,8 @@
 
 ###############################################################################
 """ UDP template """
-from bf_pktpy.library.helpers.bin import to_bin
-from bf_pktpy.library.helpers.chksum import checksum
+from bf_pktpy.library.helpers.chksum import checksum_bytes
+from bf_pktpy.library.helpers.serializer import BitWriter
 from bf_pktpy.library.specs.packet import Packet
 from bf_pktpy.library.fields import ShortField, XShortField
 
@@ -31,26 +31,21 @@ def udp_checksum(packet):
     def members_lookup(members, field_name):
         return next((val, size) for name, val, size in members if name == field_name)
 
-    binary = ""
+    writer = BitWriter()
     ip_layer = packet.underlayer
     if ip_layer is not None and ip_layer.name in ("IP", "IPv6"):
         # noinspection PyProtectedMember
         ip_members = list(ip_layer._members().values())[0]
-        src_ip = to_bin(*members_lookup(ip_members, "src"))
-        dst_ip = to_bin(*members_lookup(ip_members, "dst"))
+        writer.write_value(*members_lookup(ip_members, "src"))
+        writer.write_value(*members_lookup(ip_members, "dst"))
+        writer.write_value(ip_layer.total_len - ip_layer.hdr_len, 16)
+        writer.write(0, 8)
         proto_field = "proto" if ip_layer.name == "IP" else "nh"
-        l4_proto = to_bin(*members_lookup(ip_members, proto_field))
-        ttlen = ip_layer.total_len
-        temp = ttlen - ip_layer.hdr_len
-        l4_len = to_bin(temp, 16)
-        resved = "00000000"
-        binary += (
-            src_ip + dst_ip + l4_len + resved + l4_proto + packet["UDP"].bin(chksum=0)
-        )
-        if len(binary) % 16 > 0:
-            binary += "00000000"
-
-    calculated_checksum = checksum(binary)
+        writer.write_value(*members_lookup(ip_members, proto_field))
+        # noinspection PyProtectedMember
+        packet["UDP"]._serialize(writer, chksum=0)
+
+    calculated_checksum = checksum_bytes(writer.getvalue())
     # According to RFC768 if the result checksum is 0, it should be set to 0xFFFF  # noqa: E501
     return calculated_checksum if calculated_checksum != 0 else 0xFFFF
 
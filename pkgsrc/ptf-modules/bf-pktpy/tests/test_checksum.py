@@ -0,0 +1,144 @@
+# Copyright (c) 2021 Intel Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import pytest
+
+from bf_pktpy.library.helpers.chksum import (
+    checksum,
+    checksum_bytes,
+    ones_complement_sum,
+    update_checksum,
+)
+from bf_pktpy.packets import Ether, GRE, ICMP, IP, IPv6, TCP, UDP
+
+
+def bits(data):
+    """Bit-string as fed to checksum(), padded to a whole 16-bit word"""
+    binary = "".join(format(byte, "08b") for byte in data)
+    if len(binary) % 16:
+        binary += "00000000"
+    return binary
+
+
+def same_checksum(a, b):
+    """0x0000 and 0xFFFF are the two representations of zero (RFC 1624)"""
+    return a == b or {a, b} == {0, 0xFFFF}
+
+
+def test_checksum_bytes_rfc1071_example():
+    data = bytes.fromhex("0001f203f4f5f6f7")
+    assert ones_complement_sum(data) == 0xDDF2
+    assert checksum_bytes(data) == 0x220D
+    assert checksum_bytes(bytearray(data)) == checksum_bytes(memoryview(data))
+
+
+def test_checksum_bytes_edge_cases():
+    assert checksum_bytes(b"") == 0xFFFF
+    assert checksum_bytes(b"\xff\xff\xff\xff") == 0
+    assert checksum_bytes(b"\x12") == checksum_bytes(b"\x12\x00")
+
+
+def test_checksum_bytes_matches_bitstring_checksum():
+    rnd = random.Random(10)
+    for _ in range(2000):
+        # checksum() only folds from the second word on
+        data = bytes(rnd.randrange(256) for _ in range(rnd.randrange(3, 200)))
+        assert checksum_bytes(data) == checksum(bits(data))
+    for data in (b"\xff" * 64, b"\x00" * 64, b"\xff\xff\x00\x00" * 8):
+        assert checksum_bytes(data) == checksum(bits(data))
+
+
+def test_update_checksum_matches_full_recompute():
+    rnd = random.Random(11)
+    for _ in range(5000):
+        data = bytearray(rnd.randrange(256) for _ in range(2 * rnd.randrange(2, 40)))
+        chksum = checksum_bytes(data)
+        offset = 2 * rnd.randrange(len(data) // 2)
+        size = 2 * rnd.randrange(1, (len(data) - offset) // 2 + 1)
+        old = bytes(data[offset : offset + size])
+        new = bytes(rnd.randrange(256) for _ in range(size))
+        data[offset : offset + size] = new
+        updated = update_checksum(chksum, old, new)
+        assert same_checksum(updated, checksum_bytes(data))
+
+
+def test_update_checksum_of_an_ip_header():
+    rnd = random.Random(12)
+    for _ in range(200):
+        ip = IP(
+            src="10.0.0.%d" % rnd.randrange(256),
+            dst="10.1.0.%d" % rnd.randrange(256),
+            ttl=rnd.randrange(1, 256),
+            id=rnd.randrange(1 << 16),
+        )
+        header = bytes(ip)
+        new_ttl = rnd.randrange(256)
+        updated = update_checksum(
+            int.from_bytes(header[10:12], "big"),
+            header[8:10],
+            bytes([new_ttl]) + header[9:10],
+        )
+        ip.ttl = new_ttl
+        recomputed = int.from_bytes(bytes(ip)[10:12], "big")
+        assert same_checksum(updated, recomputed)
+
+
+def _random_packet(rnd):
+    payload = bytes(rnd.randrange(256) for _ in range(rnd.randrange(60)))
+    l4 = rnd.choice(
+        [
+            lambda: TCP(
+                sport=rnd.randrange(1 << 16),
+                dport=rnd.randrange(1 << 16),
+                seq=rnd.randrange(1 << 32),
+                flags=rnd.randrange(256),
+            ),
+            lambda: UDP(sport=rnd.randrange(1 << 16), dport=rnd.randrange(1 << 16)),
+            lambda: ICMP(type=rnd.randrange(256), id=rnd.randrange(1 << 16)),
+            lambda: GRE(),
+        ]
+    )()
+    if rnd.randrange(2):
+        l3 = IP(
+            src=".".join(str(rnd.randrange(256)) for _ in range(4)),
+            dst=".".join(str(rnd.randrange(256)) for _ in range(4)),
+            ttl=rnd.randrange(256),
+            id=rnd.randrange(1 << 16),
+        )
+    else:
+        if l4.name == "GRE":
+            l4 = UDP()
+        l3 = IPv6(
+            src=":".join("%x" % rnd.randrange(1 << 16) for _ in range(8)),
+            dst=":".join("%x" % rnd.randrange(1 << 16) for _ in range(8)),
+        )
+    pkt = Ether() / l3 / l4
+    if payload:
+        pkt = pkt / payload
+    return pkt
+
+
+def test_checksums_match_a_full_recompute_on_random_packets():
+    scapy = pytest.importorskip("scapy.all")
+    rnd = random.Random(13)
+    for _ in range(300):
+        frame = bytes(_random_packet(rnd))
+        expected = scapy.Ether(frame)
+        for layer in (scapy.IP, scapy.TCP, scapy.UDP, scapy.ICMP):
+            if layer in expected:
+                del expected[layer].chksum
+        if scapy.IPv6 in expected and scapy.ICMP in expected:
+            # ICMP over IPv6 is not checksummed with a pseudo-header here
+            continue
+        assert frame == bytes(expected.__class__(bytes(expected))), frame.hex()
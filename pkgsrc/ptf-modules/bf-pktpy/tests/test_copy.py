@@ -0,0 +1,131 @@
+# Copyright (c) 2021 Intel Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+
+import pytest
+
+from bf_pktpy.packets import (
+    Dot1Q,
+    Ether,
+    GRE,
+    ICMP,
+    IP,
+    IPv6,
+    MPLS,
+    TCP,
+    UDP,
+    VXLAN,
+)
+
+STACKS = {
+    "ether_ip_tcp": lambda: Ether() / IP(ttl=5) / TCP(sport=1) / b"payload",
+    "ipv6_udp_vxlan": lambda: Ether()
+    / IPv6()
+    / UDP(dport=4789)
+    / VXLAN(vni=7)
+    / Ether()
+    / IP(options=b"\x01\x01\x01\x00")
+    / UDP(),
+    "mpls": lambda: Ether() / MPLS(label=1) / MPLS(label=2, s=1) / IP() / UDP(),
+    "dot1q_icmp": lambda: Ether() / Dot1Q(vlan=3) / IP() / ICMP(),
+    "gre": lambda: Ether() / IP() / GRE() / IP() / (b"\x00" * 10),
+}
+
+
+def layers(pkt):
+    result = []
+    while pkt is not None:
+        result.append(pkt)
+        pkt = getattr(pkt, "_body", None)
+    return result
+
+
+@pytest.mark.parametrize("name", sorted(STACKS))
+def test_copy_matches_deepcopy(name):
+    pkt = STACKS[name]()
+    clone = pkt.copy()
+    reference = copy.deepcopy(pkt)
+
+    assert bytes(clone) == bytes(reference) == bytes(pkt)
+    assert repr(clone) == repr(reference)
+    for original, cloned in zip(layers(pkt), layers(clone)):
+        if hasattr(original, "_lock"):
+            assert cloned is not original
+            assert cloned._lock == original._lock
+            assert cloned._lock is not original._lock
+    for upper, lower in zip(layers(clone), layers(clone)[1:]):
+        if hasattr(lower, "underlayer"):
+            assert lower.underlayer is upper
+
+
+def test_copy_of_a_middle_layer_brings_its_underlayers():
+    pkt = Ether() / IP() / UDP()
+    clone = pkt[IP].copy()
+    assert clone.underlayer is not pkt
+    assert clone.underlayer._body is clone
+    assert bytes(clone) == bytes(pkt[IP])
+
+
+def test_truediv_leaves_its_operands_untouched():
+    upper = Ether() / IP()
+    lower = UDP(sport=7)
+    before = bytes(upper), bytes(lower)
+    pkt = upper / lower
+    pkt[UDP].sport = 8
+    pkt[IP].ttl = 1
+    assert (bytes(upper), bytes(lower)) == before
+    assert upper[IP]._body is None
+
+
+def test_itruediv_leaves_other_references_untouched():
+    base = Ether() / IP()
+    pkt = base
+    pkt /= TCP()
+    assert pkt is not base
+    assert base[IP]._body is None
+    assert bytes(base) == bytes(Ether() / IP())
+    assert bytes(pkt) == bytes(Ether() / IP() / TCP())
+
+
+@pytest.mark.parametrize("name", sorted(STACKS))
+def test_add_payload_builds_the_same_packet_as_truediv(name):
+    expected = STACKS[name]()
+    layers_list = [layer.copy() for layer in layers(expected)]
+    for layer in layers_list:
+        if hasattr(layer, "_body"):
+            layer._body = None
+
+    pkt = layers_list[0]
+    for layer in layers_list[1:]:
+        pkt.add_payload(layer)
+    assert bytes(pkt) == bytes(expected)
+
+
+def test_add_payload_appends_in_place_and_copies_its_argument():
+    pkt = Ether()
+    alias = pkt
+    ip = IP(ttl=3)
+    pkt.add_payload(ip)
+    pkt.add_payload(UDP())
+    pkt.add_payload(b"abc")
+
+    assert pkt is alias
+    assert pkt[IP] is not ip
+    assert ip._body is None
+    assert bytes(pkt) == bytes(Ether() / IP(ttl=3) / UDP() / b"abc")
+
+
+def test_add_payload_rejects_unsupported_values():
+    pkt = Ether()
+    with pytest.raises(ValueError):
+        pkt.add_payload(5)
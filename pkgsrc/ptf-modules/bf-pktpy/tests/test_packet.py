@@ -0,0 +1,183 @@
+# Copyright (c) 2021 Intel Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from bf_pktpy.library.fields import BitField, ShortField
+from bf_pktpy.library.specs.packet import Packet, PacketMeta
+from bf_pktpy.packets import Dot1Q, Ether, IP, MPLS, TCP, UDP
+
+
+def udp_packet():
+    return (
+        Ether(dst="00:01:02:03:04:05", src="00:0a:0b:0c:0d:0e")
+        / IP(src="10.0.0.1", dst="10.0.0.2", ttl=7)
+        / UDP(sport=1, dport=2)
+        / b"ab"
+    )
+
+
+UDP_REPR = (
+    "<Ether  dst=00:01:02:03:04:05 src=00:0a:0b:0c:0d:0e type=2048 "
+    "|<IP  version=4 tos=0 id=1 flags=<Flag 0 ()> frag=0 ttl=7 proto=17 "
+    "src=10.0.0.1 dst=10.0.0.2 options=[] "
+    "|<UDP  sport=1 dport=2 |<Raw  load=b'ab' |>>>>"
+)
+
+UDP_SHOW = """\
+###[ Ether ]###
+  dst       = 00:01:02:03:04:05
+  src       = 00:0a:0b:0c:0d:0e
+  type      = 2048
+###[ IP ]###
+     version   = 4
+     ihl       = None
+     tos       = 0
+     len       = None
+     id        = 1
+     flags     = <Flag 0 ()>
+     frag      = 0
+     ttl       = 7
+     proto     = 17
+     chksum    = None
+     src       = 10.0.0.1
+     dst       = 10.0.0.2
+     options   = []
+###[ UDP ]###
+        sport     = 1
+        dport     = 2
+        len       = None
+        chksum    = None
+###[ Raw ]###
+           load      = b'ab'
+
+"""
+
+UDP_SHOW2 = """\
+###[ Ether ]###
+  dst       = 00:01:02:03:04:05
+  src       = 00:0a:0b:0c:0d:0e
+  type      = 2048
+###[ IP ]###
+     version   = 4
+     ihl       = 5
+     tos       = 0
+     len       = 30
+     id        = 1
+     flags     = <Flag 0 ()>
+     frag      = 0
+     ttl       = 7
+     proto     = 17
+     chksum    = 40908
+     src       = 10.0.0.1
+     dst       = 10.0.0.2
+###[ UDP ]###
+        sport     = 1
+        dport     = 2
+        len       = 10
+        chksum    = 35442
+###[ Raw ]###
+           load      = b'ab'
+
+"""
+
+
+def test_repr():
+    assert repr(udp_packet()) == UDP_REPR
+    pkt = (
+        Ether(dst="00:01:02:03:04:05", src="00:0a:0b:0c:0d:0e")
+        / Dot1Q(vlan=5)
+        / MPLS(label=3, s=1)
+        / IP(src="1.1.1.1", dst="2.2.2.2")
+    )
+    assert repr(pkt) == (
+        "<Ether  dst=00:01:02:03:04:05 src=00:0a:0b:0c:0d:0e type=33024 "
+        "|<Dot1Q  prio=0 id=0 vlan=5 type=0 |<MPLS  label=3 cos=0 s=1 ttl=0 "
+        "|<IP  version=4 tos=0 id=1 flags=<Flag 0 ()> frag=0 ttl=64 proto=0 "
+        "src=1.1.1.1 dst=2.2.2.2 options=[] |>>>>"
+    )
+
+
+def test_show(capsys):
+    udp_packet().show()
+    assert capsys.readouterr().out == UDP_SHOW
+
+
+def test_show2(capsys):
+    udp_packet().show2()
+    assert capsys.readouterr().out == UDP_SHOW2
+
+
+def test_defaults():
+    ip = IP()
+    assert ip.version == 4
+    assert ip.ttl == 64
+    assert ip.internal_value("ttl") is None
+    assert ip.internal_value("ttl", default_if_none=True) == 64
+    assert ip.chksum is None
+    assert Ether().type == 0x9000
+    assert MPLS().s == 1
+    assert UDP().sport == 53
+
+
+def test_set_field_validates_and_converts():
+    ip = IP()
+    ip.ttl = 3
+    ip.src = "10.1.2.3"
+    assert ip.ttl == 3
+    assert ip.src == "10.1.2.3"
+    assert ip.internal_value("src") == 0x0A010203
+    with pytest.raises(ValueError):
+        ip.ttl = "not a ttl"
+    ip.ttl = None
+    assert ip.ttl == 64
+
+
+def test_layering_sets_the_binding_fields():
+    pkt = Ether() / IP() / UDP()
+    assert pkt.type == 0x0800
+    assert pkt[IP].proto == 17
+    assert pkt[UDP].underlayer is pkt[IP]
+    assert (Ether() / Dot1Q() / IP() / TCP())[Dot1Q].type == 0x0800
+    assert (Ether() / MPLS()).type == 0x8847
+    assert pkt.haslayer(UDP)
+    assert not pkt.haslayer(TCP)
+
+
+def test_non_field_attributes_are_plain():
+    pkt = Ether() / IP()
+    assert pkt.name == "Ether"
+    assert pkt.body is pkt._body
+    pkt.sniffed_on = "veth0"
+    assert pkt.sniffed_on == "veth0"
+
+
+def test_fields_are_indexed_by_name_per_class():
+    class Hdr(Packet):
+        name = "Hdr"
+        fields_desc = [
+            BitField("a", 1, size=4),
+            BitField("b", 2, size=4),
+            ShortField("a", 3),
+        ]
+
+    assert isinstance(Hdr, PacketMeta)
+    assert Hdr._fields_index["a"] is Hdr.fields_desc[0]
+    hdr = Hdr()
+    assert hdr._fields_desc_lookup("b") is Hdr.fields_desc[1]
+    with pytest.raises(StopIteration):
+        hdr._fields_desc_lookup("c")
+
+    Hdr.fields_desc = [ShortField("c", 4)]
+    assert set(Hdr._fields_index) == {"c"}
+    assert Hdr().c == 4
+    assert Ether._fields_index is not IP._fields_index
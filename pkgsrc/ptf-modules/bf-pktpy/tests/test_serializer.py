@@ -0,0 +1,201 @@
+# Copyright (c) 2021 Intel Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import binascii
+import random
+
+import pytest
+
+from bf_pktpy.library.helpers.serializer import BitWriter, int_from_bytes, int_to_bytes
+from bf_pktpy.packets import (
+    ARP,
+    BOOTP,
+    DHCP,
+    Dot1Q,
+    ERSPAN,
+    ERSPAN_III,
+    Ether,
+    GRE,
+    ICMP,
+    IP,
+    IPv6,
+    MPLS,
+    TCP,
+    UDP,
+    VXLAN,
+)
+
+
+def bitstring_pack(pkt):
+    """Serialize the way pack() used to: bin() -> hex() -> unhexlify"""
+    return binascii.unhexlify(pkt.hex(whitespace=False))
+
+
+STACKS = {
+    "ether_ip_tcp": lambda: Ether() / IP() / TCP() / b"payload",
+    "ether_ip_options_tcp": lambda: Ether()
+    / IP(options=b"\x01\x01\x01\x00")
+    / TCP(flags="SA"),
+    "ipv6_udp_vxlan": lambda: Ether()
+    / IPv6(tc=3, fl=0x12345)
+    / UDP(dport=4789)
+    / VXLAN(vni=0xABCDE)
+    / Ether()
+    / IP()
+    / UDP(),
+    "mpls": lambda: Ether()
+    / MPLS(label=100, cos=5)
+    / MPLS(label=200, s=1, ttl=3)
+    / IP()
+    / UDP(),
+    "dot1q": lambda: Ether() / Dot1Q(prio=5, vlan=42) / IP() / ICMP(),
+    "qinq": lambda: Ether() / Dot1Q(vlan=10) / Dot1Q(vlan=20) / IP() / UDP(),
+    "gre": lambda: Ether() / IP() / GRE() / IP() / (b"\x00" * 10),
+    "arp": lambda: Ether() / ARP(op=2, psrc="10.0.0.1", pdst="10.0.0.2"),
+    "dhcp": lambda: Ether()
+    / IP()
+    / UDP(sport=68, dport=67)
+    / BOOTP(chaddr=b"\x00\x01\x02\x03\x04\x05")
+    / DHCP(options=[("message-type", "discover"), "end"]),
+    "erspan": lambda: Ether() / IP() / GRE() / ERSPAN(session_id=7) / Ether(),
+    "erspan_iii": lambda: Ether() / IP() / GRE() / ERSPAN_III() / Ether(),
+    "misaligned_ihl": lambda: IP(ihl=3) / UDP() / b"abc",
+}
+
+
+@pytest.mark.parametrize("name", sorted(STACKS))
+def test_pack_matches_bitstring_path(name):
+    pkt = STACKS[name]()
+    assert pkt.pack() == bitstring_pack(pkt)
+    assert bytes(pkt) == pkt.pack()
+
+
+def _random_packet(rnd):
+    payload = bytes(rnd.randrange(256) for _ in range(rnd.randrange(40)))
+    kind = rnd.randrange(5)
+    if kind == 0:
+        return (
+            Ether(type=rnd.randrange(1 << 16))
+            / IP(
+                tos=rnd.randrange(256),
+                ttl=rnd.randrange(256),
+                id=rnd.randrange(1 << 16),
+                flags=rnd.randrange(8),
+                frag=rnd.randrange(1 << 13),
+            )
+            / TCP(
+                sport=rnd.randrange(1 << 16),
+                seq=rnd.randrange(1 << 32),
+                flags=rnd.randrange(256),
+                window=rnd.randrange(1 << 16),
+            )
+            / payload
+        )
+    if kind == 1:
+        return (
+            Ether()
+            / IPv6(
+                tc=rnd.randrange(256),
+                fl=rnd.randrange(1 << 20),
+                hlim=rnd.randrange(256),
+            )
+            / UDP(sport=rnd.randrange(1 << 16))
+            / VXLAN(vni=rnd.randrange(1 << 24), flags=rnd.choice([8, 12]))
+            / Ether()
+            / payload
+        )
+    if kind == 2:
+        return (
+            Ether()
+            / MPLS(
+                label=rnd.randrange(1 << 20),
+                cos=rnd.randrange(8),
+                ttl=rnd.randrange(256),
+            )
+            / MPLS(label=rnd.randrange(1 << 20), s=1)
+            / IP()
+            / UDP()
+            / payload
+        )
+    if kind == 3:
+        return (
+            Ether()
+            / Dot1Q(
+                prio=rnd.randrange(8), id=rnd.randrange(2), vlan=rnd.randrange(4096)
+            )
+            / IP(ihl=rnd.randrange(16))
+            / ICMP(type=rnd.randrange(256))
+            / payload
+        )
+    return IP(version=rnd.randrange(16)) / GRE() / IP() / payload
+
+
+def test_pack_matches_bitstring_path_on_random_packets():
+    rnd = random.Random(1)
+    for _ in range(500):
+        pkt = _random_packet(rnd)
+        assert pkt.pack() == bitstring_pack(pkt), repr(pkt)
+
+
+@pytest.mark.parametrize(
+    "value, length, binary",
+    [(0, 0, b""), (0x4500, 2, b"\x45\x00"), (1 << 70, 9, b"\x40" + b"\x00" * 8)],
+)
+def test_int_bytes_conversions(value, length, binary):
+    assert int_to_bytes(value, length, "big") == binary
+    assert int_from_bytes(binary, "big") == value
+    assert int_from_bytes(bytearray(binary), "big") == value
+    assert int_from_bytes(memoryview(b"\xff" + binary)[1:], "big") == value
+
+
+def test_bit_writer_flushes_on_byte_boundaries():
+    writer = BitWriter()
+    writer.write(4, 4)
+    assert writer.buf == bytearray()
+    writer.write(5, 4)
+    assert writer.buf == bytearray(b"E")
+    writer.write_bytes(b"\x01\x02")
+    assert writer.getvalue() == b"E\x01\x02"
+
+
+def test_bit_writer_writes_bytes_off_a_byte_boundary():
+    writer = BitWriter()
+    writer.write(1, 4)
+    writer.write_bytes(b"\xab")
+    writer.write(0xC, 4)
+    assert writer.getvalue() == b"\x1a\xbc"
+
+
+def test_bit_writer_drops_trailing_partial_byte():
+    writer = BitWriter()
+    writer.write(0xFF, 8)
+    writer.write(1, 3)
+    assert writer.getvalue() == b"\xff"
+
+
+@pytest.mark.parametrize(
+    "value, size",
+    [(0x1FF, 8), ("ab", 16), ([1, 2], 16), (b"", 8), (3, 0)],
+)
+def test_bit_writer_write_value_falls_back_to_to_bin(value, size):
+    from bf_pktpy.library.helpers.bin import to_bin
+
+    writer = BitWriter()
+    writer.write_value(value, size)
+    binary = to_bin(value, size)
+    expected = BitWriter()
+    expected.write_bits(binary)
+    assert (writer.acc, writer.nbits, writer.buf) == (
+        expected.acc,
+        expected.nbits,
+        expected.buf,
+    )
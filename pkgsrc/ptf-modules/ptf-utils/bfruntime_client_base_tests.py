@@ -28,14 +28,118 @@ import grpc
 import bfrt_grpc.bfruntime_pb2 as bfruntime_pb2
 import bfrt_grpc.client as gc
 
+import atexit
 import random
 import math
+import threading
+import time
 
 from collections import namedtuple
 
 logger = misc_utils.get_logger()
 
 
+class BfRuntimeSession:
+    """ A ClientInterface, its parsed bfrt_info and device configuration,
+        shared by all the tests of a run which set up the same connection.
+        Sessions are only used when the reuse_grpc_session test param is set.
+        The bfrt_info and device configuration are fetched again when the
+        pipeline config of the device changes or another program is bound.
+    """
+    _sessions = {}
+    _lock = threading.Lock()
+    # Time spent setting up sessions and estimated time saved by reusing them
+    stats = {"created": 0, "reused": 0, "setup_time": 0.0, "time_saved": 0.0}
+
+    def __init__(self, key, interface):
+        self.key = key
+        self.interface = interface
+        self.bound_p4_name = None
+        self.bfrt_info = None
+        self.dev_configuration = None
+        self.pipeline_config_generation = interface.pipeline_config_generation
+        self.setup_time = 0.0
+
+    @staticmethod
+    def enabled():
+        reuse = testutils.test_param_get("reuse_grpc_session", default=False)
+        if isinstance(reuse, str):
+            return reuse.lower() in ("1", "true", "yes")
+        return bool(reuse)
+
+    @staticmethod
+    def make_key(grpc_addr, client_id, notifications, perform_subscribe):
+        if notifications is not None:
+            notifications = tuple(sorted(vars(notifications).items()))
+        return (grpc_addr, client_id, notifications, perform_subscribe)
+
+    @classmethod
+    def get(cls, key):
+        """ Return the live session of key, or None. Sessions to the same
+            server with a different key are closed so that a single client is
+            connected at a time, as when every test opened its own.
+        """
+        with cls._lock:
+            session = cls._sessions.get(key)
+            if session is not None and not session.is_alive():
+                del cls._sessions[key]
+                session = None
+            for other_key in list(cls._sessions):
+                if other_key != key and other_key[0] == key[0]:
+                    cls._sessions.pop(other_key).close()
+            return session
+
+    @classmethod
+    def add(cls, session):
+        with cls._lock:
+            if not cls._sessions and not cls.stats["created"]:
+                atexit.register(cls.close_all)
+            cls._sessions[session.key] = session
+            cls.stats["created"] += 1
+            cls.stats["setup_time"] += session.setup_time
+
+    @classmethod
+    def close_all(cls):
+        with cls._lock:
+            for session in list(cls._sessions.values()):
+                session.close()
+            cls._sessions.clear()
+            if cls.stats["reused"]:
+                logger.info("gRPC sessions: %d created in %.2fs, %d reused "
+                            "saving about %.2fs", cls.stats["created"],
+                            cls.stats["setup_time"], cls.stats["reused"],
+                            cls.stats["time_saved"])
+
+    def is_alive(self):
+        if not self.key[3]:
+            return True
+        return not self.interface.is_independent and \
+            self.interface.stream_recv_thread.is_alive()
+
+    def reuse(self):
+        """ Prepare the session for a new test: drop the stream messages left
+            by the previous one, custom annotations it added, and the cached
+            bfrt_info if the pipeline config changed since it was fetched.
+        """
+        self.interface.flush_stream_queues()
+        generation = self.interface.pipeline_config_generation
+        if generation != self.pipeline_config_generation:
+            self.pipeline_config_generation = generation
+            self.drop_pipeline_info()
+        elif self.bfrt_info is not None:
+            self.bfrt_info.clear_client_annotations()
+        BfRuntimeSession.stats["reused"] += 1
+        BfRuntimeSession.stats["time_saved"] += self.setup_time
+
+    def drop_pipeline_info(self):
+        self.bfrt_info = None
+        self.dev_configuration = None
+
+    def close(self):
+        if not self.interface.is_independent:
+            self.interface.tear_down_stream()
+
+
 # This is common to all tests. setUp() is invoked at the beginning of the test
 # and tearDown() is called at the end, regardless of whether the test is passed
 # or failed/errored.
@@ -47,9 +151,11 @@ class BfRuntimeTest(BaseTest):
         self._swports = []
         self.bfrt_info = None
         self.p4_name = ""
+        self.session = None
 
     def tearDown(self):
-        if not self.interface.is_independent:
+        # A shared session stays connected for the next test
+        if self.session is None and not self.interface.is_independent:
             self.interface.tear_down_stream()
         BaseTest.tearDown(self)
 
@@ -83,29 +189,60 @@ class BfRuntimeTest(BaseTest):
 
         grpc_addr = ':'.join([testutils.test_param_get("grpc_server", default='localhost'),
                               testutils.test_param_get("bfrt_grpc_port", default='50052')] )
-        
-        self.interface = gc.ClientInterface(grpc_addr, client_id=client_id,
-                device_id=0, notifications=notifications,
-                perform_subscribe=perform_subscribe)
+
+        self.session = None
+        if BfRuntimeSession.enabled():
+            key = BfRuntimeSession.make_key(grpc_addr, client_id,
+                                            notifications, perform_subscribe)
+            self.session = BfRuntimeSession.get(key)
+            if self.session is not None:
+                self.session.reuse()
+                # What was fetched for the program bound by the previous
+                # tests is not used for another one
+                if perform_bind and p4_name and \
+                        self.session.bound_p4_name not in (None, p4_name):
+                    self.session.drop_pipeline_info()
+                self.interface = self.session.interface
+                self.bfrt_info = self.session.bfrt_info
+                self.dev_configuration = self.session.dev_configuration
+        start = time.time()
+
+        if self.session is None:
+            self.interface = gc.ClientInterface(grpc_addr, client_id=client_id,
+                    device_id=0, notifications=notifications,
+                    perform_subscribe=perform_subscribe)
 
         # If p4_name wasn't specified, then perform a bfrt_info_get and set p4_name
         # to it
         if not p4_name:
-            self.bfrt_info = self.interface.bfrt_info_get()
+            if self.bfrt_info is None:
+                self.bfrt_info = self.interface.bfrt_info_get()
             p4_name = self.bfrt_info.p4_name_get()
 
         # Get device configration information
         if self.bfrt_info is None:
             self.bfrt_info = self.interface.bfrt_info_get()
-        if testutils.test_param_get("arch") in ["tofino", "tofino2", "tofino3"]:
+        if testutils.test_param_get("arch") in ["tofino", "tofino2", "tofino3"] \
+                and (self.session is None or self.session.dev_configuration is None):
             self.dev_configuration = bfrt_utils.DevConfiguration(self.bfrt_info)
 
         # Set forwarding pipeline config (For the time being we are just
         # associating a client with a p4). Currently the grpc server supports
         # only one client to be in-charge of one p4.
-        if perform_bind:
+        if perform_bind and (self.session is None or
+                             self.session.bound_p4_name != p4_name):
             self.interface.bind_pipeline_config(p4_name)
 
+        if BfRuntimeSession.enabled():
+            if self.session is None:
+                self.session = BfRuntimeSession(key, self.interface)
+                self.session.setup_time = time.time() - start
+                BfRuntimeSession.add(self.session)
+            self.session.bfrt_info = self.bfrt_info
+            self.session.dev_configuration = getattr(self, "dev_configuration", None)
+            if perform_bind:
+                self.session.bound_p4_name = p4_name
+
     def swports(self, idx):
         if idx >= len(self._swports):
             self.fail("Index {} is out-of-bound of port map".format(idx))
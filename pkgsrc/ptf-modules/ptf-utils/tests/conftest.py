@@ -0,0 +1,39 @@
+"""Lay out ptf, bfrt_grpc and p4testutils the way they are installed, and
+reuse the in-process fake BfRuntime server of the bfrt_grpc client tests.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PTF_UTILS_DIR = os.path.dirname(HERE)
+PTF_SRC_DIR = os.path.join(PTF_UTILS_DIR, "..", "ptf", "src")
+BFRT_CLIENT_TESTS_DIR = os.path.join(PTF_UTILS_DIR, "..", "..", "bf-drivers",
+                                     "src", "bf_rt", "bfruntime_grpc_client",
+                                     "python", "tests")
+P4TESTUTILS = ("misc_utils.py", "bfrt_utils.py",
+               "bfruntime_client_base_tests.py")
+
+sys.path.insert(0, os.path.normpath(PTF_SRC_DIR))
+sys.path.insert(0, os.path.normpath(BFRT_CLIENT_TESTS_DIR))
+
+import build_bfrt_grpc  # noqa: E402
+
+# Test modules importorskip p4testutils.bfruntime_client_base_tests, so build
+# the packages before they are collected
+_PKG_DIR = tempfile.mkdtemp(prefix="p4testutils_pkg")
+if build_bfrt_grpc.build(_PKG_DIR):
+    _P4TESTUTILS_DIR = os.path.join(_PKG_DIR, "p4testutils")
+    os.makedirs(_P4TESTUTILS_DIR)
+    for name in P4TESTUTILS:
+        shutil.copy(os.path.join(PTF_UTILS_DIR, name), _P4TESTUTILS_DIR)
+    open(os.path.join(_P4TESTUTILS_DIR, "__init__.py"), "w").close()
+    sys.path.insert(0, _PKG_DIR)
+    # bfrt_utils imports misc_utils as a top level module, as run_ptf_tests
+    # has p4testutils on the path
+    sys.path.insert(0, _P4TESTUTILS_DIR)
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_PKG_DIR, ignore_errors=True)
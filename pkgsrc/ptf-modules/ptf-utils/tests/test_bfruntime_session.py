@@ -0,0 +1,91 @@
+"""BfRuntimeTest.setUp with the reuse_grpc_session test param, against the
+in-process fake BfRuntime server.
+"""
+import pytest
+
+import ptf
+from ptf import testutils
+
+ARCH_PARAMS = {"arch": "tofino2"}
+# bfrt_utils reads the arch when imported, as ptf sets the test params before
+# loading the tests
+testutils.TEST_PARAMS = ARCH_PARAMS
+base_tests = pytest.importorskip("p4testutils.bfruntime_client_base_tests")
+import fake_bfruntime as fake  # noqa: E402
+from p4testutils import bfrt_utils  # noqa: E402
+
+
+class FakeDevConfiguration:
+    """DevConfiguration reads the device_configuration table, which the fake
+    server does not have
+    """
+    built = []
+
+    def __init__(self, bfrt_info):
+        self.p4_name = bfrt_info.p4_name_get()
+        FakeDevConfiguration.built.append(self.p4_name)
+
+
+class FakeDataplane:
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def servicer(monkeypatch):
+    servicer = fake.FakeBfRuntime(p4_names=(fake.P4_NAME, "other"))
+    server, addr = fake.serve(servicer)
+    host, port = addr.split(":")
+    monkeypatch.setattr(testutils, "TEST_PARAMS", dict(
+        ARCH_PARAMS, reuse_grpc_session=True, grpc_server=host,
+        bfrt_grpc_port=port))
+    monkeypatch.setattr(ptf, "open_logfile", lambda name: None)
+    monkeypatch.setattr(ptf, "dataplane_instance", FakeDataplane(),
+                        raising=False)
+    monkeypatch.setattr(bfrt_utils, "DevConfiguration", FakeDevConfiguration)
+    monkeypatch.setattr(FakeDevConfiguration, "built", [])
+    session_cls = base_tests.BfRuntimeSession
+    monkeypatch.setattr(session_cls, "_sessions", {})
+    monkeypatch.setattr(session_cls, "stats", dict.fromkeys(session_cls.stats, 0))
+    yield servicer
+    session_cls.close_all()
+    servicer.close()
+    server.stop(None)
+
+
+def run_test(**kwargs):
+    test = base_tests.BfRuntimeTest()
+    test.setUp(**kwargs)
+    test.tearDown()
+    return test
+
+
+def test_session_reused_for_the_same_program(servicer):
+    tests = [run_test(p4_name=fake.P4_NAME) for _ in range(3)]
+    assert servicer.binds == [fake.P4_NAME]
+    assert servicer.pipeline_config_gets == 1
+    assert FakeDevConfiguration.built == [fake.P4_NAME]
+    assert len(set(id(test.interface) for test in tests)) == 1
+    assert len(set(id(test.bfrt_info) for test in tests)) == 1
+    assert base_tests.BfRuntimeSession.stats["reused"] == 2
+
+
+def test_pipeline_info_fetched_again_for_another_program(servicer):
+    first = run_test(p4_name=fake.P4_NAME)
+    second = run_test(p4_name="other")
+    assert servicer.binds == [fake.P4_NAME, "other"]
+    assert servicer.pipeline_config_gets == 2
+    assert second.interface is first.interface
+    assert second.bfrt_info is not first.bfrt_info
+    assert second.dev_configuration is not first.dev_configuration
+    # the session keeps what was fetched for the program bound last
+    third = run_test(p4_name="other")
+    assert third.bfrt_info is second.bfrt_info
+    assert third.dev_configuration is second.dev_configuration
+    # a test which does not bind keeps what the bound program fetched
+    fourth = run_test(p4_name=fake.P4_NAME, perform_bind=False,
+                      perform_subscribe=True)
+    assert fourth.bfrt_info is second.bfrt_info
+    assert servicer.binds == [fake.P4_NAME, "other"]
+    assert servicer.pipeline_config_gets == 2
+    assert FakeDevConfiguration.built == [fake.P4_NAME, fake.P4_NAME]
@@ -0,0 +1,122 @@
+"""
+AF_PACKET receive path benchmark
+
+Usage (as root):
+    python benchmarks/bench_afpacket.py [-n BURSTS] [--burst FRAMES]
+                                        [--size BYTES] [MODE ...]
+
+The benchmark moves into a network namespace of its own and creates a veth
+pair there, so the host's interfaces are not touched. For every receive mode
+of DataPlanePortLinux (by default all of them, recvmsg being the existing
+path), bursts of frames are sent into one end of the pair and then drained
+from a port on the other end. Only the draining is timed, up to the last
+frame received. Frames the port did not receive, for instance because its
+socket buffer overflowed, are counted as lost.
+"""
+
+import argparse
+import ctypes
+import os
+import select
+import socket
+import struct
+import subprocess
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+from ptf.dataplane import DataPlanePortLinux  # noqa: E402
+
+CLONE_NEWNET = 0x40000000
+ETH_P_TEST = b"\x88\xb5"
+TX_NAME, RX_NAME = "benchtx", "benchrx"
+
+
+def enter_new_netns():
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.unshare(CLONE_NEWNET) != 0:
+        err = ctypes.get_errno()
+        sys.exit("cannot create a network namespace: %s" % os.strerror(err))
+    # No IPv6 neighbour discovery frames on the new interfaces
+    with open("/proc/sys/net/ipv6/conf/default/disable_ipv6", "w") as f:
+        f.write("1")
+    subprocess.check_call(
+        ["ip", "link", "add", TX_NAME, "type", "veth", "peer", "name", RX_NAME]
+    )
+    for name in (TX_NAME, RX_NAME):
+        subprocess.check_call(["ip", "link", "set", "dev", name, "up"])
+
+
+def make_frames(count, size):
+    header = b"\x00\x01\x02\x03\x04\x05\x00\x06\x07\x08\x09\x0a" + ETH_P_TEST
+    return [
+        header + struct.pack("!I", i) * ((size - len(header)) // 4)
+        for i in range(count)
+    ]
+
+
+def drain(port, count, timeout=0.5):
+    """
+    Receive test frames from port until count are received or none arrived
+    for timeout seconds.
+    @retval (number of test frames received, time the last one was received)
+    """
+    received = 0
+    last = time.perf_counter()
+    while received < count:
+        readable, _, _ = select.select([port], [], [], timeout)
+        if not readable:
+            break
+        for t in port.recv_batch():
+            if t is not None and t[2][12:14] == ETH_P_TEST:
+                received += 1
+                last = time.perf_counter()
+    return received, last
+
+
+def bench_mode(rx_mode, frames, bursts):
+    port = DataPlanePortLinux(RX_NAME, 0, 1, {"socket_rx_mode": [rx_mode]})
+    tx = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, 0)
+    tx.bind((TX_NAME, 0))
+    try:
+        received = 0
+        elapsed = 0.0
+        for _ in range(bursts):
+            for frame in frames:
+                tx.send(frame)
+            # The wait for frames which never arrive is not counted
+            start = time.perf_counter()
+            count, last = drain(port, len(frames))
+            received += count
+            elapsed += last - start
+    finally:
+        tx.close()
+        del port
+    return received, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--bursts", type=int, default=40)
+    parser.add_argument("--burst", type=int, default=200, help="frames per burst")
+    parser.add_argument("--size", type=int, default=128, help="frame size")
+    parser.add_argument("modes", nargs="*", default=DataPlanePortLinux.RX_MODES)
+    args = parser.parse_args()
+    if os.geteuid() != 0:
+        sys.exit("must be run as root")
+    enter_new_netns()
+
+    frames = make_frames(args.burst, args.size)
+    sent = args.bursts * len(frames)
+    for rx_mode in args.modes:
+        received, elapsed = bench_mode(rx_mode, frames, args.bursts)
+        print(
+            "%-9s %7d frames %7.3f s %10.0f frames/s %6d lost"
+            % (rx_mode, received, elapsed, received / elapsed, sent - received)
+        )
+
+
+if __name__ == "__main__":
+    main()
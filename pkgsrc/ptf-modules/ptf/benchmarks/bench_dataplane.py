@@ -0,0 +1,133 @@
+"""
+DataPlane receive thread scaling benchmark
+
+Usage:
+    python benchmarks/bench_dataplane.py [-n COUNT] [--ports N ...]
+
+A DataPlane is given 8, 64 and 512 mock ports, each a UDP socket on the
+loopback interface (one file descriptor per port). For every port count:
+  any port     COUNT packets are sent round-robin over the ports in bursts of
+               one packet per port, and received with poll() on any port
+  per port     the same, received with poll() on the port of each packet
+  round trip   one packet is sent on a port and polled for, COUNT times,
+               while the other ports stay idle
+
+Only the public DataPlane interface is used, so the script can be run
+against older versions of ptf to compare.
+"""
+
+import argparse
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+from ptf.dataplane import DataPlane  # noqa: E402
+
+
+class MockPort:
+    """
+    Dataplane port receiving the datagrams sent to its loopback UDP socket
+    """
+
+    sender = None
+
+    def __init__(self, interface_name, device_number, port_number, config={}):
+        self.device_number = device_number
+        self.port_number = port_number
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        if MockPort.sender is None:
+            MockPort.sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def recv(self):
+        try:
+            pkt = self.socket.recv(4096)
+        except BlockingIOError:
+            return None
+        return (self.device_number, self.port_number, pkt, time.time())
+
+    def get_packet_source(self):
+        return self
+
+    def inject(self, pkt):
+        MockPort.sender.sendto(pkt, self.address)
+
+    def send(self, pkt):
+        return len(pkt)
+
+
+def any_port(dp, ports, count):
+    received = 0
+    while received < count:
+        for port in ports:
+            port.inject(b"x" * 64)
+        for _ in ports:
+            assert dp.poll(timeout=2).port is not None
+        received += len(ports)
+    return received
+
+
+def per_port(dp, ports, count):
+    received = 0
+    while received < count:
+        for port in ports:
+            port.inject(b"x" * 64)
+        for port in ports:
+            assert dp.poll(port_number=port.port_number, timeout=2).port is not None
+        received += len(ports)
+    return received
+
+
+def round_trip(dp, ports, count):
+    port = ports[len(ports) // 2]
+    for _ in range(count):
+        port.inject(b"x" * 64)
+        assert dp.poll(port_number=port.port_number, timeout=2).port is not None
+    return count
+
+
+SCENARIOS = (
+    ("any port", any_port),
+    ("per port", per_port),
+    ("round trip", round_trip),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=4096)
+    parser.add_argument("--ports", type=int, nargs="+", default=[8, 64, 512])
+    args = parser.parse_args()
+
+    for num_ports in args.ports:
+        dp = DataPlane(
+            config={"platform": "mock", "dataplane": {"portclass": MockPort}}
+        )
+        try:
+            for port_number in range(num_ports):
+                dp.port_add("mock%d" % port_number, 0, port_number)
+            ports = [dp.ports[(0, port_number)] for port_number in range(num_ports)]
+            for label, scenario in SCENARIOS:
+                start = time.perf_counter()
+                count = scenario(dp, ports, args.count)
+                elapsed = time.perf_counter() - start
+                print(
+                    "%-10s %4d ports %7d packets %7.3f s %9.0f packets/s"
+                    % (label, num_ports, count, elapsed, count / elapsed)
+                )
+        finally:
+            dp.kill()
+
+
+if __name__ == "__main__":
+    main()
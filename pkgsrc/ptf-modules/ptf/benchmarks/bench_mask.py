@@ -0,0 +1,158 @@
+"""
+Mask micro-benchmark
+
+Usage:
+    python benchmarks/bench_mask.py [-n COUNT] [--sizes BYTES ...]
+
+Masks are built over large VXLAN over IPv6 packets, with an inner IPv6 TCP
+frame, ignoring the fields a test usually does not care about (hop limits,
+flow labels, the outer UDP source port and the checksums) and the inner TCP
+payload. The bit offsets of the fields are looked up once, outside of the
+timed runs. For every packet size the masks are built and matched with the
+bit by bit Mask of ptf before the mask was compiled, and with Mask:
+  build        create the mask and clear the bits to ignore
+  match        match the expected packet, as received on a port (bytes)
+  mismatch     match a packet differing in the inner destination address
+  first use    build the mask and match one packet, as verify_packet() does
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+from ptf import testutils  # noqa: E402
+from ptf.mask import Mask, calculate_field_offset_and_bitwidth  # noqa: E402
+from ptf.packet import IPv6, TCP, UDP  # noqa: E402
+
+IGNORED_FIELDS = (
+    (IPv6, "hlim"),
+    (IPv6, "fl"),
+    (UDP, "sport"),
+    (UDP, "chksum"),
+    (TCP, "chksum"),
+)
+
+
+class BitwiseMask(Mask):
+    """
+    Mask as it was before being compiled: masks set bit by bit and packets
+    compared byte by byte
+    """
+
+    def set_care(self, offset, bitwidth):
+        for idx in range(offset, offset + bitwidth):
+            offsetB = idx // 8
+            offsetb = idx % 8
+            self.mask[offsetB] = self.mask[offsetB] | (1 << (7 - offsetb))
+
+    def set_do_not_care(self, offset, bitwidth):
+        for idx in range(offset, offset + bitwidth):
+            offsetB = idx // 8
+            offsetb = idx % 8
+            self.mask[offsetB] = self.mask[offsetB] & (~(1 << (7 - offsetb)))
+
+    def pkt_match(self, pkt):
+        pkt = bytearray(bytes(pkt))
+        if (not self.ignore_extra_bytes and len(pkt) != self.size) or len(
+            pkt
+        ) < self.size:
+            return False
+        exp_pkt = bytearray(bytes(self.exp_pkt))
+        for i in range(self.size):
+            if (exp_pkt[i] & self.mask[i]) != (pkt[i] & self.mask[i]):
+                return False
+        return True
+
+
+def make_packet(size):
+    inner = testutils.simple_tcpv6_packet(pktlen=size - 70)
+    return testutils.simple_vxlanv6_packet(pktlen=size, inner_frame=inner)
+
+
+def ignored_ranges(pkt):
+    """
+    Returns the (offset, bitwidth) bit ranges to ignore in pkt
+    """
+    ranges = [
+        calculate_field_offset_and_bitwidth(pkt, hdr_type, field_name)
+        for hdr_type, field_name in IGNORED_FIELDS
+    ]
+    payload = len(pkt) - len(pkt[TCP].payload)
+    ranges.append((payload * 8, (len(pkt) - payload) * 8))
+    return ranges
+
+
+def make_mask(cls, pkt, ranges):
+    mask = cls(pkt)
+    for offset, bitwidth in ranges:
+        mask.set_do_not_care(offset, bitwidth)
+    return mask
+
+
+def build(cls, pkt, ranges, received, count):
+    for _ in range(count):
+        make_mask(cls, pkt, ranges)
+
+
+def match(cls, pkt, ranges, received, count):
+    mask = make_mask(cls, pkt, ranges)
+    for _ in range(count):
+        assert mask.pkt_match(received)
+
+
+def mismatch(cls, pkt, ranges, received, count):
+    mask = make_mask(cls, pkt, ranges)
+    # differs in the destination address of the inner frame
+    offset = len(pkt) - len(pkt[TCP].underlayer) + 24
+    received = bytearray(received)
+    received[offset] ^= 1
+    received = bytes(received)
+    for _ in range(count):
+        assert not mask.pkt_match(received)
+
+
+def first_use(cls, pkt, ranges, received, count):
+    for _ in range(count):
+        assert make_mask(cls, pkt, ranges).pkt_match(received)
+
+
+SCENARIOS = (
+    ("build", build),
+    ("match", match),
+    ("mismatch", mismatch),
+    ("first use", first_use),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=500)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 1500, 9000])
+    args = parser.parse_args()
+
+    print(
+        "%-10s %5s  %14s  %14s  %7s"
+        % ("scenario", "bytes", "bitwise ops/s", "compiled ops/s", "speedup")
+    )
+    for label, scenario in SCENARIOS:
+        for size in args.sizes:
+            pkt = make_packet(size)
+            ranges = ignored_ranges(pkt)
+            received = bytes(pkt)
+            rates = []
+            for cls in (BitwiseMask, Mask):
+                start = time.perf_counter()
+                scenario(cls, pkt, ranges, received, args.count)
+                rates.append(args.count / (time.perf_counter() - start))
+            print(
+                "%-10s %5d  %14.0f  %14.0f  %6.1fx"
+                % (label, size, rates[0], rates[1], rates[1] / rates[0])
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+DataPlane receive queue micro-benchmark
+
+Usage:
+    python benchmarks/bench_packet_queue.py [-n COUNT] [--ports N ...]
+                                            [--qlen N]
+
+Fake ports generate synthetic packets in round-robin order. The packets are
+queued, then dequeued, once with the per-port lists DataPlane used before
+PacketQueues and once with PacketQueues:
+  fill/drain   queue COUNT packets, then dequeue the oldest packet on any
+               port until none are left
+  steady       queues are kept full; every new packet is followed by
+               dequeuing the oldest packet on any port, as a poll() under
+               load does
+  per port     queue COUNT packets, then dequeue them port by port
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+from ptf.packet_queue import PacketQueues  # noqa: E402
+
+
+class ListQueues(object):
+    """
+    The queues of DataPlane before PacketQueues: a list per port, pop(0) to
+    drop or dequeue, and a scan of every port to find the oldest packet
+    """
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self.queues = {}
+
+    def add_port(self, device_number, port_number):
+        self.queues[(device_number, port_number)] = []
+
+    def push(self, device_number, port_number, pkt, timestamp):
+        queue = self.queues[(device_number, port_number)]
+        dropped = len(queue) >= self.maxlen
+        if dropped:
+            queue.pop(0)
+        queue.append((pkt, timestamp))
+        return dropped
+
+    def oldest_port_number(self, device_number):
+        min_port_number = None
+        min_time = float("inf")
+        for port_id, queue in list(self.queues.items()):
+            if port_id[0] != device_number:
+                continue
+            if queue and queue[0][1] < min_time:
+                min_time = queue[0][1]
+                min_port_number = port_id[1]
+        return min_port_number
+
+    def pop(self, device_number, port_number=None):
+        if port_number is None:
+            port_number = self.oldest_port_number(device_number)
+            if port_number is None:
+                return None
+        queue = self.queues[(device_number, port_number)]
+        if not queue:
+            return None
+        pkt, timestamp = queue.pop(0)
+        return (port_number, pkt, timestamp)
+
+
+class FakePort(object):
+    """
+    Port receiving synthetic packets, numbered by arrival
+    """
+
+    def __init__(self, device_number, port_number):
+        self.device_number = device_number
+        self.port_number = port_number
+        self.pkt = b"\0" * 64
+
+    def recv(self, timestamp):
+        return (self.device_number, self.port_number, self.pkt, timestamp)
+
+
+def make_queues(cls, ports, qlen):
+    queues = cls(qlen)
+    for port in ports:
+        queues.add_port(port.device_number, port.port_number)
+    return queues
+
+
+def receive(queues, ports, count, first=0):
+    for idx in range(first, first + count):
+        queues.push(*ports[idx % len(ports)].recv(float(idx)))
+
+
+def no_setup(queues, ports):
+    return 0
+
+
+def fill_queues(queues, ports):
+    depth = len(ports) * queues.maxlen
+    receive(queues, ports, depth)
+    return depth
+
+
+def fill_drain(queues, ports, count, first):
+    receive(queues, ports, count, first)
+    while queues.pop(0) is not None:
+        pass
+
+
+def steady(queues, ports, count, first):
+    for idx in range(first, first + count):
+        queues.push(*ports[idx % len(ports)].recv(float(idx)))
+        queues.pop(0)
+
+
+def per_port(queues, ports, count, first):
+    receive(queues, ports, count, first)
+    for port in ports:
+        while queues.pop(0, port.port_number) is not None:
+            pass
+
+
+# Name, untimed setup returning the number of packets it queued, timed run
+SCENARIOS = (
+    ("fill/drain", no_setup, fill_drain),
+    ("steady", fill_queues, steady),
+    ("per port", no_setup, per_port),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=20000)
+    parser.add_argument("--ports", type=int, nargs="+", default=[8, 64, 512])
+    parser.add_argument("--qlen", type=int, default=100)
+    args = parser.parse_args()
+
+    print(
+        "%-10s %5s  %14s  %14s  %7s"
+        % ("scenario", "ports", "lists pkts/s", "queues pkts/s", "speedup")
+    )
+    for label, setup, scenario in SCENARIOS:
+        for num_ports in args.ports:
+            ports = [FakePort(0, port_number) for port_number in range(num_ports)]
+            rates = []
+            for cls in (ListQueues, PacketQueues):
+                queues = make_queues(cls, ports, args.qlen)
+                first = setup(queues, ports)
+                start = time.perf_counter()
+                scenario(queues, ports, args.count, first)
+                rates.append(args.count / (time.perf_counter() - start))
+            print(
+                "%-10s %5d  %14.0f  %14.0f  %6.1fx"
+                % (label, num_ports, rates[0], rates[1], rates[1] / rates[0])
+            )
+
+
+if __name__ == "__main__":
+    main()
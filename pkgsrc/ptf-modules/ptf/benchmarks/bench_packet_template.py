@@ -0,0 +1,143 @@
+"""
+PacketTemplate flow generation benchmark
+
+Usage:
+    python benchmarks/bench_packet_template.py [-n COUNT] [SCENARIO ...]
+
+For every scenario, COUNT packets of different flows are generated once by
+calling the simple_*_packet() builder of testutils with the flow's field
+values and serializing the result, and once with PacketTemplate.build() on a
+template of the same packet. The bytes of the first packets are compared
+before timing.
+  tcp          IPv4 source and destination addresses and TCP ports
+  udp          Ethernet source, IPv4 source and UDP source port
+  tcpv6        IPv6 source and destination addresses and TCP source port
+  vxlan        inner TCP ports of a VXLAN packet (outer UDP checksum set)
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+from ptf import testutils  # noqa: E402
+from ptf.packet import IP, IPv6, TCP, UDP, Ether  # noqa: E402
+from ptf.packet_template import PacketTemplate  # noqa: E402
+
+
+def _ip(i):
+    return "10.%d.%d.%d" % (i >> 16 & 0xFF, i >> 8 & 0xFF, i & 0xFF)
+
+
+def _ipv6(i):
+    return "2001:db8::%x:%x" % (i >> 16 & 0xFFFF, i & 0xFFFF)
+
+
+def _mac(i):
+    return "00:00:00:%02x:%02x:%02x" % (i >> 16 & 0xFF, i >> 8 & 0xFF, i & 0xFF)
+
+
+def tcp():
+    fields = [(IP, "src"), (IP, "dst"), (TCP, "sport"), (TCP, "dport")]
+
+    def values(i):
+        return _ip(i), _ip(i + 1), 1024 + i % 60000, 80 + i % 7
+
+    def build(ip_src, ip_dst, sport, dport):
+        return testutils.simple_tcp_packet(
+            ip_src=ip_src, ip_dst=ip_dst, tcp_sport=sport, tcp_dport=dport
+        )
+
+    return testutils.simple_tcp_packet(), fields, values, build
+
+
+def udp():
+    fields = [(Ether, "src"), (IP, "src"), (UDP, "sport")]
+
+    def values(i):
+        return _mac(i), _ip(i), 1024 + i % 60000
+
+    def build(eth_src, ip_src, sport):
+        return testutils.simple_udp_packet(
+            eth_src=eth_src, ip_src=ip_src, udp_sport=sport
+        )
+
+    return testutils.simple_udp_packet(), fields, values, build
+
+
+def tcpv6():
+    fields = [(IPv6, "src"), (IPv6, "dst"), (TCP, "sport")]
+
+    def values(i):
+        return _ipv6(i), _ipv6(i + 1), 1024 + i % 60000
+
+    def build(ipv6_src, ipv6_dst, sport):
+        return testutils.simple_tcpv6_packet(
+            ipv6_src=ipv6_src, ipv6_dst=ipv6_dst, tcp_sport=sport
+        )
+
+    return testutils.simple_tcpv6_packet(), fields, values, build
+
+
+def vxlan():
+    fields = [(TCP, "sport"), (TCP, "dport")]
+
+    def values(i):
+        return 1024 + i % 60000, 80 + i % 7
+
+    def build(sport, dport):
+        inner = testutils.simple_tcp_packet(tcp_sport=sport, tcp_dport=dport)
+        return testutils.simple_vxlan_packet(inner_frame=inner)
+
+    return build(*values(0)), fields, values, build
+
+
+SCENARIOS = {
+    "tcp": tcp,
+    "udp": udp,
+    "tcpv6": tcpv6,
+    "vxlan": vxlan,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=2000)
+    parser.add_argument(
+        "scenarios", nargs="*", help="one of %s" % ", ".join(sorted(SCENARIOS))
+    )
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error("unknown scenario(s): %s" % ", ".join(sorted(unknown)))
+
+    print(
+        "%-8s  %14s  %14s  %7s"
+        % ("scenario", "builder pkts/s", "template pkts/s", "speedup")
+    )
+    for name in args.scenarios or SCENARIOS:
+        pkt, fields, values, build = SCENARIOS[name]()
+        template = PacketTemplate(pkt, fields)
+        for i in range(10):
+            assert bytes(template.build(*values(i))) == bytes(build(*values(i)))
+
+        start = time.perf_counter()
+        for i in range(args.count):
+            bytes(build(*values(i)))
+        builder = args.count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i in range(args.count):
+            template.build(*values(i))
+        templated = args.count / (time.perf_counter() - start)
+        print(
+            "%-8s  %14.0f  %14.0f  %6.0fx"
+            % (name, builder, templated, templated / builder)
+        )
+
+
+if __name__ == "__main__":
+    main()
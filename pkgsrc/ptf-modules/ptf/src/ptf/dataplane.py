@@ -18,20 +18,21 @@ import sys
 import os
 import socket
 import time
-import select
+import selectors
 import logging
 import struct
 from collections import defaultdict
 from collections import deque
 from collections import namedtuple
 from threading import Thread
-from threading import Lock
+from threading import RLock
 from threading import Condition
 from . import ptfutils
 from . import netutils
 from . import mask
 from . import packet
 from .pcap_writer import PcapWriter
+from .packet_queue import PacketQueues
 from io import StringIO
 
 try:
@@ -95,6 +96,15 @@ class DataPlanePacketSourceIface:
         """
         raise NotImplementedError()
 
+    def recv_batch(self):
+        """
+        Optional. Receive all the packets currently available from this
+        source. The DataPlane falls back to recv() if a source does not
+        provide it.
+        @retval list of (device, port, packet data, timestamp)
+        """
+        return [self.recv()]
+
 
 class DataPlanePortIface:
     def get_packet_source(self):
@@ -127,12 +137,21 @@ class DataPlanePortIface:
 class DataPlanePortLinux(DataPlanePortIface, DataPlanePacketSourceIface):
     """
     Uses raw sockets to capture and send packets on a network interface.
+
+    The receive path is selected per interface with the "socket_rx_mode"
+    config entry, a list of "MODE" or "INTERFACE=MODE" strings:
+      - recvmsg: one recvmsg call per packet (default)
+      - recvmmsg: up to a batch of packets per recvmmsg call
+      - ring: zero-syscall receive from a TPACKET_V3 ring mapped in memory
     """
 
     RCV_SIZE_DEFAULT = 4096
     ETH_P_ALL = 0x03
     RCV_TIMEOUT = 10000
 
+    RX_MODE_DEFAULT = "recvmsg"
+    RX_MODES = ("recvmsg", "recvmmsg", "ring")
+
     def __init__(self, interface_name, device_number, port_number, config={}):
         """
         @param interface_name The name of the physical interface like eth1
@@ -140,14 +159,48 @@ class DataPlanePortLinux(DataPlanePortIface, DataPlanePacketSourceIface):
         self.interface_name = interface_name
         self.device_number = device_number
         self.port_number = port_number
+        self.rx_mode = self.get_rx_mode(interface_name, config)
+        self.rx_ring = None
+        self.rx_batch = None
+        self.rx_pending = deque()
         self.socket = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, 0)
         afpacket.enable_auxdata(self.socket)
+        if self.rx_mode == "ring":
+            # The ring must be set up before binding the socket
+            self.rx_ring = afpacket.RxRing(self.socket)
         self.socket.bind((interface_name, self.ETH_P_ALL))
         netutils.set_promisc(self.socket, interface_name)
         self.socket.settimeout(self.RCV_TIMEOUT)
         self.recv_size = config.get("socket_recv_size", self.RCV_SIZE_DEFAULT)
+        if self.rx_mode == "recvmmsg":
+            self.rx_batch = afpacket.RecvBatch(self.socket, self.recv_size)
+
+    @classmethod
+    def get_rx_mode(cls, interface_name, config):
+        """
+        Return the receive mode configured for the given interface. An
+        "INTERFACE=MODE" entry takes precedence over a plain "MODE" entry.
+        """
+        specs = config.get("socket_rx_mode") or []
+        if isinstance(specs, str):
+            specs = [specs]
+        rx_mode = cls.RX_MODE_DEFAULT
+        for spec in specs:
+            name, sep, mode = spec.rpartition("=")
+            if mode not in cls.RX_MODES:
+                raise ValueError(
+                    "Invalid socket receive mode '%s', expected one of %s"
+                    % (mode, ", ".join(cls.RX_MODES))
+                )
+            if not sep:
+                rx_mode = mode
+            elif name == interface_name:
+                return mode
+        return rx_mode
 
     def __del__(self):
+        if self.rx_ring:
+            self.rx_ring.close()
         if self.socket:
             self.socket.close()
 
@@ -162,8 +215,32 @@ class DataPlanePortLinux(DataPlanePortIface, DataPlanePacketSourceIface):
         Receive a packet from this port.
         @retval (device, port, packet data, timestamp)
         """
-        pkt = afpacket.recv(self.socket, self.recv_size)
-        return (self.device_number, self.port_number, pkt, time.time())
+        if self.rx_mode == "recvmsg":
+            pkt = afpacket.recv(self.socket, self.recv_size)
+            return (self.device_number, self.port_number, pkt, time.time())
+        if not self.rx_pending:
+            self.rx_pending.extend(self.recv_batch())
+        return self.rx_pending.popleft() if self.rx_pending else None
+
+    def recv_batch(self):
+        """
+        Receive all packets currently available on this port.
+        @retval list of (device, port, packet data, timestamp)
+        """
+        if self.rx_ring:
+            frames = self.rx_ring.recv_batch()
+        elif self.rx_batch:
+            frames = self.rx_batch.recv_batch()
+        else:
+            return [self.recv()]
+        batch = [
+            (self.device_number, self.port_number, pkt, timestamp)
+            for pkt, timestamp in frames
+        ]
+        if self.rx_pending:
+            batch[:0] = self.rx_pending
+            self.rx_pending.clear()
+        return batch
 
     def get_packet_source(self):
         """
@@ -528,7 +605,7 @@ class DataPlanePortPcap:
         return self.pcap.fileno()
 
     def recv(self):
-        (timestamp, pkt) = next(self.pcap)
+        timestamp, pkt = next(self.pcap)
         return (self.device_number, self.port_number, pkt[:], timestamp)
 
     def get_packet_source(self):
@@ -559,14 +636,18 @@ class DataPlane(Thread):
     # includes up to this many recent packets as context.
     POLL_MAX_RECENT_PACKETS = 3
 
+    # Maximum number of times the receive thread goes back to the ready
+    # sources before releasing the lock and notifying waiters.
+    MAX_DRAIN_PASSES = 16
+
     def __init__(self, config=None):
         Thread.__init__(self)
 
         # dict from device number, port number to port object
         self.ports = {}
 
-        # dict from device number, port number to list of (timestamp, packet)
-        self.packet_queues = {}
+        # bounded per-port packet queues, indexed by device number, port number
+        self.packet_queues = None
 
         # counters of received packets (may include packets which were dropped due to queue overflow)
         self.rx_counters = defaultdict(int)
@@ -576,12 +657,24 @@ class DataPlane(Thread):
 
         # cvar serves double duty as a regular top level lock and
         # as a condition variable
-        self.cvar = Condition()
+        self.lock = RLock()
+        self.cvar = Condition(self.lock)
+
+        # dict from device number, port number (None for any port) to the set
+        # of conditions, sharing self.lock, of the threads waiting for a packet
+        self.waiters = defaultdict(set)
 
         # Used to wake up the event loop from another thread
         self.waker = ptfutils.EventDescriptor()
         self.killed = False
 
+        # Packet sources are registered with the selector when the first port
+        # using them is added and unregistered when the last one is removed.
+        # dict from packet source to number of ports using it
+        self.sources = {}
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.waker, selectors.EVENT_READ)
+
         self.logger = logging.getLogger("dataplane")
         self.pcap_writer = None
 
@@ -620,6 +713,7 @@ class DataPlane(Thread):
             self.qlen = self.config["qlen"]
         else:
             self.qlen = self.MAX_QUEUE_LEN
+        self.packet_queues = PacketQueues(self.qlen)
 
         self.start()
 
@@ -628,49 +722,99 @@ class DataPlane(Thread):
         Activity function for class
         """
         while not self.killed:
-            sockets = set([p.get_packet_source() for p in list(self.ports.values())])
-            sockets.add(self.waker)
             try:
-                sel_in, sel_out, sel_err = select.select(sockets, [], [], 1)
+                events = self.selector.select(1)
             except:
                 print(sys.exc_info())
                 self.logger.error("Select error, exiting")
                 break
 
             with self.cvar:
-                for sel in sel_in:
-                    if sel == self.waker:
-                        self.waker.wait()
-                        continue
-                    else:
-                        # Enqueue packet
-                        t = sel.recv()
-                        if t is None:
+                rx_ports = set()
+                passes = 0
+                while events:
+                    for key, _ in events:
+                        sel = key.fileobj
+                        if sel is self.waker:
+                            self.waker.wait()
                             continue
-                        device_number, port_number, pkt, timestamp = t
-                        self.logger.debug(
-                            "Pkt len %d in on device %d, port %d",
-                            len(pkt),
-                            device_number,
-                            port_number,
-                        )
-                        if self.pcap_writer:
-                            self.pcap_writer.write(
-                                pkt, timestamp, device_number, port_number
-                            )
-                        queue = self.packet_queues[(device_number, port_number)]
-                        if len(queue) >= self.qlen:
-                            # Queue full, throw away oldest
-                            queue.pop(0)
-                            self.logger.debug("Discarding oldest packet to make room")
-                        queue.append((pkt, timestamp))
-                        self.rx_counters[(device_number, port_number)] += 1
-                self.cvar.notify_all()
+                        if sel not in self.sources:
+                            # The port was removed after select returned
+                            continue
+                        recv_batch = getattr(sel, "recv_batch", None)
+                        if recv_batch is not None:
+                            batch = recv_batch()
+                        else:
+                            batch = (sel.recv(),)
+                        for t in batch:
+                            if t is not None and self.enqueue_packet(*t):
+                                rx_ports.add((t[0], t[1]))
+                    passes += 1
+                    if passes == self.MAX_DRAIN_PASSES or self.killed:
+                        break
+                    # Drain the sources which are still ready
+                    events = self.selector.select(0)
+                if rx_ports:
+                    self.notify_waiters(rx_ports)
 
         self.logger.info("Thread exit")
 
+    def enqueue_packet(self, device_number, port_number, pkt, timestamp):
+        """
+        Enqueue a received packet. Must be called with cvar held.
+        @retval True if the packet was queued
+        """
+        self.logger.debug(
+            "Pkt len %d in on device %d, port %d",
+            len(pkt),
+            device_number,
+            port_number,
+        )
+        if self.pcap_writer:
+            self.pcap_writer.write(pkt, timestamp, device_number, port_number)
+        if (device_number, port_number) not in self.packet_queues:
+            return False
+        if self.packet_queues.push(device_number, port_number, pkt, timestamp):
+            # Queue was full, oldest packet was thrown away
+            self.logger.debug("Discarding oldest packet to make room")
+        self.rx_counters[(device_number, port_number)] += 1
+        return True
+
+    def notify_waiters(self, rx_ports):
+        """
+        Wake up the threads waiting for a packet on one of the given
+        (device number, port number) pairs or on any port of their device.
+        Threads waiting directly on cvar are not woken up, they have to wait
+        on a condition from add_waiter. Must be called with cvar held.
+        """
+        conditions = set()
+        for device_number, port_number in rx_ports:
+            conditions.update(self.waiters.get((device_number, port_number), ()))
+            conditions.update(self.waiters.get((device_number, None), ()))
+        for condition in conditions:
+            condition.notify()
+
+    def add_waiter(self, device_number, port_number):
+        """
+        Return a condition, sharing the lock of cvar, which is notified when a
+        packet is received on the given port (or any port of the device if
+        port_number is None). Must be called with cvar held, and the condition
+        must be released with remove_waiter.
+        """
+        condition = Condition(self.lock)
+        self.waiters[(device_number, port_number)].add(condition)
+        return condition
+
+    def remove_waiter(self, device_number, port_number, condition):
+        waiters = self.waiters[(device_number, port_number)]
+        waiters.discard(condition)
+        if not waiters:
+            del self.waiters[(device_number, port_number)]
+
     def set_qlen(self, qlen):
-        self.qlen = qlen
+        with self.cvar:
+            self.qlen = qlen
+            self.packet_queues.set_maxlen(qlen)
 
     def port_add(self, interface_name, device_number, port_number):
         """
@@ -687,9 +831,15 @@ class DataPlane(Thread):
             )
             self.ports[port_id]._port_number = port_number
             self.ports[port_id]._device_number = device_number
-            self.packet_queues[port_id] = []
-            # Need to wake up event loop to change the sockets being selected
-            # on.
+            self.packet_queues.add_port(device_number, port_number)
+            source = self.ports[port_id].get_packet_source()
+            if source in self.sources:
+                self.sources[source] += 1
+            else:
+                self.sources[source] = 1
+                self.selector.register(source, selectors.EVENT_READ)
+        # Wake up the event loop, selectors which poll a copy of the
+        # registered set only see the new port on their next call
         self.waker.notify()
 
     # Returns true if success
@@ -703,8 +853,13 @@ class DataPlane(Thread):
                     )
                 )
                 return False
+            source = self.ports[port_id].get_packet_source()
+            self.sources[source] -= 1
+            if self.sources[source] == 0:
+                del self.sources[source]
+                self.selector.unregister(source)
             del self.ports[port_id]
-            del self.packet_queues[port_id]
+            self.packet_queues.remove_port(device_number, port_number)
         self.waker.notify()
         return True
 
@@ -743,40 +898,23 @@ class DataPlane(Thread):
         Returns the port number with the oldest packet,
         or None if no packets are queued.
         """
-        min_port_number = None
-        min_time = float("inf")
-        for port_id, queue in list(self.packet_queues.items()):
-            if port_id[0] != device:
-                continue
-            if queue and queue[0][1] < min_time:
-                min_time = queue[0][1]
-                min_port_number = port_id[1]
-        return min_port_number
+        return self.packet_queues.oldest_port_number(device)
 
     # Dequeues and yields packets in the order they were received.
     # Yields (port, packet, received time).
     # If port is not specified yields packets from all ports.
     def packets(self, device, port=None):
         while True:
-            if port is None:
-                rcv_port = self.oldest_port_number(device)
-            else:
-                rcv_port = port
-
-            if rcv_port == None:
-                self.logger.debug("Out of packets on all ports")
-                break
-
-            queue = self.packet_queues[(device, rcv_port)]
-
-            if len(queue) == 0:
-                self.logger.debug(
-                    "Out of packets on device %d, port %d", device, rcv_port
-                )
+            t = self.packet_queues.pop(device, port)
+            if t is None:
+                if port is None:
+                    self.logger.debug("Out of packets on all ports")
+                else:
+                    self.logger.debug(
+                        "Out of packets on device %d, port %d", device, port
+                    )
                 break
-
-            pkt, time = queue.pop(0)
-            yield (rcv_port, pkt, time)
+            yield t
 
     PollResult = namedtuple("PollResult", ["device", "port", "packet", "time"])
     """
@@ -930,6 +1068,11 @@ class DataPlane(Thread):
         if exp_pkt and (port_number is None):
             self.logger.warn("Dataplane poll with exp_pkt but no port number")
 
+        # Serialize the expected packet once rather than for every candidate
+        match_pkt = exp_pkt
+        if exp_pkt and not isinstance(exp_pkt, mask.Mask):
+            match_pkt = bytes(exp_pkt)
+
         # A nested function can't assign to variables in its enclosing function
         # in Python 2, so the conventional hack is to put them in a dict.
         grab_log = {
@@ -955,7 +1098,7 @@ class DataPlane(Thread):
                 if not filter_check(pkt):
                     self.logger.debug("Paket does not match filter, discarding")
                     continue
-                if not exp_pkt or match_exp_pkt(exp_pkt, pkt):
+                if not exp_pkt or match_exp_pkt(match_pkt, pkt):
                     return DataPlane.PollSuccess(
                         rcv_device_number, rcv_port_number, pkt, exp_pkt, time
                     )
@@ -964,7 +1107,11 @@ class DataPlane(Thread):
             return None
 
         with self.cvar:
-            ret = ptfutils.timed_wait(self.cvar, grab, timeout=timeout)
+            waiter = self.add_waiter(device_number, port_number)
+            try:
+                ret = ptfutils.timed_wait(waiter, grab, timeout=timeout)
+            finally:
+                self.remove_waiter(device_number, port_number, waiter)
 
         if ret is None:
             self.logger.debug(
@@ -978,6 +1125,167 @@ class DataPlane(Thread):
 
         return ret
 
+    PollPortsResult = namedtuple(
+        "PollPortsResult", ["received", "missing", "unexpected", "other"]
+    )
+    """
+    Result of poll_ports(). @received is a list of PollSuccess for the
+    expected packets which were found, @missing a list of (port number,
+    PollFailure) for the expected packets which were not, @unexpected a list of
+    PollSuccess for the packets found on ports where they should not have been
+    received, and @other a list of PollSuccess for any other packet left on the
+    device.
+    """
+
+    def poll_ports(
+        self,
+        device_number=0,
+        expected=[],
+        unexpected=[],
+        timeout=None,
+        negative_timeout=None,
+        check_other=False,
+        filters=[],
+    ):
+        """
+        Poll several ports of a device at once, with a single deadline.
+
+        Waits up to timeout seconds for every expected packet to be received on
+        its port, then for negative_timeout seconds during which the unexpected
+        packets are looked for on their ports. Packets of these ports which
+        match nothing are discarded, as poll() does. If check_other is set, any
+        packet left on the device at the end is reported as well.
+
+        All negative checks share one window instead of each port waiting in
+        turn. If an expected packet is still missing when timeout expires, the
+        negative window is skipped.
+
+        @param device_number Poll ports of this device
+        @param expected List of (port number, packet or Mask). Several packets
+        expected on the same port must be received in list order.
+        @param unexpected List of (port number, packet or Mask) which must not
+        be received, a None packet meaning any packet
+        @param timeout Seconds to wait for the expected packets, None means use
+        the default timeout
+        @param negative_timeout Seconds to wait for unexpected packets, None
+        means use the default negative timeout
+        @param check_other Report any packet left on the device
+        @return A PollPortsResult
+        """
+        if timeout is None:
+            timeout = ptfutils.default_timeout
+        if negative_timeout is None:
+            negative_timeout = ptfutils.default_negative_timeout
+
+        def filter_check(pkt):
+            for f in filters:
+                if not f(pkt):
+                    return False
+            return True
+
+        def compile_exp_pkt(exp_pkt):
+            # Serialize the expected packet once rather than for every candidate
+            if exp_pkt is None or isinstance(exp_pkt, mask.Mask):
+                return exp_pkt
+            return bytes(exp_pkt)
+
+        # dict from port number to the deque of packets still expected on it
+        pending = defaultdict(deque)
+        for port, exp_pkt in expected:
+            pending[port].append((exp_pkt, compile_exp_pkt(exp_pkt)))
+        negatives = defaultdict(list)
+        for port, exp_pkt in unexpected:
+            negatives[port].append((exp_pkt, compile_exp_pkt(exp_pkt)))
+        grab_logs = {
+            port: {
+                "recent_packets": deque(maxlen=DataPlane.POLL_MAX_RECENT_PACKETS),
+                "packet_count": 0,
+            }
+            for port in pending
+        }
+        received = []
+        unexpected_pkts = []
+        other_pkts = []
+
+        def grab():
+            for port in list(pending):
+                queue = pending[port]
+                grab_log = grab_logs[port]
+                for _, pkt, rcv_time in self.packets(device_number, port):
+                    grab_log["recent_packets"].append(pkt)
+                    grab_log["packet_count"] += 1
+                    if not filter_check(pkt):
+                        continue
+                    exp_pkt, match_pkt = queue[0]
+                    if match_exp_pkt(match_pkt, pkt):
+                        received.append(
+                            DataPlane.PollSuccess(
+                                device_number, port, pkt, exp_pkt, rcv_time
+                            )
+                        )
+                        queue.popleft()
+                        if not queue:
+                            del pending[port]
+                            break
+            for port, port_negatives in negatives.items():
+                for _, pkt, rcv_time in self.packets(device_number, port):
+                    if not filter_check(pkt):
+                        continue
+                    for exp_pkt, match_pkt in port_negatives:
+                        if match_pkt is None or match_exp_pkt(match_pkt, pkt):
+                            unexpected_pkts.append(
+                                DataPlane.PollSuccess(
+                                    device_number, port, pkt, exp_pkt, rcv_time
+                                )
+                            )
+                            break
+
+        end_time = time.time() + timeout
+        negative_end_time = None
+        with self.cvar:
+            waiter = self.add_waiter(device_number, None)
+            try:
+                while True:
+                    grab()
+                    now = time.time()
+                    if pending:
+                        if now >= end_time:
+                            break
+                        wait_time = end_time - now
+                    elif negatives or check_other:
+                        if negative_end_time is None:
+                            negative_end_time = now + negative_timeout
+                        if now >= negative_end_time:
+                            break
+                        wait_time = negative_end_time - now
+                    else:
+                        break
+                    waiter.wait(wait_time)
+                if check_other and not pending:
+                    for port, pkt, rcv_time in self.packets(device_number):
+                        if filter_check(pkt):
+                            other_pkts.append(
+                                DataPlane.PollSuccess(
+                                    device_number, port, pkt, None, rcv_time
+                                )
+                            )
+            finally:
+                self.remove_waiter(device_number, None, waiter)
+
+        missing = [
+            (
+                port,
+                DataPlane.PollFailure(
+                    exp_pkt,
+                    grab_logs[port]["recent_packets"],
+                    grab_logs[port]["packet_count"],
+                ),
+            )
+            for port, queue in pending.items()
+            for exp_pkt, _ in queue
+        ]
+        return DataPlane.PollPortsResult(received, missing, unexpected_pkts, other_pkts)
+
     def kill(self):
         """
         Stop the dataplane thread.
@@ -988,6 +1296,8 @@ class DataPlane(Thread):
         # Explicitly release ports to ensure we don't run out of sockets
         # even if someone keeps holding a reference to the dataplane.
         del self.ports
+        self.sources.clear()
+        self.selector.close()
         self.waker.close()
 
     def port_down(self, device_number, port_number):
@@ -1017,8 +1327,8 @@ class DataPlane(Thread):
         """
         Drop any queued packets.
         """
-        for port_id in list(self.packet_queues.keys()):
-            self.packet_queues[port_id] = []
+        with self.cvar:
+            self.packet_queues.flush()
 
     def start_pcap(self, filename):
         with self.cvar:
@@ -12,6 +12,17 @@ class MaskException(Exception):
 
 
 class Mask:
+    """
+    Expected packet with a bit mask of the bits to compare.
+
+    The expected packet and the mask are compiled into comparison segments
+    the first time a packet is matched, and the segments are reused by the
+    following matches. They are dropped when exp_pkt or mask is assigned or
+    the mask is changed with the set_care*() / set_do_not_care*() methods.
+    Changing exp_pkt or the mask list in place (e.g. mask.exp_pkt[IP].ttl = 5)
+    is not detected: call recompile() afterwards.
+    """
+
     def __init__(self, exp_pkt, ignore_extra_bytes=False, dont_care_all=False):
         self.exp_pkt = exp_pkt
         self.size = len(exp_pkt)
@@ -19,11 +30,54 @@ class Mask:
         self.mask = [0] * self.size if dont_care_all else [0xFF] * self.size
         self.ignore_extra_bytes = ignore_extra_bytes
 
+    @property
+    def exp_pkt(self):
+        return self._exp_pkt
+
+    @exp_pkt.setter
+    def exp_pkt(self, exp_pkt):
+        self._exp_pkt = exp_pkt
+        self._segments = None
+
+    @property
+    def mask(self):
+        return self._mask
+
+    @mask.setter
+    def mask(self, mask):
+        self._mask = mask
+        self._segments = None
+
+    def recompile(self):
+        """
+        Compile again on the next match, after exp_pkt or the mask list was
+        changed in place
+        """
+        self._segments = None
+
+    def _set_bits(self, offset, bitwidth, care):
+        end = offset + bitwidth
+        if bitwidth <= 0:
+            return
+        if offset < 0 or end > self.size * 8:
+            raise IndexError("mask bit range out of range")
+        self._segments = None
+        mask = self._mask
+        first = offset // 8
+        last = (end - 1) // 8
+        for offsetB in (first, last):
+            lo = max(offset - offsetB * 8, 0)
+            hi = min(end - offsetB * 8, 8)
+            bits = (0xFF >> lo) & (0xFF << (8 - hi)) & 0xFF
+            if care:
+                mask[offsetB] |= bits
+            else:
+                mask[offsetB] &= ~bits & 0xFF
+        if last - first > 1:
+            mask[first + 1 : last] = [0xFF if care else 0] * (last - first - 1)
+
     def set_care(self, offset, bitwidth):
-        for idx in range(offset, offset + bitwidth):
-            offsetB = idx // 8
-            offsetb = idx % 8
-            self.mask[offsetB] = self.mask[offsetB] | (1 << (7 - offsetb))
+        self._set_bits(offset, bitwidth, True)
 
     def set_care_all(self):
         self.mask = [0xFF] * self.size
@@ -35,12 +89,7 @@ class Mask:
         self.set_care(offset, bitwidth)
 
     def set_do_not_care(self, offset, bitwidth):
-        # a very naive but simple method
-        # we do it bit by bit :)
-        for idx in range(offset, offset + bitwidth):
-            offsetB = idx // 8
-            offsetb = idx % 8
-            self.mask[offsetB] = self.mask[offsetB] & (~(1 << (7 - offsetb)))
+        self._set_bits(offset, bitwidth, False)
 
     def set_do_not_care_all(self):
         self.mask = [0] * self.size
@@ -65,59 +114,66 @@ class Mask:
     def is_valid(self):
         return self.valid
 
+    def _compile(self):
+        """
+        Split the mask into runs of bytes which are fully compared (0xFF),
+        ignored (0x00) or partially compared. Returns a list of
+        (start, end, mask, expected) tuples, one per compared run: mask is None
+        for a fully compared run and expected holds the expected bytes,
+        otherwise mask and expected are the run's mask and masked expected
+        value as big endian integers.
+        """
+        exp_pkt = bytes(self._exp_pkt)
+        mask = bytes(self._mask)
+        segments = []
+        size = self.size
+        i = 0
+        while i < size:
+            kind = mask[i] if mask[i] in (0, 0xFF) else None
+            j = i + 1
+            if kind is None:
+                while j < size and mask[j] not in (0, 0xFF):
+                    j += 1
+            else:
+                while j < size and mask[j] == kind:
+                    j += 1
+            if kind == 0xFF:
+                segments.append((i, j, None, exp_pkt[i:j]))
+            elif kind is None:
+                run_mask = int.from_bytes(mask[i:j], "big")
+                run_exp = int.from_bytes(exp_pkt[i:j], "big") & run_mask
+                segments.append((i, j, run_mask, run_exp))
+            i = j
+        return segments
+
     def pkt_match(self, pkt):
         # just to be on the safe side
-        pkt = bytearray(bytes(pkt))
+        pkt = bytes(pkt)
         # we fail if we don't match on sizes, or if ignore_extra_bytes is set,
         # fail if we have not received at least size bytes
         if (not self.ignore_extra_bytes and len(pkt) != self.size) or len(
             pkt
         ) < self.size:
             return False
-        exp_pkt = bytearray(bytes(self.exp_pkt))
-        for i in range(self.size):
-            if (exp_pkt[i] & self.mask[i]) != (pkt[i] & self.mask[i]):
+        segments = self._segments
+        if segments is None:
+            segments = self._segments = self._compile()
+        for start, end, run_mask, expected in segments:
+            if run_mask is None:
+                if pkt[start:end] != expected:
+                    return False
+            elif int.from_bytes(pkt[start:end], "big") & run_mask != expected:
                 return False
         return True
 
     def _calculate_fields_offset_and_bitwidth(self, hdr_type, field_name):
-        if hdr_type not in self.exp_pkt:
-            self.valid = False
-            raise MaskException("Unknown header type")
-
         try:
-            fields_desc = [
-                field
-                for field in hdr_type.fields_desc
-                if field.name
-                in list(
-                    self.exp_pkt[hdr_type]
-                    .__class__(bytes(self.exp_pkt[hdr_type]))
-                    .fields.keys()
-                )
-            ]  # build & parse packet to be sure all fields are correctly filled
-        except Exception:  # noqa
-            self.valid = False
-            raise MaskException("Can not build or decode Packet")
-
-        if field_name not in [x.name for x in fields_desc]:
+            return calculate_field_offset_and_bitwidth(
+                self.exp_pkt, hdr_type, field_name
+            )
+        except MaskException:
             self.valid = False
-            raise MaskException("Field %s does not exist in frame" % field_name)
-
-        hdr_offset = self.size - len(self.exp_pkt[hdr_type])
-        offset = 0
-        bitwidth = 0
-        for f in fields_desc:
-            try:
-                bits = f.size
-            except Exception:  # noqa
-                bits = 8 * f.sz
-            if f.name == field_name:
-                bitwidth = bits
-                break
-            else:
-                offset += bits
-        return hdr_offset * 8 + offset, bitwidth
+            raise
 
     def __str__(self):
         old_stdout = sys.stdout
@@ -130,3 +186,41 @@ class Mask:
 
         sys.stdout = old_stdout
         return buffer.getvalue()
+
+
+def calculate_field_offset_and_bitwidth(pkt, hdr_type, field_name):
+    """
+    Returns (offset, bitwidth) in bits of field field_name of the first
+    header of type hdr_type in packet pkt.
+    Raises MaskException if there is no such header or field.
+    """
+    if hdr_type not in pkt:
+        raise MaskException("Unknown header type")
+
+    try:
+        fields_desc = [
+            field
+            for field in hdr_type.fields_desc
+            if field.name
+            in list(pkt[hdr_type].__class__(bytes(pkt[hdr_type])).fields.keys())
+        ]  # build & parse packet to be sure all fields are correctly filled
+    except Exception:  # noqa
+        raise MaskException("Can not build or decode Packet")
+
+    if field_name not in [x.name for x in fields_desc]:
+        raise MaskException("Field %s does not exist in frame" % field_name)
+
+    hdr_offset = len(pkt) - len(pkt[hdr_type])
+    offset = 0
+    bitwidth = 0
+    for f in fields_desc:
+        try:
+            bits = f.size
+        except Exception:  # noqa
+            bits = 8 * f.sz
+        if f.name == field_name:
+            bitwidth = bits
+            break
+        else:
+            offset += bits
+    return hdr_offset * 8 + offset, bitwidth
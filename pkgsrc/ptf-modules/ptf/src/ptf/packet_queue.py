@@ -0,0 +1,154 @@
+"""
+Per-port receive queues for the dataplane
+
+Packets received on each (device, port) are kept in a bounded ring buffer.
+When a ring buffer is full, the oldest packet on that port is discarded to make
+room for the new one. A per-device arrival index records the order in which
+packets were received across all ports, so that finding (and dequeuing) the
+oldest packet on any port of a device does not require scanning every port.
+"""
+
+from collections import deque
+
+
+class PacketQueues(object):
+    """
+    Set of bounded packet queues indexed by (device number, port number).
+
+    Each queued entry is a (sequence number, packet, timestamp) tuple where the
+    sequence number is a global, strictly increasing arrival counter. The
+    arrival index of a device holds (sequence number, port number) pairs in
+    arrival order; entries whose packet has already been dequeued or dropped
+    are discarded lazily the next time the index is consulted.
+
+    This class does no locking, the caller (DataPlane) serializes access.
+    """
+
+    def __init__(self, maxlen):
+        """
+        @param maxlen Maximum number of packets kept per port
+        """
+        self.maxlen = maxlen
+        # dict from (device number, port number) to deque of entries
+        self.queues = {}
+        # dict from device number to deque of (sequence number, port number)
+        self.arrivals = {}
+        self.seq = 0
+        # number of packets currently queued over all ports
+        self.count = 0
+
+    def __contains__(self, port_id):
+        return port_id in self.queues
+
+    def __len__(self):
+        return self.count
+
+    def keys(self):
+        return list(self.queues.keys())
+
+    def qsize(self, device_number, port_number):
+        """
+        Return the number of packets queued on the given port
+        """
+        queue = self.queues.get((device_number, port_number))
+        return len(queue) if queue is not None else 0
+
+    def add_port(self, device_number, port_number):
+        port_id = (device_number, port_number)
+        if port_id not in self.queues:
+            self.queues[port_id] = deque(maxlen=self.maxlen)
+            self.arrivals.setdefault(device_number, deque())
+
+    def remove_port(self, device_number, port_number):
+        queue = self.queues.pop((device_number, port_number), None)
+        if queue is not None:
+            self.count -= len(queue)
+
+    def set_maxlen(self, maxlen):
+        """
+        Change the depth of every queue. If a queue holds more packets than the
+        new depth allows, its oldest packets are discarded.
+        """
+        self.maxlen = maxlen
+        for port_id, queue in list(self.queues.items()):
+            self.count -= len(queue)
+            self.queues[port_id] = deque(queue, maxlen=maxlen)
+            self.count += len(self.queues[port_id])
+
+    def push(self, device_number, port_number, pkt, timestamp):
+        """
+        Enqueue a packet received on the given port.
+        @retval True if the oldest packet of the port was discarded to make room
+        """
+        queue = self.queues[(device_number, port_number)]
+        dropped = len(queue) == queue.maxlen
+        if dropped:
+            # deque with maxlen discards the head on append
+            self.count -= 1
+        self.seq += 1
+        queue.append((self.seq, pkt, timestamp))
+        self.count += 1
+        arrivals = self.arrivals[device_number]
+        arrivals.append((self.seq, port_number))
+        if len(arrivals) > 2 * self.count + 64:
+            self._compact(device_number)
+        return dropped
+
+    def _is_live(self, device_number, seq, port_number):
+        queue = self.queues.get((device_number, port_number))
+        return bool(queue) and queue[0][0] <= seq
+
+    def _compact(self, device_number):
+        """
+        Drop stale entries from the arrival index of a device. This keeps the
+        index bounded when packets are only ever dequeued by port number.
+        """
+        self.arrivals[device_number] = deque(
+            (seq, port_number)
+            for seq, port_number in self.arrivals[device_number]
+            if self._is_live(device_number, seq, port_number)
+        )
+
+    def oldest_port_number(self, device_number):
+        """
+        Returns the port number with the oldest packet on the given device,
+        or None if no packets are queued.
+        """
+        arrivals = self.arrivals.get(device_number)
+        if not arrivals:
+            return None
+        # Per-port sequence numbers are increasing, so the head of the arrival
+        # index is live iff it is not older than the head of its port queue.
+        while arrivals:
+            seq, port_number = arrivals[0]
+            if self._is_live(device_number, seq, port_number):
+                return port_number
+            arrivals.popleft()
+        return None
+
+    def pop(self, device_number, port_number=None):
+        """
+        Dequeue the oldest packet of a port, or of any port of the device if
+        port_number is None.
+        @retval (port number, packet, timestamp) or None if there is no packet
+        """
+        if port_number is None:
+            port_number = self.oldest_port_number(device_number)
+            if port_number is None:
+                return None
+        queue = self.queues.get((device_number, port_number))
+        if not queue:
+            return None
+        _, pkt, timestamp = queue.popleft()
+        self.count -= 1
+        return (port_number, pkt, timestamp)
+
+    def flush(self):
+        """
+        Drop all queued packets.
+        """
+        for queue in self.queues.values():
+            queue.clear()
+        for arrivals in self.arrivals.values():
+            arrivals.clear()
+        self.count = 0
@@ -0,0 +1,278 @@
+"""
+Packet templates for high volume flow generation
+
+A PacketTemplate serializes a packet once and records the bit offsets of a
+few chosen fields. Each variant is then produced by patching only those
+fields in a reusable buffer, IPv4 header and TCP/UDP/ICMP checksums covering
+a patched field are fixed up incrementally (RFC 1624) instead of being
+recomputed over the whole packet:
+
+    tmpl = PacketTemplate(simple_tcp_packet(),
+                          [(packet.IP, "src"), (packet.TCP, "sport")])
+    for i in range(1000000):
+        send_packet(self, port, tmpl.build("10.0.%d.%d" % (i >> 8 & 0xFF, i & 0xFF),
+                                           1024 + i % 60000))
+"""
+
+import socket
+
+from ptf.mask import MaskException, calculate_field_offset_and_bitwidth
+
+
+def _ones_complement_sum(data):
+    # 2 ** 16 == 1 (mod 0xFFFF) so the data read as a big endian integer is
+    # congruent to the sum of its 16-bit words
+    value = int.from_bytes(data, "big")
+    total = value % 0xFFFF
+    if not total and value:
+        return 0xFFFF
+    return total
+
+
+def update_checksum(chksum, old, new):
+    """
+    Update an internet checksum after the bytes old it covers became new,
+    HC' = ~(~HC + ~m + m') from RFC 1624. old and new have the same, even,
+    length.
+    """
+    total = (
+        (chksum ^ 0xFFFF)
+        + (_ones_complement_sum(old) ^ 0xFFFF)
+        + _ones_complement_sum(new)
+    )
+    while total >> 16:
+        total = (total >> 16) + (total & 0xFFFF)
+    return total ^ 0xFFFF
+
+
+class _Checksum(object):
+    """
+    A 16-bit checksum at byte offset 'offset' of the packet, computed over the
+    byte ranges 'ranges'. Each range is summed as if it started on a 16-bit
+    word boundary (true of all pseudo-header and header ranges).
+    """
+
+    def __init__(self, offset, ranges, zero_means_none=False):
+        self.offset = offset
+        self.ranges = ranges
+        # UDP: a zero checksum means no checksum, and a computed 0 is sent as
+        # 0xFFFF
+        self.zero_means_none = zero_means_none
+
+    def covers(self, start, end):
+        return any(start < r_end and r_start < end for r_start, r_end in self.ranges)
+
+
+def _ip_payload_end(buf, ip_offset, version):
+    if version == 4:
+        end = ip_offset + int.from_bytes(buf[ip_offset + 2 : ip_offset + 4], "big")
+    else:
+        end = ip_offset + 40 + int.from_bytes(buf[ip_offset + 4 : ip_offset + 6], "big")
+    return min(end, len(buf))
+
+
+def _is_icmpv6(layer):
+    return layer.__class__.__name__.startswith("ICMPv6")
+
+
+def _has_unsupported_checksum(layer):
+    """
+    True for the layers other than ICMPv6 whose checksum is not updated
+    """
+    if layer.name == "GRE":
+        return bool(layer.chksum_present)
+    return layer.name in ("IGMP", "IGMPv3", "SCTP")
+
+
+def _find_checksums(pkt, buf):
+    """
+    Walks the layers of pkt and returns (checksums, protected, unsupported)
+    where checksums is the list of _Checksum of the packet, protected is a
+    list of byte ranges which cannot be patched: the checksums themselves and
+    the IP fields the TCP/UDP pseudo-header derives from (protocol and
+    length), and unsupported is a list of (layer name, byte ranges) of the
+    checksums which cannot be updated.
+    """
+    checksums = []
+    protected = []
+    unsupported = []
+    size = len(buf)
+    ip = None
+    index = 0
+    layer = pkt.getlayer(0)
+    while layer is not None and hasattr(layer, "name"):
+        offset = size - len(layer)
+        name = layer.name
+        if name == "IP":
+            ihl = (buf[offset] & 0x0F) * 4
+            checksums.append(_Checksum(offset + 10, [(offset, offset + ihl)]))
+            protected.append((offset + 10, offset + 12))
+            ip = (4, offset)
+        elif name == "IPv6":
+            ip = (6, offset)
+        elif ip is not None and (
+            name in ("TCP", "UDP") or (name == "ICMP" and ip[0] == 4)
+        ):
+            version, ip_offset = ip
+            end = _ip_payload_end(buf, ip_offset, version)
+            chksum_offset = offset + {"TCP": 16, "UDP": 6, "ICMP": 2}[name]
+            if name == "ICMP":
+                # ICMP (over IPv4 only) has no pseudo-header
+                ranges = [(offset, end)]
+            elif version == 4:
+                ranges = [(ip_offset + 12, ip_offset + 20), (offset, end)]
+                protected.append((ip_offset + 2, ip_offset + 4))
+                protected.append((ip_offset + 9, ip_offset + 10))
+            else:
+                ranges = [(ip_offset + 8, ip_offset + 40), (offset, end)]
+                protected.append((ip_offset + 4, ip_offset + 7))
+            checksums.append(
+                _Checksum(chksum_offset, ranges, zero_means_none=name == "UDP")
+            )
+            protected.append((chksum_offset, chksum_offset + 2))
+            ip = None
+        elif _is_icmpv6(layer) or _has_unsupported_checksum(layer):
+            if ip is None:
+                ranges = [(offset, size)]
+            else:
+                version, ip_offset = ip
+                ranges = [(offset, _ip_payload_end(buf, ip_offset, version))]
+                if version == 6 and _is_icmpv6(layer):
+                    # pseudo-header: payload length, next header, addresses
+                    ranges.append((ip_offset + 4, ip_offset + 7))
+                    ranges.append((ip_offset + 8, ip_offset + 40))
+            unsupported.append((layer.__class__.__name__, ranges))
+        index += 1
+        layer = pkt.getlayer(index)
+    return checksums, protected, unsupported
+
+
+def _to_int(value, bitwidth):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return int.from_bytes(value, "big")
+    if bitwidth == 48 and ":" in value:
+        return int(value.replace(":", "").replace("-", ""), 16)
+    if bitwidth == 32:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, value), "big")
+    if bitwidth == 128:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET6, value), "big")
+    raise ValueError("Cannot convert %r to a %d-bit field value" % (value, bitwidth))
+
+
+class PacketTemplate(object):
+    """
+    Serializes pkt once and produces variants of it where only the given
+    fields change.
+
+    @param pkt Packet object (any packet manipulation module supported by
+    Mask.set_do_not_care_packet)
+    @param fields List of (header type, field name) to patch, e.g.
+    [(packet.IP, "src"), (packet.TCP, "sport")]
+
+    Raises ValueError if a field is a checksum, is covered by a
+    pseudo-header, or is covered by a checksum which cannot be updated
+    (ICMPv6, GRE with the checksum present, IGMP, SCTP).
+    """
+
+    def __init__(self, pkt, fields):
+        self.buffer = bytearray(bytes(pkt))
+        self.fields = []
+        checksums, protected, unsupported = _find_checksums(pkt, self.buffer)
+        for hdr_type, field_name in fields:
+            try:
+                offset, bitwidth = calculate_field_offset_and_bitwidth(
+                    pkt, hdr_type, field_name
+                )
+            except MaskException as e:
+                raise ValueError("%s.%s: %s" % (hdr_type.__name__, field_name, e))
+            start, end = offset // 8, (offset + bitwidth + 7) // 8
+            if any(start < p_end and p_start < end for p_start, p_end in protected):
+                raise ValueError(
+                    "%s.%s is a checksum or is covered by a pseudo-header "
+                    "and cannot be patched" % (hdr_type.__name__, field_name)
+                )
+            for layer_name, ranges in unsupported:
+                if any(start < r_end and r_start < end for r_start, r_end in ranges):
+                    raise ValueError(
+                        "%s.%s is covered by the %s checksum, which cannot be "
+                        "updated" % (hdr_type.__name__, field_name, layer_name)
+                    )
+            self.fields.append(
+                (
+                    start,
+                    end,
+                    end * 8 - offset - bitwidth,
+                    (1 << bitwidth) - 1,
+                    bitwidth,
+                    [c for c in checksums if c.covers(start, end)],
+                )
+            )
+        self.checksums = checksums
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def build(self, *values):
+        """
+        Patch the template with one value per field, in the order the fields
+        were given. Values are ints, bytes, or MAC / IPv4 / IPv6 address
+        strings for 48, 32 and 128-bit fields.
+        @retval The template buffer (a bytearray reused by the next call)
+        """
+        if len(values) != len(self.fields):
+            raise ValueError(
+                "expected %d values, got %d" % (len(self.fields), len(values))
+            )
+        buf = self.buffer
+        for (start, end, shift, mask, bitwidth, checksums), value in zip(
+            self.fields, values
+        ):
+            value = _to_int(value, bitwidth)
+            if value < 0 or value > mask:
+                raise ValueError("value %r does not fit in %d bits" % (value, bitwidth))
+            old = bytes(buf[start:end])
+            current = int.from_bytes(old, "big")
+            new = (current & ~(mask << shift)) | (value << shift)
+            if new == current:
+                continue
+            buf[start:end] = new.to_bytes(end - start, "big")
+            for checksum in checksums:
+                self._update_checksum(checksum, start, end, old)
+        return buf
+
+    def _update_checksum(self, checksum, start, end, old):
+        """
+        Fix checksum after bytes [start, end) of the buffer changed from old
+        """
+        buf = self.buffer
+        chksum = int.from_bytes(buf[checksum.offset : checksum.offset + 2], "big")
+        if checksum.zero_means_none and chksum == 0:
+            return
+        for r_start, r_end in checksum.ranges:
+            if not (start < r_end and r_start < end):
+                continue
+            # widen the change to the enclosing 16-bit words of the range
+            w_start = r_start + ((max(start, r_start) - r_start) & ~1)
+            w_end = r_start + ((min(end, r_end) - r_start + 1) & ~1)
+            new_words = bytearray(buf[w_start : min(w_end, r_end)])
+            old_words = bytearray(new_words)
+            lo, hi = max(start, w_start), min(end, w_end, r_end)
+            old_words[lo - w_start : hi - w_start] = old[lo - start : hi - start]
+            if len(new_words) % 2:
+                new_words.append(0)
+                old_words.append(0)
+            chksum = update_checksum(chksum, old_words, new_words)
+        if checksum.zero_means_none and chksum == 0:
+            chksum = 0xFFFF
+        old_chksum = bytes(buf[checksum.offset : checksum.offset + 2])
+        buf[checksum.offset : checksum.offset + 2] = chksum.to_bytes(2, "big")
+        # the checksum itself may be covered by an outer checksum (tunnels)
+        for outer in self.checksums:
+            if outer is not checksum and outer.covers(
+                checksum.offset, checksum.offset + 2
+            ):
+                self._update_checksum(
+                    outer, checksum.offset, checksum.offset + 2, old_chksum
+                )
@@ -3314,18 +3314,88 @@ def verify_packets(test, pkt, ports=[], device_number=0, timeout=None, n_timeout
     Note: +ve timeout here means timeout in which we are expecting pkt to arrive in
     -ve timeout here means timeout for which we will wait for to check for unexpected pkts
     """
-    if not timeout:
-        timeout = ptf.ptfutils.default_timeout
-    if not n_timeout:
-        n_timeout = ptf.ptfutils.default_negative_timeout
+    expected = []
+    unexpected = []
     for device, port in ptf_ports():
         if device != device_number:
             continue
         if port in ports:
-            verify_packet(test, pkt, (device, port), timeout=timeout)
+            expected.append((port, pkt))
         else:
-            verify_no_packet(test, pkt, (device, port), timeout=n_timeout)
-    verify_no_other_packets(test, device_number=device_number, timeout=n_timeout)
+            unexpected.append((port, pkt))
+    verify_packets_on_ports(
+        test,
+        expected,
+        unexpected,
+        device_number=device_number,
+        timeout=timeout,
+        n_timeout=n_timeout,
+    )
+
+
+def verify_packets_on_ports(
+    test, expected=[], unexpected=[], device_number=0, timeout=None, n_timeout=None
+):
+    """
+    a.) Check that each (port, packet) pair of expected is received for a given
+    device (default device number is 0). Several packets expected on the same
+    port must be received in list order.
+
+    b.) Also verifies that no (port, packet) pair of unexpected is received, a
+    None packet meaning any packet, and that no other packets are received on
+    the device (unless --relax is in effect).
+
+    All the ports are checked at once: (a) waits at most timeout and (b) waits
+    for a single n_timeout window, whatever the number of ports. Every
+    violation is reported in one failure.
+
+    Timeout for this function is used as +ve timeout for (a) and n_timeout is used for
+    -ve timeout for (b)
+    Note: +ve timeout here means timeout in which we are expecting pkt to arrive in
+    -ve timeout here means timeout for which we will wait for to check for unexpected pkts
+    """
+    if not timeout:
+        timeout = ptf.ptfutils.default_timeout
+    if not n_timeout:
+        n_timeout = ptf.ptfutils.default_negative_timeout
+    logging.debug(
+        "Checking for pkts on device %d, ports %r, not on ports %r",
+        device_number,
+        [port for port, _ in expected],
+        [port for port, _ in unexpected],
+    )
+    result = test.dataplane.poll_ports(
+        device_number=device_number,
+        expected=expected,
+        unexpected=unexpected,
+        timeout=timeout,
+        negative_timeout=n_timeout,
+        check_other=not ptf.config["relax"],
+        filters=FILTERS,
+    )
+    for success in result.received + result.unexpected + result.other:
+        test.at_receive(
+            success.packet, device_number=success.device, port_number=success.port
+        )
+
+    errors = []
+    for port, failure in result.missing:
+        errors.append(
+            "Expected packet was not received on device %d, port %r.\n%s"
+            % (device_number, port, failure.format())
+        )
+    for success in result.unexpected:
+        errors.append(
+            "Received packet that we expected not to receive on device %d, "
+            "port %r.\n%s" % (device_number, success.port, success.format())
+        )
+    for success in result.other:
+        errors.append(
+            "A packet was received on device %d, port %r, but we expected no "
+            "packets.\n%s" % (device_number, success.port, success.format())
+        )
+    if errors:
+        test.fail("\n".join(errors))
 
 
 def verify_no_packet_any(test, pkt, ports=[], device_number=0, timeout=None):
@@ -3521,30 +3591,16 @@ def verify_each_packet_on_each_port(
     Note: +ve timeout here means timeout in which we are expecting pkt to arrive in
     -ve timeout here means timeout for which we will wait for to check for unexpected pkts
     """
-    pkt_cnt = 0
     test.assertTrue(
         len(pkts) == len(ports), "packet list count does not match port list count"
     )
-    if not timeout:
-        timeout = ptf.ptfutils.default_timeout
-    if not n_timeout:
-        n_timeout = ptf.ptfutils.default_negative_timeout
-    for port, pkt in zip(ports, pkts):
-        logging.debug("Checking for pkt on device %d, port %d", device_number, port)
-        result = dp_poll(
-            test,
-            device_number=device_number,
-            port_number=port,
-            timeout=timeout,
-            exp_pkt=pkt,
-        )
-        if isinstance(result, test.dataplane.PollFailure):
-            test.fail(
-                "Did not receive expected packets on port %d for device %d.\n%s"
-                % (port, device_number, result.format())
-            )
-
-    verify_no_other_packets(test, device_number=device_number, timeout=n_timeout)
+    verify_packets_on_ports(
+        test,
+        list(zip(ports, pkts)),
+        device_number=device_number,
+        timeout=timeout,
+        n_timeout=n_timeout,
+    )
 
 
 def verify_each_packet_on_multiple_port_lists(
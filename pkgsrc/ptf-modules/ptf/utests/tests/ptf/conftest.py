@@ -1,9 +1,14 @@
+import socket
+import time
+
 import pytest
 from scapy.layers.inet import IP, UDP, TCP
 from scapy.layers.l2 import Ether
 from scapy.layers.vxlan import VXLAN
 from scapy.packet import Packet
 
+from ptf.dataplane import DataPlane
+
 
 @pytest.fixture
 def scapy_simple_tcp_packet():  # type: () -> Packet
@@ -34,3 +39,46 @@ def scapy_simple_vxlan_packet():  # type: () -> Packet
         / IP(src="192.168.0.1", dst="192.168.0.2")
         / TCP(sport=1234, dport=80)
     )
+
+
+class MockPort:
+    """
+    Dataplane port backed by a datagram socket pair. Packets written to the
+    peer socket with inject() are received by the dataplane.
+    """
+
+    def __init__(self, interface_name, device_number, port_number, config={}):
+        self.interface_name = interface_name
+        self.device_number = device_number
+        self.port_number = port_number
+        self.socket, self.peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.sent = []
+
+    def __del__(self):
+        self.socket.close()
+        self.peer.close()
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def recv(self):
+        pkt = self.socket.recv(4096)
+        return (self.device_number, self.port_number, pkt, time.time())
+
+    def get_packet_source(self):
+        return self
+
+    def inject(self, pkt):
+        self.peer.send(pkt)
+
+    def send(self, pkt):
+        self.sent.append(pkt)
+        return len(pkt)
+
+
+@pytest.fixture
+def dataplane():
+    dp = DataPlane(config={"platform": "mock", "dataplane": {"portclass": MockPort}})
+    yield dp
+    dp.kill()
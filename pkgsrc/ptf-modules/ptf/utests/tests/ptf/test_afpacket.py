@@ -0,0 +1,116 @@
+import contextlib
+import ctypes
+import os
+import select
+import socket
+import struct
+import subprocess
+import time
+
+import pytest
+
+from ptf import afpacket
+from ptf.dataplane import DataPlanePortLinux
+
+CLONE_NEWNET = 0x40000000
+
+
+def _ip(*args):
+    return subprocess.run(
+        ["ip"] + list(args), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    ).returncode
+
+
+@contextlib.contextmanager
+def _in_netns(name):
+    """
+    Run the body in the network namespace name. Sockets created there stay in
+    it. Only the calling thread changes namespace.
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+    with open("/proc/thread-self/ns/net") as orig, open("/run/netns/" + name) as ns:
+        if libc.setns(ns.fileno(), CLONE_NEWNET) != 0:
+            raise OSError(ctypes.get_errno(), "setns failed")
+        try:
+            yield
+        finally:
+            libc.setns(orig.fileno(), CLONE_NEWNET)
+
+
+@pytest.fixture
+def veth_pair():
+    """
+    A veth pair in a network namespace of its own, so that the host's
+    interfaces are not touched. Yields the namespace and the two interface
+    names.
+    """
+    if os.geteuid() != 0:
+        pytest.skip("creating network namespaces requires root")
+    netns = "ptfut%d" % os.getpid()
+    if _ip("netns", "add", netns) != 0:
+        pytest.skip("cannot create a network namespace")
+    try:
+        veth = ["link", "add", "ptftx", "type", "veth", "peer", "name", "ptfrx"]
+        if _ip("-n", netns, *veth) != 0:
+            pytest.skip("cannot create veth interfaces")
+        for name in ("ptftx", "ptfrx"):
+            _ip("-n", netns, "link", "set", "dev", name, "up")
+        yield netns, "ptftx", "ptfrx"
+    finally:
+        _ip("netns", "del", netns)
+
+
+def _frames(count):
+    frames = []
+    for i in range(count):
+        payload = struct.pack("!I", i) * 16
+        frames.append(
+            b"\x00\x01\x02\x03\x04\x05\x00\x06\x07\x08\x09\x0a\x88\xb5" + payload
+        )
+    # VLAN tagged frame
+    frames.append(
+        b"\x00\x01\x02\x03\x04\x05\x00\x06\x07\x08\x09\x0a"
+        b"\x81\x00\x00\x0a\x88\xb5" + b"\xaa" * 64
+    )
+    return frames
+
+
+def _receive(port, count, timeout=5):
+    received = []
+    end = time.time() + timeout
+    while len(received) < count and time.time() < end:
+        readable, _, _ = select.select([port], [], [], 0.1)
+        if readable:
+            received.extend(t for t in port.recv_batch() if t is not None)
+    return received
+
+
+@pytest.mark.parametrize("rx_mode", DataPlanePortLinux.RX_MODES)
+def test_afpacket__rx_modes_receive_identical_frames(veth_pair, rx_mode):
+    netns, tx_name, rx_name = veth_pair
+    with _in_netns(netns):
+        port = DataPlanePortLinux(rx_name, 0, 1, {"socket_rx_mode": [rx_mode]})
+        tx = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, 0)
+        tx.bind((tx_name, 0))
+    try:
+        frames = _frames(200)
+        for frame in frames:
+            tx.send(frame)
+        received = _receive(port, len(frames))
+        # Ignore frames the kernel may emit on the new interface (IPv6 ND...)
+        received = [t[2] for t in received if t[2][12:14] in (b"\x88\xb5", b"\x81\x00")]
+        assert received == frames
+        assert port.rx_mode == rx_mode
+    finally:
+        tx.close()
+        del port
+
+
+def test_afpacket__rx_mode_per_interface():
+    config = {"socket_rx_mode": ["veth3=ring", "recvmmsg", "veth5=recvmsg"]}
+    assert DataPlanePortLinux.get_rx_mode("veth3", config) == "ring"
+    assert DataPlanePortLinux.get_rx_mode("veth5", config) == "recvmsg"
+    assert DataPlanePortLinux.get_rx_mode("veth7", config) == "recvmmsg"
+    assert DataPlanePortLinux.get_rx_mode("veth7", {}) == "recvmsg"
+    with pytest.raises(ValueError):
+        DataPlanePortLinux.get_rx_mode("veth7", {"socket_rx_mode": ["mmap"]})
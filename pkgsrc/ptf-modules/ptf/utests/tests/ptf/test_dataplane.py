@@ -0,0 +1,82 @@
+import selectors
+import time
+
+import pytest
+
+from ptf.dataplane import DataPlane
+
+from .conftest import MockPort
+
+
+def _add_ports(dp, count, device_number=0):
+    for port_number in range(count):
+        dp.port_add("mock%d" % port_number, device_number, port_number)
+
+
+class TestDataPlane:
+    @pytest.mark.parametrize("num_ports", [8, 64, 512])
+    def test_dataplane__poll_receives_from_every_port(self, dataplane, num_ports):
+        _add_ports(dataplane, num_ports)
+        for port_number in range(num_ports):
+            dataplane.ports[(0, port_number)].inject(b"pkt%d" % port_number)
+
+        for port_number in reversed(range(num_ports)):
+            result = dataplane.poll(
+                port_number=port_number, exp_pkt=b"pkt%d" % port_number, timeout=2
+            )
+            assert result.port == port_number
+        assert dataplane.poll(timeout=0.05).port is None
+
+    def test_dataplane__poll_any_port_in_arrival_order(self, dataplane):
+        _add_ports(dataplane, 4)
+        for port_number in (3, 1, 2, 0):
+            dataplane.ports[(0, port_number)].inject(b"pkt%d" % port_number)
+            # Let the receive thread pick up each packet on its own
+            time.sleep(0.01)
+
+        received = [dataplane.poll(timeout=1).port for _ in range(4)]
+        assert received == [3, 1, 2, 0]
+
+    def test_dataplane__poll_wakes_up_on_packet(self, dataplane):
+        _add_ports(dataplane, 2)
+        start = time.time()
+        dataplane.ports[(0, 1)].inject(b"late")
+        result = dataplane.poll(port_number=1, exp_pkt=b"late", timeout=5)
+        assert result.packet == b"late"
+        assert time.time() - start < 1
+
+    def test_dataplane__port_remove_and_add(self, dataplane):
+        _add_ports(dataplane, 2)
+        assert dataplane.port_remove(0, 1)
+        assert not dataplane.port_remove(0, 1)
+        dataplane.port_add("mock1", 0, 1)
+        dataplane.ports[(0, 1)].inject(b"again")
+        assert dataplane.poll(port_number=1, exp_pkt=b"again", timeout=2).port == 1
+
+    def test_dataplane__notify_only_matching_waiters(self, dataplane):
+        notified = []
+        with dataplane.cvar:
+            for port_number in (1, 2, None):
+                condition = dataplane.add_waiter(0, port_number)
+                condition.notify = lambda key=port_number: notified.append(key)
+            dataplane.cvar.notify_all = lambda: notified.append("all")
+            dataplane.notify_waiters({(0, 1)})
+        assert sorted(notified, key=str) == [1, None]
+
+    def test_dataplane__port_add_wakes_up_select_selector(self, monkeypatch):
+        # SelectSelector only watches the sockets registered when select()
+        # was called, the receive loop has to start over for a new port
+        monkeypatch.setattr(selectors, "DefaultSelector", selectors.SelectSelector)
+        dp = DataPlane(
+            config={"platform": "mock", "dataplane": {"portclass": MockPort}}
+        )
+        try:
+            # Let the receive thread block in select
+            time.sleep(0.1)
+            _add_ports(dp, 1)
+            start = time.time()
+            dp.ports[(0, 0)].inject(b"new")
+            assert dp.poll(port_number=0, exp_pkt=b"new", timeout=2).port == 0
+            assert time.time() - start < 0.5
+        finally:
+            dp.kill()
@@ -1,3 +1,5 @@
+import random
+
 import pytest
 from scapy.layers.inet import IP, TCP, UDP
 from scapy.layers.vxlan import VXLAN
@@ -128,6 +130,101 @@ class TestMask:
         masked_packet.set_do_not_care_packet(IP, "chksum")
         assert str(masked_packet) == EXPECTED_MASKED_PACKET
 
+    def test_mask__bit_ranges_match_bitwise_reference(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            size = rng.randint(1, 40)
+            mask = Mask(bytes(size), dont_care_all=rng.random() < 0.5)
+            reference = list(mask.mask)
+            for _ in range(5):
+                offset = rng.randint(0, size * 8 - 1)
+                bitwidth = rng.randint(0, size * 8 - offset)
+                care = rng.random() < 0.5
+                for idx in range(offset, offset + bitwidth):
+                    bit = 1 << (7 - idx % 8)
+                    if care:
+                        reference[idx // 8] |= bit
+                    else:
+                        reference[idx // 8] &= ~bit
+                if care:
+                    mask.set_care(offset, bitwidth)
+                else:
+                    mask.set_do_not_care(offset, bitwidth)
+                assert mask.mask == reference
+
+    def test_mask__pkt_match_matches_bytewise_reference(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            size = rng.randint(1, 64)
+            expected = bytes(rng.getrandbits(8) for _ in range(size))
+            mask = Mask(expected, ignore_extra_bytes=rng.random() < 0.5)
+            for _ in range(rng.randint(0, 3)):
+                offset = rng.randint(0, size * 8 - 1)
+                mask.set_do_not_care(offset, rng.randint(0, size * 8 - offset))
+            received = bytearray(expected + bytes(rng.randint(0, 2)))
+            for _ in range(rng.randint(0, 2)):
+                received[rng.randrange(len(received))] ^= 1 << rng.randrange(8)
+            received = bytes(received)
+            reference = (mask.ignore_extra_bytes or len(received) == size) and all(
+                expected[i] & mask.mask[i] == received[i] & mask.mask[i]
+                for i in range(size)
+            )
+            assert mask.pkt_match(received) == reference
+
+    def test_mask__pkt_match_after_mask_update(self, scapy_simple_vxlan_packet):
+        masked_packet = Mask(scapy_simple_vxlan_packet)
+        modified_packet = scapy_simple_vxlan_packet.copy()
+        modified_packet[VXLAN].vni = 42
+        assert masked_packet.pkt_match(scapy_simple_vxlan_packet)
+        assert not masked_packet.pkt_match(modified_packet)
+        masked_packet.set_do_not_care_packet(VXLAN, "vni")
+        masked_packet.set_do_not_care_packet(UDP, "chksum")
+        assert masked_packet.pkt_match(modified_packet)
+        masked_packet.set_care_all()
+        assert not masked_packet.pkt_match(modified_packet)
+
+    def test_mask__pkt_match_compiles_once(self, scapy_simple_tcp_packet, monkeypatch):
+        masked_packet = Mask(scapy_simple_tcp_packet)
+        compiled = []
+        compile_ = masked_packet._compile
+        monkeypatch.setattr(
+            masked_packet, "_compile", lambda: compiled.append(1) or compile_()
+        )
+        for _ in range(3):
+            assert masked_packet.pkt_match(scapy_simple_tcp_packet)
+        assert len(compiled) == 1
+        masked_packet.set_do_not_care_packet(IP, "ttl")
+        masked_packet.set_do_not_care_packet(IP, "chksum")
+        for _ in range(3):
+            assert masked_packet.pkt_match(scapy_simple_tcp_packet)
+        assert len(compiled) == 2
+
+    def test_mask__pkt_match_after_in_place_changes(self, scapy_simple_tcp_packet):
+        masked_packet = Mask(scapy_simple_tcp_packet.copy())
+        assert masked_packet.pkt_match(scapy_simple_tcp_packet)
+
+        # changing the wrapped packet in place needs a recompile
+        masked_packet.exp_pkt[IP].ttl = 5
+        assert masked_packet.pkt_match(scapy_simple_tcp_packet)
+        masked_packet.recompile()
+        assert not masked_packet.pkt_match(scapy_simple_tcp_packet)
+        modified_packet = scapy_simple_tcp_packet.copy()
+        modified_packet[IP].ttl = 5
+        assert masked_packet.pkt_match(modified_packet)
+
+        # and so does a change of the mask list itself
+        offset = len(modified_packet) - len(modified_packet[IP]) + 8
+        masked_packet.mask[offset] = 0
+        masked_packet.mask[offset + 2 : offset + 4] = [0, 0]
+        masked_packet.recompile()
+        assert masked_packet.pkt_match(scapy_simple_tcp_packet)
+
+        # assigning a new packet recompiles by itself
+        masked_packet.exp_pkt = modified_packet
+        masked_packet.set_care_all()
+        assert not masked_packet.pkt_match(scapy_simple_tcp_packet)
+        assert masked_packet.pkt_match(modified_packet)
+
 
 EXPECTED_MASKED_PACKET = """
 packet status: OK
@@ -0,0 +1,100 @@
+from ptf.packet_queue import PacketQueues
+
+
+class TestPacketQueues:
+    def test_packet_queues__pop_oldest_on_any_port(self):
+        queues = PacketQueues(10)
+        for port in range(4):
+            queues.add_port(0, port)
+        queues.push(0, 2, b"a", 1.0)
+        queues.push(0, 0, b"b", 2.0)
+        queues.push(0, 2, b"c", 3.0)
+        queues.push(0, 1, b"d", 4.0)
+
+        assert queues.oldest_port_number(0) == 2
+        assert queues.pop(0) == (2, b"a", 1.0)
+        assert queues.pop(0) == (0, b"b", 2.0)
+        assert queues.pop(0) == (2, b"c", 3.0)
+        assert queues.pop(0) == (1, b"d", 4.0)
+        assert queues.pop(0) is None
+        assert queues.oldest_port_number(0) is None
+        assert len(queues) == 0
+
+    def test_packet_queues__pop_by_port_keeps_arrival_order(self):
+        queues = PacketQueues(10)
+        queues.add_port(0, 1)
+        queues.add_port(0, 2)
+        queues.push(0, 1, b"a", 1.0)
+        queues.push(0, 2, b"b", 2.0)
+        queues.push(0, 1, b"c", 3.0)
+
+        assert queues.pop(0, 1) == (1, b"a", 1.0)
+        assert queues.pop(0, 1) == (1, b"c", 3.0)
+        assert queues.pop(0, 1) is None
+        assert queues.pop(0) == (2, b"b", 2.0)
+
+    def test_packet_queues__devices_are_independent(self):
+        queues = PacketQueues(10)
+        queues.add_port(0, 1)
+        queues.add_port(1, 1)
+        queues.push(1, 1, b"a", 1.0)
+        queues.push(0, 1, b"b", 2.0)
+
+        assert queues.pop(0) == (1, b"b", 2.0)
+        assert queues.pop(0) is None
+        assert queues.pop(1) == (1, b"a", 1.0)
+
+    def test_packet_queues__overflow_discards_oldest(self):
+        queues = PacketQueues(2)
+        queues.add_port(0, 1)
+        queues.add_port(0, 2)
+        queues.push(0, 1, b"a", 1.0)
+        queues.push(0, 2, b"b", 2.0)
+        assert not queues.push(0, 1, b"c", 3.0)
+        assert queues.push(0, 1, b"d", 4.0)
+
+        assert queues.qsize(0, 1) == 2
+        assert len(queues) == 3
+        assert queues.pop(0) == (2, b"b", 2.0)
+        assert queues.pop(0) == (1, b"c", 3.0)
+        assert queues.pop(0) == (1, b"d", 4.0)
+
+    def test_packet_queues__set_maxlen_truncates(self):
+        queues = PacketQueues(4)
+        queues.add_port(0, 1)
+        for i in range(4):
+            queues.push(0, 1, bytes([i]), float(i))
+        queues.set_maxlen(2)
+
+        assert queues.qsize(0, 1) == 2
+        assert queues.pop(0) == (1, b"\x02", 2.0)
+        queues.push(0, 1, b"\x04", 4.0)
+        queues.push(0, 1, b"\x05", 5.0)
+        assert queues.pop(0) == (1, b"\x04", 4.0)
+
+    def test_packet_queues__flush_and_remove_port(self):
+        queues = PacketQueues(4)
+        queues.add_port(0, 1)
+        queues.add_port(0, 2)
+        queues.push(0, 1, b"a", 1.0)
+        queues.push(0, 2, b"b", 2.0)
+        queues.remove_port(0, 1)
+        assert len(queues) == 1
+        assert queues.pop(0) == (2, b"b", 2.0)
+
+        queues.add_port(0, 1)
+        queues.push(0, 1, b"c", 3.0)
+        queues.flush()
+        assert len(queues) == 0
+        assert queues.pop(0) is None
+
+    def test_packet_queues__arrival_index_stays_bounded(self):
+        queues = PacketQueues(8)
+        queues.add_port(0, 1)
+        queues.add_port(0, 2)
+        for i in range(10000):
+            queues.push(0, 1, b"x", float(i))
+            assert queues.pop(0, 1) is not None
+        assert len(queues.arrivals[0]) <= 2 * len(queues) + 64
+        queues.push(0, 2, b"y", 10000.0)
+        assert queues.pop(0) == (2, b"y", 10000.0)
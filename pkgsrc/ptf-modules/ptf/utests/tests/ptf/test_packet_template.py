@@ -0,0 +1,167 @@
+import random
+
+import pytest
+from scapy.layers.inet import ICMP, IP, TCP, UDP
+from scapy.layers.inet6 import ICMPv6EchoRequest, IPv6
+from scapy.layers.l2 import GRE, Dot1Q, Ether
+
+from ptf.packet_template import PacketTemplate
+from ptf.testutils import (
+    simple_gre_packet,
+    simple_icmp_packet,
+    simple_icmpv6_packet,
+    simple_tcp_packet,
+    simple_tcpv6_packet,
+    simple_udp_packet,
+    simple_vxlan_packet,
+)
+
+
+def _ip(rand):
+    return "%d.%d.%d.%d" % tuple(rand.randrange(256) for _ in range(4))
+
+
+def _ipv6(rand):
+    return ":".join("%x" % rand.randrange(0x10000) for _ in range(8))
+
+
+class TestPacketTemplate:
+    def test_packet_template__tcp_5_tuple(self):
+        rand = random.Random(0)
+        template = PacketTemplate(
+            simple_tcp_packet(),
+            [
+                (IP, "src"),
+                (IP, "dst"),
+                (TCP, "sport"),
+                (TCP, "dport"),
+                (IP, "ttl"),
+                (IP, "tos"),
+            ],
+        )
+        for _ in range(300):
+            values = (
+                _ip(rand),
+                _ip(rand),
+                rand.randrange(0x10000),
+                rand.randrange(0x10000),
+                rand.randrange(256),
+                rand.randrange(256),
+            )
+            expected = simple_tcp_packet(
+                ip_src=values[0],
+                ip_dst=values[1],
+                tcp_sport=values[2],
+                tcp_dport=values[3],
+                ip_ttl=values[4],
+                ip_tos=values[5],
+            )
+            assert bytes(template.build(*values)) == bytes(expected)
+
+    def test_packet_template__udp_and_mac(self):
+        rand = random.Random(1)
+        template = PacketTemplate(
+            simple_udp_packet(dl_vlan_enable=True, vlan_vid=10),
+            [(Ether, "src"), (Dot1Q, "vlan"), (IP, "src"), (UDP, "sport")],
+        )
+        for _ in range(300):
+            mac = ":".join("%02x" % rand.randrange(256) for _ in range(6))
+            values = (mac, rand.randrange(4096), _ip(rand), rand.randrange(0x10000))
+            expected = simple_udp_packet(
+                eth_src=values[0],
+                dl_vlan_enable=True,
+                vlan_vid=values[1],
+                ip_src=values[2],
+                udp_sport=values[3],
+            )
+            assert bytes(template.build(*values)) == bytes(expected)
+
+    def test_packet_template__ipv6(self):
+        rand = random.Random(2)
+        template = PacketTemplate(
+            simple_tcpv6_packet(),
+            [(IPv6, "src"), (IPv6, "dst"), (IPv6, "fl"), (TCP, "sport")],
+        )
+        for _ in range(300):
+            values = (
+                _ipv6(rand),
+                _ipv6(rand),
+                rand.randrange(1 << 20),
+                rand.randrange(0x10000),
+            )
+            expected = simple_tcpv6_packet(
+                ipv6_src=values[0],
+                ipv6_dst=values[1],
+                ipv6_fl=values[2],
+                tcp_sport=values[3],
+            )
+            assert bytes(template.build(*values)) == bytes(expected)
+
+    def test_packet_template__icmp(self):
+        template = PacketTemplate(simple_icmp_packet(), [(ICMP, "type"), (IP, "dst")])
+        # from type 13 (timestamp) on, scapy lays the ICMP header out differently
+        for icmp_type in range(13):
+            expected = simple_icmp_packet(icmp_type=icmp_type, ip_dst="10.1.2.3")
+            assert bytes(template.build(icmp_type, "10.1.2.3")) == bytes(expected)
+
+    def test_packet_template__inner_fields_fix_outer_checksums(self):
+        rand = random.Random(3)
+        inner = simple_tcp_packet()
+        outer = simple_vxlan_packet(inner_frame=inner)
+        outer[UDP].chksum = None
+        template = PacketTemplate(outer, [(TCP, "sport"), (TCP, "dport")])
+        for _ in range(100):
+            sport, dport = rand.randrange(0x10000), rand.randrange(0x10000)
+            expected = outer.copy()
+            expected[TCP].sport = sport
+            expected[TCP].dport = dport
+            expected[TCP].chksum = None
+            expected = Ether(bytes(expected))
+            expected[UDP].chksum = None
+            assert bytes(template.build(sport, dport)) == bytes(expected)
+
+    def test_packet_template__errors(self):
+        template = PacketTemplate(simple_tcp_packet(), [(TCP, "sport")])
+        with pytest.raises(ValueError):
+            template.build(0x10000)
+        with pytest.raises(ValueError):
+            template.build(1, 2)
+        with pytest.raises(ValueError):
+            PacketTemplate(simple_tcp_packet(), [(TCP, "chksum")])
+        with pytest.raises(ValueError):
+            PacketTemplate(simple_tcp_packet(), [(IP, "proto")])
+        with pytest.raises(ValueError):
+            PacketTemplate(simple_tcp_packet(), [(UDP, "sport")])
+
+    @pytest.mark.parametrize(
+        "field",
+        [(IPv6, "src"), (IPv6, "dst"), (IPv6, "plen"), (ICMPv6EchoRequest, "id")],
+    )
+    def test_packet_template__icmpv6_checksum_is_not_updated(self, field):
+        pkt = Ether() / IPv6() / ICMPv6EchoRequest(id=1, seq=2)
+        with pytest.raises(ValueError, match="ICMPv6EchoRequest checksum"):
+            PacketTemplate(pkt, [field])
+
+    def test_packet_template__fields_outside_icmpv6(self):
+        template = PacketTemplate(
+            simple_icmpv6_packet(), [(Ether, "src"), (IPv6, "hlim")]
+        )
+        expected = simple_icmpv6_packet(eth_src="00:11:22:33:44:55", ipv6_hlim=7)
+        assert bytes(template.build("00:11:22:33:44:55", 7)) == bytes(expected)
+
+    def test_packet_template__gre_checksum_is_not_updated(self):
+        inner = simple_tcp_packet()[IP]
+        pkt = simple_gre_packet(gre_chksum_present=1, inner_frame=inner)
+        # the inner TCP checksum would be updated, but not the GRE one around it
+        for field in ((TCP, "sport"), (GRE, "key_present")):
+            with pytest.raises(ValueError, match="GRE"):
+                PacketTemplate(pkt, [field])
+        template = PacketTemplate(pkt, [(IP, "ttl")])
+        expected = simple_gre_packet(gre_chksum_present=1, inner_frame=inner, ip_ttl=9)
+        assert bytes(template.build(9)) == bytes(expected)
+        # without a GRE checksum the inner fields can be patched
+        template = PacketTemplate(
+            simple_gre_packet(inner_frame=inner), [(TCP, "sport")]
+        )
+        expected = simple_gre_packet(inner_frame=simple_tcp_packet(tcp_sport=7)[IP])
+        assert bytes(template.build(7)) == bytes(expected)
@@ -1,6 +1,99 @@
-from ptf.testutils import simple_igmp_packet
+import time
+
+import pytest
+
+import ptf
+import ptf.ptfutils
+from ptf.testutils import (
+    simple_igmp_packet,
+    verify_each_packet_on_each_port,
+    verify_packets,
+)
 
 
 def test_simple_igmp_packet__proper_setting_mrtime_mrcode():
     simple_packet = simple_igmp_packet(igmp_mrtime=10)
     assert simple_packet["IGMP"].mrcode == 10
+
+
+class FakeTest:
+    def __init__(self, dataplane):
+        self.dataplane = dataplane
+        self.received = []
+
+    def fail(self, msg):
+        raise AssertionError(msg)
+
+    def assertTrue(self, expr, msg=None):
+        assert expr, msg
+
+    def at_receive(self, pkt, device_number=0, port_number=-1):
+        self.received.append((device_number, port_number, pkt))
+
+
+@pytest.fixture
+def ptf_test(dataplane, monkeypatch):
+    num_ports = 32
+    monkeypatch.setitem(
+        ptf.config,
+        "port_map",
+        {(0, port): "mock%d" % port for port in range(num_ports)},
+    )
+    monkeypatch.setitem(ptf.config, "relax", False)
+    monkeypatch.setattr(ptf.ptfutils, "default_timeout", 2.0)
+    monkeypatch.setattr(ptf.ptfutils, "default_negative_timeout", 0.2)
+    for port in range(num_ports):
+        dataplane.port_add("mock%d" % port, 0, port)
+    return FakeTest(dataplane)
+
+
+def _inject(test, port, pkt):
+    test.dataplane.ports[(0, port)].inject(pkt)
+
+
+def test_verify_packets__negative_checks_share_one_deadline(ptf_test):
+    pkt = b"\x00\x01\x02\x03\x04\x05" * 10
+    _inject(ptf_test, 3, pkt)
+    _inject(ptf_test, 7, pkt)
+    start = time.time()
+    verify_packets(ptf_test, pkt, [3, 7])
+    # Checking 30 ports one after another would take 30 * 0.2s
+    assert time.time() - start < 1.0
+    assert sorted(port for _, port, _ in ptf_test.received) == [3, 7]
+
+
+def test_verify_packets__reports_every_violation(ptf_test):
+    pkt = b"\x00\x01\x02\x03\x04\x05" * 10
+    other_pkt = b"\x0a" * 60
+    _inject(ptf_test, 3, pkt)
+    _inject(ptf_test, 7, other_pkt)
+    _inject(ptf_test, 12, pkt)
+    _inject(ptf_test, 20, pkt)
+    with pytest.raises(AssertionError) as e:
+        verify_packets(ptf_test, pkt, [3, 7], n_timeout=0.2)
+    message = str(e.value)
+    assert "Expected packet was not received on device 0, port 7" in message
+    assert "expected not to receive on device 0, port 12" in message
+    assert "expected not to receive on device 0, port 20" in message
+
+
+def test_verify_packets__reports_other_packets(ptf_test):
+    pkt = b"\x00\x01\x02\x03\x04\x05" * 10
+    _inject(ptf_test, 3, pkt)
+    _inject(ptf_test, 3, b"\x0b" * 60)
+    with pytest.raises(AssertionError) as e:
+        verify_packets(ptf_test, pkt, [3])
+    assert "port 3, but we expected no packets" in str(e.value)
+
+
+def test_verify_each_packet_on_each_port__in_order(ptf_test):
+    pkts = [b"\x01" * 60, b"\x02" * 60, b"\x03" * 60]
+    for port, pkt in zip([5, 5, 9], pkts):
+        _inject(ptf_test, port, pkt)
+    start = time.time()
+    verify_each_packet_on_each_port(ptf_test, pkts, [5, 5, 9])
+    assert time.time() - start < 1.0
+
+    _inject(ptf_test, 5, pkts[1])
+    with pytest.raises(AssertionError):
+        verify_each_packet_on_each_port(ptf_test, pkts[:2], [5, 5], timeout=0.2)